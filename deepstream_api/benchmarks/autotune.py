@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Autotuner de parámetros del pipeline (modules/pipeline_autotuner.py)
+
+Barre el espacio de parámetros sobre un conjunto de clips, imprime el frente
+de Pareto (fps, latencia p95, acuerdo en cruces) y escribe los perfiles
+elegidos (tuned-throughput, tuned-latency, tuned-balanced) en un archivo que
+el runtime carga con `main.py --profiles-file`.
+
+Backends:
+- simulated (default): pipeline simulado sin GPU (benchmarks/autotune_sim.py);
+  clips = escenas generadas (--scenario) o grabadas (.npz)
+- deepstream: pipeline real por clip (modules/clip_backend.py); clips =
+  videos grabados con su línea (--clip nombre=video.mp4 --line x1,y1,x2,y2)
+
+Uso:
+    python3 benchmarks/autotune.py
+    python3 benchmarks/autotune.py --scenario dia --scenario hora_punta --max-trials 40
+    python3 benchmarks/autotune.py --space espacio.json --out /app/configs/tuned_profiles.json
+    python3 benchmarks/autotune.py --backend deepstream --clip entrada=/app/clips/entrada.mp4 \\
+        --line 960,0,960,1080 --max-trials 24
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+def parse_clip(value):
+    """'nombre=ruta' -> (nombre, ruta)"""
+    name, sep, path = value.partition('=')
+    if not sep or not name or not path:
+        raise argparse.ArgumentTypeError(f"se espera nombre=ruta: {value!r}")
+    return name, path
+
+
+def parse_line(value):
+    """'x1,y1,x2,y2' -> [x1, y1, x2, y2]"""
+    try:
+        coords = [float(v) for v in value.split(',')]
+    except ValueError:
+        coords = []
+    if len(coords) != 4:
+        raise argparse.ArgumentTypeError(f"se espera x1,y1,x2,y2: {value!r}")
+    return coords
+
+
+def build_simulated(args, autotuner):
+    from benchmarks.autotune_sim import SimulatedPipelineBackend
+    from benchmarks.bench_adaptive_interval import SCENARIOS
+
+    backend = SimulatedPipelineBackend(seed=args.seed)
+    clips = [backend.load_clip(path) for path in args.replay]
+    for name in args.scenario or ([] if clips else ['dia', 'hora_punta']):
+        clips.append(backend.generate_clip(name, SCENARIOS[name], seed=args.seed))
+    return backend, clips
+
+
+def build_deepstream(args, autotuner):
+    import gi
+    gi.require_version('Gst', '1.0')
+    from gi.repository import Gst
+    from modules.clip_backend import DeepStreamClipBackend
+
+    if not args.clip or not args.line:
+        raise SystemExit("--backend deepstream requiere --clip nombre=video y --line x1,y1,x2,y2")
+    Gst.init(None)
+    x1, y1, x2, y2 = args.line
+    line_config = {'start': [x1, y1], 'end': [x2, y2], 'direccion_entrada': args.entry}
+    clips = [autotuner.Clip(name=name, uri=f"file://{os.path.abspath(path)}", line_config=line_config)
+             for name, path in args.clip]
+    return DeepStreamClipBackend(args.infer_config), clips
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Autotuner de parámetros del pipeline')
+    parser.add_argument('--backend', choices=['simulated', 'deepstream'], default='simulated')
+    parser.add_argument('--space', help='Espacio de parámetros (JSON {"parametro": [valores]}); '
+                                        'default: DEFAULT_SPACE')
+    parser.add_argument('--max-trials', type=int, help='Muestra aleatoria del espacio (default: rejilla completa)')
+    parser.add_argument('--repeats', type=int, default=1, help='Ejecuciones por clip y punto')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--base-profile', default='headless',
+                        help='Perfil sobre el que se aplican los parámetros (default: headless)')
+    parser.add_argument('--min-agreement', type=float, default=0.95,
+                        help='Acuerdo mínimo en cruces para entrar en el frente (default: 0.95)')
+    parser.add_argument('--out', default='tuned_profiles.json', help='Archivo de perfiles a escribir')
+    parser.add_argument('--prefix', default='tuned', help='Prefijo de los perfiles escritos')
+    # simulated
+    parser.add_argument('--scenario', action='append', default=[],
+                        help='Escena generada (repetible; default: dia y hora_punta)')
+    parser.add_argument('--replay', action='append', default=[], help='Escena grabada .npz (repetible)')
+    # deepstream
+    parser.add_argument('--clip', type=parse_clip, action='append', default=[], metavar='NOMBRE=VIDEO')
+    parser.add_argument('--line', type=parse_line, help='Línea de conteo de los clips: x1,y1,x2,y2 (1920x1080)')
+    parser.add_argument('--entry', default='izquierda', help='Dirección de entrada de la línea')
+    parser.add_argument('--infer-config', default='/app/configs/deepstream/config_infer_primary_yolo11x_b1.txt')
+    args = parser.parse_args()
+
+    # Los logs del probe (cruces, estado) no interesan aquí
+    logging.basicConfig(level=logging.WARNING)
+    if args.backend == 'simulated':
+        logging.disable(logging.WARNING)
+    autotuner = load_probe_module('pipeline_autotuner')
+    space = (autotuner.ParameterSpace.from_file(args.space) if args.space
+             else autotuner.ParameterSpace(autotuner.DEFAULT_SPACE))
+
+    build = build_simulated if args.backend == 'simulated' else build_deepstream
+    backend, clips = build(args, autotuner)
+
+    tuner = autotuner.PipelineAutotuner(backend, clips, space, base_profile=args.base_profile,
+                                        min_agreement=args.min_agreement, max_trials=args.max_trials,
+                                        repeats=args.repeats, seed=args.seed)
+    trials = min(space.size, args.max_trials or space.size)
+    print(f"🔧 {trials} de {space.size} puntos x {len(clips)} clips ({backend.name})")
+    for clip in clips:
+        expected = f" esperados E:{clip.expected['entradas']} S:{clip.expected['salidas']}" if clip.expected else ""
+        print(f"   🎬 {clip.name}{expected}")
+    print()
+
+    def progress(index, total, result):
+        print(f"\r   {index}/{total}", end='', flush=True)
+
+    report = tuner.run(on_trial=progress)
+    print(f"\r   {len(report.results)} puntos en {report.elapsed_s:.1f}s\n")
+
+    names = list(space.axes)
+    header = ' '.join(f"{name:>14}" for name in names)
+    print(f"Frente de Pareto ({len(report.front)} puntos, acuerdo >= {args.min_agreement:.2f})")
+    print(f"{header} {'fps':>8} {'p50 ms':>8} {'p95 ms':>8} {'acuerdo':>8}")
+    for result in report.front:
+        values = ' '.join(f"{str(result.params[name]):>14}" for name in names)
+        print(f"{values} {result.fps:>8.1f} {result.latency_p50_ms:>8.1f} "
+              f"{result.latency_p95_ms:>8.1f} {result.agreement:>8.1%}")
+
+    profiles = report.write_profiles(args.out, prefix=args.prefix)
+    print(f"\n💾 Perfiles escritos en {args.out}:")
+    for name, entry in profiles.items():
+        print(f"   {name}: {json.dumps(entry)}")
+    print(f"\n   python3 main.py --profiles-file {args.out} --profile {args.prefix}-balanced")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
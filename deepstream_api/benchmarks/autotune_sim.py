@@ -0,0 +1,277 @@
+"""
+Pipeline simulado para el autotuner (sin GPU)
+
+SimulatedPipelineBackend ejecuta un clip (escena de bench_adaptive_interval,
+generada o .npz grabado) con un CameraProfile:
+
+- Conteo: el probe real (LineCrossingCounter) recibe los tracks de un tracker
+  simulado que depende del perfil
+  - nvstreammux: a menor resolución, personas más pequeñas (más detecciones
+    perdidas) y más ruido de posición
+  - interval: nvinfer salta batches enteros (batch_size frames por batch)
+  - NvDCF: sigue visualmente entre inferencias (ruido y pérdidas según la
+    resolución del tracker); IOU: repite la última caja y reasocia por IoU
+- Tiempo: modelo de coste por etapa (CostModel) con formación de batches en
+  nvstreammux a la cadencia de una cámara en vivo (latencia) y a máxima
+  velocidad (throughput del clip)
+
+Determinista: la semilla sale del clip y del perfil
+"""
+import os
+import sys
+import zlib
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_meta import (BatchMeta, FrameMeta, ObjectMeta, RectParams, PERSON_CLASS_ID,
+                                       install_pyservicemaker_standin, load_probe_module)
+from benchmarks.bench_adaptive_interval import generate_scene, split_frames
+
+
+# Caja de una persona en la escena (espacio 1920x1080)
+BOX_W = 40.0
+BOX_H = 120.0
+
+
+@dataclass
+class CostModel:
+    """
+    Costes por etapa en ms (orden de magnitud de YOLO11x en una GPU de datacenter)
+
+    Escalan con la resolución de nvstreammux (pixeles / 1080p) y del tracker
+    (pixeles / 960x544)
+    """
+    decode_frame_ms: float = 1.2          # nvv4l2decoder (en paralelo con la GPU)
+    mux_frame_ms: float = 0.35            # escalado + conversión en nvstreammux a 1080p
+    infer_batch_ms: float = 3.0           # coste fijo por batch inferido
+    infer_frame_ms: float = 7.0           # coste por frame inferido (entrada de red fija)
+    nvdcf_frame_ms: float = 0.9           # NvDCF a 960x544
+    nvdcf_object_ms: float = 0.06
+    iou_frame_ms: float = 0.05
+    iou_object_ms: float = 0.004
+    default_push_timeout_us: int = 40000  # batched-push-timeout si el perfil no lo fija
+
+
+class _TrackerModel:
+    """
+    Tracker simulado: asocia detecciones (por persona real) a tracks con ID
+
+    Un ID nuevo para una persona ya seguida es un cambio de ID: el probe la
+    ve por primera vez y no puede contar un cruce en ese frame
+    """
+
+    IOU_THRESHOLD = 0.3
+    IOU_MAX_MISSES = 2          # inferencias sin asociar antes de borrar el track
+    NVDCF_SHADOW_FRAMES = 30    # frames siguiendo sin detección
+
+    def __init__(self, profile, rng):
+        self.rng = rng
+        self.nvdcf = 'NvDCF' in profile.tracker_label
+        mux_w, mux_h = profile.mux_size()
+        self.mux_scale = mux_h / 1080.0
+        tracker_h = profile.tracker_height or 544
+        self.tracker_scale = tracker_h / 544.0
+        # Detector: personas de menos pixeles se pierden más
+        person_px = BOX_H * self.mux_scale
+        self.p_detect = 1.0 - math.exp(-(person_px - 20.0) / 15.0)
+        self.det_sigma = 1.0 / self.mux_scale
+        # NvDCF entre inferencias: ruido y pérdida según la resolución del tracker
+        self.cf_sigma = 1.5 / self.tracker_scale
+        self.p_lost = 0.0015 / self.tracker_scale ** 2
+        self.tracks = {}        # persona -> [track_id, x, y, misses, shadow]
+        self.next_id = 1
+
+    def _new_track(self, person, x, y):
+        self.tracks[person] = [self.next_id, x, y, 0, 0]
+        self.next_id += 1
+
+    @staticmethod
+    def _iou_shift(dx, dy):
+        """IoU de dos cajas iguales desplazadas (dx, dy)"""
+        ix = max(0.0, BOX_W - abs(dx))
+        iy = max(0.0, BOX_H - abs(dy))
+        inter = ix * iy
+        return inter / (2 * BOX_W * BOX_H - inter)
+
+    def step(self, ids, xy, inferred):
+        """Tracks reportados en el frame: lista de (track_id, x, y) en espacio 1080p"""
+        rng = self.rng
+        present = dict(zip(ids.tolist(), map(tuple, xy.tolist())))
+        for person in [p for p in self.tracks if p not in present]:
+            del self.tracks[person]
+
+        if inferred:
+            # Un sorteo por frame para todas las personas
+            detected = rng.random(len(present)) < self.p_detect
+            noise = rng.normal(0.0, self.det_sigma, (len(present), 2))
+            for (person, (x, y)), hit, (dx, dy) in zip(present.items(), detected.tolist(), noise.tolist()):
+                track = self.tracks.get(person)
+                if not hit:
+                    if track is not None:
+                        track[3] += 1
+                        if not self.nvdcf and track[3] > self.IOU_MAX_MISSES:
+                            del self.tracks[person]
+                    continue
+                x, y = x + dx, y + dy
+                if track is None:
+                    self._new_track(person, x, y)
+                elif not self.nvdcf and self._iou_shift(x - track[1], y - track[2]) < self.IOU_THRESHOLD:
+                    self._new_track(person, x, y)     # la caja se movió demasiado: ID nuevo
+                else:
+                    track[1:] = [x, y, 0, 0]
+        elif self.nvdcf:
+            lost = rng.random(len(present)) < self.p_lost
+            noise = rng.normal(0.0, self.cf_sigma, (len(present), 2))
+            for (person, (x, y)), drop, (dx, dy) in zip(present.items(), lost.tolist(), noise.tolist()):
+                track = self.tracks.get(person)
+                if track is None:
+                    continue
+                track[4] += 1
+                if drop or track[4] > self.NVDCF_SHADOW_FRAMES:
+                    del self.tracks[person]
+                    continue
+                track[1], track[2] = x + dx, y + dy
+        # IOU sin inferencia: repite la última caja
+
+        return [(track[0], track[1], track[2]) for track in self.tracks.values()]
+
+
+class SimulatedPipelineBackend:
+    """Backend del autotuner sin GPU: escenas en memoria, conteo con el probe real"""
+
+    name = "simulated"
+
+    def __init__(self, cost_model=None, seed=0):
+        install_pyservicemaker_standin()
+        self.probe_module = load_probe_module('deepstream_camera_sm')
+        self.autotuner = load_probe_module('pipeline_autotuner')
+        self.cost = cost_model or CostModel()
+        self.seed = seed
+        self._scenes = {}       # nombre -> (frames, line_config)
+
+    # ------------------------------------------------------------------
+    # Clips
+    # ------------------------------------------------------------------
+
+    def add_scene(self, name, scene, fps=30.0):
+        """
+        Registra una escena y devuelve su Clip
+
+        Los cruces esperados son los de las trayectorias reales (IDs perfectos)
+        """
+        frames = split_frames(scene)
+        x1, y1, x2, y2 = scene['line'].tolist()
+        line_config = {'start': [x1, y1], 'end': [x2, y2], 'direccion_entrada': 'izquierda'}
+        self._scenes[name] = (frames, line_config)
+        counter = self._counter(line_config)
+        for frame_number, (ids, xy) in enumerate(frames):
+            self._feed(counter, frame_number, zip(ids.tolist(), xy[:, 0].tolist(), xy[:, 1].tolist()), 1.0)
+        expected = {'entradas': counter.contadores['entradas'], 'salidas': counter.contadores['salidas']}
+        return self.autotuner.Clip(name=name, uri=f"sim://{name}", line_config=line_config,
+                                   expected=expected, fps=fps)
+
+    def generate_clip(self, name, schedule, seed=0, fps=30.0):
+        """Clip con una escena generada (ver bench_adaptive_interval.SCENARIOS)"""
+        return self.add_scene(name, generate_scene(schedule, seed=seed), fps)
+
+    def load_clip(self, path, fps=30.0):
+        """Clip con una escena grabada (.npz de bench_adaptive_interval --save)"""
+        name = os.path.splitext(os.path.basename(path))[0]
+        return self.add_scene(name, dict(np.load(path)), fps)
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+
+    def _counter(self, line_config):
+        return self.probe_module.LineCrossingCounter(0, 'autotune-sim', line_config, draw_overlays=False,
+                                                     status_every=10 ** 9)
+
+    @staticmethod
+    def _feed(counter, frame_number, tracks, scale):
+        objects = [ObjectMeta(PERSON_CLASS_ID, track_id,
+                              RectParams((x - BOX_W / 2) * scale, (y - BOX_H / 2) * scale,
+                                         BOX_W * scale, BOX_H * scale))
+                   for track_id, x, y in tracks]
+        counter.handle_metadata(BatchMeta([FrameMeta(0, frame_number, objects)]))
+        return len(objects)
+
+    def run_clip(self, clip, profile):
+        frames, line_config = self._scenes[clip.name]
+        rng = np.random.default_rng(self.seed + zlib.crc32(f"{clip.name}|{profile}".encode()))
+        batch_size = profile.batch_size or 1
+        interval = profile.infer_interval or 0
+        tracker = _TrackerModel(profile, rng)
+        scale = tracker.mux_scale
+
+        counter = self._counter(profile.scale_line(line_config))
+        objects = np.zeros(len(frames))
+        for frame_number, (ids, xy) in enumerate(frames):
+            # nvinfer salta batches completos: interval cuenta batches
+            inferred = (frame_number // batch_size) % (interval + 1) == 0
+            tracks = tracker.step(ids, xy, inferred)
+            objects[frame_number] = self._feed(counter, frame_number, tracks, scale)
+
+        elapsed_s, latencies = self._timing(profile, objects, clip.fps)
+        return self.autotuner.ClipRun(frames=len(frames), elapsed_s=elapsed_s, latencies_ms=latencies,
+                                      entradas=counter.contadores['entradas'],
+                                      salidas=counter.contadores['salidas'])
+
+    def _timing(self, profile, objects, fps):
+        """
+        Tiempo del clip a máxima velocidad y latencia por frame en vivo
+
+        Returns:
+            (segundos a máxima velocidad, latencias en ms)
+        """
+        cost = self.cost
+        frames = len(objects)
+        batch_size = profile.batch_size or 1
+        interval = profile.infer_interval or 0
+        mux_w, mux_h = profile.mux_size()
+        mux_ms = cost.mux_frame_ms * (mux_w * mux_h) / (1920 * 1080)
+        if 'NvDCF' in profile.tracker_label:
+            tracker_px = (profile.tracker_width or 960) * (profile.tracker_height or 544) / (960 * 544)
+            track_frame, track_object = cost.nvdcf_frame_ms * tracker_px, cost.nvdcf_object_ms * tracker_px
+        else:
+            track_frame, track_object = cost.iou_frame_ms, cost.iou_object_ms
+
+        def service(batch_index, start, size):
+            """Coste de GPU de un batch"""
+            ms = size * (mux_ms + track_frame) + objects[start:start + size].sum() * track_object
+            if batch_index % (interval + 1) == 0:
+                ms += cost.infer_batch_ms + size * cost.infer_frame_ms
+            return ms
+
+        # Máxima velocidad: batches llenos; el decoder va en paralelo con la GPU
+        gpu_ms = sum(service(index, start, min(batch_size, frames - start))
+                      for index, start in enumerate(range(0, frames, batch_size)))
+        elapsed_s = max(gpu_ms, frames * cost.decode_frame_ms) / 1000.0
+
+        # En vivo: un frame cada 1/fps; el batch sale lleno o al vencer el
+        # timeout contado desde su primer frame
+        period = 1000.0 / fps
+        timeout = (profile.batched_push_timeout_us or cost.default_push_timeout_us) / 1000.0
+        latencies = np.empty(frames)
+        gpu_free = 0.0
+        start = 0
+        batch_index = 0
+        while start < frames:
+            first = start * period + cost.decode_frame_ms
+            size = 1
+            while (size < batch_size and start + size < frames
+                   and (start + size) * period + cost.decode_frame_ms <= first + timeout):
+                size += 1
+            push = (start + size - 1) * period + cost.decode_frame_ms if size == batch_size else first + timeout
+            if start + size == frames:
+                push = (start + size - 1) * period + cost.decode_frame_ms
+            done = max(push, gpu_free) + service(batch_index, start, size)
+            gpu_free = done
+            latencies[start:start + size] = done - np.arange(start, start + size) * period
+            start += size
+            batch_index += 1
+        return elapsed_s, latencies.tolist()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark de interval adaptativo de nvinfer (sin GPU)
+
+Reproduce una escena (generada o grabada) a través del probe real
+(LineCrossingCounter) con un tracker simulado: en los frames inferidos el
+tracker recibe las detecciones; en los saltados reporta la posición predicha
+(última posición + velocidad), como hace nvtracker entre inferencias.
+
+Compara interval fijo 0 (referencia), fijo 2 (config actual), fijo N y el
+controlador adaptativo: cruces contados y fracción de frames inferidos.
+
+Escenas: las personas entran por los bordes y cruzan la línea (o caminan en
+paralelo, o se acercan y vuelven). Una escena grabada es un .npz con arrays
+frame, id, x, y (una fila por persona y frame) y width/height/line.
+
+Uso:
+    python3 benchmarks/bench_adaptive_interval.py
+    python3 benchmarks/bench_adaptive_interval.py --scenario noche --max-interval 12
+    python3 benchmarks/bench_adaptive_interval.py --save escena.npz
+    python3 benchmarks/bench_adaptive_interval.py --replay escena.npz
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_meta import (BatchMeta, FrameMeta, ObjectMeta, RectParams, PERSON_CLASS_ID,
+                                       install_pyservicemaker_standin, load_probe_module)
+
+
+FPS = 30
+
+# Llegadas por minuto en cada tramo: (segundos, llegadas/min)
+SCENARIOS = {
+    'noche': [(120, 0), (30, 2), (120, 0), (30, 4), (60, 0)],
+    'hora_punta': [(60, 60), (60, 120), (60, 90)],
+    'dia': [(60, 0), (45, 10), (60, 60), (30, 0), (45, 30), (60, 0)],
+}
+
+
+# ----------------------------------------------------------------------
+# Escena
+# ----------------------------------------------------------------------
+
+def generate_scene(schedule, width=1920, height=1080, seed=0, crossing_rate=0.6, turn_rate=0.15,
+                   jitter=0.4):
+    """
+    Genera trayectorias de personas que entran por los bordes
+
+    - crossers: entran por izquierda/derecha y atraviesan la línea central
+    - turners: se acercan a la línea y vuelven sin cruzarla
+    - resto: caminan de arriba a abajo lejos de la línea
+    - la velocidad de cada persona deriva (ruido `jitter` px/frame alrededor
+      de su velocidad de crucero), así la predicción del tracker se equivoca
+
+    Returns:
+        dict con arrays frame, id, x, y y la geometría de la escena
+    """
+    rng = np.random.default_rng(seed)
+    line_x = width / 2
+    people = {}   # id -> [x, y, vx, vy, turn_at, cruise_vx, cruise_vy]
+    next_id = 1
+    rows = []
+
+    frame = 0
+    for seconds, per_minute in schedule:
+        for _ in range(int(seconds * FPS)):
+            for _ in range(rng.poisson(per_minute / 60.0 / FPS)):
+                speed = rng.uniform(2.0, 7.0)
+                kind = rng.random()
+                y = rng.uniform(0.1, 0.9) * height
+                if kind < crossing_rate + turn_rate:
+                    from_left = rng.random() < 0.5
+                    x = 0.0 if from_left else float(width)
+                    vx = speed if from_left else -speed
+                    turn_at = (line_x - rng.uniform(30, 200) * np.sign(vx)) if kind >= crossing_rate else None
+                    people[next_id] = [x, y, vx, 0.0, turn_at, vx, 0.0]
+                else:
+                    side = rng.choice([rng.uniform(0, line_x - 400), rng.uniform(line_x + 400, width)])
+                    people[next_id] = [side, 0.0, 0.0, speed, None, 0.0, speed]
+                next_id += 1
+
+            for person_id in list(people):
+                p = people[person_id]
+                p[2] += 0.2 * (p[5] - p[2]) + rng.normal(0, jitter)
+                p[3] += 0.2 * (p[6] - p[3]) + rng.normal(0, jitter)
+                p[0] += p[2]
+                p[1] += p[3]
+                if p[4] is not None and (p[0] - p[4]) * np.sign(p[2]) >= 0:
+                    p[2], p[4], p[5] = -p[2], None, -p[5]
+                if not (0 <= p[0] <= width and 0 <= p[1] <= height):
+                    del people[person_id]
+                    continue
+                rows.append((frame, person_id, p[0], p[1]))
+            frame += 1
+
+    data = np.array(rows, dtype=np.float64).reshape(-1, 4)
+    return {
+        'frame': data[:, 0].astype(np.int64), 'id': data[:, 1].astype(np.int64),
+        'x': data[:, 2], 'y': data[:, 3], 'frames': np.int64(frame),
+        'width': np.int64(width), 'height': np.int64(height),
+        'line': np.array([line_x, 0, line_x, height], dtype=np.float64),
+    }
+
+
+def split_frames(scene):
+    """Lista por frame de (ids, posiciones (N, 2))"""
+    frames = int(scene['frames'])
+    order = np.argsort(scene['frame'], kind='stable')
+    frame_idx = scene['frame'][order]
+    bounds = np.searchsorted(frame_idx, np.arange(frames + 1))
+    ids, xy = scene['id'][order], np.column_stack((scene['x'][order], scene['y'][order]))
+    return [(ids[bounds[i]:bounds[i + 1]], xy[bounds[i]:bounds[i + 1]]) for i in range(frames)]
+
+
+# ----------------------------------------------------------------------
+# Tracker simulado
+# ----------------------------------------------------------------------
+
+class SimulatedTracker:
+    """Con inferencia: detecciones reales. Sin inferencia: predicción lineal"""
+
+    def __init__(self):
+        self.tracks = {}      # id -> (x, y) reportada
+        self._detected = {}   # id -> (x, y, vx, vy, frames desde la detección)
+
+    def step(self, ids, xy, inferred):
+        if inferred:
+            detected = {}
+            for object_id, (x, y) in zip(ids.tolist(), xy.tolist()):
+                prev = self._detected.get(object_id)
+                if prev is None:
+                    detected[object_id] = (x, y, 0.0, 0.0, 0)
+                else:
+                    px, py, _, _, age = prev
+                    age += 1
+                    detected[object_id] = (x, y, (x - px) / age, (y - py) / age, 0)
+            self._detected = detected
+        else:
+            self._detected = {object_id: (x, y, vx, vy, age + 1)
+                              for object_id, (x, y, vx, vy, age) in self._detected.items()}
+        self.tracks = {object_id: (x + vx * age, y + vy * age)
+                       for object_id, (x, y, vx, vy, age) in self._detected.items()}
+        return self.tracks
+
+
+def run_mode(module, controller_module, frames, line_config, interval=None, controller_options=None):
+    """
+    Ejecuta la escena con interval fijo (interval) o adaptativo (controller_options)
+
+    Returns:
+        (contadores, frames inferidos, stats del controlador o None)
+    """
+    state = {'interval': interval or 0}
+    controller = None
+    if controller_options is not None:
+        controller = controller_module.AdaptiveInferenceInterval(
+            on_change=lambda value: state.__setitem__('interval', value), **controller_options)
+
+    counter = module.LineCrossingCounter(0, 'bench', line_config, draw_overlays=False,
+                                         interval_controller=controller)
+    tracker = SimulatedTracker()
+    since_inference = None
+    inferred_frames = 0
+
+    for frame_number, (ids, xy) in enumerate(frames):
+        inferred = since_inference is None or since_inference >= state['interval']
+        if inferred:
+            since_inference = 0
+            inferred_frames += 1
+        else:
+            since_inference += 1
+
+        tracks = tracker.step(ids, xy, inferred)
+        objects = [ObjectMeta(PERSON_CLASS_ID, object_id, RectParams(x - 20.0, y - 60.0, 40.0, 120.0))
+                   for object_id, (x, y) in tracks.items()]
+        counter.handle_metadata(BatchMeta([FrameMeta(0, frame_number, objects)]))
+
+    return dict(counter.contadores), inferred_frames, controller.stats() if controller else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de interval adaptativo (sin GPU)')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='dia')
+    parser.add_argument('--replay', help='Escena grabada (.npz)')
+    parser.add_argument('--save', help='Guardar la escena generada (.npz)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-interval', type=int, default=2)
+    parser.add_argument('--max-interval', type=int, default=8)
+    parser.add_argument('--near-px', type=float, default=120.0)
+    args = parser.parse_args()
+
+    # Los logs del probe (cruces, estado) no interesan aquí
+    logging.disable(logging.WARNING)
+    install_pyservicemaker_standin()
+    module = load_probe_module('deepstream_camera_sm')
+    controller_module = load_probe_module('inference_interval')
+
+    if args.replay:
+        scene = dict(np.load(args.replay))
+        name = os.path.basename(args.replay)
+    else:
+        scene = generate_scene(SCENARIOS[args.scenario], seed=args.seed)
+        name = args.scenario
+    if args.save:
+        np.savez_compressed(args.save, **scene)
+        print(f"💾 Escena guardada en {args.save}")
+
+    frames = split_frames(scene)
+    x1, y1, x2, y2 = scene['line'].tolist()
+    line_config = {'start': [x1, y1], 'end': [x2, y2], 'direccion_entrada': 'izquierda'}
+    people = len(np.unique(scene['id']))
+    print(f"🎬 Escena '{name}': {len(frames)} frames ({len(frames) / FPS:.0f}s a {FPS} fps), "
+          f"{people} personas\n")
+
+    modes = [('fijo 0', {'interval': 0}), ('fijo 2 (config)', {'interval': 2}),
+             (f'fijo {args.max_interval}', {'interval': args.max_interval}),
+             ('adaptativo', {'controller_options': {'min_interval': args.min_interval,
+                                                    'max_interval': args.max_interval,
+                                                    'near_px': args.near_px}})]
+
+    reference = None
+    print(f"{'Modo':<18} {'Entradas':>9} {'Salidas':>8} {'Δ vs fijo 0':>12} {'Inferidos':>10} "
+          f"{'Ahorro':>7} {'ms':>7}")
+    for label, options in modes:
+        t0 = time.perf_counter()
+        counts, inferred, stats = run_mode(module, controller_module, frames, line_config, **options)
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        if reference is None:
+            reference = counts
+        delta = abs(counts['entradas'] - reference['entradas']) + abs(counts['salidas'] - reference['salidas'])
+        print(f"{label:<18} {counts['entradas']:>9} {counts['salidas']:>8} {delta:>12} "
+              f"{inferred / len(frames):>9.1%} {1 - inferred / len(frames):>7.1%} {elapsed_ms:>7.0f}")
+        if stats:
+            print(f"{'':<18} estimado por el controlador: ahorro {stats['infer_saved_pct']:.1f}% "
+                  f"vs todos los frames, {stats['infer_saved_vs_fixed_pct']:.1f}% vs interval 2 "
+                  f"({stats['infer_changes']} cambios de interval)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
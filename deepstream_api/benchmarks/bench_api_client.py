@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark de CameraAPIClient contra el servidor stub (sin backend real)
+
+Escenarios:
+- sana: primera descarga y consultas repetidas (deben ser 304)
+- latencia: API lenta (--latency-ms)
+- caída con caché: la API no responde; get_cameras() cae a la última lista válida
+- arranque en frío: prefer_cache=True con la API caída (tiempo hasta tener cámaras)
+- caída sin caché: tiempo hasta fallar tras los reintentos
+- recuperación: refresco en segundo plano detecta el cambio al volver la API
+
+Uso:
+    python3 benchmarks/bench_api_client.py
+    python3 benchmarks/bench_api_client.py --latency-ms 300 --outage reset --cameras 16
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_api_server import StubAPIServer, DEFAULT_CAMERAS, OUTAGE_MODES
+from benchmarks.synthetic_meta import load_probe_module
+
+
+def make_cameras(count):
+    base = DEFAULT_CAMERAS[0]
+    return [dict(base, id=i, cam_nombre=f"Stub {i}") for i in range(1, count + 1)]
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    try:
+        result = fn()
+        error = None
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}"
+    return (time.perf_counter() - t0) * 1000.0, result, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de CameraAPIClient con el stub')
+    parser.add_argument('--cameras', type=int, default=16, help='Cámaras servidas por el stub')
+    parser.add_argument('--requests', type=int, default=20, help='Consultas repetidas en el escenario sano')
+    parser.add_argument('--latency-ms', type=float, default=200.0, help='Latencia del escenario lento')
+    parser.add_argument('--outage', choices=[m for m in OUTAGE_MODES if m], default='503')
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--json', help='Guardar resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    api_client = load_probe_module('api_client')
+    cache_dir = tempfile.mkdtemp(prefix='api_cache_')
+    cache_path = os.path.join(cache_dir, 'camaras.json')
+
+    server = StubAPIServer(cameras=make_cameras(args.cameras)).start()
+
+    def client(**kwargs):
+        return api_client.CameraAPIClient(server.url, timeout=(1.0, 2.0), max_retries=args.max_retries,
+                                          backoff_base=0.2, backoff_max=1.0, cache_path=cache_path, **kwargs)
+
+    results = {'params': vars(args)}
+    try:
+        # Sana: 1 descarga + N consultas condicionales
+        c = client()
+        first_ms, cameras, _ = timed(c.get_cameras)
+        repeat = [timed(c.fetch)[0] for _ in range(args.requests)]
+        results['sana'] = {
+            'first_ms': first_ms,
+            'repeat_ms_avg': sum(repeat) / len(repeat),
+            'not_modified': server.camaras_not_modified,
+            'downloaded': c.get_stats()['downloaded'],
+            'cameras': len(cameras or []),
+        }
+        c.stop()
+
+        # Latencia
+        server.latency_ms = args.latency_ms
+        c = client(); c.load_cache()
+        lat_ms, _, _ = timed(c.fetch)
+        results['latencia'] = {'fetch_ms': lat_ms}
+        server.latency_ms = 0.0
+        c.stop()
+
+        # Caída con caché en disco (proceso nuevo: solo la copia en disco)
+        server.outage = args.outage
+        c = client()
+        down_ms, cameras, error = timed(c.get_cameras)
+        results['caida_con_cache'] = {'ms': down_ms, 'cameras': len(cameras or []), 'error': error,
+                                      'retries': c.get_stats()['retries']}
+        c.stop()
+
+        # Arranque en frío con la API caída
+        c = client()
+        cold_ms, cameras, error = timed(lambda: c.get_cameras(prefer_cache=True))
+        results['arranque_en_frio'] = {'ms': cold_ms, 'cameras': len(cameras or []), 'error': error}
+        c.stop()
+
+        # Caída sin caché
+        c = api_client.CameraAPIClient(server.url, timeout=(1.0, 2.0), max_retries=args.max_retries,
+                                       backoff_base=0.2, backoff_max=1.0, cache_path=None)
+        fail_ms, _, error = timed(c.get_cameras)
+        results['caida_sin_cache'] = {'ms': fail_ms, 'error': error}
+        c.stop()
+
+        # Recuperación: la API vuelve con una cámara nueva
+        updated = threading.Event()
+        c = client()
+        c.get_cameras(prefer_cache=True)
+        t0 = time.perf_counter()
+        c.start_background_refresh(interval=0.5, on_update=lambda cams: updated.set())
+        time.sleep(1.0)
+        server.set_cameras(make_cameras(args.cameras + 1))
+        server.outage = None
+        recovered = updated.wait(timeout=15.0)
+        results['recuperacion'] = {'detected': recovered,
+                                   'ms_since_start': (time.perf_counter() - t0) * 1000.0}
+        c.stop()
+    finally:
+        server.outage = None
+        server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"\n{'='*70}")
+    print(f"📊 CameraAPIClient vs stub ({args.cameras} cámaras, caída '{args.outage}')")
+    print(f"{'='*70}")
+    sana = results['sana']
+    print(f"Sana:              1ª consulta {sana['first_ms']:.1f} ms | repetidas {sana['repeat_ms_avg']:.1f} ms "
+          f"| 304: {sana['not_modified']}/{args.requests} | descargas: {sana['downloaded']}")
+    print(f"Latencia {args.latency_ms:.0f} ms:    {results['latencia']['fetch_ms']:.1f} ms")
+    r = results['caida_con_cache']
+    print(f"Caída con caché:   {r['ms']:.0f} ms -> {r['cameras']} cámaras ({r['retries']} reintentos)")
+    r = results['arranque_en_frio']
+    print(f"Arranque en frío:  {r['ms']:.1f} ms -> {r['cameras']} cámaras")
+    r = results['caida_sin_cache']
+    print(f"Caída sin caché:   {r['ms']:.0f} ms -> {r['error']}")
+    r = results['recuperacion']
+    print(f"Recuperación:      {'detectada' if r['detected'] else 'NO detectada'} "
+          f"({r['ms_since_start']:.0f} ms desde el arranque)")
+    print(f"{'='*70}\n")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline de CrossingEventPublisher contra el stub local de la API
+
+Mide:
+- Coste de publish() en el thread del probe (ns/evento)
+- Throughput de envío (eventos/s)
+- Latencia extremo a extremo (publish -> recepción en el servidor)
+- Descartes por cola llena (backpressure)
+
+Uso:
+    python3 benchmarks/bench_event_publisher.py
+    python3 benchmarks/bench_event_publisher.py --events 100000 --producers 16 --latency-ms 30
+    python3 benchmarks/bench_event_publisher.py --fail-rate 0.2 --max-queue 1000
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_api_server import StubAPIServer
+from benchmarks.synthetic_meta import load_probe_module
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def producer(publisher, camera_id, count, rate, publish_ns, codes):
+    """Simula el probe de una cámara publicando cruces (codes: entrada, salida)"""
+    interval = 1.0 / rate if rate > 0 else 0.0
+    next_t = time.perf_counter()
+    total_ns = 0
+    for i in range(count):
+        code = codes[i % 2]
+        t0 = time.perf_counter_ns()
+        publisher.publish(camera_id, i, code, i, i, 0)
+        total_ns += time.perf_counter_ns() - t0
+        if interval:
+            next_t += interval
+            sleep = next_t - time.perf_counter()
+            if sleep > 0:
+                time.sleep(sleep)
+    publish_ns.append(total_ns / max(1, count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del publicador de eventos')
+    parser.add_argument('--events', type=int, default=20000, help='Eventos totales')
+    parser.add_argument('--producers', type=int, default=8, help='Threads productores (cámaras)')
+    parser.add_argument('--rate', type=float, default=0.0, help='Eventos/s por productor (0 = sin límite)')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Latencia simulada del servidor')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Probabilidad de 503 en el servidor')
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--flush-interval', type=float, default=0.5)
+    parser.add_argument('--max-queue', type=int, default=10000)
+    args = parser.parse_args()
+
+    event_publisher = load_probe_module('event_publisher')
+    detector = load_probe_module('line_crossing_detector')
+    codes = (detector.CRUCE_ENTRADA, detector.CRUCE_SALIDA)
+
+    server = StubAPIServer(latency_ms=args.latency_ms, fail_rate=args.fail_rate).start()
+    publisher = event_publisher.CrossingEventPublisher(
+        server.url,
+        max_queue=args.max_queue,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        retry_backoff=0.05
+    )
+    publisher.start()
+
+    per_producer = args.events // args.producers
+    publish_ns = []
+    threads = [
+        threading.Thread(target=producer, args=(publisher, cam, per_producer, args.rate, publish_ns, codes))
+        for cam in range(1, args.producers + 1)
+    ]
+
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    produce_s = time.perf_counter() - t0
+
+    publisher.stop(timeout=60)
+    total_s = time.perf_counter() - t0
+    server.stop()
+
+    stats = publisher.get_stats()
+    latencies_ms = [(received - evento['ts']) * 1000.0 for received, evento in server.events]
+
+    print(f"\n{'='*70}")
+    print("📊 RESULTADOS PUBLICADOR DE EVENTOS")
+    print(f"{'='*70}")
+    print(f"Eventos publicados:     {per_producer * args.producers} ({args.producers} productores)")
+    print(f"Coste publish():        {sum(publish_ns) / max(1, len(publish_ns)):.0f} ns/evento")
+    print(f"Tiempo de producción:   {produce_s:.2f} s")
+    print(f"Tiempo total (drenado): {total_s:.2f} s")
+    print(f"Recibidos por servidor: {len(server.events)} en {server.requests_count} peticiones")
+    print(f"Throughput envío:       {len(server.events) / total_s:.0f} eventos/s")
+    print(f"Latencia p50/p95/p99:   {percentile(latencies_ms, 50):.1f} / "
+          f"{percentile(latencies_ms, 95):.1f} / {percentile(latencies_ms, 99):.1f} ms")
+    print(f"Descartados (cola):     {stats['dropped']}")
+    print(f"Fallidos (tras reint.): {stats['failed']} | Reintentos: {stats['retries']}")
+    print(f"{'='*70}\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark del probe de conteo con metadatos sintéticos (solo CPU)
+
+Mide, para cada perfil de cámara (modules/camera_profiles.py):
+- ns/frame y ns/objeto de handle_metadata
+- ns/frame de process_detections (sin recolección de metadatos ni overlay)
+- Memoria transitoria por frame (pico tracemalloc) y bloques retenidos
+- Detector: punto_cruza_linea por objeto vs cruces_batch por frame
+
+No requiere GPU, DeepStream ni cámaras: usa los sustitutos de
+benchmarks/synthetic_meta.py si pyservicemaker no está instalado.
+
+Uso:
+    python3 benchmarks/bench_probe.py
+    python3 benchmarks/bench_probe.py --density 80 --churn 0.05 --crossing-rate 0.5
+    python3 benchmarks/bench_probe.py --variant headless --frames 5000 --json
+"""
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+import contextlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_meta import CrowdGenerator, install_pyservicemaker_standin, load_probe_module
+
+
+def profile_variants():
+    """variante -> CameraProfile (perfiles registrados + low-latency sin display)"""
+    profiles = load_probe_module('camera_profiles')
+    variants = dict(profiles.PROFILES)
+    headless_ll = profiles.resolve_profile('low-latency', headless=True)
+    variants[headless_ll.name] = headless_ll
+    return variants
+
+
+VARIANTS = profile_variants()
+
+
+def make_counter(variant, line_config):
+    profile = VARIANTS[variant]
+    module = load_probe_module('deepstream_camera_sm')
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        return module.LineCrossingCounter(1, 'bench', line_config, draw_overlays=profile.draws_overlays,
+                                          overlay_style=profile.overlay_style(),
+                                          status_every=profile.status_every)
+
+
+def bench_handle_metadata(variant, batches, line_config, repeat):
+    """Tiempo de handle_metadata por frame y por objeto (mejor de `repeat`)"""
+    frames = sum(len(batch.frame_items) for batch in batches)
+    objects = sum(len(frame.object_items) for batch in batches for frame in batch.frame_items)
+
+    best_ns = None
+    counter = None
+    devnull = open(os.devnull, 'w')
+    for _ in range(repeat):
+        counter = make_counter(variant, line_config)
+        for batch in batches:
+            batch.reset()
+
+        gc.collect()
+        with contextlib.redirect_stdout(devnull):
+            t0 = time.perf_counter_ns()
+            for batch in batches:
+                counter.handle_metadata(batch)
+            elapsed = time.perf_counter_ns() - t0
+        best_ns = elapsed if best_ns is None else min(best_ns, elapsed)
+
+    return {
+        'ns_per_frame': best_ns / frames,
+        'ns_per_object': best_ns / max(1, objects),
+        'entradas': counter.contadores['entradas'],
+        'salidas': counter.contadores['salidas'],
+        'tracks': len(counter.tracks),
+    }
+
+
+def bench_allocations(variant, batches, line_config):
+    """Memoria transitoria por frame (pico tracemalloc) y bloques retenidos"""
+    counter = make_counter(variant, line_config)
+    devnull = open(os.devnull, 'w')
+
+    # Calentar (los tracks y cachés iniciales no son coste por frame)
+    warmup = max(1, len(batches) // 10)
+    with contextlib.redirect_stdout(devnull):
+        for batch in batches[:warmup]:
+            batch.reset()
+            counter.handle_metadata(batch)
+
+    measured = batches[warmup:]
+    for batch in measured:
+        batch.reset()
+
+    gc.collect()
+    tracemalloc.start()
+    peak_total = 0
+    blocks_before = sys.getallocatedblocks()
+    with contextlib.redirect_stdout(devnull):
+        for batch in measured:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            counter.handle_metadata(batch)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - current
+    blocks_after = sys.getallocatedblocks()
+    tracemalloc.stop()
+
+    frames = sum(len(batch.frame_items) for batch in measured)
+    return {
+        'transient_bytes_per_frame': peak_total / max(1, len(measured)),
+        'retained_blocks_per_frame': (blocks_after - blocks_before) / max(1, frames),
+    }
+
+
+def bench_process_detections(variant, batches, line_config, repeat):
+    """Solo process_detections (núcleo vectorizado), con detecciones ya extraídas"""
+    detections = []
+    for batch in batches:
+        for frame in batch.frame_items:
+            track_ids = []
+            centroids = []
+            for obj in frame.object_items:
+                if obj.class_id == 0:
+                    rect = obj.rect_params
+                    track_ids.append(obj.object_id)
+                    centroids.append((rect.left + rect.width / 2, rect.top + rect.height / 2))
+            detections.append((track_ids, centroids))
+
+    best_ns = None
+    devnull = open(os.devnull, 'w')
+    for _ in range(repeat):
+        counter = make_counter(variant, line_config)
+        gc.collect()
+        with contextlib.redirect_stdout(devnull):
+            t0 = time.perf_counter_ns()
+            for track_ids, centroids in detections:
+                if track_ids:
+                    counter.process_detections(track_ids, centroids)
+                counter.frame_count += 1
+            elapsed = time.perf_counter_ns() - t0
+        best_ns = elapsed if best_ns is None else min(best_ns, elapsed)
+
+    return {'ns_per_frame': best_ns / max(1, len(detections))}
+
+
+def bench_detector(crowd, frames):
+    """punto_cruza_linea (escalar, por objeto) vs cruces_batch (por frame)"""
+    detector_module = load_probe_module('line_crossing_detector')
+    config = crowd.line_config
+    detector = detector_module.LineCrossingDetector(config['start'], config['end'], config['direccion_entrada'])
+
+    rng = np.random.default_rng(1)
+    prev = rng.uniform(0, crowd.width, (frames, crowd.density, 2))
+    curr = prev + rng.normal(0, crowd.speed, prev.shape)
+    prev_lists = prev.tolist()
+    curr_lists = curr.tolist()
+
+    t0 = time.perf_counter_ns()
+    for prev_frame, curr_frame in zip(prev_lists, curr_lists):
+        for (px, py), (x, y) in zip(prev_frame, curr_frame):
+            detector.punto_cruza_linea(x, y, px, py)
+    scalar_ns = time.perf_counter_ns() - t0
+
+    t0 = time.perf_counter_ns()
+    for i in range(frames):
+        detector.cruces_batch(prev[i], curr[i])
+    batch_ns = time.perf_counter_ns() - t0
+
+    objects = frames * crowd.density
+    return {
+        'scalar_ns_per_object': scalar_ns / objects,
+        'batch_ns_per_object': batch_ns / objects,
+        'batch_ns_per_frame': batch_ns / frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del probe con metadatos sintéticos')
+    parser.add_argument('--frames', type=int, default=2000, help='Frames por variante')
+    parser.add_argument('--density', type=int, default=20, help='Personas por frame')
+    parser.add_argument('--others', type=int, default=5, help='Objetos de otras clases por frame')
+    parser.add_argument('--churn', type=float, default=0.01, help='Probabilidad de salida de un track por frame')
+    parser.add_argument('--crossing-rate', type=float, default=0.2, help='Fracción de personas que cruzan')
+    parser.add_argument('--speed', type=float, default=6.0, help='Velocidad en px/frame')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones (se toma la mejor)')
+    parser.add_argument('--variant', action='append', choices=sorted(VARIANTS),
+                        help='Variante(s) a medir (default: todas)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='Guardar resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    standin = install_pyservicemaker_standin()
+    variants = args.variant or list(VARIANTS)
+
+    crowd = CrowdGenerator(density=args.density, churn=args.churn, crossing_rate=args.crossing_rate,
+                           speed=args.speed, others=args.others, seed=args.seed)
+    batches = crowd.generate(args.frames)
+
+    print(f"\n{'='*78}")
+    print("📊 BENCHMARK DEL PROBE (metadatos sintéticos)")
+    print(f"{'='*78}")
+    print(f"pyservicemaker: {'sustituto' if standin else 'real'} | frames: {args.frames} | "
+          f"densidad: {args.density} | otros: {args.others} | churn: {args.churn} | "
+          f"cruce: {args.crossing_rate}")
+    print(f"{'-'*78}")
+    print(f"{'Variante':<22}{'ns/frame':>11}{'ns/obj':>9}{'detect ns/fr':>14}"
+          f"{'B/frame':>10}{'ret blk/fr':>12}")
+
+    results = {'params': vars(args), 'standin': standin, 'variants': {}}
+    for variant in variants:
+        handle = bench_handle_metadata(variant, batches, crowd.line_config, args.repeat)
+        detect = bench_process_detections(variant, batches, crowd.line_config, args.repeat)
+        alloc = bench_allocations(variant, batches, crowd.line_config)
+        results['variants'][variant] = {'handle_metadata': handle, 'process_detections': detect,
+                                        'allocations': alloc}
+
+        print(f"{variant:<22}{handle['ns_per_frame']:>11.0f}{handle['ns_per_object']:>9.0f}"
+              f"{detect['ns_per_frame']:>14.0f}{alloc['transient_bytes_per_frame']:>10.0f}"
+              f"{alloc['retained_blocks_per_frame']:>12.2f}")
+
+    detector = bench_detector(crowd, min(args.frames, 2000))
+    results['detector'] = detector
+    print(f"{'-'*78}")
+    print(f"Detector: punto_cruza_linea {detector['scalar_ns_per_object']:.0f} ns/obj | "
+          f"cruces_batch {detector['batch_ns_per_object']:.0f} ns/obj "
+          f"({detector['batch_ns_per_frame']:.0f} ns/frame)")
+
+    sample = next(iter(results['variants'].values()))['handle_metadata']
+    print(f"Conteo (sanidad): E:{sample['entradas']} S:{sample['salidas']} tracks:{sample['tracks']}")
+    print(f"{'='*78}\n")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
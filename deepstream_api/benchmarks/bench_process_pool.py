@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cámaras en threads (un GIL) vs cámaras en procesos worker
+
+Cada "cámara" ejecuta el probe real (LineCrossingCounter.handle_metadata)
+sobre metadatos sintéticos, sin GPU. Compara:
+- Throughput agregado del probe (frames/s de todas las cámaras)
+- FPS mínimo por cámara (la que más se retrasa)
+- Latencia de ida y vuelta del canal de control (modo process)
+
+En modo process se usa CameraProcessGroup real (Pipe + comandos) con
+SyntheticProbeCamera como fábrica. Se usa el contexto 'fork' para que
+los workers hereden los sustitutos de pyservicemaker; en producción
+el gestor usa 'spawn'.
+
+Uso:
+    python3 benchmarks/bench_process_pool.py --cameras 8
+    python3 benchmarks/bench_process_pool.py --cameras 16 --cameras-per-process 2 --density 40
+    python3 benchmarks/bench_process_pool.py --cameras 8 --fps 30   # ¿alcanza cada cámara 30 FPS?
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_meta import SyntheticProbeCamera, install_pyservicemaker_standin, load_probe_module
+
+FACTORY = "benchmarks.synthetic_meta:SyntheticProbeCamera"
+
+
+def measure(cameras, duration, warmup):
+    """Frames procesados por cámara durante `duration` segundos tras `warmup`"""
+    time.sleep(warmup)
+    before = {cid: camera.get_metrics()['frames'] for cid, camera in cameras.items()}
+    t0 = time.perf_counter()
+    time.sleep(duration)
+    elapsed = time.perf_counter() - t0
+    after = {cid: camera.get_metrics()['frames'] for cid, camera in cameras.items()}
+
+    per_camera = {cid: (after[cid] - before[cid]) / elapsed for cid in cameras}
+    return {
+        'aggregate_fps': sum(per_camera.values()),
+        'min_camera_fps': min(per_camera.values()),
+        'avg_camera_fps': sum(per_camera.values()) / len(per_camera),
+        'per_camera_fps': per_camera,
+    }
+
+
+def run_thread_mode(args):
+    cameras = {
+        cid: SyntheticProbeCamera(cid, f"synthetic-{cid}", None, None)
+        for cid in range(1, args.cameras + 1)
+    }
+    for camera in cameras.values():
+        camera.start()
+    try:
+        return measure(cameras, args.duration, args.warmup)
+    finally:
+        for camera in cameras.values():
+            camera.stop()
+
+
+def run_process_mode(args):
+    process_camera = load_probe_module('process_camera')
+
+    groups = []
+    cameras = {}
+    for cid in range(1, args.cameras + 1):
+        if not groups or len(groups[-1].camera_ids) >= args.cameras_per_process:
+            groups.append(process_camera.CameraProcessGroup(
+                len(groups), headless=True, camera_factory=FACTORY, mp_context='fork',
+                poll_max_age=0.0))
+        cameras[cid] = process_camera.ProcessCamera(cid, f"synthetic-{cid}", None, None, groups[-1])
+
+    try:
+        for camera in cameras.values():
+            if not camera.start():
+                raise RuntimeError(f"No se pudo iniciar la cámara {camera.camera_id}")
+
+        result = measure(cameras, args.duration, args.warmup)
+
+        rtts = []
+        for _ in range(50):
+            t0 = time.perf_counter()
+            groups[0].call('poll')
+            rtts.append((time.perf_counter() - t0) * 1000.0)
+        rtts.sort()
+        result['control_rtt_ms_p50'] = rtts[len(rtts) // 2]
+        result['control_rtt_ms_max'] = rtts[-1]
+        result['workers'] = len(groups)
+        return result
+    finally:
+        for group in groups:
+            group.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark threads vs procesos worker')
+    parser.add_argument('--cameras', type=int, default=8)
+    parser.add_argument('--cameras-per-process', type=int, default=1)
+    parser.add_argument('--density', type=int, default=20, help='Personas por frame')
+    parser.add_argument('--fps', type=float, default=0.0, help='FPS objetivo por cámara (0 = sin límite)')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--mode', choices=['thread', 'process', 'both'], default='both')
+    parser.add_argument('--json', help='Guardar resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    install_pyservicemaker_standin()
+    SyntheticProbeCamera.density = args.density
+    SyntheticProbeCamera.target_fps = args.fps
+
+    # Los logs del probe (cruces, cada N frames) irían a stdout en cada cámara;
+    # se descartan durante la medición (los workers heredan la redirección)
+    results = {'params': vars(args), 'cpus': os.cpu_count()}
+    with open(os.devnull, 'w') as devnull:
+        if args.mode in ('thread', 'both'):
+            print(f"▶️  Modo thread: {args.cameras} cámaras en un proceso...", flush=True)
+            with contextlib.redirect_stdout(devnull):
+                results['thread'] = run_thread_mode(args)
+        if args.mode in ('process', 'both'):
+            print(f"▶️  Modo process: {args.cameras} cámaras, "
+                  f"{args.cameras_per_process} por worker...", flush=True)
+            with contextlib.redirect_stdout(devnull):
+                results['process'] = run_process_mode(args)
+
+    print(f"\n{'='*70}")
+    print(f"📊 THREADS vs PROCESOS ({args.cameras} cámaras, densidad {args.density}, "
+          f"{os.cpu_count()} CPUs)")
+    print(f"{'='*70}")
+    print(f"{'Modo':<10}{'FPS agregado':>15}{'FPS mín/cám':>14}{'FPS prom/cám':>15}")
+    for mode in ('thread', 'process'):
+        if mode in results:
+            r = results[mode]
+            print(f"{mode:<10}{r['aggregate_fps']:>15.0f}{r['min_camera_fps']:>14.1f}{r['avg_camera_fps']:>15.1f}")
+    if 'process' in results:
+        r = results['process']
+        print(f"Canal de control ({r['workers']} workers): poll p50 {r['control_rtt_ms_p50']:.2f} ms, "
+              f"max {r['control_rtt_ms_max']:.2f} ms")
+    if 'thread' in results and 'process' in results and results['thread']['aggregate_fps'] > 0:
+        print(f"Speedup: x{results['process']['aggregate_fps'] / results['thread']['aggregate_fps']:.2f}")
+    print(f"{'='*70}\n")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"💾 Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pipelines por cámara vs pipeline compartido (batch)
+
+Ejecuta N fuentes durante un tiempo fijo en cada modo y compara:
+- FPS agregado (frames procesados por el probe / segundo)
+- FPS por cámara (mínimo y promedio)
+- Memoria GPU usada (pico, vía nvidia-smi)
+
+Requiere GPU + DeepStream. Las fuentes pueden ser RTSP o archivos
+(file:///...). Si se pasa una sola URI se repite N veces.
+
+Uso:
+    python3 benchmarks/bench_shared_pipeline.py --uri file:///app/videos/entrada.mp4 --cameras 16
+    python3 benchmarks/bench_shared_pipeline.py --uri rtsp://... --uri rtsp://... --duration 120
+    python3 benchmarks/bench_shared_pipeline.py --uri ... --mode shared
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+from modules.multi_camera_manager import MultiCameraManager
+
+
+# Línea neutra: el benchmark mide throughput, no conteo
+BENCH_LINE_CONFIG = {
+    'start': [640, 0],
+    'end': [640, 720],
+    'direccion_entrada': 'izquierda'
+}
+
+
+class GPUMemorySampler:
+    """Muestrea memoria GPU usada (MB) en segundo plano vía nvidia-smi"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def read_memory_used_mb():
+        try:
+            result = subprocess.run(
+                ['nvidia-smi', '--query-gpu=memory.used', '--format=csv,noheader,nounits'],
+                capture_output=True, text=True, timeout=5
+            )
+            if result.returncode == 0:
+                return sum(int(line.strip()) for line in result.stdout.strip().split('\n') if line.strip())
+        except Exception:
+            pass
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            value = self.read_memory_used_mb()
+            if value is not None:
+                self.samples.append(value)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="GPU-Sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    @property
+    def peak(self):
+        return max(self.samples) if self.samples else None
+
+
+def frame_counts(manager: MultiCameraManager) -> dict:
+    """Frames procesados por el probe para cada cámara"""
+    counts = {}
+    with manager._cameras_lock:
+        cameras = dict(manager.cameras)
+
+    for camera_id, camera in cameras.items():
+        if manager.shared_pipeline:
+            instance = manager._shared.deepstream_instance if manager._shared else None
+            counts[camera_id] = instance.get_frame_count(camera_id) if instance else 0
+        else:
+            instance = camera.deepstream_instance
+            counts[camera_id] = instance.counter.frame_count if instance else 0
+    return counts
+
+
+def run_mode(mode: str, uris: list, duration: float, warmup: float) -> dict:
+    """
+    Ejecuta un modo del benchmark
+
+    Args:
+        mode: 'per-camera' o 'shared'
+        uris: URIs de las fuentes (una por cámara)
+        duration: Segundos de medición
+        warmup: Segundos de calentamiento (carga de engine, conexión RTSP)
+
+    Returns:
+        Diccionario con resultados
+    """
+    print(f"\n{'='*70}")
+    print(f"⏱️  MODO: {mode.upper()} ({len(uris)} cámaras)")
+    print(f"{'='*70}")
+
+    baseline_mb = GPUMemorySampler.read_memory_used_mb()
+    sampler = GPUMemorySampler()
+    sampler.start()
+
+    manager = MultiCameraManager(
+        max_cameras=len(uris),
+        headless=True,
+        shared_pipeline=(mode == 'shared')
+    )
+    for idx, uri in enumerate(uris, 1):
+        manager.add_camera(
+            camera_id=idx,
+            camera_name=f"bench-{idx}",
+            rtsp_uri=uri,
+            line_config=BENCH_LINE_CONFIG
+        )
+
+    t_start = time.monotonic()
+    manager.start_all_cameras(sequential=False)
+    startup_s = time.monotonic() - t_start
+
+    time.sleep(warmup)
+    frames_before = frame_counts(manager)
+    t0 = time.monotonic()
+    time.sleep(duration)
+    elapsed = time.monotonic() - t0
+    frames_after = frame_counts(manager)
+
+    manager.stop_all_cameras()
+    manager.close()
+    sampler.stop()
+
+    per_camera_fps = {
+        camera_id: (frames_after.get(camera_id, 0) - frames_before.get(camera_id, 0)) / elapsed
+        for camera_id in frames_after
+    }
+    fps_values = list(per_camera_fps.values()) or [0.0]
+
+    return {
+        'mode': mode,
+        'cameras': len(uris),
+        'startup_s': round(startup_s, 2),
+        'aggregate_fps': round(sum(fps_values), 2),
+        'min_camera_fps': round(min(fps_values), 2),
+        'avg_camera_fps': round(sum(fps_values) / len(fps_values), 2),
+        'gpu_baseline_mb': baseline_mb,
+        'gpu_peak_mb': sampler.peak,
+        'gpu_delta_mb': (sampler.peak - baseline_mb) if (sampler.peak and baseline_mb is not None) else None,
+    }
+
+
+def print_comparison(results: list):
+    """Imprime tabla comparativa"""
+    print(f"\n{'='*70}")
+    print("📊 RESULTADOS")
+    print(f"{'='*70}")
+    header = f"{'Modo':<12}{'Cám':>5}{'FPS total':>11}{'FPS mín':>10}{'FPS prom':>10}{'GPU Δ MB':>11}{'Inicio s':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        gpu = r['gpu_delta_mb'] if r['gpu_delta_mb'] is not None else '-'
+        print(f"{r['mode']:<12}{r['cameras']:>5}{r['aggregate_fps']:>11}{r['min_camera_fps']:>10}"
+              f"{r['avg_camera_fps']:>10}{gpu:>11}{r['startup_s']:>10}")
+
+    if len(results) == 2 and results[0]['aggregate_fps'] > 0:
+        per_cam, shared = results
+        speedup = shared['aggregate_fps'] / per_cam['aggregate_fps']
+        print(f"\n⚡ Speedup throughput (compartido / por cámara): {speedup:.2f}x")
+        if per_cam['gpu_delta_mb'] and shared['gpu_delta_mb']:
+            ratio = per_cam['gpu_delta_mb'] / shared['gpu_delta_mb']
+            print(f"💾 Ahorro memoria GPU: {ratio:.2f}x menos")
+    print(f"{'='*70}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline por cámara vs compartido')
+    parser.add_argument('--uri', action='append', required=True,
+                        help='URI de fuente (repetible). Si hay una sola se replica --cameras veces')
+    parser.add_argument('--cameras', type=int, default=None, help='Número de cámaras (default: nº de URIs)')
+    parser.add_argument('--duration', type=float, default=60.0, help='Segundos de medición (default: 60)')
+    parser.add_argument('--warmup', type=float, default=20.0, help='Segundos de calentamiento (default: 20)')
+    parser.add_argument('--mode', choices=['both', 'per-camera', 'shared'], default='both')
+    parser.add_argument('--json', help='Guardar resultados en archivo JSON')
+    args = parser.parse_args()
+
+    count = args.cameras or len(args.uri)
+    uris = [args.uri[i % len(args.uri)] for i in range(count)]
+
+    Gst.init(None)
+
+    modes = ['per-camera', 'shared'] if args.mode == 'both' else [args.mode]
+    results = [run_mode(mode, uris, args.duration, args.warmup) for mode in modes]
+
+    print_comparison(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados guardados en: {args.json}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
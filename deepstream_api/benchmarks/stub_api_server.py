@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Servidor stub local de la API de cámaras (Laravel) para pruebas offline
+
+Endpoints:
+    GET  /api/camaras  -> {"success": true, "data": [...]} (ETag/Last-Modified, 304)
+    POST /api/eventos  -> recibe lotes {"eventos": [...]} del publicador
+
+Permite simular latencia, errores y caídas completas de la API para medir
+CrossingEventPublisher y CameraAPIClient sin backend real.
+
+Uso:
+    python3 benchmarks/stub_api_server.py --port 8080 --latency-ms 50 --fail-rate 0.1
+    # En otro terminal: API_URL=http://127.0.0.1:8080/api
+"""
+import sys
+import json
+import time
+import hashlib
+import random
+import argparse
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_CAMERAS = [
+    {
+        "id": 1,
+        "zonas_id": 1,
+        "cam_nombre": "Stub Entrada",
+        "cam_ip": "127.0.0.1",
+        "cam_port": 8554,
+        "cam_user": "",
+        "cam_password": "",
+        "cam_coordenadas": "{\"end\": [640, 720], \"start\": [640, 0], \"direccion_entrada\": \"izquierda\"}",
+        "cam_rstp": "stub"
+    }
+]
+
+# Modos de caída de la API (StubAPIServer.outage)
+OUTAGE_MODES = (None, '503', 'hang', 'reset')
+
+
+class StubAPIServer:
+    """
+    Servidor HTTP en un thread con estado inspeccionable
+
+    Attributes:
+        events: Lista de (recibido_en, evento) de todos los eventos recibidos
+        requests_count: Peticiones POST /eventos recibidas
+        camaras_requests: Peticiones GET /camaras recibidas
+        camaras_not_modified: Respuestas 304 a GET /camaras
+        outage: None o modo de caída ('503', 'hang' = no responde, 'reset' = cierra la conexión)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, cameras=None,
+                 latency_ms: float = 0.0, fail_rate: float = 0.0):
+        """
+        Args:
+            host: Interfaz de escucha
+            port: Puerto (0 = puerto libre aleatorio)
+            cameras: Lista de cámaras a servir en /api/camaras
+            latency_ms: Latencia artificial por petición
+            fail_rate: Probabilidad [0-1] de responder 503
+        """
+        self.latency_ms = latency_ms
+        self.fail_rate = fail_rate
+        self.outage = None
+        self.set_cameras(cameras if cameras is not None else list(DEFAULT_CAMERAS))
+
+        self.events = []
+        self.requests_count = 0
+        self.failed_count = 0
+        self.camaras_requests = 0
+        self.camaras_not_modified = 0
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def set_cameras(self, cameras):
+        """Reemplaza la lista servida (nuevo ETag y Last-Modified)"""
+        body = json.dumps({'success': True, 'data': cameras}).encode('utf-8')
+        self.cameras = cameras
+        self._camaras_body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+    @property
+    def url(self) -> str:
+        """URL base de la API (equivalente a http://172.80.20.22/api)"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _simulate(self) -> bool:
+                """Aplica latencia, caídas y fallos simulados. Retorna False si debe fallar"""
+                if stub.outage == 'hang':
+                    time.sleep(30)
+                    self.close_connection = True
+                    return False
+                if stub.outage == 'reset':
+                    self.close_connection = True
+                    self.connection.close()
+                    return False
+                if stub.outage == '503':
+                    self._send_json(503, {'success': False, 'error': 'stub outage'})
+                    return False
+                if stub.latency_ms > 0:
+                    time.sleep(stub.latency_ms / 1000.0)
+                if stub.fail_rate > 0 and random.random() < stub.fail_rate:
+                    with stub._lock:
+                        stub.failed_count += 1
+                    self._send_json(503, {'success': False, 'error': 'stub failure'})
+                    return False
+                return True
+
+            def do_GET(self):
+                if self.path.rstrip('/') != '/api/camaras':
+                    self._send_json(404, {'success': False})
+                    return
+                with stub._lock:
+                    stub.camaras_requests += 1
+                if not self._simulate():
+                    return
+
+                etag, last_modified, body = stub.etag, stub.last_modified, stub._camaras_body
+                if (self.headers.get('If-None-Match') == etag
+                        or (self.headers.get('If-None-Match') is None
+                            and self.headers.get('If-Modified-Since') == last_modified)):
+                    with stub._lock:
+                        stub.camaras_not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Last-Modified', last_modified)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length else b''
+
+                if self.path.rstrip('/') != '/api/eventos':
+                    self._send_json(404, {'success': False})
+                    return
+                if not self._simulate():
+                    return
+
+                try:
+                    eventos = json.loads(body).get('eventos', [])
+                except (json.JSONDecodeError, AttributeError):
+                    self._send_json(400, {'success': False, 'error': 'JSON inválido'})
+                    return
+
+                received_at = time.time()
+                with stub._lock:
+                    stub.requests_count += 1
+                    stub.events.extend((received_at, evento) for evento in eventos)
+
+                self._send_json(201, {'success': True, 'recibidos': len(eventos)})
+
+        return Handler
+
+    def start(self):
+        """Inicia el servidor en un thread daemon"""
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="StubAPIServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el servidor"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor stub de la API de cámaras')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latencia artificial por petición')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Probabilidad de responder 503')
+    parser.add_argument('--cameras', help='Archivo JSON con la lista de cámaras a servir')
+    parser.add_argument('--outage', choices=[m for m in OUTAGE_MODES if m],
+                        help='Simular caída de la API desde el inicio')
+    args = parser.parse_args()
+
+    cameras = None
+    if args.cameras:
+        with open(args.cameras) as f:
+            cameras = json.load(f)
+
+    server = StubAPIServer(args.host, args.port, cameras=cameras,
+                           latency_ms=args.latency_ms, fail_rate=args.fail_rate)
+    server.outage = args.outage
+    server.start()
+    print(f"🧪 Stub API escuchando en {server.url} (Ctrl+C para salir)")
+
+    try:
+        while True:
+            time.sleep(5)
+            print(f"   GET camaras: {server.camaras_requests} (304: {server.camaras_not_modified}) | "
+                  f"Peticiones eventos: {server.requests_count} | "
+                  f"Eventos: {len(server.events)} | Fallos simulados: {server.failed_count}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,402 @@
+"""
+Metadatos sintéticos para medir el probe sin GPU ni cámaras
+
+- Sustitutos ligeros de los metadatos de pyservicemaker (batch/frame/object,
+  display-meta y osd) con los mismos atributos que usa LineCrossingCounter
+- install_pyservicemaker_standin(): registra un módulo `pyservicemaker` de
+  sustitución SOLO si el real no está instalado
+- load_probe_module(): importa un módulo de `modules/` sin ejecutar
+  modules/__init__.py (que requiere GStreamer/gi)
+- CrowdGenerator: multitudes sintéticas con densidad, rotación de tracks
+  y tasa de cruce configurables
+"""
+import os
+import sys
+import types
+import random
+import importlib
+import importlib.util
+
+import numpy as np
+
+
+MODULES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'modules')
+
+PERSON_CLASS_ID = 0
+OTHER_CLASS_ID = 2
+
+
+# ----------------------------------------------------------------------
+# Metadatos
+# ----------------------------------------------------------------------
+
+class RectParams:
+    __slots__ = ('left', 'top', 'width', 'height')
+
+    def __init__(self, left, top, width, height):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+
+
+class ObjectMeta:
+    __slots__ = ('class_id', 'object_id', 'rect_params', 'confidence')
+
+    def __init__(self, class_id, object_id, rect_params, confidence=0.9):
+        self.class_id = class_id
+        self.object_id = object_id
+        self.rect_params = rect_params
+        self.confidence = confidence
+
+
+class DisplayMeta:
+    __slots__ = ('lines', 'texts')
+
+    def __init__(self):
+        self.lines = []
+        self.texts = []
+
+    def add_line(self, line):
+        self.lines.append(line)
+
+    def add_text(self, text):
+        self.texts.append(text)
+
+
+class FrameMeta:
+    __slots__ = ('source_id', 'frame_number', 'object_items', 'display_meta_count')
+
+    def __init__(self, source_id, frame_number, object_items):
+        self.source_id = source_id
+        self.frame_number = frame_number
+        self.object_items = object_items
+        self.display_meta_count = 0
+
+    def append(self, display_meta):
+        # En DeepStream el display-meta pertenece al pool del batch;
+        # aquí solo se cuenta para no retener memoria entre frames
+        self.display_meta_count += 1
+
+    def reset(self):
+        """Reinicia el frame para reutilizarlo en otra repetición"""
+        self.display_meta_count = 0
+
+
+class BatchMeta:
+    __slots__ = ('frame_items',)
+
+    def __init__(self, frame_items):
+        self.frame_items = frame_items
+
+    def acquire_display_meta(self):
+        return DisplayMeta()
+
+    def reset(self):
+        for frame_meta in self.frame_items:
+            frame_meta.reset()
+
+
+# ----------------------------------------------------------------------
+# Sustituto de pyservicemaker
+# ----------------------------------------------------------------------
+
+class _Color:
+    __slots__ = ('r', 'g', 'b', 'a')
+
+    def __init__(self, r=0.0, g=0.0, b=0.0, a=0.0):
+        self.r, self.g, self.b, self.a = r, g, b, a
+
+
+class _Font:
+    def __init__(self):
+        self.name = None
+        self.size = 0
+        self.color = None
+
+
+class _Line:
+    def __init__(self):
+        self.x1 = self.y1 = self.x2 = self.y2 = 0
+        self.width = 0
+        self.color = None
+
+
+class _Text:
+    def __init__(self):
+        self.display_text = b''
+        self.x_offset = 0
+        self.y_offset = 0
+        self.font = _Font()
+        self.set_bg_color = False
+        self.bg_color = None
+
+
+class _FontFamily:
+    Serif = 'Serif'
+    Sans = 'Sans'
+    Mono = 'Mono'
+
+
+class _BatchMetadataOperator:
+    def __init__(self):
+        pass
+
+
+class _Unavailable:
+    """Pipeline/Flow/Probe no existen fuera de DeepStream"""
+
+    def __init__(self, *args, **kwargs):
+        raise RuntimeError("pyservicemaker sustituto: solo metadatos, sin pipeline")
+
+
+def install_pyservicemaker_standin():
+    """
+    Registra un `pyservicemaker` sustituto si el real no está disponible
+
+    Returns:
+        True si se instaló el sustituto, False si se usa el real
+    """
+    try:
+        importlib.import_module('pyservicemaker')
+        return False
+    except ImportError:
+        pass
+
+    osd = types.ModuleType('pyservicemaker.osd')
+    osd.Line = _Line
+    osd.Text = _Text
+    osd.Color = _Color
+    osd.FontFamily = _FontFamily
+
+    module = types.ModuleType('pyservicemaker')
+    module.BatchMetadataOperator = _BatchMetadataOperator
+    module.Pipeline = _Unavailable
+    module.Flow = _Unavailable
+    module.Probe = _Unavailable
+    module.RenderMode = types.SimpleNamespace(DISCARD='discard')
+    module.osd = osd
+
+    sys.modules['pyservicemaker'] = module
+    sys.modules['pyservicemaker.osd'] = osd
+    return True
+
+
+def load_probe_module(name):
+    """
+    Importa modules.<name> sin ejecutar modules/__init__.py
+
+    modules/__init__.py importa los wrappers con GStreamer (gi), que no
+    hacen falta para medir el probe
+
+    Args:
+        name: Nombre del módulo (p.ej. 'deepstream_camera_sm')
+    """
+    if 'modules' not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            'modules', os.path.join(MODULES_DIR, '__init__.py'),
+            submodule_search_locations=[MODULES_DIR]
+        )
+        sys.modules['modules'] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(f'modules.{name}')
+
+
+# ----------------------------------------------------------------------
+# Generador de multitudes
+# ----------------------------------------------------------------------
+
+class CrowdGenerator:
+    """
+    Multitud sintética alrededor de una línea vertical en el centro
+
+    - `density`: personas visibles por frame
+    - `churn`: probabilidad por frame de que un track salga de escena
+      (se reemplaza por uno nuevo con otro object_id)
+    - `crossing_rate`: fracción de personas que caminan atravesando la línea;
+      el resto se mueve sin cruzarla
+    - `others`: objetos de otras clases por frame (el probe los filtra)
+    """
+
+    def __init__(self, width=1920, height=1080, density=20, churn=0.01,
+                 crossing_rate=0.2, speed=6.0, others=0, sources=1, seed=0):
+        self.width = width
+        self.height = height
+        self.density = density
+        self.churn = churn
+        self.crossing_rate = crossing_rate
+        self.speed = speed
+        self.others = others
+        self.sources = sources
+        self.line_x = width // 2
+
+        self._rng = np.random.default_rng(seed)
+        self._random = random.Random(seed)
+        self._next_id = 1
+
+        # Estado por fuente: ids, posiciones, velocidades
+        self._state = [self._spawn(density) for _ in range(sources)]
+
+    @property
+    def line_config(self):
+        return {
+            'start': [self.line_x, 0],
+            'end': [self.line_x, self.height],
+            'direccion_entrada': 'izquierda'
+        }
+
+    def _spawn(self, count):
+        ids = np.arange(self._next_id, self._next_id + count, dtype=np.int64)
+        self._next_id += count
+
+        xs = self._rng.uniform(0, self.width, count)
+        ys = self._rng.uniform(0, self.height, count)
+
+        # Los que cruzan caminan hacia la línea; el resto se aleja de ella
+        crossers = self._rng.random(count) < self.crossing_rate
+        toward = np.where(xs < self.line_x, 1.0, -1.0)
+        vx = np.where(crossers, toward, -toward) * self.speed
+        vy = self._rng.normal(0, self.speed * 0.1, count)
+        return [ids, xs, ys, vx, vy]
+
+    def _step(self, state):
+        ids, xs, ys, vx, vy = state
+        xs += vx
+        ys += vy
+
+        # Rebote en bordes (sin cruzar la línea por rebote)
+        out = (xs < 0) | (xs > self.width)
+        vx[out] = -vx[out]
+        np.clip(xs, 0, self.width, out=xs)
+        np.clip(ys, 0, self.height, out=ys)
+
+        # Rotación de tracks
+        if self.churn > 0:
+            leaving = np.flatnonzero(self._rng.random(len(ids)) < self.churn)
+            if len(leaving):
+                new_ids, new_xs, new_ys, new_vx, new_vy = self._spawn(len(leaving))
+                ids[leaving] = new_ids
+                xs[leaving] = new_xs
+                ys[leaving] = new_ys
+                vx[leaving] = new_vx
+                vy[leaving] = new_vy
+
+    def _frame_meta(self, source_id, frame_number, state):
+        ids, xs, ys = state[0], state[1], state[2]
+        objects = [
+            ObjectMeta(PERSON_CLASS_ID, int(object_id), RectParams(x - 20.0, y - 60.0, 40.0, 120.0))
+            for object_id, x, y in zip(ids.tolist(), xs.tolist(), ys.tolist())
+        ]
+        for _ in range(self.others):
+            objects.append(ObjectMeta(
+                OTHER_CLASS_ID, 0,
+                RectParams(self._random.uniform(0, self.width), self._random.uniform(0, self.height), 80.0, 60.0)
+            ))
+        return FrameMeta(source_id, frame_number, objects)
+
+    def generate(self, frames):
+        """
+        Genera `frames` batches (un frame por fuente en cada batch)
+
+        Se generan antes de medir para no contar el coste del generador
+
+        Returns:
+            Lista de BatchMeta
+        """
+        batches = []
+        for frame_number in range(frames):
+            frame_items = []
+            for source_id, state in enumerate(self._state):
+                self._step(state)
+                frame_items.append(self._frame_meta(source_id, frame_number, state))
+            batches.append(BatchMeta(frame_items))
+        return batches
+
+
+# ----------------------------------------------------------------------
+# Cámara sintética (misma interfaz que ThreadedDeepStreamCamera)
+# ----------------------------------------------------------------------
+
+class SyntheticProbeCamera:
+    """
+    Ejecuta el probe real (LineCrossingCounter.handle_metadata) en un thread
+    sobre batches sintéticos, tan rápido como pueda o a `fps` fijo
+
+    Sirve como camera_factory de CameraProcessGroup para comparar el modo
+    thread con el modo process sin GPU. Los logs del probe van a stdout:
+    el benchmark lo redirige a /dev/null
+    """
+
+    frames = 300
+    density = 20
+    target_fps = 0.0
+    probe_module = 'deepstream_camera_sm'
+
+    def __init__(self, camera_id, camera_name, rtsp_uri, line_config,
+                 headless=True, event_publisher=None, counter_row=None, profile=None):
+        import threading
+
+        install_pyservicemaker_standin()
+        module = load_probe_module(self.probe_module)
+        # Del perfil solo aplican overlay y cadencia de logs (no hay pipeline)
+        self.profile = load_probe_module('camera_profiles').resolve_profile(profile, headless)
+
+        crowd = CrowdGenerator(density=self.density, seed=int(camera_id))
+        self.batches = crowd.generate(self.frames)
+
+        self.camera_id = camera_id
+        self.camera_name = camera_name
+        self.counter = module.LineCrossingCounter(
+            camera_id, camera_name, line_config or crowd.line_config,
+            draw_overlays=self.profile.draws_overlays, event_publisher=event_publisher,
+            counter_row=counter_row, overlay_style=self.profile.overlay_style(),
+            status_every=self.profile.status_every
+        )
+
+        self._running = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        import time
+
+        interval = 1.0 / self.target_fps if self.target_fps > 0 else 0.0
+        next_t = time.perf_counter()
+        while self._running.is_set():
+            for batch in self.batches:
+                if not self._running.is_set():
+                    break
+                batch.reset()
+                self.counter.handle_metadata(batch)
+                if interval:
+                    next_t += interval
+                    delay = next_t - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+    def start(self):
+        import threading
+
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name=f"Synthetic-{self.camera_id}", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=8.0):
+        self._running.clear()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def update_line_config(self, line_config):
+        self.counter.set_line_config(line_config)
+        return True
+
+    def get_stats(self):
+        return self.counter.contadores.copy()
+
+    def get_metrics(self):
+        return self.counter.metrics.snapshot()
+
+    def get_fps(self):
+        return self.get_metrics()['fps']
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
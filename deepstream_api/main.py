@@ -3,118 +3,255 @@
 Sistema multi-cámara de detección y conteo de personas con DeepStream
 Conecta a API REST para obtener configuración de múltiples cámaras RTSP
 Ejecuta múltiples cámaras en paralelo usando threading
+
+El pipeline de cada cámara sale de un perfil (--profile / --camera-profile):
+throughput, low-latency, headless o record (modules/camera_profiles.py), más
+los de --profiles-file (p.ej. los que escribe benchmarks/autotune.py).
+main_headless.py y main_low_latency.py son este mismo script con otro perfil
 """
+import os
+import logging
 import sys
+import argparse
 import gi
 
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst
 
 # Importar módulos
+from modules.async_logging import setup_logging, shutdown_logging
 from modules.api_client import CameraAPIClient
-from modules.rtsp_builder import RTSPBuilder
 from modules.camera_config import CameraConfig
+from modules.event_publisher import CrossingEventPublisher
 from modules.multi_camera_manager import MultiCameraManager
+from modules.fleet_reconciler import FleetReconciler
+from modules.line_config_watcher import LineConfigWatcher
+from modules.startup_scheduler import StartupScheduler
+from modules.camera_profiles import PROFILES, DEFAULT_PROFILE, load_profiles, resolve_profile, infer_config_path
+
+# engines/: generador de la config de nvinfer y almacén de artefactos
+ENGINES_DIR = os.environ.get('ENGINES_DIR', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'engines'))
+sys.path.insert(0, ENGINES_DIR)
+from nvinfer_config import Deployment, InferConfigError, generate as generate_infer_config
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_camera_profile(value):
+    """'ID=perfil' -> (camera_id, perfil)"""
+    camera_id, sep, name = value.partition('=')
+    if not sep or not camera_id.strip().isdigit() or name not in PROFILES:
+        raise argparse.ArgumentTypeError(
+            f"se espera ID=perfil con perfil en {', '.join(PROFILES)}: {value!r}")
+    return int(camera_id), name
+
+
+def parse_args(argv=None, default_profile=DEFAULT_PROFILE, headless=False):
+    """Parsea argumentos de línea de comandos"""
+    # Los perfiles del archivo se registran antes de armar las opciones de --profile
+    pre_parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    pre_parser.add_argument('--profiles-file')
+    known, _ = pre_parser.parse_known_args(argv)
+    if known.profiles_file:
+        try:
+            load_profiles(known.profiles_file)
+        except (OSError, ValueError) as e:
+            pre_parser.error(f"--profiles-file: {e}")
+
+    parser = argparse.ArgumentParser(description='Sistema multi-cámara de conteo de personas')
+    parser.add_argument('--profiles-file', metavar='JSON',
+                        help='Archivo de perfiles adicionales (benchmarks/autotune.py --out)')
+    parser.add_argument('--profile', choices=list(PROFILES), default=default_profile,
+                        help=f'Perfil de todas las cámaras (default: {default_profile})')
+    parser.add_argument('--camera-profile', type=parse_camera_profile, action='append', default=[],
+                        metavar='ID=PERFIL', help='Perfil de una cámara concreta (repetible)')
+    parser.add_argument('--headless', action='store_true', default=headless,
+                        help='Sin ventanas: los perfiles con display usan su variante sin display')
+    parser.add_argument('--shared-pipeline', action='store_true',
+                        help='Un solo pipeline batch para todas las cámaras '
+                             '(engine cargado una vez, batch-size = nº de cámaras)')
+    parser.add_argument('--processes', action='store_true',
+                        help='Ejecutar las cámaras en procesos worker (un GIL por proceso)')
+    parser.add_argument('--cameras-per-process', type=int, default=1,
+                        help='Cámaras por proceso worker con --processes (default: 1)')
+    parser.add_argument('--start-concurrency', type=int, default=4,
+                        help='Cámaras iniciándose a la vez tras el sondeo RTSP (default: 4)')
+    parser.add_argument('--adaptive-interval', action='store_true',
+                        help='Interval de nvinfer por cámara según la actividad cerca de la línea')
+    parser.add_argument('--min-interval', type=int, default=2,
+                        help='Interval con personas cerca de la línea en --adaptive-interval (default: 2, '
+                             'el del config: nunca infiere más que el interval fijo; 0 cuesta +25%% de GPU '
+                             'de día y +176%% en hora punta frente a interval=2)')
+    parser.add_argument('--max-interval', type=int, default=8,
+                        help='Interval con la escena vacía en --adaptive-interval (default: 8)')
+    parser.add_argument('--min-person-height', type=int, default=int(os.environ.get('MIN_PERSON_HEIGHT', 40)),
+                        help='Alto mínimo de persona en píxeles del frame: detected-min-h y '
+                             'entrada mínima del engine (default: $MIN_PERSON_HEIGHT o 40)')
+    parser.add_argument('--skip-infer-config', action='store_true',
+                        help='Usar la config de nvinfer de la imagen sin generarla ni validarla')
+    args = parser.parse_args(argv)
+    if args.shared_pipeline and args.processes:
+        parser.error('--shared-pipeline y --processes son excluyentes')
+    return args
+
+
+def prepare_infer_config(args, cameras: int) -> str:
+    """
+    Genera la config de nvinfer del despliegue y la valida contra el engine
+
+    Batch = cámaras activas (pipeline compartido) o el mayor batch_size de
+    los perfiles en uso (1 si no lo fijan); frame = el mayor nvstreammux de
+    los perfiles en uso. Se publica en NVINFER_CONFIG para todos los
+    pipelines (y procesos worker)
 
+    Raises:
+        InferConfigError: si el engine no admite el despliegue
+    """
+    profiles = [resolve_profile(args.profile, args.headless)]
+    profiles += [resolve_profile(name, args.headless) for _, name in args.camera_profile]
+    width = max(profile.mux_size()[0] for profile in profiles)
+    height = max(profile.mux_size()[1] for profile in profiles)
+    # El pipeline compartido ignora el batch del perfil (batch = cámaras)
+    profile_batch = None if args.shared_pipeline else max(profile.batch_size or 1 for profile in profiles)
+    deployment = Deployment(cameras, args.shared_pipeline, width, height, args.min_person_height,
+                            profile_batch=profile_batch)
+    path = generate_infer_config(deployment)
+    os.environ['NVINFER_CONFIG'] = path
+    logger.info(f"⚙️  Config de nvinfer: {path}")
+    logger.info(f"   {deployment.describe()}")
+    return path
 
-def main():
-    """Función principal para sistema multi-cámara"""
+
+def main(argv=None, default_profile=DEFAULT_PROFILE, headless=False):
+    """
+    Función principal para sistema multi-cámara
+
+    Args:
+        argv: Argumentos (None = sys.argv)
+        default_profile: Perfil si no se pasa --profile
+        headless: Si True, --headless viene activado
+    """
+    args = parse_args(argv, default_profile, headless)
+
+    # Logs por cola: los threads de cámara nunca esperan a stdout
+    setup_logging()
 
     # Configuración de la API
     API_URL = "http://172.80.20.22/api"
 
-    print("=" * 70)
-    print("🎥 SISTEMA MULTI-CÁMARA DE CONTEO DE PERSONAS")
-    print("=" * 70)
-    print(f"API URL: {API_URL}")
-    print("=" * 70)
-    print()
+    logger.info("=" * 70)
+    logger.info("🎥 SISTEMA MULTI-CÁMARA DE CONTEO DE PERSONAS")
+    logger.info("=" * 70)
+    logger.info(f"API URL: {API_URL}")
+    logger.info(f"Modo pipeline: {'COMPARTIDO (batch)' if args.shared_pipeline else 'POR CÁMARA'}")
+    if args.profiles_file:
+        logger.info(f"Perfiles adicionales: {args.profiles_file}")
+    logger.info(f"Perfil: {args.profile}{' (headless)' if args.headless else ''}")
+    for camera_id, name in args.camera_profile:
+        logger.info(f"   Cámara {camera_id}: {name}")
+    if args.processes:
+        logger.info(f"Ejecución: PROCESOS ({args.cameras_per_process} cámara(s) por worker)")
+    logger.info("=" * 70)
+    logger.info("")
 
     # Inicializar GStreamer (UNA VEZ en thread principal)
     Gst.init(None)
 
+    # Publicador asíncrono de eventos de cruce (no bloquea los probes)
+    event_publisher = CrossingEventPublisher(API_URL)
+    event_publisher.start()
+
+    manager = None
+    api_client = None
+    reconciler = None
+    line_watcher = None
+    startup = None
+    config_manager = None
     try:
         # 1. Conectar a la API
-        print("🔌 Conectando a la API...")
+        logger.info("🔌 Conectando a la API...")
         api_client = CameraAPIClient(API_URL)
 
         # 2. Obtener TODAS las cámaras
-        print("📡 Obteniendo cámaras desde la API...")
-        cameras_data = api_client.get_cameras()
+        logger.info("📡 Obteniendo cámaras desde la API...")
+        # Con copia local arranca sin esperar a la API y la consulta en segundo plano
+        cameras_data = api_client.get_cameras(prefer_cache=True)
 
         if not cameras_data:
-            print("❌ ERROR: No se encontraron cámaras en la API")
+            logger.error("❌ ERROR: No se encontraron cámaras en la API")
             return 1
 
-        print(f"✅ Se encontraron {len(cameras_data)} cámaras")
-        print()
+        logger.info(f"✅ Se encontraron {len(cameras_data)} cámaras")
+        logger.info("")
+
+        # Config de nvinfer del despliegue, validada contra el engine antes de
+        # crear ningún pipeline ni worker: un desajuste no dispara una recompilación.
+        # Con todas las cámaras de la API: los perfiles del engine empiezan en
+        # batch 1, así que también valen si alguna no llega a agregarse
+        if args.skip_infer_config:
+            logger.warning(f"⚠️  Config de nvinfer sin validar: {infer_config_path()}")
+        else:
+            try:
+                prepare_infer_config(args, len(cameras_data))
+            except InferConfigError as e:
+                logger.error("❌ ERROR: la config de nvinfer no encaja con el engine:")
+                for problem in e.problems:
+                    logger.error(f"   - {problem}")
+                return 1
 
         # 3. Crear gestor de múltiples cámaras
-        manager = MultiCameraManager(max_cameras=16)
+        manager = MultiCameraManager(max_cameras=16, headless=args.headless,
+                                     profile=args.profile,
+                                     camera_profiles=dict(args.camera_profile),
+                                     shared_pipeline=args.shared_pipeline,
+                                     event_publisher=event_publisher,
+                                     execution_mode="process" if args.processes else "thread",
+                                     cameras_per_process=args.cameras_per_process,
+                                     adaptive_interval=({'min_interval': args.min_interval,
+                                                         'max_interval': args.max_interval}
+                                                        if args.adaptive_interval else None))
         config_manager = CameraConfig()
 
         # 4. Agregar TODAS las cámaras
-        print("📋 Configurando cámaras...")
-        print("=" * 70)
-        print(f"🎥 PROCESANDO TODAS LAS CÁMARAS ({len(cameras_data)} cámaras)")
-        print("=" * 70)
-
-        # Procesar cada cámara
-        cameras_added = 0
-        for idx, camera_data in enumerate(cameras_data, 1):
-            camera_id = camera_data['id']
-            camera_name = camera_data['cam_nombre']
-            camera_ip = camera_data['cam_ip']
-
-            print(f"\n[{idx}/{len(cameras_data)}] 📹 Configurando cámara ID {camera_id}:")
-            print(f"   Nombre: {camera_name}")
-            print(f"   IP: {camera_ip}")
-
-            # Construir URI RTSP
-            rtsp_uri = RTSPBuilder.build_rtsp_uri(camera_data)
-
-            if not RTSPBuilder.validate_rtsp_uri(rtsp_uri):
-                print(f"   ❌ URI RTSP inválida, omitiendo...")
-                continue
-
-            # Obtener configuración de línea
-            line_config = config_manager.get_line_config(
-                camera_id,
-                camera_data['cam_coordenadas']
-            )
-
-            print(f"   Línea: {line_config['start']} -> {line_config['end']}")
-            print(f"   Dirección: {line_config['direccion_entrada']}")
-
-            # Guardar metadata
-            metadata = config_manager.get_camera_metadata(camera_data)
-            config_manager.save_camera_metadata(camera_id, metadata)
-
-            # Agregar al gestor
-            if manager.add_camera(
-                camera_id=camera_id,
-                camera_name=camera_name,
-                rtsp_uri=rtsp_uri,
-                line_config=line_config
-            ):
-                cameras_added += 1
-                print(f"   ✅ Cámara {camera_id} agregada")
-            else:
-                print(f"   ❌ Error agregando cámara {camera_id}")
-
-        print("\n" + "=" * 70)
-        print(f"✅ {cameras_added}/{len(cameras_data)} cámaras configuradas exitosamente")
-        print("=" * 70)
-        print()
+        logger.info("📋 Configurando cámaras...")
+        logger.info("=" * 70)
+        logger.info(f"🎥 PROCESANDO TODAS LAS CÁMARAS ({len(cameras_data)} cámaras)")
+        logger.info("=" * 70)
+
+        # Agregar solo las cámaras (se inician juntas más abajo); el mismo
+        # reconciliador aplica después los cambios de la API sin reiniciar el resto
+        line_watcher = LineConfigWatcher(manager, config_manager)
+        reconciler = FleetReconciler(manager, config_manager, line_watcher=line_watcher)
+        cameras_added = len(reconciler.reconcile(cameras_data, start_new=False).added)
+
+        logger.info("\n" + "=" * 70)
+        logger.info(f"✅ {cameras_added}/{len(cameras_data)} cámaras configuradas exitosamente")
+        logger.info("=" * 70)
+        logger.info("")
 
         if cameras_added == 0:
-            print("❌ ERROR: No se agregó ninguna cámara")
+            logger.error("❌ ERROR: No se agregó ninguna cámara")
             return 1
 
         # 5. Iniciar todas las cámaras
-        # sequential=True: Inicia una por una (más seguro, debugging fácil)
-        # sequential=False: Inicia en paralelo (más rápido, mayor carga inicial)
-        manager.start_all_cameras(sequential=True)
+        if args.shared_pipeline:
+            # El pipeline compartido se construye de una vez con todas las fuentes
+            manager.start_all_cameras()
+        else:
+            # Sondeo RTSP en paralelo; las cámaras caídas no retrasan a las demás
+            # y quedan reintentándose en segundo plano
+            startup = StartupScheduler(manager, max_concurrent=args.start_concurrency)
+            startup.run()
+            # Las cámaras que caen (EOS, error del pipeline, sin frames) se
+            # reinician solas, con backoff y circuit breaker
+            manager.start_supervisor()
+
+        # Aplicar altas, bajas y cambios de la API sin detener las demás cámaras
+        reconciler.start(api_client)
+        # Cambios en camera_X_line.json se aplican en caliente (sin reiniciar la cámara)
+        line_watcher.start()
 
         # 6. Esperar interrupción de teclado (Ctrl+C)
         manager.wait_keyboard_interrupt()
@@ -125,15 +262,36 @@ def main():
         return 0
 
     except KeyboardInterrupt:
-        print("\n⚠️  Interrupción por teclado")
+        logger.warning("\n⚠️  Interrupción por teclado")
         return 0
 
     except Exception as e:
-        print(f"\n❌ ERROR: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"\n❌ ERROR: {e}", exc_info=True)
         return 1
 
+    finally:
+        if startup is not None:
+            startup.stop()
+        if reconciler is not None:
+            reconciler.stop()
+        if line_watcher is not None:
+            line_watcher.stop()
+        if config_manager is not None:
+            config_manager.close()
+        if api_client is not None:
+            api_client.stop()
+
+        # Liberar la tabla de contadores compartida
+        if manager is not None:
+            manager.close()
+
+        # Enviar eventos pendientes antes de salir
+        event_publisher.stop()
+        stats = event_publisher.get_stats()
+        logger.info(f"📤 Eventos enviados: {stats['sent']} | Fallidos: {stats['failed']} | "
+                    f"Descartados: {stats['dropped']}")
+        shutdown_logging()
+
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -1,53 +1,323 @@
 """
 Cliente API para obtener configuración de cámaras
+Sesión HTTP persistente, reintentos con backoff y jitter, peticiones
+condicionales (ETag/Last-Modified) y copia en disco de la última respuesta válida
 """
+import logging
+import os
+import random
+import threading
+import time
 import requests
 import json
-from typing import List, Dict, Optional
+from requests.adapters import HTTPAdapter
+from typing import Callable, List, Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CACHE_PATH = "/app/output/api_cache/camaras.json"
+
+# Respuestas que vale la pena reintentar (el resto son errores definitivos)
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class CameraAPIError(Exception):
+    """La API respondió, pero con un error que no se resuelve reintentando"""
 
 
 class CameraAPIClient:
-    """Cliente para comunicarse con la API de cámaras"""
+    """
+    Cliente para comunicarse con la API de cámaras
 
-    def __init__(self, api_url: str):
+    - get_cameras(): consulta la API con reintentos; si no responde, usa la
+      última lista válida (memoria o disco)
+    - get_cameras(prefer_cache=True): arranque en frío sin esperar a la API
+      (lista en disco) y refresco en segundo plano
+    - Las consultas repetidas son condicionales: si la lista no cambió la API
+      responde 304 y no se descarga de nuevo
+    """
+
+    def __init__(self, api_url: str, timeout: Tuple[float, float] = (3.05, 10.0),
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 cache_path: Optional[str] = DEFAULT_CACHE_PATH):
         """
         Inicializa el cliente API
 
         Args:
             api_url: URL base de la API (ej: http://172.80.20.22/api)
+            timeout: (conexión, lectura) en segundos
+            max_retries: Reintentos tras el primer intento fallido
+            backoff_base: Espera base del backoff exponencial (s)
+            backoff_max: Espera máxima entre intentos (s)
+            cache_path: Archivo de la última respuesta válida (None = sin caché en disco)
         """
         self.api_url = api_url.rstrip('/')
         self.cameras_endpoint = f"{self.api_url}/camaras"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache_path = cache_path
+
+        # Sesión HTTP con pool de conexiones (keep-alive entre consultas)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        # Última lista válida y sus validadores HTTP
+        self._lock = threading.Lock()
+        self._cameras: Optional[List[Dict]] = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._fetched_at = 0.0
+
+        # Refresco en segundo plano
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
 
-    def get_cameras(self) -> List[Dict]:
+        self._stats = {
+            'requests': 0,
+            'not_modified': 0,
+            'downloaded': 0,
+            'retries': 0,
+            'failures': 0,
+            'cache_loads': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def get_cameras(self, prefer_cache: bool = False) -> List[Dict]:
         """
         Obtiene la lista de cámaras desde la API
 
+        Args:
+            prefer_cache: Si True y hay copia en disco, la retorna de inmediato
+                          (el llamador debe iniciar start_background_refresh)
+
         Returns:
             Lista de diccionarios con datos de cámaras
 
         Raises:
-            Exception: Si hay error en la comunicación con la API
+            Exception: Si la API falla y no hay ninguna copia válida
         """
-        try:
-            print(f"🌐 Consultando API: {self.cameras_endpoint}")
-            response = requests.get(self.cameras_endpoint, timeout=10)
-            response.raise_for_status()
+        if prefer_cache:
+            cached = self.load_cache()
+            if cached is not None:
+                logger.info(f"💾 {len(cached)} cámaras desde la caché local "
+                            f"(se refrescará desde la API en segundo plano)")
+                return cached
 
-            data = response.json()
+        try:
+            cameras, _ = self.fetch()
+            return cameras
+        except (requests.exceptions.RequestException, CameraAPIError, ValueError) as e:
+            fallback = self._cameras if self._cameras is not None else self.load_cache()
+            if fallback is None:
+                raise
+            logger.warning(f"⚠️  API no disponible ({e}); usando la última lista válida "
+                           f"({len(fallback)} cámaras)")
+            return fallback
 
-            if not data.get('success', False):
-                raise Exception(f"API retornó error: {data}")
+    def fetch(self) -> Tuple[List[Dict], bool]:
+        """
+        Consulta condicional con reintentos
 
-            cameras = data.get('data', [])
-            print(f"✅ Se obtuvieron {len(cameras)} cámaras desde la API")
+        Returns:
+            (cámaras, cambió): cambió=False si la API respondió 304
 
-            return cameras
+        Raises:
+            requests.exceptions.RequestException: API inalcanzable tras los reintentos
+            CameraAPIError: La API respondió con un error
+            ValueError: Respuesta JSON inválida
+        """
+        logger.info(f"🌐 Consultando API: {self.cameras_endpoint}")
+        response = self._request_with_retries()
 
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error conectando a la API: {e}")
-            raise
+        if response.status_code == 304 and self._cameras is not None:
+            self._stats['not_modified'] += 1
+            self._fetched_at = time.time()
+            logger.info(f"✅ Lista de cámaras sin cambios ({len(self._cameras)} cámaras)")
+            return self._cameras, False
 
+        try:
+            data = response.json()
         except json.JSONDecodeError as e:
-            print(f"❌ Error decodificando respuesta JSON: {e}")
+            logger.error(f"❌ Error decodificando respuesta JSON: {e}")
             raise
+
+        if not data.get('success', False):
+            raise CameraAPIError(f"API retornó error: {data}")
+
+        cameras = data.get('data', [])
+        self._stats['downloaded'] += 1
+        with self._lock:
+            changed = cameras != self._cameras
+            self._cameras = cameras
+            self._etag = response.headers.get('ETag')
+            self._last_modified = response.headers.get('Last-Modified')
+            self._fetched_at = time.time()
+
+        logger.info(f"✅ Se obtuvieron {len(cameras)} cámaras desde la API")
+        if changed:
+            self._save_cache()
+        return cameras, changed
+
+    def start_background_refresh(self, interval: float = 60.0,
+                                 on_update: Optional[Callable[[List[Dict]], None]] = None,
+                                 immediate: bool = True):
+        """
+        Refresca la lista periódicamente en un thread daemon
+
+        Args:
+            interval: Segundos entre consultas
+            on_update: Llamado con la nueva lista cuando cambia
+            immediate: Consultar en cuanto arranca (arranque desde la caché)
+        """
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        def run():
+            wait = 0.0 if immediate else interval
+            while not self._stop_event.wait(wait):
+                wait = interval
+                try:
+                    cameras, changed = self.fetch()
+                except Exception as e:
+                    logger.warning(f"⚠️  Refresco de cámaras falló: {e}")
+                    continue
+                if changed and on_update is not None:
+                    try:
+                        on_update(cameras)
+                    except Exception as e:
+                        logger.error(f"❌ Error aplicando lista de cámaras actualizada: {e}",
+                                     exc_info=True)
+
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(target=run, name="CameraAPIRefresh", daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self):
+        """Detiene el refresco en segundo plano y cierra la sesión"""
+        self._stop_event.set()
+        if self._refresh_thread:
+            self._refresh_thread.join(timeout=self.timeout[0] + self.timeout[1] + 1)
+            self._refresh_thread = None
+        self._session.close()
+
+    def get_stats(self) -> Dict:
+        """Contadores de peticiones, 304, reintentos y fallos"""
+        stats = dict(self._stats)
+        stats['cache_age_s'] = time.time() - self._fetched_at if self._fetched_at else None
+        return stats
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _request_with_retries(self) -> requests.Response:
+        headers = {}
+        with self._lock:
+            if self._cameras is not None:
+                if self._etag:
+                    headers['If-None-Match'] = self._etag
+                if self._last_modified:
+                    headers['If-Modified-Since'] = self._last_modified
+
+        attempt = 0
+        while True:
+            self._stats['requests'] += 1
+            retry_after = None
+            try:
+                response = self._session.get(self.cameras_endpoint, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                    return response
+                retry_after = response.headers.get('Retry-After')
+                error = requests.exceptions.HTTPError(f"HTTP {response.status_code}", response=response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            except requests.exceptions.HTTPError as e:
+                # 4xx: reintentar no ayuda
+                self._stats['failures'] += 1
+                logger.error(f"❌ Error conectando a la API: {e}")
+                raise
+
+            if attempt >= self.max_retries:
+                self._stats['failures'] += 1
+                logger.error(f"❌ Error conectando a la API: {error}")
+                raise error
+
+            delay = self._backoff(attempt, retry_after)
+            attempt += 1
+            self._stats['retries'] += 1
+            logger.warning(f"⚠️  API no responde ({error}); reintento {attempt}/{self.max_retries} "
+                           f"en {delay:.1f}s")
+            if self._stop_event.wait(delay):
+                raise error
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Backoff exponencial con jitter completo (respeta Retry-After en segundos)"""
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    # ------------------------------------------------------------------
+    # Caché en disco
+    # ------------------------------------------------------------------
+
+    def load_cache(self) -> Optional[List[Dict]]:
+        """
+        Carga la última lista válida guardada en disco
+
+        Returns:
+            Lista de cámaras, o None si no hay caché legible
+        """
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+            cameras = cached['data']
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️  Caché de cámaras ilegible ({self.cache_path}): {e}")
+            return None
+
+        with self._lock:
+            if self._cameras is None:
+                self._cameras = cameras
+                self._etag = cached.get('etag')
+                self._last_modified = cached.get('last_modified')
+                self._fetched_at = cached.get('fetched_at', 0.0)
+        self._stats['cache_loads'] += 1
+        return cameras
+
+    def _save_cache(self):
+        """Escritura atómica (tmp + fsync + rename) de la última lista válida"""
+        if not self.cache_path:
+            return
+        with self._lock:
+            payload = {
+                'fetched_at': self._fetched_at,
+                'etag': self._etag,
+                'last_modified': self._last_modified,
+                'data': self._cameras,
+            }
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(payload, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo guardar la caché de cámaras ({self.cache_path}): {e}")
@@ -0,0 +1,205 @@
+"""
+Logging asíncrono para los caminos calientes
+Los threads de las cámaras solo encolan registros; un único thread escritor
+formatea y escribe a stdout (un log driver lento ya no bloquea el streaming)
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+
+LOG_QUEUE_SIZE = 10000
+
+# Límites por tipo de línea: tipo -> (intervalo s, líneas por intervalo y cámara)
+# Se aplican a través de LogSampler
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    'status': (5.0, 1),   # Línea periódica de contadores/FPS
+    'cruce': (1.0, 10),   # Una línea por cruce
+    'error': (10.0, 1),   # Errores repetidos en el probe
+}
+
+TEXT_FORMAT = '%(message)s'
+
+# Límites activos (setup_logging puede reemplazar algunos)
+_rate_limits: Dict[str, Tuple[float, int]] = dict(DEFAULT_RATE_LIMITS)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler que nunca bloquea ni formatea en el thread que loguea
+
+    - prepare() no construye el mensaje: msg % args se evalúa en el
+      thread escritor, solo para las líneas que se escriben
+    - Si la cola está llena, el registro se descarta y se cuenta
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogSampler:
+    """
+    Muestreo de una línea repetitiva de una cámara
+
+    Decide ANTES de crear el LogRecord (crearlo es lo caro de una llamada a
+    logging): cada (tipo, cámara) admite `burst` líneas por intervalo y las
+    omitidas se cuentan e informan en la siguiente línea escrita.
+    Lo usa un solo thread (el probe de su cámara), por eso no toma lock
+    """
+
+    __slots__ = ('logger', 'level', 'interval', 'burst', '_extra',
+                 '_window_start', '_count', '_omitted')
+
+    def __init__(self, logger: logging.Logger, kind: str, camera_id=None,
+                 level: int = logging.INFO):
+        """
+        Args:
+            logger: Logger del módulo
+            kind: Tipo de línea (clave de DEFAULT_RATE_LIMITS / setup_logging(limits=...))
+            camera_id: Cámara (se adjunta al registro como campo estructurado)
+            level: Nivel de las líneas
+        """
+        self.logger = logger
+        self.level = level
+        self.interval, self.burst = _rate_limits.get(kind, (0.0, 1))
+        self._extra = {'camera_id': camera_id, 'kind': kind}
+        self._window_start = 0.0
+        self._count = 0
+        self._omitted = 0
+
+    def log(self, msg: str, *args, exc_info=False):
+        """Escribe la línea (msg % args se formatea en el thread escritor) si hay cupo"""
+        if not self.logger.isEnabledFor(self.level):
+            return
+
+        now = time.monotonic()
+        if now - self._window_start >= self.interval:
+            self._window_start = now
+            self._count = 0
+        if self._count >= self.burst:
+            self._omitted += 1
+            return
+        self._count += 1
+
+        if self._omitted:
+            msg = f"{msg} (+%d omitidas)"
+            args = args + (self._omitted,)
+            self._omitted = 0
+        self.logger.log(self.level, msg, *args, exc_info=exc_info, extra=self._extra)
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro (para log drivers que indexan campos)"""
+
+    def format(self, record) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        camera_id = getattr(record, 'camera_id', None)
+        if camera_id is not None:
+            entry['camera_id'] = camera_id
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+_state = {'pid': None, 'listener': None, 'handler': None}
+_state_lock = threading.Lock()
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                  stream=None, limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                  queue_size: int = LOG_QUEUE_SIZE) -> DroppingQueueHandler:
+    """
+    Configura el logging del proceso (idempotente por proceso)
+
+    Args:
+        level: Nivel ('DEBUG', 'INFO', ...). Default: $DS_LOG_LEVEL o INFO
+        fmt: 'text' (mensaje tal cual, como los print) o 'json'.
+             Default: $DS_LOG_FORMAT o 'text'
+        stream: Destino (default: sys.stdout)
+        limits: Límites por tipo de línea que reemplazan a DEFAULT_RATE_LIMITS
+                (aplican a los LogSampler creados después)
+        queue_size: Registros en cola antes de descartar
+
+    Returns:
+        El handler de cola (expone `dropped`)
+    """
+    with _state_lock:
+        # Un worker creado con fork hereda el estado del padre pero no su
+        # thread escritor: se reconfigura
+        if _state['pid'] == os.getpid():
+            return _state['handler']
+
+        # Sin búsqueda de archivo/línea (recorre la pila en cada llamada) ni
+        # datos de proceso que el formato no usa
+        logging._srcfile = None
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+        level = (level or os.environ.get('DS_LOG_LEVEL', 'INFO')).upper()
+        fmt = fmt or os.environ.get('DS_LOG_FORMAT', 'text')
+
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        handler = DroppingQueueHandler(log_queue)
+        if limits:
+            _rate_limits.update(limits)
+
+        root = logging.getLogger()
+        for old in list(root.handlers):
+            root.removeHandler(old)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        listener = QueueListener(log_queue, writer, respect_handler_level=False)
+        listener.start()
+
+        if _state['pid'] is None:
+            atexit.register(shutdown_logging)
+        _state.update(pid=os.getpid(), listener=listener, handler=handler)
+        return handler
+
+
+def shutdown_logging():
+    """Escribe los registros pendientes y detiene el thread escritor"""
+    with _state_lock:
+        listener = _state['listener']
+        if listener is None or _state['pid'] != os.getpid():
+            return
+        listener.stop()
+        _state['listener'] = None
+        _state['pid'] = None
+
+        handler = _state['handler']
+        if handler is not None and handler.dropped:
+            sys.stdout.write(f"⚠️  Logging: {handler.dropped} líneas descartadas (cola llena)\n")
+
+
+def get_dropped() -> int:
+    """Líneas descartadas por cola llena en este proceso"""
+    handler = _state['handler']
+    return handler.dropped if handler is not None else 0
@@ -1,30 +1,45 @@
 """
 Gestión de configuración de cámaras
+Líneas y metadata en un almacén SQLite único (config_dir/cameras.db)
 """
+import logging
 import json
+import os
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
+
+from .config_store import ConfigStore, CONFIG_DB_NAME
+
+
+logger = logging.getLogger(__name__)
 
 
 class CameraConfig:
     """Gestiona la configuración de líneas de conteo para cámaras"""
 
-    def __init__(self, config_dir: str = "deepstream_api/config"):
+    def __init__(self, config_dir: str = "deepstream_api/config", db_path: Optional[str] = None):
         """
         Inicializa el gestor de configuración
 
+        La primera vez importa los camera_<id>_line.json / camera_<id>_metadata.json
+        existentes en config_dir
+
         Args:
             config_dir: Directorio donde guardar las configuraciones
+            db_path: Archivo SQLite (default: config_dir/cameras.db)
         """
         self.config_dir = Path(config_dir)
         self.config_dir.mkdir(parents=True, exist_ok=True)
 
+        self.store = ConfigStore(db_path or self.config_dir / CONFIG_DB_NAME)
+        self.store.migrate_json_dir(self.config_dir, read_line=self._read_line_file)
+
     def get_line_config(self, camera_id: int, api_coordinates) -> Dict:
         """
         Obtiene la configuración de línea para una cámara
 
-        Primero intenta cargar desde archivo local (si el usuario la editó)
-        Si no existe, usa las coordenadas de la API
+        Primero usa la línea local (editada por el usuario: save_line_config
+        o camera_<id>_line.json). Si no existe, usa las coordenadas de la API
 
         Args:
             camera_id: ID de la cámara
@@ -33,17 +48,10 @@ class CameraConfig:
         Returns:
             Diccionario con 'start', 'end', 'direccion_entrada'
         """
-        config_file = self.config_dir / f"camera_{camera_id}_line.json"
-
-        # Intentar cargar desde archivo local
-        if config_file.exists():
-            try:
-                with open(config_file, 'r') as f:
-                    config = json.load(f)
-                print(f"📁 Configuración de línea cargada desde: {config_file}")
-                return config
-            except Exception as e:
-                print(f"⚠️  Error cargando config local: {e}, usando API")
+        local = self.get_local_line_config(camera_id)
+        if local is not None:
+            logger.info(f"📁 Usando línea local para cámara {camera_id}")
+            return local
 
         # Parsear coordenadas de la API
         try:
@@ -59,10 +67,10 @@ class CameraConfig:
                 'end': coords.get('end', [0, 0]),
                 'direccion_entrada': coords.get('direccion_entrada', 'izquierda')
             }
-            print(f"🌐 Usando coordenadas desde API para cámara {camera_id}")
+            logger.info(f"🌐 Usando coordenadas desde API para cámara {camera_id}")
             return config
         except (json.JSONDecodeError, TypeError) as e:
-            print(f"❌ Error parseando coordenadas de API: {e}")
+            logger.error(f"❌ Error parseando coordenadas de API: {e}")
             # Retornar configuración por defecto
             return {
                 'start': [0, 0],
@@ -70,6 +78,91 @@ class CameraConfig:
                 'direccion_entrada': 'izquierda'
             }
 
+    def line_config_path(self, camera_id: int) -> Path:
+        """Archivo local de línea de una cámara (puede no existir)"""
+        return self.config_dir / f"camera_{camera_id}_line.json"
+
+    def line_file_stamp(self, camera_id: int) -> Optional[str]:
+        """Firma (mtime, tamaño, inodo) del archivo de línea; None si no existe"""
+        try:
+            st = os.stat(self.line_config_path(camera_id))
+        except FileNotFoundError:
+            return None
+        return f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}"
+
+    def get_local_line_config(self, camera_id: int) -> Optional[Dict]:
+        """
+        Línea local de una cámara desde el almacén
+
+        Si camera_<id>_line.json cambió desde la última lectura (solo se compara
+        su firma), se valida y se reimporta; si se borró, vuelve a regir la API.
+        Un archivo inválido se ignora y se mantiene la línea anterior
+
+        Returns:
+            Diccionario con 'start', 'end', 'direccion_entrada', o None
+        """
+        line_config, stored_stamp = self.store.get_line(camera_id)
+        stamp = self.line_file_stamp(camera_id)
+        if stamp == stored_stamp:
+            return line_config
+
+        if stamp is None:
+            # Se borró el archivo del que venía la línea
+            self.store.set_line(camera_id, None)
+            return None
+
+        try:
+            file_config, stamp = self._read_line_file(camera_id)
+        except ValueError as e:
+            logger.warning(f"⚠️  [Cam {camera_id}] {e}; se mantiene la línea anterior")
+            return line_config
+        self.store.set_line(camera_id, file_config, stamp)
+        return file_config
+
+    def save_line_config(self, camera_id: int, start, end, direction: str = "izquierda"):
+        """
+        Guarda una línea editada (tiene prioridad sobre las coordenadas de la API)
+
+        Un servicio en ejecución la detecta (LineConfigWatcher) y la aplica en caliente
+
+        Args:
+            camera_id: ID de la cámara
+            start: Punto inicial [x, y]
+            end: Punto final [x, y]
+            direction: 'izquierda' o 'derecha'
+        """
+        line_config = {'start': list(start), 'end': list(end), 'direccion_entrada': direction}
+        self.store.set_line(camera_id, line_config, self.line_file_stamp(camera_id))
+
+    def _read_line_file(self, camera_id: int) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Lee y valida camera_<id>_line.json
+
+        Returns:
+            (línea o None si no hay archivo, firma del archivo leído)
+
+        Raises:
+            ValueError: Si el archivo está incompleto o no es JSON válido
+                        (p.ej. el editor aún lo está escribiendo)
+        """
+        stamp = self.line_file_stamp(camera_id)
+        try:
+            with open(self.line_config_path(camera_id), 'r') as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            return None, None
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"archivo de línea ilegible: {e}")
+
+        for key in ('start', 'end'):
+            point = config.get(key) if isinstance(config, dict) else None
+            if (not isinstance(point, list) or len(point) != 2
+                    or not all(isinstance(v, (int, float)) for v in point)):
+                raise ValueError(f"archivo de línea inválido: '{key}' debe ser [x, y]")
+        if config.get('direccion_entrada', 'izquierda') not in ('izquierda', 'derecha'):
+            raise ValueError("archivo de línea inválido: 'direccion_entrada' debe ser izquierda o derecha")
+        return config, stamp
+
     def get_camera_metadata(self, camera_data: Dict) -> Dict:
         """
         Extrae metadata importante de la cámara
@@ -89,16 +182,47 @@ class CameraConfig:
 
     def save_camera_metadata(self, camera_id: int, metadata: Dict):
         """
-        Guarda metadata de la cámara
+        Guarda metadata de la cámara (no escribe si no cambió)
 
         Args:
             camera_id: ID de la cámara
             metadata: Diccionario con metadata
         """
-        metadata_file = self.config_dir / f"camera_{camera_id}_metadata.json"
+        self.save_cameras_metadata([(camera_id, metadata)])
 
+    def save_cameras_metadata(self, items: Iterable[Tuple[int, Dict]]) -> int:
+        """
+        Guarda la metadata de varias cámaras en una sola transacción
+
+        Args:
+            items: Pares (camera_id, metadata)
+
+        Returns:
+            Cámaras cuya metadata cambió
+        """
         try:
-            with open(metadata_file, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            return self.store.upsert_metadata_many(items)
         except Exception as e:
-            print(f"❌ Error guardando metadata: {e}")
+            logger.error(f"❌ Error guardando metadata: {e}")
+            return 0
+
+    def get_saved_metadata(self, camera_id: int) -> Optional[Dict]:
+        """Metadata guardada de una cámara (None si no existe)"""
+        entry = self.store.get(camera_id)
+        return entry['metadata'] if entry else None
+
+    def cameras_in_zone(self, zona_id: int) -> List[Dict]:
+        """Cámaras guardadas de una zona (id, metadata, línea local, versión)"""
+        return self.store.cameras_in_zone(zona_id)
+
+    def get_version(self, camera_id: int) -> int:
+        """Versión de la configuración guardada de una cámara (sube con cada cambio)"""
+        return self.store.get_version(camera_id)
+
+    def data_version(self) -> int:
+        """Cambia cuando otro proceso modifica el almacén (ver ConfigStore.data_version)"""
+        return self.store.data_version()
+
+    def close(self):
+        """Cierra el almacén"""
+        self.store.close()
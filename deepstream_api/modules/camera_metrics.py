@@ -0,0 +1,173 @@
+"""
+Métricas por cámara escritas desde el probe
+Un único escritor (thread del probe) y lectores con snapshots consistentes (seqlock)
+"""
+import time
+from typing import Dict, Optional
+
+
+# Buckets del histograma de duración de handle_metadata (potencias de 2 en µs)
+# Bucket i cubre [2^(i+3), 2^(i+4)) µs; el primero incluye todo < 16 µs
+# y el último todo >= ~65 ms
+LATENCY_BUCKETS = 13
+LATENCY_BUCKET_BOUNDS_US = tuple(2 ** (i + 4) for i in range(LATENCY_BUCKETS))
+
+# Ventana para el cálculo de FPS y tiempo sin frames para considerar FPS = 0
+FPS_WINDOW_S = 1.0
+STALE_AFTER_S = 3.0
+
+
+def _latency_bucket(duration_us: int) -> int:
+    """Índice del bucket para una duración en µs (sin bucles ni logaritmos)"""
+    return min(LATENCY_BUCKETS - 1, max(0, duration_us.bit_length() - 4))
+
+
+class CameraMetrics:
+    """
+    Contadores de rendimiento de una cámara
+
+    - Escritura sin locks: solo el thread del probe escribe
+    - Cada escritura va entre dos incrementos de `_seq` (impar = escribiendo);
+      snapshot() reintenta hasta leer el mismo `_seq` par antes y después,
+      así los lectores nunca ven un estado a medio actualizar
+    - El FPS se calcula en el escritor sobre ventanas de FPS_WINDOW_S
+    """
+
+    def __init__(self, name):
+        """
+        Args:
+            name: Identificador (camera_id o "shared")
+        """
+        self.name = name
+        self._seq = 0
+
+        self.frames = 0
+        self.batches = 0
+        self.objects_total = 0
+        self.objects_max = 0
+        self.tracked = 0
+        self.crossings = 0
+
+        self.batch_ns_total = 0
+        self.batch_ns_max = 0
+        self.latency_hist = [0] * LATENCY_BUCKETS
+
+        self.fps = 0.0
+        self.crossings_per_min = 0.0
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+        self._window_crossings = 0
+        self.last_frame_time = 0.0
+
+    # ------------------------------------------------------------------
+    # Escritor (thread del probe)
+    # ------------------------------------------------------------------
+
+    def record_batch(self, duration_ns: int):
+        """Registra la duración de un handle_metadata"""
+        self._seq += 1
+        self.batches += 1
+        self.batch_ns_total += duration_ns
+        if duration_ns > self.batch_ns_max:
+            self.batch_ns_max = duration_ns
+        self.latency_hist[_latency_bucket(duration_ns // 1000)] += 1
+        self._seq += 1
+
+    def record_frame(self, objects: int, tracked: int, crossings: int):
+        """
+        Registra un frame procesado
+
+        Args:
+            objects: Personas detectadas en el frame
+            tracked: Tracks activos tras el frame
+            crossings: Cruces detectados en el frame
+        """
+        now = time.monotonic()
+
+        self._seq += 1
+        self.frames += 1
+        self.objects_total += objects
+        if objects > self.objects_max:
+            self.objects_max = objects
+        self.tracked = tracked
+        self.crossings += crossings
+        self.last_frame_time = now
+
+        elapsed = now - self._window_start
+        if elapsed >= FPS_WINDOW_S:
+            self.fps = (self.frames - self._window_frames) / elapsed
+            self.crossings_per_min = (self.crossings - self._window_crossings) * 60.0 / elapsed
+            self._window_start = now
+            self._window_frames = self.frames
+            self._window_crossings = self.crossings
+        self._seq += 1
+
+    # ------------------------------------------------------------------
+    # Lectores (print_summary, scrapers)
+    # ------------------------------------------------------------------
+
+    def snapshot(self, max_retries: int = 100) -> Dict:
+        """
+        Retorna una copia consistente de las métricas
+
+        Returns:
+            dict listo para serializar (JSON)
+        """
+        for _ in range(max(1, max_retries)):
+            seq = self._seq
+            # Siempre se lee: si ningún intento ve una secuencia par estable
+            # queda la última lectura en vez de nada
+            data = (self.frames, self.batches, self.objects_total, self.objects_max,
+                    self.tracked, self.crossings, self.batch_ns_total, self.batch_ns_max,
+                    list(self.latency_hist), self.fps, self.crossings_per_min,
+                    self.last_frame_time)
+
+            if not seq & 1 and seq == self._seq:
+                break
+            time.sleep(0)
+        # Tras max_retries se usa la última lectura (el escritor no debería tardar tanto)
+
+        (frames, batches, objects_total, objects_max, tracked, crossings,
+         batch_ns_total, batch_ns_max, hist, fps, crossings_per_min, last_frame_time) = data
+
+        # Sin frames recientes el FPS de la última ventana ya no es válido
+        if not last_frame_time or time.monotonic() - last_frame_time > STALE_AFTER_S:
+            fps = 0.0
+            crossings_per_min = 0.0
+
+        return {
+            'name': self.name,
+            'frames': frames,
+            'fps': fps,
+            'batches': batches,
+            'batch_ms_avg': batch_ns_total / batches / 1e6 if batches else 0.0,
+            'batch_ms_max': batch_ns_max / 1e6,
+            'batch_ms_p50': self._percentile_ms(hist, 0.50),
+            'batch_ms_p95': self._percentile_ms(hist, 0.95),
+            'batch_ms_p99': self._percentile_ms(hist, 0.99),
+            'latency_hist': hist,
+            'objects_per_frame': objects_total / frames if frames else 0.0,
+            'objects_max': objects_max,
+            'tracked': tracked,
+            'crossings': crossings,
+            'crossings_per_min': crossings_per_min,
+        }
+
+    @staticmethod
+    def _percentile_ms(hist, fraction: float) -> float:
+        """Percentil aproximado (límite superior del bucket) en ms"""
+        total = sum(hist)
+        if total == 0:
+            return 0.0
+        target = fraction * total
+        cumulative = 0
+        for index, count in enumerate(hist):
+            cumulative += count
+            if cumulative >= target:
+                return LATENCY_BUCKET_BOUNDS_US[index] / 1000.0
+        return LATENCY_BUCKET_BOUNDS_US[-1] / 1000.0
+
+
+def empty_snapshot(name: Optional[object] = None) -> Dict:
+    """Snapshot vacío para cámaras sin pipeline activo"""
+    return CameraMetrics(name).snapshot()
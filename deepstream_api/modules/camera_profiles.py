@@ -0,0 +1,351 @@
+"""
+Perfiles de rendimiento de cámara
+Un perfil declara cómo se arma el pipeline de una cámara (batching, tracker,
+sink, overlay, cadencia de logs); DeepStreamCameraServiceMaker lo construye.
+Sin dependencias de GStreamer: se puede importar desde el gestor y los scripts
+
+Además de los perfiles fijos, load_profiles() registra los de un archivo JSON
+(p.ej. el que escribe el autotuner, benchmarks/autotune.py)
+"""
+import os
+import json
+from dataclasses import dataclass, fields, replace, asdict
+from typing import Dict, List, Optional, Tuple, Union
+
+
+DEEPSTREAM_ROOT = "/opt/nvidia/deepstream/deepstream-8.0"
+TRACKER_LIB = f"{DEEPSTREAM_ROOT}/lib/libnvds_nvmultiobjecttracker.so"
+TRACKER_NVDCF_PERF = f"{DEEPSTREAM_ROOT}/samples/configs/deepstream-app/config_tracker_NvDCF_perf.yml"
+TRACKER_IOU = f"{DEEPSTREAM_ROOT}/samples/configs/deepstream-app/config_tracker_IOU.yml"
+
+# Trackers por nombre corto (archivo de perfiles, autotuner): (config, etiqueta)
+TRACKERS = {
+    'nvdcf': (TRACKER_NVDCF_PERF, "NvDCF perf"),
+    'iou': (TRACKER_IOU, "IOU"),
+}
+
+# Resolución de salida de nvstreammux cuando el perfil no la fija. Las líneas
+# de conteo (Laravel) están en este espacio; con otra resolución se escalan
+MUX_DEFAULT_SIZE = (1920, 1080)
+
+# Sinks
+SINK_DISPLAY = "display"    # ventana (render con OSD)
+SINK_DISCARD = "discard"    # fakesink: sin OSD ni render
+SINK_ENCODE = "encode"      # sin ventana + rama de grabación segmentada
+
+# Overlays (estilo de LineOverlay)
+OVERLAY_FULL = "full"
+OVERLAY_COMPACT = "compact"
+OVERLAY_NONE = "none"
+
+OVERLAY_STYLES = {
+    OVERLAY_FULL: {},
+    OVERLAY_COMPACT: {
+        'text_format': "C{camera_id}|E:{entradas} S:{salidas}|D:{dentro}",
+        'line_width': 3,
+        'font_size': 12,
+        'bg_alpha': 0.6,
+    },
+}
+
+DEFAULT_RECORD_DIR = "/app/logs/videos"
+
+# Config de nvinfer de la imagen; main.py genera la del despliegue
+# (engines/nvinfer_config.py) y la publica en NVINFER_CONFIG
+DEFAULT_INFER_CONFIG = "/app/configs/deepstream/config_infer_primary_yolo11x_b1.txt"
+
+
+def infer_config_path() -> str:
+    """Config de nvinfer activa: la generada en el arranque o la de la imagen"""
+    return os.environ.get('NVINFER_CONFIG', DEFAULT_INFER_CONFIG)
+
+
+@dataclass(frozen=True)
+class CameraProfile:
+    """
+    Configuración declarativa del pipeline de una cámara
+
+    Los campos en None dejan el valor por defecto de pyservicemaker
+    """
+    name: str
+    description: str = ""
+    tracker_config: str = TRACKER_NVDCF_PERF
+    tracker_label: str = "NvDCF perf"
+    # Batching de nvstreammux (un pipeline por cámara: 1 fuente)
+    batch_size: Optional[int] = None
+    batched_push_timeout_us: Optional[int] = None
+    mux_width: Optional[int] = None
+    mux_height: Optional[int] = None
+    # nvinfer / nvtracker
+    infer_interval: Optional[int] = None        # None = interval del config de inferencia
+    tracker_width: Optional[int] = None         # None = resolución del config del tracker
+    tracker_height: Optional[int] = None
+    # Sink
+    sink: str = SINK_DISPLAY
+    sink_sync: Optional[bool] = None
+    sink_qos: Optional[bool] = None
+    sink_async: Optional[bool] = None
+    sink_max_lateness: Optional[int] = None
+    window_width: int = 1280
+    window_height: int = 720
+    record_dir: str = DEFAULT_RECORD_DIR
+    # Tee de grabación listo desde el arranque: start_recording() sin
+    # reconstruir el pipeline (el perfil record siempre lo tiene)
+    recordable: bool = False
+    # Probe
+    overlay: str = OVERLAY_FULL
+    status_every: int = 30              # frames entre logs de estado del probe
+
+    @property
+    def draws_overlays(self) -> bool:
+        return self.overlay != OVERLAY_NONE
+
+    def overlay_style(self) -> Optional[Dict]:
+        """kwargs de LineOverlay; None = sin display-meta"""
+        if not self.draws_overlays:
+            return None
+        return dict(OVERLAY_STYLES[self.overlay])
+
+    def capture_options(self) -> Dict:
+        """Propiedades de nvstreammux para batch_capture()"""
+        options = {}
+        if self.batch_size is not None:
+            options['batch-size'] = self.batch_size
+        if self.batched_push_timeout_us is not None:
+            options['batched-push-timeout'] = self.batched_push_timeout_us
+        if self.mux_width is not None:
+            options['width'] = self.mux_width
+        if self.mux_height is not None:
+            options['height'] = self.mux_height
+        return options
+
+    def infer_options(self) -> Dict:
+        """Propiedades de nvinfer para infer()"""
+        if self.infer_interval is None:
+            return {}
+        return {'interval': self.infer_interval}
+
+    def tracker_options(self) -> Dict:
+        """Propiedades de nvtracker para track()"""
+        options = {}
+        if self.tracker_width is not None:
+            options['tracker-width'] = self.tracker_width
+        if self.tracker_height is not None:
+            options['tracker-height'] = self.tracker_height
+        return options
+
+    def mux_size(self) -> Tuple[int, int]:
+        """Resolución de salida de nvstreammux (ancho, alto)"""
+        return (self.mux_width or MUX_DEFAULT_SIZE[0], self.mux_height or MUX_DEFAULT_SIZE[1])
+
+    def scale_line(self, line_config: Dict) -> Dict:
+        """
+        Línea de conteo en el espacio de nvstreammux del perfil
+
+        Las coordenadas llegan en MUX_DEFAULT_SIZE; si el perfil usa otra
+        resolución se devuelve una copia escalada (si no, la misma línea)
+        """
+        width, height = self.mux_size()
+        if (width, height) == MUX_DEFAULT_SIZE:
+            return line_config
+        sx, sy = width / MUX_DEFAULT_SIZE[0], height / MUX_DEFAULT_SIZE[1]
+        scaled = dict(line_config)
+        for key in ('start', 'end'):
+            x, y = line_config[key]
+            scaled[key] = [x * sx, y * sy]
+        return scaled
+
+    def sink_options(self) -> Dict:
+        """Propiedades del sink para render()"""
+        options = {}
+        if self.sink_sync is not None:
+            options['sync'] = self.sink_sync
+        if self.sink_qos is not None:
+            options['qos'] = self.sink_qos
+        if self.sink_async is not None:
+            options['async_handling'] = self.sink_async
+        if self.sink_max_lateness is not None:
+            options['max_lateness'] = self.sink_max_lateness
+        return options
+
+    def without_display(self) -> 'CameraProfile':
+        """Variante sin ventana (fakesink, sin overlay); el resto del perfil se conserva"""
+        if self.sink != SINK_DISPLAY:
+            return self
+        return replace(self, name=f"{self.name}+headless", sink=SINK_DISCARD,
+                       overlay=OVERLAY_NONE, sink_sync=None, sink_qos=None,
+                       sink_async=None, sink_max_lateness=None)
+
+    def derive(self, name: str, **changes) -> 'CameraProfile':
+        """
+        Perfil derivado de este con otros campos (archivo de perfiles, autotuner)
+
+        La descripción se regenera con lo que cambia respecto a la base, salvo
+        que se pase una explícita: la de la base (p.ej. "tracker NvDCF") dejaría
+        de ser cierta
+        """
+        profile = replace(self, name=name, **changes)
+        if 'description' in changes:
+            return profile
+        changed = []
+        if profile.tracker_label != self.tracker_label:
+            changed.append(f"tracker {profile.tracker_label}")
+        if profile.batch_size != self.batch_size:
+            changed.append(f"batch {profile.batch_size if profile.batch_size is not None else 'default'}")
+        if profile.batched_push_timeout_us != self.batched_push_timeout_us:
+            changed.append(f"push-timeout {profile.batched_push_timeout_us}us")
+        if profile.mux_size() != self.mux_size():
+            changed.append("mux {}x{}".format(*profile.mux_size()))
+        if profile.infer_interval != self.infer_interval:
+            changed.append(f"interval {profile.infer_interval}")
+        if (profile.tracker_width, profile.tracker_height) != (self.tracker_width, self.tracker_height):
+            changed.append(f"tracker {profile.tracker_width or '-'}x{profile.tracker_height or '-'}")
+        if profile.sink != self.sink:
+            changed.append(f"sink {profile.sink}")
+        if not changed:
+            return profile
+        return replace(profile, description=f"{self.name} con {', '.join(changed)}")
+
+    def describe(self) -> str:
+        """Resumen de una línea para logs"""
+        batching = f"batch {self.batch_size}" if self.batch_size is not None else "batch default"
+        extras = []
+        if self.mux_width is not None or self.mux_height is not None:
+            extras.append("mux {}x{}".format(*self.mux_size()))
+        if self.infer_interval is not None:
+            extras.append(f"interval {self.infer_interval}")
+        if self.tracker_width is not None or self.tracker_height is not None:
+            extras.append(f"tracker {self.tracker_width or '-'}x{self.tracker_height or '-'}")
+        if self.recordable:
+            extras.append("grabable")
+        extra = f", {', '.join(extras)}" if extras else ""
+        return (f"{self.name}: tracker {self.tracker_label}, {batching}{extra}, sink {self.sink}, "
+                f"overlay {self.overlay}, logs cada {self.status_every} frames")
+
+    def to_dict(self) -> Dict:
+        """Campos del perfil (serializable a JSON)"""
+        return asdict(self)
+
+
+PROFILES: Dict[str, CameraProfile] = {
+    profile.name: profile for profile in (
+        CameraProfile(
+            name="throughput",
+            description="Ventana con OSD, tracker NvDCF (máxima precisión)",
+        ),
+        CameraProfile(
+            name="low-latency",
+            description="Ventana sin esperar al reloj, tracker IOU, batch 1",
+            tracker_config=TRACKER_IOU,
+            tracker_label="IOU",
+            batch_size=1,           # procesa cada frame sin esperar a llenar el batch
+            sink_sync=False,        # no esperar vsync: muestra cada frame al llegar
+            sink_qos=False,         # sin throttling por QoS
+            sink_async=False,       # no esperar estado ASYNC
+            sink_max_lateness=-1,   # no descartar frames tardíos
+            overlay=OVERLAY_COMPACT,
+            status_every=60,
+        ),
+        CameraProfile(
+            name="headless",
+            description="Sin ventana ni OSD (fakesink), tracker NvDCF",
+            sink=SINK_DISCARD,
+            overlay=OVERLAY_NONE,
+        ),
+        CameraProfile(
+            name="record",
+            description="Graba el video con OSD en segmentos (rama de grabación), tracker NvDCF",
+            sink=SINK_ENCODE,
+            status_every=150,
+        ),
+    )
+}
+
+DEFAULT_PROFILE = "throughput"
+
+
+def get_profile(name: str) -> CameraProfile:
+    """
+    Perfil registrado por nombre
+
+    Raises:
+        ValueError: si el nombre no existe
+    """
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Perfil desconocido: {name!r} (disponibles: {', '.join(PROFILES)})") from None
+
+
+def resolve_profile(profile: Union[str, CameraProfile, None] = None,
+                    headless: bool = False) -> CameraProfile:
+    """
+    Normaliza el perfil de una cámara
+
+    Args:
+        profile: Nombre, CameraProfile o None (throughput, o headless si headless=True)
+        headless: Sin ventana: un perfil con display pasa a su variante sin display
+
+    Returns:
+        CameraProfile
+    """
+    if profile is None:
+        profile = "headless" if headless else DEFAULT_PROFILE
+    if isinstance(profile, str):
+        profile = get_profile(profile)
+    if headless:
+        profile = profile.without_display()
+    return profile
+
+
+def profile_from_dict(name: str, entry: Dict) -> CameraProfile:
+    """
+    Perfil a partir de una entrada de un archivo de perfiles
+
+    La entrada puede heredar de un perfil registrado ('base', default
+    throughput) y nombrar el tracker por su nombre corto ('tracker': nvdcf/iou);
+    el resto son campos de CameraProfile
+
+    Raises:
+        ValueError: base, tracker o campos desconocidos
+    """
+    entry = dict(entry)
+    base = get_profile(entry.pop('base', DEFAULT_PROFILE))
+    tracker = entry.pop('tracker', None)
+    if tracker is not None:
+        if tracker not in TRACKERS:
+            raise ValueError(f"Tracker desconocido en el perfil {name!r}: {tracker!r} "
+                             f"(disponibles: {', '.join(TRACKERS)})")
+        entry['tracker_config'], entry['tracker_label'] = TRACKERS[tracker]
+    entry.pop('name', None)
+    known = {field.name for field in fields(CameraProfile)}
+    unknown = sorted(set(entry) - known)
+    if unknown:
+        raise ValueError(f"Campos desconocidos en el perfil {name!r}: {', '.join(unknown)}")
+    return base.derive(name, **entry)
+
+
+def load_profiles(path: str, register: bool = True) -> List[CameraProfile]:
+    """
+    Carga los perfiles de un archivo JSON ({"profiles": {nombre: entrada}})
+
+    Args:
+        path: Archivo de perfiles (p.ej. el que escribe benchmarks/autotune.py)
+        register: Si True, los agrega a PROFILES (un nombre existente se reemplaza)
+
+    Returns:
+        Perfiles cargados, en el orden del archivo
+
+    Raises:
+        ValueError: archivo sin 'profiles' o entradas inválidas
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get('profiles') if isinstance(data, dict) else None
+    if not isinstance(entries, dict) or not entries:
+        raise ValueError(f"{path}: se espera un objeto 'profiles' con al menos un perfil")
+    loaded = [profile_from_dict(name, entry) for name, entry in entries.items()]
+    if register:
+        for profile in loaded:
+            PROFILES[profile.name] = profile
+    return loaded
@@ -0,0 +1,314 @@
+"""
+Supervisor de cámaras: reconexión automática con backoff y circuit breaker
+Detecta pipelines que terminan (EOS, error del bus, worker caído) o que dejan
+de recibir frames, y reinicia solo la cámara afectada
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional
+
+from .rtsp_probe import probe_rtsp
+
+
+logger = logging.getLogger(__name__)
+
+
+# Estados de una cámara supervisada
+RUNNING = "running"
+BACKOFF = "backoff"     # caída, esperando el próximo intento
+OPEN = "open"           # circuito abierto: demasiadas caídas, en enfriamiento
+
+
+@dataclass
+class CameraHealth:
+    """Historial de caídas y reinicios de una cámara"""
+    camera_id: int
+    state: str = RUNNING
+    restarts: int = 0                   # pipelines reconstruidos
+    failures: int = 0                   # caídas + intentos fallidos
+    consecutive_failures: int = 0       # define el backoff; vuelve a 0 tras `stable_after`
+    last_exit: Optional[str] = None
+    downtime_s: float = 0.0             # caídas ya terminadas
+    down_since: Optional[float] = None  # time.monotonic() de la caída en curso
+    up_since: Optional[float] = None
+    next_attempt: float = 0.0
+    recent_failures: Deque[float] = field(default_factory=deque)
+
+    # Estado interno del supervisor
+    camera: object = field(default=None, repr=False)
+    supervised: bool = False            # la cámara llegó a correr (si no, es del StartupScheduler)
+    restarting: bool = False
+    last_frames: int = -1
+    last_progress: float = 0.0
+
+    def as_dict(self, now: float) -> Dict:
+        """Vista serializable (downtime incluye la caída en curso)"""
+        current = now - self.down_since if self.down_since is not None else 0.0
+        return {
+            'state': self.state if self.supervised or self.down_since is not None else "idle",
+            'restarts': self.restarts,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_exit': self.last_exit,
+            'downtime_s': round(self.downtime_s + current, 1),
+            'down_for_s': round(current, 1),
+            'next_attempt_in_s': round(max(0.0, self.next_attempt - now), 1) if self.state != RUNNING else 0.0,
+        }
+
+
+class CameraSupervisor:
+    """
+    Reinicia las cámaras caídas de un MultiCameraManager
+
+    - Caída: el pipeline terminó solo (exit_reason 'eos', 'error: ...',
+      'worker: ...') o no avanzó ningún frame en `stall_timeout` segundos
+    - Las paradas intencionales (exit_reason 'stopped') no se reinician
+    - Antes de reconstruir el pipeline se sondea el RTSP: una cámara que
+      sigue caída cuesta un connect, no una carga de engine en la GPU
+    - Backoff exponencial con jitter: base_delay * 2^n, entre 50% y 100%
+      de ese valor, hasta max_delay
+    - Circuit breaker: `max_failures` caídas en `failure_window` segundos
+      abren el circuito por `cooldown` segundos; luego se hace un solo
+      intento (half-open) y, si vuelve a caer, se abre de nuevo
+    - El backoff vuelve a cero cuando la cámara corre `stable_after` segundos
+    - Los contadores se conservan: la cámara nueva arranca con los de la
+      anterior y en su misma fila (MultiCameraManager.restart_camera)
+    - Las cámaras que nunca llegaron a correr son del StartupScheduler
+    """
+
+    def __init__(self, manager, interval: float = 1.0, stall_timeout: float = 30.0,
+                 base_delay: float = 2.0, max_delay: float = 120.0,
+                 max_failures: int = 5, failure_window: float = 600.0, cooldown: float = 900.0,
+                 stable_after: float = 60.0, probe_timeout: float = 3.0, max_concurrent: int = 2):
+        """
+        Args:
+            manager: MultiCameraManager (modo thread o process)
+            interval: Segundos entre revisiones
+            stall_timeout: Segundos sin frames nuevos para considerar caída la cámara
+            base_delay: Espera antes del primer reintento (s)
+            max_delay: Espera máxima entre reintentos (s)
+            max_failures: Caídas en failure_window que abren el circuito
+            failure_window: Ventana de conteo de caídas (s)
+            cooldown: Tiempo con el circuito abierto (s)
+            stable_after: Segundos corriendo para dar la cámara por recuperada
+            probe_timeout: Timeout del sondeo RTSP previo al reinicio (s)
+            max_concurrent: Reinicios simultáneos
+        """
+        self.manager = manager
+        self.interval = interval
+        self.stall_timeout = stall_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_failures = max_failures
+        self.failure_window = failure_window
+        self.cooldown = cooldown
+        self.stable_after = stable_after
+        self.probe_timeout = probe_timeout
+        self.max_concurrent = max(1, max_concurrent)
+
+        self._health: Dict[int, CameraHealth] = {}
+        self._lock = threading.Lock()
+        # Pool de reinicios: se crea en start() y se cierra en stop()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Revisión periódica
+    # ------------------------------------------------------------------
+
+    def check(self):
+        """Revisa todas las cámaras una vez y agenda los reinicios que tocan"""
+        now = time.monotonic()
+        with self.manager._cameras_lock:
+            cameras = dict(self.manager.cameras)
+
+        with self._lock:
+            # Cámaras quitadas del gestor: se olvidan
+            for camera_id in [c for c in self._health if c not in cameras]:
+                del self._health[camera_id]
+
+            for camera_id, camera in cameras.items():
+                health = self._health.get(camera_id)
+                if health is None:
+                    health = self._health[camera_id] = CameraHealth(camera_id, camera=camera)
+                elif health.camera is not camera:
+                    if health.restarting:
+                        continue
+                    # Reemplazada desde fuera (p.ej. FleetReconciler): se supervisa cuando corra
+                    health.camera, health.supervised = camera, False
+                if health.restarting:
+                    continue
+
+                if camera.is_alive():
+                    self._check_running(health, camera, now)
+                elif health.supervised:
+                    self._check_down(health, camera, now)
+
+    def _check_running(self, health: CameraHealth, camera, now: float):
+        """Cámara con pipeline vivo: recuperación, estabilidad y frames congelados"""
+        frames = camera.get_metrics().get('frames', 0)
+        if not health.supervised:
+            health.supervised = True
+            health.up_since = now
+            health.last_frames, health.last_progress = frames, now
+            return
+
+        if health.up_since is None:
+            # Congelada y ya contada como caída: se reinicia al terminar el backoff,
+            # salvo que los frames vuelvan solos
+            if frames == health.last_frames:
+                self._schedule(health, camera, now, stop_first=True)
+                return
+            health.up_since = now
+
+        if frames != health.last_frames:
+            first_sample = health.last_frames < 0
+            health.last_frames, health.last_progress = frames, now
+            if health.down_since is not None and not first_sample:
+                # Solo cuenta como recuperada cuando vuelven a llegar frames
+                outage = now - health.down_since
+                health.downtime_s += outage
+                health.down_since = None
+                health.state = RUNNING
+                logger.info(f"💚 [Cam {health.camera_id}] Recuperada tras {outage:.1f}s "
+                            f"(reinicios: {health.restarts})")
+
+        if (health.consecutive_failures and health.down_since is None
+                and now - health.up_since >= self.stable_after):
+            health.consecutive_failures = 0
+
+        if now - health.last_progress >= self.stall_timeout:
+            self._register_failure(health, f"stall: sin frames en {now - health.last_progress:.0f}s", now)
+            self._schedule(health, camera, now, stop_first=True)
+
+    def _check_down(self, health: CameraHealth, camera, now: float):
+        """Cámara que llegó a correr y ya no corre"""
+        reason = getattr(camera, 'exit_reason', None) or "exit"
+        if reason == "stopped" and health.down_since is None:
+            # Parada intencional (la detuvo el supervisor solo si ya estaba caída)
+            return
+        if health.down_since is None or health.up_since is not None:
+            # Caída nueva (o el reinicio anterior volvió a caer)
+            self._register_failure(health, reason, now)
+        self._schedule(health, camera, now)
+
+    def _register_failure(self, health: CameraHealth, reason: str, now: float):
+        if health.down_since is None:
+            health.down_since = now
+        health.up_since = None
+        health.last_exit = reason
+        health.failures += 1
+        health.consecutive_failures += 1
+
+        health.recent_failures.append(now)
+        while health.recent_failures and now - health.recent_failures[0] > self.failure_window:
+            health.recent_failures.popleft()
+
+        # Con el circuito abierto solo se hace un intento: si falla, se vuelve a abrir
+        if health.state == OPEN or len(health.recent_failures) >= self.max_failures:
+            health.state = OPEN
+            health.next_attempt = now + self.cooldown
+            health.recent_failures.clear()
+            logger.error(f"⛔ [Cam {health.camera_id}] {self.max_failures} caídas en "
+                         f"{self.failure_window:.0f}s ({reason}); circuito abierto por "
+                         f"{self.cooldown:.0f}s")
+        else:
+            delay = min(self.base_delay * (2 ** (health.consecutive_failures - 1)), self.max_delay)
+            delay *= random.uniform(0.5, 1.0)
+            health.state = BACKOFF
+            health.next_attempt = now + delay
+            logger.warning(f"⚠️  [Cam {health.camera_id}] Caída ({reason}); "
+                           f"reintento {health.consecutive_failures} en {delay:.1f}s")
+
+    def _schedule(self, health: CameraHealth, camera, now: float, stop_first: bool = False):
+        """Lanza el reinicio si ya pasó el backoff/enfriamiento (con self._lock tomado)"""
+        if now < health.next_attempt or self._stop_event.is_set() or self._executor is None:
+            return
+        if health.state == OPEN:
+            logger.info(f"🔌 [Cam {health.camera_id}] Fin del enfriamiento, intento de prueba")
+        health.restarting = True
+        self._executor.submit(self._restart, health, camera, stop_first)
+
+    # ------------------------------------------------------------------
+    # Reinicio
+    # ------------------------------------------------------------------
+
+    def _restart(self, health: CameraHealth, camera, stop_first: bool):
+        """Sondea y, si responde, reconstruye la cámara (en el pool de reinicios)"""
+        camera_id = health.camera_id
+        try:
+            if stop_first:
+                self.manager.stop_camera(camera_id)
+
+            probe = probe_rtsp(camera.rtsp_uri, timeout=self.probe_timeout)
+            if not probe.ok:
+                with self._lock:
+                    self._register_failure(health, f"rtsp {probe.stage}: {probe.error}", time.monotonic())
+                return
+
+            restarted = self.manager.restart_camera(camera_id, camera.camera_name, camera.rtsp_uri,
+                                                    camera.line_config, expected=camera)
+            with self._lock:
+                health.camera = self.manager.cameras.get(camera_id)
+                if restarted:
+                    health.restarts += 1
+                    # El tiempo de caída sigue corriendo hasta el primer frame
+                    health.up_since = time.monotonic()
+                    health.last_frames, health.last_progress = -1, time.monotonic()
+                    logger.info(f"🔄 [Cam {camera_id}] Pipeline reconstruido "
+                                f"(reinicio {health.restarts})")
+                elif health.camera is not None:
+                    self._register_failure(health, "restart falló", time.monotonic())
+        except Exception as e:
+            logger.error(f"❌ [Cam {camera_id}] Error reiniciando: {e}", exc_info=True)
+            with self._lock:
+                self._register_failure(health, f"restart: {e}", time.monotonic())
+        finally:
+            health.restarting = False
+
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[int, Dict]:
+        """{camera_id: {'state', 'restarts', 'failures', 'downtime_s', ...}}"""
+        now = time.monotonic()
+        with self._lock:
+            return {camera_id: health.as_dict(now) for camera_id, health in self._health.items()}
+
+    def start(self):
+        """Revisa las cámaras cada `interval` segundos en un thread daemon"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def run():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.check()
+                except Exception as e:
+                    logger.error(f"❌ Error supervisando cámaras: {e}", exc_info=True)
+
+        self._stop_event.clear()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                                thread_name_prefix="CameraRestart")
+        self._thread = threading.Thread(target=run, name="CameraSupervisor", daemon=True)
+        self._thread.start()
+        logger.info(f"🩺 Supervisor de cámaras activo (sin frames {self.stall_timeout:g}s = caída)")
+
+    def stop(self, timeout: float = 5.0):
+        """Detiene la supervisión (los reinicios en curso terminan solos)"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        with self._lock:
+            # Con el lock: check() no puede estar agendando en el pool que se cierra
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
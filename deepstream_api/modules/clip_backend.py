@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Backend DeepStream del autotuner (modules/pipeline_autotuner.py)
+Ejecuta un clip grabado (file://) con el pipeline de un CameraProfile y el
+LineCrossingCounter real, sin sink visible y a máxima velocidad
+
+Latencia extremo a extremo por frame: desde que el buffer entra en
+nvstreammux (probe GStreamer en sus pads sink) hasta que el frame llega al
+probe de conteo, después del tracker. Requiere GPU y Gst.init() previo
+"""
+
+import logging
+import threading
+import time
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+from pyservicemaker import Pipeline, Flow, Probe, RenderMode
+
+from modules.deepstream_camera_sm import LineCrossingCounter
+from modules.camera_profiles import TRACKER_LIB
+from modules.pipeline_autotuner import ClipRun
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INFER_CONFIG = "/app/configs/deepstream/config_infer_primary_yolo11x_b1.txt"
+
+
+class TimedLineCrossingCounter(LineCrossingCounter):
+    """LineCrossingCounter que además mide la latencia de cada frame"""
+
+    def __init__(self, camera_name, line_config):
+        super().__init__(0, camera_name, line_config, draw_overlays=False, status_every=10 ** 9)
+        self._arrivals = {}          # pts -> perf_counter al entrar en nvstreammux
+        self._arrivals_lock = threading.Lock()
+        self.latencies_ms = []
+
+    def on_arrival(self, pad, info):
+        """Probe GStreamer en los pads sink de nvstreammux"""
+        buffer = info.get_buffer()
+        if buffer is not None:
+            with self._arrivals_lock:
+                self._arrivals[buffer.pts] = time.perf_counter()
+        return Gst.PadProbeReturn.OK
+
+    def process_frame(self, batch_meta, frame_meta):
+        with self._arrivals_lock:
+            arrived = self._arrivals.pop(frame_meta.buffer_pts, None)
+        if arrived is not None:
+            self.latencies_ms.append((time.perf_counter() - arrived) * 1000.0)
+        super().process_frame(batch_meta, frame_meta)
+
+
+class DeepStreamClipBackend:
+    """Backend real: un pipeline pyservicemaker por clip y perfil"""
+
+    name = "deepstream"
+
+    def __init__(self, config_file=DEFAULT_INFER_CONFIG):
+        """
+        Args:
+            config_file: Config de nvinfer (el engine debe admitir los batch-size del barrido)
+        """
+        self.config_file = config_file
+
+    def run_clip(self, clip, profile):
+        """
+        Ejecuta el clip hasta EOS
+
+        Returns:
+            ClipRun con frames, tiempo de pared, latencias y cruces contados
+        """
+        pipeline = Pipeline(f"autotune-{clip.name}")
+        counter = TimedLineCrossingCounter(clip.name, profile.scale_line(clip.line_config))
+        flow = (Flow(pipeline)
+                .batch_capture([clip.uri], **profile.capture_options())
+                .infer(self.config_file, **profile.infer_options())
+                .track(ll_config_file=profile.tracker_config, ll_lib_file=TRACKER_LIB,
+                       **profile.tracker_options())
+                .attach(what=Probe("autotune-line-crossing", counter))
+                .render(mode=RenderMode.DISCARD))
+        self._watch_arrivals(pipeline, counter)
+
+        t0 = time.perf_counter()
+        flow()  # Blocking hasta EOS
+        elapsed = time.perf_counter() - t0
+
+        logger.info(f"🎞️  {clip.name} [{profile.describe()}]: {counter.frame_count} frames "
+                    f"en {elapsed:.1f}s, E:{counter.contadores['entradas']} S:{counter.contadores['salidas']}")
+        return ClipRun(frames=counter.frame_count, elapsed_s=elapsed,
+                       latencies_ms=counter.latencies_ms,
+                       entradas=counter.contadores['entradas'],
+                       salidas=counter.contadores['salidas'])
+
+    @staticmethod
+    def _watch_arrivals(pipeline, counter):
+        """Probe de llegada en los pads sink de nvstreammux (los presentes y los que se pidan)"""
+        def add_probe(pad):
+            if pad.get_direction() == Gst.PadDirection.SINK:
+                pad.add_probe(Gst.PadProbeType.BUFFER, counter.on_arrival)
+
+        for element in pipeline.pipeline.iterate_recurse():
+            factory = element.get_factory()
+            if factory is not None and factory.get_name() == 'nvstreammux':
+                for pad in element.sinkpads:
+                    add_probe(pad)
+                element.connect("pad-added", lambda _element, pad: add_probe(pad))
+                return
+        logger.warning("⚠️  nvstreammux no encontrado: sin medición de latencia")
@@ -0,0 +1,293 @@
+"""
+Almacén único de configuración de cámaras (SQLite en modo WAL)
+Líneas de conteo, metadata y una versión por cámara en un solo archivo indexado
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+CONFIG_DB_NAME = "cameras.db"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cameras (
+    camera_id   INTEGER PRIMARY KEY,
+    zona_id     INTEGER,
+    metadata    TEXT,
+    line        TEXT,
+    line_stamp  TEXT,
+    version     INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_cameras_zona ON cameras (zona_id);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Solo se escribe si la metadata cambió (la versión sube con cada cambio real)
+_UPSERT_METADATA = """
+INSERT INTO cameras (camera_id, zona_id, metadata, version, updated_at)
+VALUES (?, ?, ?, 1, ?)
+ON CONFLICT (camera_id) DO UPDATE SET
+    zona_id = excluded.zona_id,
+    metadata = excluded.metadata,
+    version = version + 1,
+    updated_at = excluded.updated_at
+WHERE metadata IS NOT excluded.metadata
+"""
+
+_UPSERT_LINE = """
+INSERT INTO cameras (camera_id, line, line_stamp, version, updated_at)
+VALUES (?, ?, ?, 1, ?)
+ON CONFLICT (camera_id) DO UPDATE SET
+    version = version + (line IS NOT excluded.line),
+    line = excluded.line,
+    line_stamp = excluded.line_stamp,
+    updated_at = excluded.updated_at
+WHERE line IS NOT excluded.line OR line_stamp IS NOT excluded.line_stamp
+"""
+
+_JSON_FILE = re.compile(r'^camera_(\d+)_(line|metadata)\.json$')
+
+
+def _dumps(value) -> Optional[str]:
+    """JSON canónico (claves ordenadas) para comparar sin falsos cambios"""
+    if value is None:
+        return None
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+
+class ConfigStore:
+    """
+    Configuración de todas las cámaras en una base SQLite
+
+    - WAL + synchronous=NORMAL: lecturas concurrentes con la escritura y un
+      solo fsync por checkpoint, no por cámara
+    - upsert_metadata_many() escribe un lote en una transacción y omite las
+      cámaras cuya metadata no cambió
+    - Búsqueda indexada por camera_id (clave primaria) y por zona_id
+    - Una conexión compartida entre threads, serializada con un lock
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Archivo de la base (se crea si no existe)
+        """
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def upsert_metadata_many(self, items: Iterable[Tuple[int, Dict]]) -> int:
+        """
+        Guarda la metadata de varias cámaras en una sola transacción
+
+        Args:
+            items: Pares (camera_id, metadata); metadata['zona_id'] se indexa
+
+        Returns:
+            Cámaras cuya metadata cambió (las demás no se tocan)
+        """
+        now = time.time()
+        rows = [(camera_id, metadata.get('zona_id'), _dumps(metadata), now)
+                for camera_id, metadata in items]
+        if not rows:
+            return 0
+        with self._lock:
+            before = self._conn.total_changes
+            with self._transaction():
+                self._conn.executemany(_UPSERT_METADATA, rows)
+            return self._conn.total_changes - before
+
+    def set_line(self, camera_id: int, line_config: Optional[Dict],
+                 stamp: Optional[str] = None) -> bool:
+        """
+        Guarda (o borra, con None) la línea local de una cámara
+
+        Args:
+            camera_id: ID de la cámara
+            line_config: dict con 'start', 'end', 'direccion_entrada'
+            stamp: Firma del archivo camera_<id>_line.json de origen (None si
+                   la línea no viene de un archivo)
+
+        Returns:
+            True si algo cambió
+        """
+        with self._lock:
+            before = self._conn.total_changes
+            with self._transaction():
+                self._conn.execute(_UPSERT_LINE, (camera_id, _dumps(line_config), stamp, time.time()))
+            return self._conn.total_changes != before
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def get(self, camera_id: int) -> Optional[Dict]:
+        """
+        Fila de una cámara
+
+        Returns:
+            {'camera_id', 'zona_id', 'metadata', 'line', 'line_stamp', 'version',
+             'updated_at'} con metadata/line decodificados, o None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM cameras WHERE camera_id = ?",
+                                     (camera_id,)).fetchone()
+        return self._decode(row) if row is not None else None
+
+    def get_line(self, camera_id: int) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Returns:
+            (línea local o None, firma del archivo de origen o None)
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT line, line_stamp FROM cameras WHERE camera_id = ?",
+                                     (camera_id,)).fetchone()
+        if row is None or row['line'] is None:
+            return None, row['line_stamp'] if row is not None else None
+        return json.loads(row['line']), row['line_stamp']
+
+    def get_version(self, camera_id: int) -> int:
+        """Versión de la configuración de una cámara (0 si no existe)"""
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM cameras WHERE camera_id = ?",
+                                     (camera_id,)).fetchone()
+        return row['version'] if row is not None else 0
+
+    def cameras_in_zone(self, zona_id: int) -> List[Dict]:
+        """Cámaras de una zona (búsqueda por índice)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM cameras WHERE zona_id = ? ORDER BY camera_id",
+                                      (zona_id,)).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def data_version(self) -> int:
+        """
+        Cambia cuando OTRA conexión (p.ej. una herramienta de edición) confirma
+        una escritura: permite detectar cambios externos con una sola consulta
+        """
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict:
+        entry = dict(row)
+        entry['metadata'] = json.loads(entry['metadata']) if entry['metadata'] else None
+        entry['line'] = json.loads(entry['line']) if entry['line'] else None
+        return entry
+
+    # ------------------------------------------------------------------
+    # Migración desde los archivos JSON por cámara
+    # ------------------------------------------------------------------
+
+    def migrate_json_dir(self, config_dir: str,
+                         read_line: Optional[Callable[[int], Tuple[Optional[Dict], Optional[str]]]] = None) -> int:
+        """
+        Importa una única vez camera_<id>_line.json y camera_<id>_metadata.json
+
+        Los archivos no se borran; los de línea siguen sirviendo para editar
+        la línea a mano (CameraConfig los reimporta cuando cambian)
+
+        Args:
+            config_dir: Directorio con los JSON
+            read_line: camera_id -> (línea validada, firma del archivo); lanza
+                       ValueError si el archivo es inválido
+
+        Returns:
+            Archivos importados (0 si ya se migró antes)
+        """
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM store_meta WHERE key = 'json_migrated'").fetchone()
+        if done is not None:
+            return 0
+
+        metadata_rows = []
+        line_rows = []
+        for path in sorted(Path(config_dir).glob('camera_*_*.json')):
+            match = _JSON_FILE.match(path.name)
+            if not match:
+                continue
+            camera_id, kind = int(match.group(1)), match.group(2)
+            try:
+                if kind == 'line' and read_line is not None:
+                    line_config, stamp = read_line(camera_id)
+                    if line_config is not None:
+                        line_rows.append((camera_id, line_config, stamp))
+                    continue
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️  No se pudo migrar {path}: {e}")
+                continue
+            if kind == 'metadata':
+                metadata_rows.append((camera_id, data))
+            else:
+                line_rows.append((camera_id, data, None))
+
+        now = time.time()
+        with self._lock:
+            with self._transaction():
+                self._conn.executemany(_UPSERT_METADATA, [
+                    (camera_id, data.get('zona_id'), _dumps(data), now) for camera_id, data in metadata_rows
+                ])
+                self._conn.executemany(_UPSERT_LINE, [
+                    (camera_id, _dumps(line_config), stamp, now) for camera_id, line_config, stamp in line_rows
+                ])
+                self._conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('json_migrated', ?)",
+                                   (str(now),))
+
+        imported = len(metadata_rows) + len(line_rows)
+        if imported:
+            logger.info(f"📦 Configuración migrada a {self.path}: {len(line_rows)} líneas, "
+                        f"{len(metadata_rows)} metadata")
+        return imported
+
+    # ------------------------------------------------------------------
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def close(self):
+        """Cierra la conexión (hace checkpoint del WAL)"""
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK (la conexión está en modo autocommit)"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
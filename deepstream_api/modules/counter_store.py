@@ -0,0 +1,298 @@
+"""
+Persistencia de contadores por cámara a prueba de caídas
+Log binario append-only (registros de tamaño fijo) + snapshots compactos
+"""
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+# Registro del log: seq, timestamp, código de cruce, entradas, salidas, dentro, crc32
+WAL_RECORD = struct.Struct('<QdBIII')
+WAL_RECORD_SIZE = WAL_RECORD.size + 4
+
+# Snapshot: magic, versión, seq, timestamp, entradas, salidas, dentro, crc32
+SNAPSHOT_MAGIC = b'DSCN'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_RECORD = struct.Struct('<4sHQdIII')
+
+DEFAULT_COUNTER_DIR = "/app/output/counters"
+
+
+def _pack_with_crc(record: struct.Struct, *values) -> bytes:
+    """Empaqueta un registro y le agrega su CRC32"""
+    data = record.pack(*values)
+    return data + struct.pack('<I', zlib.crc32(data))
+
+
+def _unpack_with_crc(record: struct.Struct, data: bytes) -> Optional[tuple]:
+    """Desempaqueta un registro validando su CRC32 (None si está corrupto)"""
+    if len(data) != record.size + 4:
+        return None
+    body, crc = data[:record.size], struct.unpack('<I', data[record.size:])[0]
+    if zlib.crc32(body) != crc:
+        return None
+    return record.unpack(body)
+
+
+class CounterStore:
+    """
+    Persistencia de `contadores` de una cámara
+
+    - record() solo agrega bytes a un buffer en memoria (camino del probe)
+    - Un thread escribe el buffer y hace fsync cada `flush_interval` segundos
+      (un fsync por grupo de eventos, no por evento)
+    - Cada `snapshot_interval` segundos se escribe un snapshot atómico
+      (tmp + fsync + os.replace) y se trunca el log
+    - restore() lee solo el último snapshot y la cola del log; un registro
+      final incompleto o con CRC inválido (escritura cortada) se descarta
+    """
+
+    def __init__(self, camera_id, base_dir: str = DEFAULT_COUNTER_DIR,
+                 flush_interval: float = 0.5, snapshot_interval: float = 60.0):
+        """
+        Inicializa el almacén (no abre archivos hasta restore/start)
+
+        Args:
+            camera_id: ID de la cámara (define los nombres de archivo)
+            base_dir: Directorio de persistencia
+            flush_interval: Segundos entre escrituras+fsync del log
+            snapshot_interval: Segundos entre snapshots (y truncado del log)
+        """
+        self.camera_id = camera_id
+        self.base_dir = base_dir
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+
+        self.wal_path = os.path.join(base_dir, f"camera_{camera_id}.wal")
+        self.snapshot_path = os.path.join(base_dir, f"camera_{camera_id}.snap")
+
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._seq = 0
+        self._state = (0, 0, 0)  # (entradas, salidas, dentro) del último registro
+        self._flushed = (0, (0, 0, 0))  # (seq, estado) del último registro ya en el log
+        self._snapshot_seq = 0
+
+        self._wal = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_snapshot = time.monotonic()
+
+        self._stats = {
+            'records': 0,
+            'flushes': 0,
+            'snapshots': 0,
+            'last_flush_ms': 0.0,
+            'restored_records': 0,
+            'discarded_bytes': 0,
+        }
+
+    def restore(self) -> Dict[str, int]:
+        """
+        Recupera los contadores persistidos
+
+        Returns:
+            dict con 'entradas', 'salidas', 'dentro' (ceros si no hay datos)
+        """
+        os.makedirs(self.base_dir, exist_ok=True)
+
+        seq, state = 0, (0, 0, 0)
+
+        # 1. Último snapshot
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = _unpack_with_crc(SNAPSHOT_RECORD, f.read())
+            if snapshot and snapshot[0] == SNAPSHOT_MAGIC and snapshot[1] == SNAPSHOT_VERSION:
+                seq, state = snapshot[2], tuple(snapshot[4:7])
+            else:
+                logger.warning(f"⚠️  [Cam {self.camera_id}] Snapshot de contadores inválido, se ignora")
+        except FileNotFoundError:
+            pass
+
+        self._snapshot_seq = seq
+
+        # 2. Cola del log (registros posteriores al snapshot)
+        valid_size = 0
+        restored = 0
+        try:
+            with open(self.wal_path, 'rb') as f:
+                while True:
+                    data = f.read(WAL_RECORD_SIZE)
+                    record = _unpack_with_crc(WAL_RECORD, data)
+                    if record is None:
+                        break
+                    valid_size += WAL_RECORD_SIZE
+                    if record[0] > seq:
+                        seq, state = record[0], tuple(record[3:6])
+                        restored += 1
+
+            # Cortar una escritura incompleta para que los nuevos registros queden alineados
+            discarded = os.path.getsize(self.wal_path) - valid_size
+            if discarded:
+                with open(self.wal_path, 'r+b') as f:
+                    f.truncate(valid_size)
+                self._stats['discarded_bytes'] = discarded
+                logger.warning(f"⚠️  [Cam {self.camera_id}] Log de contadores: "
+                               f"{discarded} bytes finales descartados (escritura incompleta)")
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self._seq = seq
+            self._state = state
+            self._flushed = (seq, state)
+        self._stats['restored_records'] = restored
+
+        entradas, salidas, dentro = state
+        if seq:
+            logger.info(f"♻️  [Cam {self.camera_id}] Contadores restaurados: "
+                        f"E:{entradas} S:{salidas} D:{dentro} ({restored} eventos del log)")
+        return {'entradas': entradas, 'salidas': salidas, 'dentro': dentro}
+
+    def start(self):
+        """Abre el log y arranca el thread de escritura"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._wal = open(self.wal_path, 'ab', buffering=0)
+        self._last_snapshot = time.monotonic()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"CounterStore-{self.camera_id}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def record(self, codigo_cruce: int, entradas: int, salidas: int, dentro: int):
+        """
+        Registra el estado tras un cruce (llamado desde el probe)
+
+        Solo empaqueta el registro en memoria; la escritura es diferida
+        """
+        with self._lock:
+            self._seq += 1
+            self._state = (entradas, salidas, dentro)
+            self._buffer += _pack_with_crc(WAL_RECORD, self._seq, time.time(),
+                                           codigo_cruce, entradas, salidas, dentro)
+        self._stats['records'] += 1
+
+    def close(self):
+        """Detiene el thread, vacía el buffer y deja un snapshot final"""
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+        if self._wal:
+            self._flush()
+            self._snapshot()
+            self._wal.close()
+            self._wal = None
+
+    def get_stats(self) -> Dict:
+        """Retorna copia de los contadores del almacén"""
+        stats = dict(self._stats)
+        stats['seq'] = self._seq
+        stats['pending_bytes'] = len(self._buffer)
+        return stats
+
+    def _run(self):
+        """Bucle del thread: flush+fsync agrupado y snapshots periódicos"""
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self._flush()
+                if time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+                    self._snapshot()
+            except OSError as e:
+                logger.error(f"❌ [Cam {self.camera_id}] Error persistiendo contadores: {e}")
+
+    def _flush(self):
+        """Escribe los registros pendientes y hace fsync"""
+        with self._lock:
+            if not self._buffer:
+                return
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            flushed = (self._seq, self._state)
+
+        t0 = time.monotonic()
+        self._wal.write(data)
+        os.fsync(self._wal.fileno())
+        self._flushed = flushed
+        self._stats['flushes'] += 1
+        self._stats['last_flush_ms'] = (time.monotonic() - t0) * 1000.0
+
+    def _snapshot(self):
+        """
+        Escribe un snapshot atómico y trunca el log
+
+        El snapshot guarda el seq: si se cae entre os.replace y el truncado,
+        restore() ignora los registros del log con seq <= seq del snapshot
+
+        Se toma el estado del último _flush() (no el de record(), que puede
+        tener registros en el buffer): con cruces constantes el buffer casi
+        nunca está vacío y el log no se truncaría nunca
+        """
+        self._last_snapshot = time.monotonic()
+
+        # Lo escribe el mismo thread que _flush(): el log tiene justo hasta este seq
+        seq, (entradas, salidas, dentro) = self._flushed
+
+        if seq == self._snapshot_seq:
+            return
+
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_pack_with_crc(SNAPSHOT_RECORD, SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                   seq, time.time(), entradas, salidas, dentro))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        # fsync del directorio para que el rename sobreviva a un corte de energía
+        dir_fd = os.open(self.base_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+        self._snapshot_seq = seq
+        self._stats['snapshots'] += 1
+
+        # Con el snapshot en disco, el log anterior ya no es necesario
+        self._wal.truncate(0)
+        os.fsync(self._wal.fileno())
+
+
+def open_counter_store(camera_id, base_dir: Optional[str] = DEFAULT_COUNTER_DIR):
+    """
+    Crea, restaura e inicia el almacén de una cámara
+
+    Si base_dir es None o no se puede escribir (p.ej. fuera del contenedor),
+    la persistencia queda deshabilitada
+
+    Returns:
+        (CounterStore o None, dict de contadores restaurados o None)
+    """
+    if base_dir is None:
+        return None, None
+
+    store = CounterStore(camera_id, base_dir)
+    try:
+        contadores = store.restore()
+        store.start()
+    except OSError as e:
+        logger.warning(f"⚠️  [Cam {camera_id}] Persistencia de contadores deshabilitada ({base_dir}): {e}")
+        return None, None
+    return store, contadores
@@ -2,13 +2,28 @@
 """
 DeepStream Camera con grabación de video
 Versión modificada de deepstream_camera_headless que graba el video con detecciones
+
+La grabación es segmentada (RecordingBranch: splitmuxsink + SegmentStore):
+segmentos de duración fija en un buffer circular con cuota de disco por
+cámara. Los clips de eventos referencian segmentos completos, sin re-codificar
+
+Para grabar una cámara que también se cuenta, usar la rama de grabación del
+runtime de conteo (MultiCameraManager.start_recording): un solo decode y una
+sola inferencia. Este pipeline propio queda para grabar sin contar
 """
 
+import logging
 import gi
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst, GLib
 import os
 
+from modules.camera_profiles import infer_config_path
+from modules.recording_branch import RecordingBranch
+
+
+logger = logging.getLogger(__name__)
+
 # Paths de DeepStream
 DEEPSTREAM_DIR = os.environ.get('DEEPSTREAM_DIR', '/opt/nvidia/deepstream/deepstream')
 TRACKER_LIB = f'{DEEPSTREAM_DIR}/lib/libnvds_nvmultiobjecttracker.so'
@@ -16,12 +31,14 @@ TRACKER_LIB = f'{DEEPSTREAM_DIR}/lib/libnvds_nvmultiobjecttracker.so'
 class DeepStreamCameraRecorder:
     """
     Cámara DeepStream que graba video con detecciones y OSD
-    Similar a headless pero con encoder H264 y filesink
+    Similar a headless pero con la rama de grabación segmentada después del OSD
     """
 
     def __init__(self, camera_id, camera_name, rtsp_url,
                  line_coords, line_direction="derecha",
-                 output_dir="/app/logs/videos"):
+                 output_dir="/app/logs/videos",
+                 segment_s=60, quota_mb=2048, clip_quota_mb=1024,
+                 clip_pre_s=10.0, clip_post_s=10.0):
         """
         Args:
             camera_id: ID único de la cámara
@@ -30,6 +47,11 @@ class DeepStreamCameraRecorder:
             line_coords: Tupla ((x1,y1), (x2,y2)) de la línea de conteo
             line_direction: "izquierda" o "derecha" (entrada desde ese lado)
             output_dir: Directorio donde guardar videos
+            segment_s: Duración de cada segmento (s)
+            quota_mb: Disco máximo de segmentos de la cámara (MB)
+            clip_quota_mb: Disco máximo de clips de la cámara (MB)
+            clip_pre_s: Segundos de video antes del evento en cada clip
+            clip_post_s: Segundos de video después del evento en cada clip
         """
         self.camera_id = camera_id
         self.camera_name = camera_name
@@ -41,11 +63,16 @@ class DeepStreamCameraRecorder:
         # Crear directorio de salida si no existe
         os.makedirs(output_dir, exist_ok=True)
 
-        # Nombre del archivo de video
+        # Directorio de segmentos de la cámara (índice y clips dentro)
         self.output_file = os.path.join(
             output_dir,
-            f"camera_{camera_id}_{camera_name.replace(' ', '_')}.mp4"
+            f"camera_{camera_id}_{camera_name.replace(' ', '_')}"
         )
+        self.recording = RecordingBranch(camera_id, self.output_file, segment_s=segment_s,
+                                         quota_mb=quota_mb, clip_quota_mb=clip_quota_mb,
+                                         clip_pre_s=clip_pre_s, clip_post_s=clip_post_s)
+        # Sin la rama este pipeline no tiene sentido: un error de grabación lo detiene
+        self.recording.on_failure = self.stop
 
         self.pipeline = None
         self.loop = None
@@ -55,11 +82,11 @@ class DeepStreamCameraRecorder:
         self.count_in = 0
         self.count_out = 0
 
-        print(f"✓ DeepStreamCameraRecorder inicializado")
-        print(f"   ID: {camera_id}")
-        print(f"   Nombre: {camera_name}")
-        print(f"   Output: {self.output_file}")
-        print()
+        logger.info(f"✓ DeepStreamCameraRecorder inicializado")
+        logger.info(f"   ID: {camera_id}")
+        logger.info(f"   Nombre: {camera_name}")
+        logger.info(f"   Output: {self.output_file} (segmentos de {segment_s}s, cuota {quota_mb} MB)")
+        logger.info("")
 
     def create_tracker_config(self):
         """Crea archivo de configuración del tracker"""
@@ -82,7 +109,7 @@ tracker-surface-type=1
     def create_pipeline(self):
         """Crea el pipeline GStreamer con grabación de video"""
 
-        print("[Camera Recorder] 🔧 Creando pipeline con grabación...")
+        logger.info("[Camera Recorder] 🔧 Creando pipeline con grabación...")
 
         # Crear pipeline
         self.pipeline = Gst.Pipeline.new(f"camera-recorder-{self.camera_id}")
@@ -92,7 +119,7 @@ tracker-surface-type=1
         rtspsrc.set_property('location', self.rtsp_url)
         rtspsrc.set_property('latency', 100)
         rtspsrc.set_property('drop-on-latency', True)
-        print(f"   📡 RTSP source: {self.rtsp_url}")
+        logger.info(f"   📡 RTSP source: {self.rtsp_url}")
 
         # ===== DEPAY =====
         depay = Gst.ElementFactory.make("rtph264depay", "depay")
@@ -124,10 +151,9 @@ tracker-surface-type=1
 
         # ===== INFERENCE (YOLO) =====
         nvinfer = Gst.ElementFactory.make("nvinfer", "nvinfer")
-        nvinfer.set_property('config-file-path',
-            '/app/configs/deepstream/config_infer_primary_yolo11x_b1.txt')
+        nvinfer.set_property('config-file-path', infer_config_path())
         nvinfer.set_property('gpu-id', 0)
-        print("   🤖 YOLO inference configurado")
+        logger.info("   🤖 YOLO inference configurado")
 
         # ===== TRACKER =====
         nvtracker = Gst.ElementFactory.make("nvtracker", "nvtracker")
@@ -137,50 +163,24 @@ tracker-surface-type=1
         nvtracker.set_property('ll-lib-file', TRACKER_LIB)
         self.create_tracker_config()
         nvtracker.set_property('ll-config-file', 'tracker_config.yml')
-        print("   🎯 Tracker configurado")
+        logger.info("   🎯 Tracker configurado")
 
         # ===== ON-SCREEN DISPLAY (OSD) =====
         nvdsosd = Gst.ElementFactory.make("nvdsosd", "nvosd")
         nvdsosd.set_property('process-mode', 1)  # GPU mode
         nvdsosd.set_property('display-text', True)
         nvdsosd.set_property('display-bbox', True)
-        print("   🎨 OSD configurado (bboxes + IDs)")
-
-        # ===== NVIDIA VIDEO CONVERT (post-OSD) =====
-        nvvidconv_post = Gst.ElementFactory.make("nvvideoconvert", "nvvidconv_post")
-        nvvidconv_post.set_property('gpu-id', 0)
+        logger.info("   🎨 OSD configurado (bboxes + IDs)")
 
-        # ===== CAPS FILTER (output format) =====
-        caps_out = Gst.ElementFactory.make("capsfilter", "caps_out")
-        caps_out.set_property('caps',
-            Gst.Caps.from_string("video/x-raw(memory:NVMM), format=I420"))
-
-        # ===== ENCODER H264 (NVIDIA) =====
-        encoder = Gst.ElementFactory.make("nvv4l2h264enc", "encoder")
-        encoder.set_property('bitrate', 4000000)  # 4 Mbps
-        encoder.set_property('insert-sps-pps', True)
-        encoder.set_property('iframeinterval', 30)
-        print("   🎥 Encoder H264 configurado (4 Mbps)")
-
-        # ===== H264 PARSE (post-encoder) =====
-        h264parse_out = Gst.ElementFactory.make("h264parse", "h264parse_out")
-
-        # ===== MP4 MUX =====
-        mp4mux = Gst.ElementFactory.make("mp4mux", "mp4mux")
-
-        # ===== FILE SINK =====
-        filesink = Gst.ElementFactory.make("filesink", "filesink")
-        filesink.set_property('location', self.output_file)
-        filesink.set_property('sync', False)
-        filesink.set_property('async', False)
-        print(f"   💾 Grabando a: {self.output_file}")
+        # ===== GRABACIÓN (queue -> encoder H264 -> splitmuxsink) =====
+        recording = self.recording.bin
+        logger.info(f"   💾 Grabando segmentos de {self.recording.segment_s}s en: {self.output_file}")
 
         # Agregar todos los elementos
         elements = [
             rtspsrc, depay, h264parse, decoder,
             nvvidconv_pre, caps_nvmm, streammux, nvinfer, nvtracker,
-            nvdsosd, nvvidconv_post, caps_out, encoder, h264parse_out,
-            mp4mux, filesink
+            nvdsosd, recording
         ]
 
         for elem in elements:
@@ -191,58 +191,43 @@ tracker-surface-type=1
 
         # Enlaces estáticos
         if not depay.link(h264parse):
-            print("❌ Error: depay -> h264parse")
+            logger.error("❌ Error: depay -> h264parse")
             return False
         if not h264parse.link(decoder):
-            print("❌ Error: h264parse -> decoder")
+            logger.error("❌ Error: h264parse -> decoder")
             return False
         if not decoder.link(nvvidconv_pre):
-            print("❌ Error: decoder -> nvvidconv_pre")
+            logger.error("❌ Error: decoder -> nvvidconv_pre")
             return False
         if not nvvidconv_pre.link(caps_nvmm):
-            print("❌ Error: nvvidconv_pre -> caps_nvmm")
+            logger.error("❌ Error: nvvidconv_pre -> caps_nvmm")
             return False
 
         # Conectar a streammux (sink pad)
         sinkpad = streammux.get_request_pad("sink_0")
         if not sinkpad:
-            print("❌ Error: No se pudo obtener sink pad de streammux")
+            logger.error("❌ Error: No se pudo obtener sink pad de streammux")
             return False
         srcpad = caps_nvmm.get_static_pad("src")
         if srcpad.link(sinkpad) != Gst.PadLinkReturn.OK:
-            print("❌ Error: caps_nvmm -> streammux")
+            logger.error("❌ Error: caps_nvmm -> streammux")
             return False
 
         # Resto del pipeline
         if not streammux.link(nvinfer):
-            print("❌ Error: streammux -> nvinfer")
+            logger.error("❌ Error: streammux -> nvinfer")
             return False
         if not nvinfer.link(nvtracker):
-            print("❌ Error: nvinfer -> nvtracker")
+            logger.error("❌ Error: nvinfer -> nvtracker")
             return False
         if not nvtracker.link(nvdsosd):
-            print("❌ Error: nvtracker -> nvdsosd")
-            return False
-        if not nvdsosd.link(nvvidconv_post):
-            print("❌ Error: nvdsosd -> nvvidconv_post")
+            logger.error("❌ Error: nvtracker -> nvdsosd")
             return False
-        if not nvvidconv_post.link(caps_out):
-            print("❌ Error: nvvidconv_post -> caps_out")
-            return False
-        if not caps_out.link(encoder):
-            print("❌ Error: caps_out -> encoder")
-            return False
-        if not encoder.link(h264parse_out):
-            print("❌ Error: encoder -> h264parse_out")
-            return False
-        if not h264parse_out.link(mp4mux):
-            print("❌ Error: h264parse_out -> mp4mux")
-            return False
-        if not mp4mux.link(filesink):
-            print("❌ Error: mp4mux -> filesink")
+        if nvdsosd.get_static_pad("src").link(self.recording.sink_pad) != Gst.PadLinkReturn.OK:
+            logger.error("❌ Error: nvdsosd -> grabación")
             return False
 
-        print("✅ Pipeline con grabación creado exitosamente")
+        logger.info("✅ Pipeline con grabación creado exitosamente")
         return True
 
     def on_rtspsrc_pad_added(self, src, new_pad, depay):
@@ -256,37 +241,48 @@ tracker-surface-type=1
         if not self.create_pipeline():
             return False
 
-        print(f"[Camera Recorder {self.camera_id}] ▶️  Iniciando grabación...")
+        logger.info(f"[Camera Recorder {self.camera_id}] ▶️  Iniciando grabación...")
 
         # Establecer pipeline a PLAYING
         ret = self.pipeline.set_state(Gst.State.PLAYING)
         if ret == Gst.StateChangeReturn.FAILURE:
-            print(f"❌ Error: No se pudo iniciar pipeline de cámara {self.camera_id}")
+            logger.error(f"❌ Error: No se pudo iniciar pipeline de cámara {self.camera_id}")
             return False
 
         self.is_running = True
-        print(f"✅ Cámara {self.camera_id} grabando")
+        logger.info(f"✅ Cámara {self.camera_id} grabando")
         return True
 
-    def stop(self):
-        """Detiene el pipeline y cierra el video"""
-        if self.pipeline:
-            print(f"[Camera Recorder {self.camera_id}] ⏹️  Deteniendo grabación...")
+    def request_clip(self, event_ts=None, label="cruce"):
+        """
+        Pide un clip alrededor de un evento (clip_pre_s antes, clip_post_s después)
 
-            # Enviar EOS para cerrar el archivo correctamente
-            self.pipeline.send_event(Gst.Event.new_eos())
+        Returns:
+            clip_id; el clip queda en <output>/clips/<clip_id>/ cuando se
+            cierra el segmento que cubre el post-roll
+        """
+        return self.recording.request_clip(event_ts, label)
+
+    def clips(self):
+        """Clips exportados de la cámara (consulta al índice)"""
+        return self.recording.segments.clips()
 
-            # Esperar un momento para que se procese el EOS
-            import time
-            time.sleep(2)
+    def stop(self):
+        """Detiene el pipeline y cierra el segmento en curso"""
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline:
+            logger.info(f"[Camera Recorder {self.camera_id}] ⏹️  Deteniendo grabación...")
+
+            # EOS: splitmuxsink cierra el segmento abierto (la rama avisa al recibirlo)
+            pipeline.send_event(Gst.Event.new_eos())
+            self.recording.wait_closed()
 
             # Detener pipeline
-            self.pipeline.set_state(Gst.State.NULL)
+            pipeline.set_state(Gst.State.NULL)
             self.is_running = False
 
-            print(f"✅ Video guardado: {self.output_file}")
-
-            # Mostrar tamaño del archivo
-            if os.path.exists(self.output_file):
-                size_mb = os.path.getsize(self.output_file) / (1024 * 1024)
-                print(f"   📏 Tamaño: {size_mb:.2f} MB")
+            usage = self.recording.stats()
+            self.recording.close()
+            logger.info(f"✅ Segmentos guardados: {self.output_file}")
+            logger.info(f"   📏 {usage['segments']} segmentos, {usage['segment_bytes'] / (1024 * 1024):.2f} MB; "
+                        f"{usage['clips']} clips")
@@ -4,8 +4,25 @@ Módulo DeepStream usando pyservicemaker (DeepStream 8.0+)
 Implementa detección de personas y conteo con línea de cruce
 """
 
-from pyservicemaker import Pipeline, Flow, BatchMetadataOperator, Probe, osd, RenderMode
-from modules.line_crossing_detector import LineCrossingDetector
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from pyservicemaker import Pipeline, Flow, BatchMetadataOperator, Probe, RenderMode
+from modules.line_crossing_detector import LineCrossingDetector, CRUCE_ENTRADA, CRUCE_SALIDA
+from modules.track_state import TrackStateStore
+from modules.line_overlay import LineOverlay
+from modules.counter_store import open_counter_store, DEFAULT_COUNTER_DIR
+from modules.camera_metrics import CameraMetrics
+from modules.async_logging import LogSampler
+from modules.inference_interval import AdaptiveInferenceInterval
+from modules.camera_profiles import (resolve_profile, infer_config_path, TRACKER_LIB,
+                                     SINK_DISPLAY, SINK_DISCARD, SINK_ENCODE)
+
+
+logger = logging.getLogger(__name__)
 
 
 class LineCrossingCounter(BatchMetadataOperator):
@@ -13,7 +30,10 @@ class LineCrossingCounter(BatchMetadataOperator):
     Operador personalizado para detectar cruces de línea y contar personas
     """
 
-    def __init__(self, camera_id, camera_name, line_config):
+    def __init__(self, camera_id, camera_name, line_config,
+                 track_ttl_frames=150, max_tracks=2048, draw_overlays=True,
+                 event_publisher=None, counter_store=None, counter_row=None,
+                 interval_controller=None, overlay_style=None, status_every=30):
         """
         Inicializa el contador de línea
 
@@ -21,6 +41,16 @@ class LineCrossingCounter(BatchMetadataOperator):
             camera_id: ID de la cámara
             camera_name: Nombre de la cámara
             line_config: dict con 'start', 'end', 'direccion_entrada'
+            track_ttl_frames: Frames sin ver un track antes de olvidarlo
+            max_tracks: Máximo de tracks simultáneos en memoria
+            draw_overlays: Si False (sin sink visible), no se genera display-meta
+            event_publisher: CrossingEventPublisher opcional para enviar cruces a la API
+            counter_store: CounterStore opcional para persistir los contadores
+            counter_row: CounterRow opcional de la tabla de contadores compartida
+            interval_controller: AdaptiveInferenceInterval opcional (interval de
+                                 nvinfer según la actividad cerca de la línea)
+            overlay_style: kwargs de LineOverlay (CameraProfile.overlay_style())
+            status_every: Frames entre logs de estado
         """
         super().__init__()
         self.camera_id = camera_id
@@ -31,9 +61,12 @@ class LineCrossingCounter(BatchMetadataOperator):
         start_line = tuple(line_config['start'])
         end_line = tuple(line_config['end'])
 
-        self.line_detector = LineCrossingDetector()
-        self.line_detector.set_line(start_line, end_line)
-        self.line_detector.set_direction(line_config['direccion_entrada'])
+        self.line_detector = self._build_detector(line_config)
+
+        # Detector con una línea nueva, pendiente de aplicar al inicio del
+        # próximo batch (lo escribe set_line_config desde otro thread)
+        self._pending_detector = None
+        self._line_lock = threading.Lock()
 
         # Contadores
         self.contadores = {
@@ -42,143 +75,248 @@ class LineCrossingCounter(BatchMetadataOperator):
             'dentro': 0
         }
 
-        # Objetos trackeados
-        self.tracked_objects = {}
+        # Estado de objetos trackeados (acotado, con expiración por TTL)
+        self.tracks = TrackStateStore(capacity=max_tracks, ttl_frames=track_ttl_frames)
 
         # Frame counter para logs periódicos
         self.frame_count = 0
 
-        print(f"✅ LineCrossingCounter inicializado para cámara {camera_id}")
-        print(f"   Línea (sin escalar): {start_line} -> {end_line}")
-        print(f"   Dirección entrada: {line_config['direccion_entrada']}")
+        # Métricas de rendimiento (escritas por el probe, leídas por snapshot)
+        self.metrics = CameraMetrics(camera_id)
+
+        # Publicador asíncrono de eventos (encola sin bloquear el probe)
+        self.event_publisher = event_publisher
+
+        # Persistencia de contadores (log + snapshots, escritura diferida)
+        self.counter_store = counter_store
+
+        # Fila en la tabla compartida (lectura de stats sin locks)
+        self.counter_row = counter_row
+
+        # Intervalo de inferencia adaptativo (observa cada frame)
+        self.interval_controller = interval_controller
+
+        # Overlay cacheado; None si no hay sink visible (headless)
+        self.overlay = LineOverlay(camera_id, **(overlay_style or {})) if draw_overlays else None
+        self.status_every = status_every
+
+        # Líneas repetitivas con cupo por cámara (se formatean solo si se escriben)
+        self._log_status = LogSampler(logger, 'status', camera_id)
+        self._log_cruce = LogSampler(logger, 'cruce', camera_id)
+        self._log_error = LogSampler(logger, 'error', camera_id, logging.ERROR)
+
+        logger.info(f"✅ LineCrossingCounter inicializado para cámara {camera_id}")
+        logger.info(f"   Línea (sin escalar): {start_line} -> {end_line}")
+        logger.info(f"   Dirección entrada: {line_config['direccion_entrada']}")
 
     def handle_metadata(self, batch_meta):
         """
         Procesa metadatos de cada batch
-        Este método se llama por cada frame procesado
+        Este método se llama por cada batch procesado
         """
+        t0 = time.perf_counter_ns()
+        if self._pending_detector is not None:
+            self.apply_pending_line()
         try:
             # Iterar sobre todos los frames en el batch
             for frame_meta in batch_meta.frame_items:
-                # Procesar objetos detectados (solo personas, clase 0)
-                for object_meta in frame_meta.object_items:
-                    if object_meta.class_id == 0:  # Solo personas
-                        self.process_detection(object_meta)
-
-                # Dibujar línea y contadores en el frame
-                self.draw_overlays(batch_meta, frame_meta)
+                self.process_frame(batch_meta, frame_meta)
 
-            # Log periódico en consola
-            self.frame_count += 1
-            if self.frame_count % 30 == 0:
-                print(f"[Camera {self.camera_id}] E:{self.contadores['entradas']} "
-                      f"S:{self.contadores['salidas']} D:{self.contadores['dentro']}")
+            self.metrics.record_batch(time.perf_counter_ns() - t0)
 
         except Exception as e:
-            print(f"❌ Error en handle_metadata: {e}")
-            import traceback
-            traceback.print_exc()
+            self._log_error.log("❌ [Cam %s] Error en handle_metadata: %s", self.camera_id, e,
+                                exc_info=True)
 
-    def process_detection(self, object_meta):
-        """Procesa una detección de persona y verifica cruce de línea"""
+    def process_frame(self, batch_meta, frame_meta):
+        """
+        Procesa un frame de esta cámara
+
+        Separado de handle_metadata para que un pipeline compartido
+        (MultiSourceLineCrossingCounter) pueda enrutar cada frame a la
+        cámara correcta según frame_meta.source_id
+        """
+        # Recolectar detecciones de personas (clase 0) del frame
+        track_ids = []
+        centroids = []
+        for object_meta in frame_meta.object_items:
+            if object_meta.class_id == 0:  # Solo personas
+                rect = object_meta.rect_params
+                track_ids.append(object_meta.object_id)
+                centroids.append((rect.left + rect.width / 2, rect.top + rect.height / 2))
+
+        # Una sola llamada vectorizada por frame
+        if track_ids:
+            crossings = self.process_detections(track_ids, centroids)
+        else:
+            crossings = 0
+            if self.interval_controller is not None:
+                self.interval_controller.observe_empty()
+
+        # Olvidar tracks que el tracker dejó de reportar
+        self.tracks.sweep(self.frame_count)
+
+        # Dibujar línea y contadores en el frame (solo con sink visible)
+        if self.overlay is not None:
+            self.draw_overlays(batch_meta, frame_meta)
+
+        # Log periódico en consola
+        self.frame_count += 1
+        self.metrics.record_frame(len(track_ids), len(self.tracks), crossings)
+        if self.counter_row is not None:
+            self.write_counter_row()
+        if self.frame_count % self.status_every == 0:
+            self._log_status.log("[Camera %s] E:%d S:%d D:%d", self.camera_id, self.contadores['entradas'],
+                                 self.contadores['salidas'], self.contadores['dentro'])
+
+    def process_detections(self, track_ids, centroids):
+        """
+        Procesa las detecciones de personas de un frame y verifica cruces de línea
+
+        Args:
+            track_ids: Lista de object_id del tracker
+            centroids: Lista de centros (x, y) de cada bbox, mismo orden que track_ids
+
+        Returns:
+            Número de cruces detectados en el frame
+        """
         try:
-            track_id = object_meta.object_id
-
-            # DEBUG: Imprimir atributos disponibles
-            if not hasattr(self, '_debug_printed'):
-                print(f"DEBUG: Atributos de object_meta: {dir(object_meta)}")
-                self._debug_printed = True
-
-            # Calcular centro del bbox - probar rect_params según DeepStream C API
-            bbox_left = object_meta.rect_params.left
-            bbox_top = object_meta.rect_params.top
-            bbox_width = object_meta.rect_params.width
-            bbox_height = object_meta.rect_params.height
-
-            center_x = bbox_left + bbox_width / 2
-            center_y = bbox_top + bbox_height / 2
-            current_pos = (int(center_x), int(center_y))
-
-            # Si es la primera vez que vemos este objeto
-            if track_id not in self.tracked_objects:
-                self.tracked_objects[track_id] = {
-                    'prev_pos': current_pos,
-                    'crossed': False
-                }
-                return
+            slots, is_new = self.tracks.lookup(track_ids, self.frame_count)
+
+            centroids = np.asarray(centroids, dtype=np.float64)
+            current_x = centroids[:, 0].astype(np.int32)
+            current_y = centroids[:, 1].astype(np.int32)
+
+            known = ~is_new
+            codes = None
+            prev_centroids = None
+            if known.any():
+                known_slots = slots[known]
+                prev_centroids = self.tracks.prev_positions(known_slots)
+                if self.line_detector.tiene_linea_configurada():
+                    # Verificar cruces de línea de todo el frame de una vez
+                    codes = self.line_detector.cruces_batch(prev_centroids, centroids[known])
 
-            # Verificar cruce de línea
-            prev_pos = self.tracked_objects[track_id]['prev_pos']
+            if self.interval_controller is not None:
+                self.interval_controller.observe(self.line_detector, centroids, known, prev_centroids)
 
-            if self.line_detector.tiene_linea_configurada():
-                cruce = self.line_detector.punto_cruza_linea(
-                    center_x, center_y, prev_pos[0], prev_pos[1]
-                )
+            # Actualizar posición previa (también de los tracks nuevos)
+            self.tracks.update_positions(slots, current_x, current_y)
 
-                if cruce == "ENTRADA":
+            if codes is None:
+                return 0
+
+            crossing = np.flatnonzero(codes)
+            if len(crossing) == 0:
+                return 0
+
+            self.tracks.mark_crossed(known_slots[crossing])
+            known_idx = np.flatnonzero(known)
+
+            for idx in crossing:
+                track_id = track_ids[known_idx[idx]]
+                code = int(codes[idx])
+
+                if code == CRUCE_ENTRADA:
                     self.contadores['entradas'] += 1
                     self.contadores['dentro'] += 1
-                    print(f"✅ [Cam {self.camera_id}] ENTRADA detectada (ID: {track_id}) "
-                          f"| Total E:{self.contadores['entradas']} D:{self.contadores['dentro']}")
+                    self._log_cruce.log("✅ [Cam %s] ENTRADA detectada (ID: %s) | Total E:%d D:%d",
+                                        self.camera_id, track_id, self.contadores['entradas'],
+                                        self.contadores['dentro'])
 
-                elif cruce == "SALIDA":
+                elif code == CRUCE_SALIDA:
                     self.contadores['salidas'] += 1
                     self.contadores['dentro'] = max(0, self.contadores['dentro'] - 1)
-                    print(f"⬅️  [Cam {self.camera_id}] SALIDA detectada (ID: {track_id}) "
-                          f"| Total S:{self.contadores['salidas']} D:{self.contadores['dentro']}")
-
-            # Actualizar posición previa
-            self.tracked_objects[track_id]['prev_pos'] = current_pos
+                    self._log_cruce.log("⬅️  [Cam %s] SALIDA detectada (ID: %s) | Total S:%d D:%d",
+                                        self.camera_id, track_id, self.contadores['salidas'],
+                                        self.contadores['dentro'])
+
+                if self.event_publisher is not None:
+                    self.event_publisher.publish(
+                        self.camera_id, track_id, code,
+                        self.contadores['entradas'],
+                        self.contadores['salidas'],
+                        self.contadores['dentro']
+                    )
+
+                if self.counter_store is not None:
+                    self.counter_store.record(
+                        code,
+                        self.contadores['entradas'],
+                        self.contadores['salidas'],
+                        self.contadores['dentro']
+                    )
+
+            return len(crossing)
 
         except Exception as e:
-            print(f"❌ Error procesando detección: {e}")
+            self._log_error.log("❌ [Cam %s] Error procesando detecciones: %s", self.camera_id, e)
+            return 0
+
+    @staticmethod
+    def _build_detector(line_config):
+        detector = LineCrossingDetector()
+        detector.set_line(tuple(line_config['start']), tuple(line_config['end']))
+        detector.set_direction(line_config['direccion_entrada'])
+        return detector
+
+    def set_line_config(self, line_config):
+        """
+        Programa una línea nueva sin reconstruir el pipeline (seguro desde cualquier thread)
+
+        El detector se construye completo aquí y el probe lo adopta al inicio
+        del siguiente batch: ningún frame se evalúa con una línea a medias
+
+        Args:
+            line_config: dict con 'start', 'end', 'direccion_entrada'
+        """
+        detector = self._build_detector(line_config)
+        with self._line_lock:
+            self._pending_detector = detector
+
+    def apply_pending_line(self):
+        """Adopta la línea pendiente (lo llama el thread del probe entre batches)"""
+        with self._line_lock:
+            detector, self._pending_detector = self._pending_detector, None
+        if detector is None:
+            return
+        self.line_detector = detector
+        logger.info(f"🔁 [Cam {self.camera_id}] Línea actualizada en caliente: "
+                    f"{detector.line_start} -> {detector.line_end} ({detector.direccion_entrada})")
+
+    def write_counter_row(self):
+        """Publica contadores y frames en la tabla compartida"""
+        self.counter_row.write(self.contadores['entradas'], self.contadores['salidas'],
+                               self.contadores['dentro'], self.frame_count)
 
     def draw_overlays(self, batch_meta, frame_meta):
         """Dibuja línea de cruce y contadores en el frame"""
         try:
-            # Crear display metadata
-            display_meta = batch_meta.acquire_display_meta()
-
-            # Dibujar línea de cruce
-            line = osd.Line()
-            line.x1 = int(self.line_detector.line_start[0])
-            line.y1 = int(self.line_detector.line_start[1])
-            line.x2 = int(self.line_detector.line_end[0])
-            line.y2 = int(self.line_detector.line_end[1])
-            line.width = 4
-            line.color = osd.Color(0.0, 1.0, 0.0, 1.0)  # Verde
-            display_meta.add_line(line)
-
-            # Dibujar texto con contadores
-            text = osd.Text()
-            text.display_text = (
-                f"Cam {self.camera_id} | E:{self.contadores['entradas']} "
-                f"S:{self.contadores['salidas']} | Dentro:{self.contadores['dentro']}"
-            ).encode('ascii')
-            text.x_offset = 10
-            text.y_offset = 10
-            text.font.name = osd.FontFamily.Serif
-            text.font.size = 14
-            text.font.color = osd.Color(1.0, 1.0, 1.0, 1.0)  # Blanco
-            text.set_bg_color = True
-            text.bg_color = osd.Color(0.0, 0.0, 0.0, 0.7)  # Negro semi-transparente
-            display_meta.add_text(text)
-
-            # Agregar display metadata al frame
-            frame_meta.append(display_meta)
+            self.overlay.draw(batch_meta, frame_meta, self.line_detector, self.contadores)
 
         except Exception as e:
-            print(f"❌ Error dibujando overlays: {e}")
+            self._log_error.log("❌ [Cam %s] Error dibujando overlays: %s", self.camera_id, e)
 
 
 class DeepStreamCameraServiceMaker:
     """
     Wrapper para cámara usando pyservicemaker
+
+    El pipeline se arma según un CameraProfile (modules/camera_profiles.py):
+    batching, tracker, sink, overlay y cadencia de logs
+
+    Grabación: si la cámara graba desde el arranque (perfil record u opciones
+    de grabación) o su perfil es `recordable`, un tee después del OSD (o del
+    tracker, sin sink visible) admite una RecordingBranch enganchable en
+    caliente (start_recording / stop_recording). Sin tee, la cámara no graba
+    sin reconstruir su pipeline
     """
 
     def __init__(self, camera_id, camera_name, rtsp_uri, line_config,
-                 config_file="/app/configs/deepstream/config_infer_primary_yolo11x_b1.txt",
-                 headless=False):
+                 config_file=None,
+                 headless=False, event_publisher=None,
+                 persist_dir=DEFAULT_COUNTER_DIR, counter_row=None, adaptive_interval=None,
+                 profile=None, recording=None, initial_counts=None):
         """
         Inicializa la cámara con pyservicemaker
 
@@ -187,62 +325,254 @@ class DeepStreamCameraServiceMaker:
             camera_name: Nombre de la cámara
             rtsp_uri: URI RTSP de la cámara
             line_config: dict con configuración de línea
-            config_file: Ruta al archivo de configuración de inferencia
-            headless: Si True, no renderiza video (mejor rendimiento)
+            config_file: Config de nvinfer (None = infer_config_path())
+            headless: Si True, no renderiza video (perfil sin display)
+            event_publisher: CrossingEventPublisher opcional para enviar cruces a la API
+            persist_dir: Directorio de persistencia de contadores (None = deshabilitada)
+            counter_row: CounterRow opcional de la tabla de contadores compartida
+            adaptive_interval: dict de opciones de AdaptiveInferenceInterval
+                               (min_interval, max_interval, near_px...); None = interval fijo del config
+            profile: Nombre o CameraProfile (None = throughput, o headless si headless=True)
+            recording: Opciones de RecordingBranch para grabar desde el arranque
+                       (None = sin grabar, salvo perfil record)
+            initial_counts: Contadores con los que arrancar si el CounterStore no
+                            restauró nada (p.ej. los de la cámara que se reinicia)
         """
         self.camera_id = camera_id
         self.camera_name = camera_name
         self.rtsp_uri = rtsp_uri
         self.line_config = line_config
-        self.config_file = config_file
-        self.headless = headless
+        self.config_file = config_file or infer_config_path()
+        self.profile = resolve_profile(profile, headless)
+        self.headless = self.profile.sink != SINK_DISPLAY
+        self.record_path = None
+        self.exit_error = None
+
+        # Rama de grabación (tee insertado al armar el pipeline)
+        self._record_tee = None
+        self._record_osd = False
+        self.recording_branch = None
+        self._recording_lock = threading.Lock()
 
         # Crear pipeline y flow
         self.pipeline = Pipeline(f"camera-{camera_id}")
 
+        # Persistencia de contadores: último snapshot + cola del log
+        self.counter_store, restored = open_counter_store(camera_id, persist_dir)
+
+        # Interval de nvinfer según la actividad (se aplica desde el probe)
+        self._nvinfer = None
+        self.interval_controller = None
+        if adaptive_interval is not None:
+            self.interval_controller = AdaptiveInferenceInterval(on_change=self._set_infer_interval,
+                                                                 **adaptive_interval)
+
         # Crear operador personalizado
-        self.counter = LineCrossingCounter(camera_id, camera_name, line_config)
+        # Línea en el espacio de nvstreammux del perfil
+        self.counter = LineCrossingCounter(camera_id, camera_name, self.profile.scale_line(line_config),
+                                           draw_overlays=self.profile.draws_overlays,
+                                           event_publisher=event_publisher,
+                                           counter_store=self.counter_store,
+                                           counter_row=counter_row,
+                                           interval_controller=self.interval_controller,
+                                           overlay_style=self.profile.overlay_style(),
+                                           status_every=self.profile.status_every)
+        if restored:
+            self.counter.contadores.update(restored)
+        elif initial_counts:
+            self.counter.contadores.update({key: initial_counts[key] for key in self.counter.contadores
+                                            if key in initial_counts})
+        if counter_row is not None:
+            self.counter.write_counter_row()
 
         # Construir flow CON tracker para IDs persistentes
-        # El OSD se agrega automáticamente con render()
-        tracker_config = "/opt/nvidia/deepstream/deepstream-8.0/samples/configs/deepstream-app/config_tracker_NvDCF_perf.yml"
-        tracker_lib = "/opt/nvidia/deepstream/deepstream-8.0/lib/libnvds_nvmultiobjecttracker.so"
-
         base_flow = (Flow(self.pipeline)
-                    .batch_capture([rtsp_uri])
-                    .infer(config_file)
-                    .track(ll_config_file=tracker_config, ll_lib_file=tracker_lib)
+                    .batch_capture([rtsp_uri], **self.profile.capture_options())
+                    .infer(self.config_file, **self.profile.infer_options())
+                    .track(ll_config_file=self.profile.tracker_config, ll_lib_file=TRACKER_LIB,
+                           **self.profile.tracker_options())
                     .attach(what=Probe("line-crossing", self.counter)))
+        self.flow = self._add_sink(base_flow)
+        if recording is None and self.profile.sink == SINK_ENCODE:
+            recording = {}
+        if recording is not None or self.profile.recordable:
+            self._insert_record_tee()
+        if recording is not None and self._record_tee is None:
+            logger.error(f"❌ [Cam {camera_id}] Grabación pedida pero el pipeline no tiene tee; "
+                         f"la cámara cuenta sin grabar")
+        elif recording is not None:
+            try:
+                self.start_recording(**recording)
+            except Exception as e:
+                # La grabación es opcional: el conteo sigue sin ella
+                logger.error(f"❌ [Cam {camera_id}] No se pudo enganchar la grabación: {e}")
+
+        logger.info(f"✅ DeepStreamCameraServiceMaker creado para cámara {camera_id}")
+        logger.info(f"   Perfil: {self.profile.describe()}")
+
+    def _add_sink(self, flow):
+        """Termina el flow con el sink del perfil"""
+        profile = self.profile
+        if profile.sink == SINK_DISPLAY:
+            # render() agrega el OSD antes del sink; ventana de 1280x720 para
+            # que la línea dibujada coincida con la posición visual
+            return flow.render(window_width=profile.window_width,
+                               window_height=profile.window_height,
+                               force_aspect_ratio=True,
+                               **profile.sink_options())
+        if profile.sink in (SINK_DISCARD, SINK_ENCODE):
+            # SINK_ENCODE: la grabación es la rama del tee (segmentada)
+            # fakesink: descarta los frames sin mostrarlos
+            return flow.render(mode=RenderMode.DISCARD)
+        raise ValueError(f"Sink desconocido en el perfil {profile.name}: {profile.sink}")
+
+    def _insert_record_tee(self):
+        """
+        Tee para la rama de grabación, antes de iniciar el pipeline
 
-        # Agregar sink según modo
-        # render() automáticamente agrega OSD antes del sink
-        if not headless:
-            # Modo normal: mostrar video en ventana de 1280x720
-            # Esto asegura que la línea dibujada coincida con la posición visual
-            self.flow = base_flow.render(
-                window_width=1280,
-                window_height=720,
-                force_aspect_ratio=True
-            )
-        else:
-            # Modo headless: usar fakesink (descarta los frames sin mostrarlos)
-            self.flow = base_flow.render(mode=RenderMode.DISCARD)
+        Con sink visible va después del OSD de render(); si no hay OSD (sin
+        display) va después del tracker y la rama dibuja su propio OSD. Con
+        una sola rama el tee no copia ni agrega latencia. Si falla, la cámara
+        cuenta sin poder grabar
+        """
+        try:
+            from modules.recording_branch import insert_tee
+            osd = self._find_element('nvdsosd')
+            anchor = osd or self._find_element('nvtracker')
+            tee = insert_tee(self.pipeline.pipeline, anchor, f"record-tee-{self.camera_id}") if anchor else None
+        except Exception as e:
+            logger.error(f"❌ [Cam {self.camera_id}] Grabación deshabilitada: {e}")
+            return
+        if tee is None:
+            logger.warning(f"⚠️  [Cam {self.camera_id}] Sin punto de enganche para grabar")
+            return
+        self._record_tee = tee
+        self._record_osd = osd is None
+
+    @property
+    def can_record(self):
+        """True si el pipeline tiene el tee de grabación"""
+        return self._record_tee is not None
+
+    def start_recording(self, **options):
+        """
+        Engancha la rama de grabación (con el pipeline corriendo o antes de iniciarlo)
+
+        Args:
+            **options: Opciones de RecordingBranch (segment_s, quota_mb,
+                       clip_quota_mb, clip_pre_s, clip_post_s, bitrate);
+                       'directory' default <record_dir del perfil>/camera_<id>_<nombre>
 
-        print(f"✅ DeepStreamCameraServiceMaker creado para cámara {camera_id}")
-        print(f"   Modo: {'HEADLESS (sin display)' if headless else 'NORMAL (con display)'}")
+        Returns:
+            La RecordingBranch enganchada (la existente si ya grababa)
+        """
+        from modules.recording_branch import RecordingBranch
+
+        if self._record_tee is None:
+            raise RuntimeError(f"Cámara {self.camera_id}: el pipeline no admite grabación")
+        with self._recording_lock:
+            if self.recording_branch is not None:
+                return self.recording_branch
+            options.setdefault('directory', os.path.join(
+                self.profile.record_dir, f"camera_{self.camera_id}_{self.camera_name.replace(' ', '_')}"))
+            branch = RecordingBranch(self.camera_id, draw_osd=self._record_osd, **options)
+            # Error en la rama (disco lleno, encoder): se desengancha y el conteo sigue
+            branch.on_failure = self.stop_recording
+            # Sin sink visible el probe no genera display-meta: la línea y los
+            # contadores se dibujan solo mientras se graba
+            if self.counter.overlay is None:
+                self.counter.overlay = LineOverlay(self.camera_id, **(self.profile.overlay_style() or {}))
+            branch.attach(self.pipeline.pipeline, self._record_tee)
+            self.recording_branch = branch
+            self.record_path = branch.directory
+            return branch
+
+    def stop_recording(self) -> bool:
+        """
+        Desengancha la rama de grabación sin detener el conteo
+
+        Returns:
+            True si el último segmento quedó cerrado (o no se grababa)
+        """
+        with self._recording_lock:
+            branch, self.recording_branch = self.recording_branch, None
+            if branch is None:
+                return True
+            if not self.profile.draws_overlays:
+                self.counter.overlay = None
+            try:
+                return branch.detach()
+            finally:
+                branch.close()
+
+    def request_clip(self, event_ts=None, label="cruce"):
+        """Clip alrededor de un evento; None si la cámara no graba"""
+        branch = self.recording_branch
+        return branch.request_clip(event_ts, label) if branch is not None else None
+
+    def get_recording_stats(self):
+        """Uso de disco y estado de la grabación; None si la cámara no graba"""
+        branch = self.recording_branch
+        return branch.stats() if branch is not None else None
 
     def run(self):
         """Ejecuta el pipeline (blocking)"""
-        print(f"🚀 Iniciando cámara {self.camera_id} ({self.camera_name})...")
+        logger.info(f"🚀 Iniciando cámara {self.camera_id} ({self.camera_name})...")
+        self.exit_error = None
         try:
             self.flow()  # Blocking call
         except KeyboardInterrupt:
-            print(f"\n⚠️  Cámara {self.camera_id} detenida por usuario")
+            logger.warning(f"\n⚠️  Cámara {self.camera_id} detenida por usuario")
         except Exception as e:
-            print(f"❌ Error en cámara {self.camera_id}: {e}")
-            import traceback
-            traceback.print_exc()
+            # Error del pipeline (p.ej. mensaje de error del bus): el wrapper lo informa
+            self.exit_error = str(e) or type(e).__name__
+            logger.error(f"❌ Error en cámara {self.camera_id}: {e}", exc_info=True)
+        finally:
+            # Índice de segmentos y clips pendientes (el pipeline ya no corre)
+            self.stop_recording()
+            # Flush final + snapshot
+            if self.counter_store is not None:
+                self.counter_store.close()
+
+    def update_line_config(self, line_config):
+        """Cambia la línea de conteo con el pipeline corriendo"""
+        self.line_config = line_config
+        self.counter.set_line_config(self.profile.scale_line(line_config))
 
     def get_counters(self):
         """Retorna contadores actuales"""
         return self.counter.contadores.copy()
+
+    def get_track_stats(self):
+        """Retorna tamaño y expulsiones del almacén de tracks"""
+        return self.counter.tracks.stats()
+
+    def _set_infer_interval(self, interval):
+        """
+        Cambia el interval de nvinfer con el pipeline en PLAYING
+
+        Lo llama el probe (thread de streaming) cuando el controlador cambia
+        de intervalo; nvinfer lee la propiedad en cada batch
+        """
+        if self._nvinfer is None:
+            self._nvinfer = self._find_element('nvinfer')
+            if self._nvinfer is None:
+                logger.warning(f"⚠️  [Cam {self.camera_id}] nvinfer no encontrado; interval fijo del config")
+                self.interval_controller.on_change = None
+                return
+        self._nvinfer.set_property('interval', interval)
+
+    def _find_element(self, factory_name):
+        """Busca un elemento del pipeline GStreamer por nombre de fábrica"""
+        for element in self.pipeline.pipeline.iterate_recurse():
+            factory = element.get_factory()
+            if factory is not None and factory.get_name() == factory_name:
+                return element
+        return None
+
+    def get_metrics(self):
+        """Retorna snapshot consistente de las métricas de rendimiento"""
+        metrics = self.counter.metrics.snapshot()
+        if self.interval_controller is not None:
+            metrics.update(self.interval_controller.stats())
+        return metrics
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Pipeline DeepStream COMPARTIDO para múltiples cámaras (pyservicemaker)
+Un solo batch_capture sobre todas las URIs, un solo infer() y un solo tracker
+"""
+
+import logging
+import time
+
+from pyservicemaker import Pipeline, Flow, BatchMetadataOperator, Probe, RenderMode
+from modules.deepstream_camera_sm import LineCrossingCounter
+from modules.counter_store import open_counter_store, DEFAULT_COUNTER_DIR
+from modules.camera_metrics import CameraMetrics
+from modules.async_logging import LogSampler
+from modules.camera_profiles import (resolve_profile, infer_config_path, TRACKER_LIB,
+                                     SINK_DISPLAY, SINK_DISCARD)
+
+
+logger = logging.getLogger(__name__)
+
+
+class MultiSourceLineCrossingCounter(BatchMetadataOperator):
+    """
+    Operador único para un batch con varias cámaras
+
+    Enruta cada frame al LineCrossingCounter de su cámara según
+    frame_meta.source_id (índice de la URI en batch_capture)
+    """
+
+    def __init__(self, sources, draw_overlays=True, event_publisher=None,
+                 persist_dir=None, overlay_style=None, status_every=30):
+        """
+        Inicializa el operador multi-cámara
+
+        Args:
+            sources: Lista de dicts con 'camera_id', 'camera_name', 'line_config'
+                     (y 'counter_row' opcional) en el mismo orden que las URIs del batch
+            draw_overlays: Si False (sin sink visible), no se genera display-meta
+            event_publisher: CrossingEventPublisher opcional compartido por las cámaras
+            persist_dir: Directorio de persistencia de contadores (None = deshabilitada)
+            overlay_style: kwargs de LineOverlay de cada cámara (CameraProfile.overlay_style())
+            status_every: Frames entre logs de estado de cada cámara
+        """
+        super().__init__()
+
+        # source_id -> contador de la cámara
+        self.counters = {}
+        for source_id, source in enumerate(sources):
+            counter_store, restored = open_counter_store(source['camera_id'], persist_dir)
+            self.counters[source_id] = LineCrossingCounter(
+                source['camera_id'],
+                source['camera_name'],
+                source['line_config'],
+                draw_overlays=draw_overlays,
+                event_publisher=event_publisher,
+                counter_store=counter_store,
+                counter_row=source.get('counter_row'),
+                overlay_style=overlay_style,
+                status_every=status_every
+            )
+            if restored:
+                self.counters[source_id].contadores.update(restored)
+            if source.get('counter_row') is not None:
+                self.counters[source_id].write_counter_row()
+
+        # camera_id -> contador (para consultas de estadísticas)
+        self.counters_by_camera = {
+            counter.camera_id: counter for counter in self.counters.values()
+        }
+
+        self.batch_count = 0
+
+        # Hay líneas nuevas pendientes en algún contador (ver set_line_config)
+        self._lines_pending = False
+
+        # Duración de handle_metadata del batch completo (las métricas por
+        # frame viven en el contador de cada cámara)
+        self.metrics = CameraMetrics("shared")
+        self._log_error = LogSampler(logger, 'error', 'shared', logging.ERROR)
+
+        logger.info(f"✅ MultiSourceLineCrossingCounter inicializado con {len(self.counters)} cámaras")
+
+    def handle_metadata(self, batch_meta):
+        """
+        Procesa metadatos de cada batch
+        Cada frame del batch pertenece a una cámara distinta
+        """
+        t0 = time.perf_counter_ns()
+        if self._lines_pending:
+            self._lines_pending = False
+            for counter in self.counters.values():
+                counter.apply_pending_line()
+        try:
+            for frame_meta in batch_meta.frame_items:
+                counter = self.counters.get(frame_meta.source_id)
+                if counter is None:
+                    continue
+                counter.process_frame(batch_meta, frame_meta)
+
+            self.batch_count += 1
+            self.metrics.record_batch(time.perf_counter_ns() - t0)
+
+        except Exception as e:
+            self._log_error.log("❌ Error en handle_metadata (multi-source): %s", e, exc_info=True)
+
+    def set_line_config(self, camera_id, line_config):
+        """
+        Programa una línea nueva para una cámara del batch
+
+        Returns:
+            False si la cámara no está en este pipeline
+        """
+        counter = self.counters_by_camera.get(camera_id)
+        if counter is None:
+            return False
+        counter.set_line_config(line_config)
+        self._lines_pending = True
+        return True
+
+    def close_stores(self):
+        """Flush final + snapshot de la persistencia de cada cámara"""
+        for counter in self.counters.values():
+            if counter.counter_store is not None:
+                counter.counter_store.close()
+
+
+class DeepStreamMultiSourceServiceMaker:
+    """
+    Pipeline pyservicemaker compartido por todas las cámaras
+
+    El engine YOLO se carga UNA vez y la inferencia corre con
+    batch-size igual al número de cámaras
+    """
+
+    def __init__(self, sources,
+                 config_file=None,
+                 headless=False, event_publisher=None,
+                 persist_dir=DEFAULT_COUNTER_DIR, profile=None):
+        """
+        Inicializa el pipeline compartido
+
+        Args:
+            sources: Lista de dicts con 'camera_id', 'camera_name', 'rtsp_uri', 'line_config'
+            config_file: Config de nvinfer (None = infer_config_path())
+            headless: Si True, no renderiza video (perfil sin display)
+            event_publisher: CrossingEventPublisher opcional para enviar cruces a la API
+            persist_dir: Directorio de persistencia de contadores (None = deshabilitada)
+            profile: Nombre o CameraProfile; el batch-size del perfil se ignora
+                     (aquí siempre es el número de cámaras)
+        """
+        if not sources:
+            raise ValueError("Se requiere al menos una cámara para el pipeline compartido")
+
+        self.sources = list(sources)
+        self.config_file = config_file or infer_config_path()
+        self.profile = resolve_profile(profile, headless)
+        if self.profile.sink not in (SINK_DISPLAY, SINK_DISCARD):
+            raise ValueError(f"El pipeline compartido no admite el sink '{self.profile.sink}' "
+                             f"(perfil {self.profile.name})")
+        self.headless = self.profile.sink != SINK_DISPLAY
+        self.batch_size = len(self.sources)
+
+        # source_id -> camera_id (orden de las URIs en batch_capture)
+        self.source_to_camera = {
+            source_id: source['camera_id'] for source_id, source in enumerate(self.sources)
+        }
+
+        # Crear pipeline único
+        self.pipeline = Pipeline("camera-shared")
+
+        # Operador que enruta por source_id
+        # Líneas en el espacio de nvstreammux del perfil
+        scaled_sources = [dict(source, line_config=self.profile.scale_line(source['line_config']))
+                          for source in self.sources]
+        self.counter = MultiSourceLineCrossingCounter(scaled_sources,
+                                                      draw_overlays=self.profile.draws_overlays,
+                                                      event_publisher=event_publisher,
+                                                      persist_dir=persist_dir,
+                                                      overlay_style=self.profile.overlay_style(),
+                                                      status_every=self.profile.status_every)
+
+        capture_options = self.profile.capture_options()
+        capture_options['batch-size'] = self.batch_size
+
+        uris = [source['rtsp_uri'] for source in self.sources]
+
+        # batch-size = número de cámaras tanto en streammux como en nvinfer
+        # main.py comprueba antes de arrancar que el perfil del engine admite
+        # este batch (engines/nvinfer_config.py); la config generada no lleva
+        # onnx-file, así que un desajuste falla en vez de recompilar
+        base_flow = (Flow(self.pipeline)
+                    .batch_capture(uris, **capture_options)
+                    .infer(self.config_file, **{'batch-size': self.batch_size},
+                           **self.profile.infer_options())
+                    .track(ll_config_file=self.profile.tracker_config, ll_lib_file=TRACKER_LIB,
+                           **self.profile.tracker_options())
+                    .attach(what=Probe("line-crossing-shared", self.counter)))
+
+        if not self.headless:
+            self.flow = base_flow.render(
+                window_width=self.profile.window_width,
+                window_height=self.profile.window_height,
+                force_aspect_ratio=True,
+                **self.profile.sink_options()
+            )
+        else:
+            self.flow = base_flow.render(mode=RenderMode.DISCARD)
+
+        logger.info(f"✅ DeepStreamMultiSourceServiceMaker creado con {self.batch_size} cámaras")
+        logger.info(f"   Cámaras: {list(self.source_to_camera.values())}")
+        logger.info(f"   Perfil: {self.profile.describe()}")
+
+    def run(self):
+        """Ejecuta el pipeline compartido (blocking)"""
+        logger.info(f"🚀 Iniciando pipeline compartido ({self.batch_size} cámaras)...")
+        try:
+            self.flow()  # Blocking call
+        except KeyboardInterrupt:
+            logger.warning("\n⚠️  Pipeline compartido detenido por usuario")
+        except Exception as e:
+            logger.error(f"❌ Error en pipeline compartido: {e}", exc_info=True)
+        finally:
+            self.counter.close_stores()
+
+    def update_line_config(self, camera_id, line_config):
+        """Cambia la línea de conteo de una cámara con el pipeline corriendo"""
+        return self.counter.set_line_config(camera_id, self.profile.scale_line(line_config))
+
+    def get_counters(self, camera_id):
+        """Retorna contadores actuales de una cámara del batch"""
+        counter = self.counter.counters_by_camera.get(camera_id)
+        if counter is None:
+            return {'entradas': 0, 'salidas': 0, 'dentro': 0}
+        return counter.contadores.copy()
+
+    def get_frame_count(self, camera_id):
+        """Retorna frames procesados de una cámara del batch"""
+        counter = self.counter.counters_by_camera.get(camera_id)
+        return counter.frame_count if counter else 0
+
+    def get_metrics(self, camera_id=None):
+        """
+        Retorna snapshot de métricas
+
+        Args:
+            camera_id: Cámara del batch; None = duración de batch del pipeline
+        """
+        if camera_id is None:
+            return self.counter.metrics.snapshot()
+        counter = self.counter.counters_by_camera.get(camera_id)
+        if counter is None:
+            return CameraMetrics(camera_id).snapshot()
+        return counter.metrics.snapshot()
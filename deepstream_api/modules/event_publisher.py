@@ -0,0 +1,230 @@
+"""
+Publicador asíncrono de eventos de cruce hacia la API de cámaras
+El probe encola registros compactos; un worker los envía en lotes
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.line_crossing_detector import CRUCE_ENTRADA, CRUCE_SALIDA
+
+
+logger = logging.getLogger(__name__)
+
+
+# Código de cruce -> tipo de evento en la API
+TIPOS_EVENTO = {
+    CRUCE_ENTRADA: 'entrada',
+    CRUCE_SALIDA: 'salida',
+}
+
+# Registro compacto: (camera_id, track_id, codigo_cruce, timestamp, entradas, salidas, dentro)
+EventRecord = Tuple[int, int, int, float, int, int, int]
+
+
+class CrossingEventPublisher:
+    """
+    Publicador no bloqueante de eventos de cruce
+
+    - publish() nunca espera: si la cola está llena el evento se descarta
+      y se cuenta (backpressure visible en get_stats)
+    - Un único worker envía lotes de hasta `batch_size` eventos, o lo que
+      haya acumulado cada `flush_interval` segundos
+    - Sesión HTTP con pool de conexiones (keep-alive) reutilizada
+    """
+
+    def __init__(self, api_url: str, endpoint: str = "/eventos",
+                 max_queue: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 1.0, timeout: float = 5.0,
+                 max_retries: int = 2, retry_backoff: float = 0.5):
+        """
+        Inicializa el publicador
+
+        Args:
+            api_url: URL base de la API (ej: http://172.80.20.22/api)
+            endpoint: Ruta del endpoint de eventos
+            max_queue: Máximo de eventos pendientes antes de descartar
+            batch_size: Máximo de eventos por petición
+            flush_interval: Segundos máximos que un evento espera en cola
+            timeout: Timeout de cada petición HTTP
+            max_retries: Reintentos por lote antes de darlo por fallido
+            retry_backoff: Espera base entre reintentos (se duplica)
+        """
+        self.api_url = api_url
+        self.events_endpoint = f"{api_url.rstrip('/')}{endpoint}"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._queue: "queue.Queue[EventRecord]" = queue.Queue(maxsize=max_queue)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Sesión HTTP con pool de conexiones
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        # Contadores (escritos por el worker, salvo 'dropped')
+        self._dropped_lock = threading.Lock()
+        self._stats = {
+            'dropped': 0,
+            'received': 0,
+            'sent': 0,
+            'failed': 0,
+            'batches_sent': 0,
+            'batches_failed': 0,
+            'retries': 0,
+            'last_request_ms': 0.0,
+            'max_queue_delay_ms': 0.0,
+        }
+
+    def start(self):
+        """Inicia el worker de envío"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="CrossingEventPublisher",
+            daemon=True
+        )
+        self._thread.start()
+        logger.info(f"✅ Publicador de eventos iniciado: {self.events_endpoint}")
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Detiene el worker enviando los eventos pendientes
+
+        Args:
+            timeout: Tiempo máximo de espera para vaciar la cola
+        """
+        if not self._thread:
+            return
+
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            # La sesión la cierra el worker al terminar: cerrarla aquí cortaría su envío en curso
+            logger.warning(f"⚠️  Publicador de eventos no terminó en {timeout}s "
+                           f"({self._queue.qsize()} eventos pendientes)")
+        self._thread = None
+
+    def publish(self, camera_id: int, track_id: int, codigo_cruce: int,
+                entradas: int, salidas: int, dentro: int) -> bool:
+        """
+        Encola un evento de cruce (llamado desde el probe, nunca bloquea)
+
+        Returns:
+            True si se encoló, False si se descartó por cola llena
+        """
+        try:
+            self._queue.put_nowait(
+                (camera_id, track_id, codigo_cruce, time.time(), entradas, salidas, dentro)
+            )
+            return True
+        except queue.Full:
+            with self._dropped_lock:
+                self._stats['dropped'] += 1
+            return False
+
+    def get_stats(self) -> Dict:
+        """Retorna copia de los contadores del publicador"""
+        stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize()
+        return stats
+
+    def _run(self):
+        """Bucle del worker: acumula lotes y los envía (cierra la sesión al salir)"""
+        try:
+            self._drain()
+        finally:
+            self._session.close()
+
+    def _drain(self):
+        """Acumula lotes y los envía hasta que stop() vacía la cola"""
+        batch: List[EventRecord] = []
+        deadline = None
+
+        while True:
+            stopping = self._stop_event.is_set()
+
+            # Esperar el primer evento del lote o el fin del intervalo
+            wait = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                record = self._queue.get(timeout=0.1 if stopping else min(wait, 0.5))
+                batch.append(record)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+                # Drenar lo disponible sin esperar
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if batch and (len(batch) >= self.batch_size or due or stopping):
+                self._send_batch(batch)
+                batch = []
+                deadline = None
+
+            if stopping and not batch and self._queue.empty():
+                break
+
+    def _send_batch(self, batch: List[EventRecord]):
+        """Envía un lote con reintentos"""
+        self._stats['received'] += len(batch)
+
+        now = time.time()
+        oldest_delay_ms = (now - batch[0][3]) * 1000.0
+        if oldest_delay_ms > self._stats['max_queue_delay_ms']:
+            self._stats['max_queue_delay_ms'] = oldest_delay_ms
+
+        payload = {
+            'eventos': [
+                {
+                    'camara_id': camera_id,
+                    'track_id': track_id,
+                    'tipo': TIPOS_EVENTO.get(codigo, 'desconocido'),
+                    'fecha': datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+                    'ts': ts,
+                    'entradas': entradas,
+                    'salidas': salidas,
+                    'dentro': dentro,
+                }
+                for camera_id, track_id, codigo, ts, entradas, salidas, dentro in batch
+            ]
+        }
+
+        for attempt in range(self.max_retries + 1):
+            t0 = time.monotonic()
+            try:
+                response = self._session.post(self.events_endpoint, json=payload, timeout=self.timeout)
+                self._stats['last_request_ms'] = (time.monotonic() - t0) * 1000.0
+                response.raise_for_status()
+
+                self._stats['sent'] += len(batch)
+                self._stats['batches_sent'] += 1
+                return
+
+            except requests.exceptions.RequestException as e:
+                if attempt < self.max_retries:
+                    self._stats['retries'] += 1
+                    # Durante la parada no se espera el backoff
+                    self._stop_event.wait(self.retry_backoff * (2 ** attempt))
+                else:
+                    logger.error(f"❌ Error enviando {len(batch)} eventos a la API: {e}")
+
+        self._stats['failed'] += len(batch)
+        self._stats['batches_failed'] += 1
@@ -0,0 +1,348 @@
+"""
+Reconciliación incremental de la flota de cámaras
+Compara la lista de la API con las cámaras del gestor (por id y hash de campos)
+y agrega, quita o reinicia solo las cámaras que cambiaron
+"""
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .rtsp_builder import RTSPBuilder
+
+
+logger = logging.getLogger(__name__)
+
+
+# Campos de la API que definen el pipeline (cambio => reiniciar la cámara)
+PIPELINE_FIELDS = ('cam_ip', 'cam_port', 'cam_user', 'cam_password', 'cam_rstp')
+# Campos de la línea de conteo (cambio => reiniciar si la línea efectiva cambia)
+LINE_FIELDS = ('cam_coordenadas',)
+# Campos descriptivos (cambio => solo se actualiza la metadata)
+META_FIELDS = ('cam_nombre', 'zonas_id')
+
+
+def _digest(camera_data: Dict, fields: Tuple[str, ...]) -> bytes:
+    values = [camera_data.get(name) for name in fields]
+    return hashlib.blake2b(json.dumps(values, sort_keys=True, default=str).encode('utf-8'),
+                           digest_size=8).digest()
+
+
+def fingerprint(camera_data: Dict) -> Tuple[bytes, bytes, bytes]:
+    """Hashes (pipeline, línea, metadata) de un registro de la API"""
+    return (_digest(camera_data, PIPELINE_FIELDS),
+            _digest(camera_data, LINE_FIELDS),
+            _digest(camera_data, META_FIELDS))
+
+
+@dataclass
+class CameraSpec:
+    """Configuración resuelta de una cámara (lo que recibe MultiCameraManager)"""
+    camera_id: int
+    camera_name: str
+    rtsp_uri: str
+    line_config: Dict
+    api_coordinates: object = field(repr=False, default=None)
+    fingerprint: Tuple[bytes, bytes, bytes] = field(repr=False, default=(b'', b'', b''))
+
+
+@dataclass
+class ReconcileResult:
+    """Cámaras afectadas por una reconciliación"""
+    added: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    restarted: List[int] = field(default_factory=list)
+    updated: List[int] = field(default_factory=list)
+    failed: List[int] = field(default_factory=list)
+
+    @property
+    def changes(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.restarted) + len(self.updated)
+
+
+class FleetReconciler:
+    """
+    Mantiene MultiCameraManager alineado con la lista de cámaras de la API
+
+    - Cámaras sin cambios: no se tocan (siguen corriendo con sus contadores)
+    - Cambio de IP/puerto/credenciales/path: se reinicia solo esa cámara
+      (conserva sus contadores: MultiCameraManager.restart_camera)
+    - Cambio de coordenadas: la línea efectiva (un archivo local
+      camera_<id>_line.json tiene prioridad) se aplica en caliente, sin reinicio
+    - Cambio de nombre/zona: solo se actualiza la metadata
+    - El trabajo por consulta es comparar hashes; lo caro (archivos de
+      configuración, pipelines) solo se hace para las cámaras que cambiaron
+    """
+
+    def __init__(self, manager, config_manager, stop_timeout: float = 5.0,
+                 line_watcher=None):
+        """
+        Args:
+            manager: MultiCameraManager
+            config_manager: CameraConfig (líneas y metadata por cámara)
+            stop_timeout: Espera al detener una cámara que se reinicia o quita
+            line_watcher: LineConfigWatcher opcional (se mantiene al día con
+                          las cámaras y coordenadas de la API)
+        """
+        self.manager = manager
+        self.config_manager = config_manager
+        self.stop_timeout = stop_timeout
+        self.line_watcher = line_watcher
+
+        # camera_id -> CameraSpec aplicada
+        self.specs: Dict[int, CameraSpec] = {}
+        # Cámaras cuyo último intento falló (se reintentan en la siguiente consulta)
+        self._pending: set = set()
+        self._metadata_batch: List[Tuple[int, Dict]] = []
+        self._lock = threading.Lock()
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Construcción de la configuración de una cámara
+    # ------------------------------------------------------------------
+
+    def build_spec(self, camera_data: Dict) -> Optional[CameraSpec]:
+        """
+        Resuelve URI RTSP y línea de una cámara y encola su metadata
+
+        Returns:
+            CameraSpec, o None si la URI RTSP no es válida
+        """
+        camera_id = camera_data['id']
+        camera_name = camera_data.get('cam_nombre', f"Cámara {camera_id}")
+
+        logger.info(f"   Nombre: {camera_name}")
+        logger.info(f"   IP: {camera_data.get('cam_ip')}")
+
+        try:
+            rtsp_uri = RTSPBuilder.build_rtsp_uri(camera_data)
+        except ValueError as e:
+            logger.error(f"   ❌ {e}, omitiendo...")
+            return None
+        if not RTSPBuilder.validate_rtsp_uri(rtsp_uri):
+            logger.error(f"   ❌ URI RTSP inválida, omitiendo...")
+            return None
+
+        line_config = self.config_manager.get_line_config(camera_id, camera_data.get('cam_coordenadas'))
+        logger.info(f"   Línea: {line_config['start']} -> {line_config['end']}")
+        logger.info(f"   Dirección: {line_config['direccion_entrada']}")
+
+        self._save_metadata(camera_data)
+        return CameraSpec(camera_id, camera_name, rtsp_uri, line_config,
+                          camera_data.get('cam_coordenadas'), fingerprint(camera_data))
+
+    def _save_metadata(self, camera_data: Dict):
+        """Encola la metadata; se guarda en una sola transacción al final de la reconciliación"""
+        self._metadata_batch.append((camera_data['id'], self.config_manager.get_camera_metadata(camera_data)))
+
+    def _flush_metadata(self):
+        batch, self._metadata_batch = self._metadata_batch, []
+        if batch:
+            self.config_manager.save_cameras_metadata(batch)
+
+    # ------------------------------------------------------------------
+    # Reconciliación
+    # ------------------------------------------------------------------
+
+    def reconcile(self, cameras_data: List[Dict], start_new: bool = True) -> ReconcileResult:
+        """
+        Aplica la lista de cámaras de la API al gestor
+
+        Args:
+            cameras_data: Lista de cámaras tal como la retorna la API
+            start_new: Iniciar las cámaras agregadas (False en el arranque:
+                       main las inicia todas juntas con start_all_cameras)
+
+        Returns:
+            ReconcileResult con los ids afectados
+        """
+        with self._lock:
+            try:
+                return self._reconcile(cameras_data, start_new)
+            finally:
+                self._flush_metadata()
+
+    def _reconcile(self, cameras_data: List[Dict], start_new: bool) -> ReconcileResult:
+        result = ReconcileResult()
+        if self.manager.shutdown_event.is_set():
+            return result
+
+        incoming = {c['id']: c for c in cameras_data if c.get('id') is not None}
+        pending, self._pending = self._pending, set()
+
+        # Diff por id y hash (sin tocar archivos ni pipelines)
+        removed = [cid for cid in self.specs if cid not in incoming]
+        added = [cid for cid in incoming if cid not in self.specs]
+        changed = []
+        for camera_id, camera_data in incoming.items():
+            spec = self.specs.get(camera_id)
+            if spec is not None and (camera_id in pending or fingerprint(camera_data) != spec.fingerprint):
+                changed.append(camera_id)
+        added.extend(cid for cid in pending if cid in incoming and cid not in self.specs and cid not in added)
+
+        if not (removed or added or changed):
+            return result
+
+        if self._frozen():
+            # Sin agregar/quitar fuentes: solo se aplican líneas y metadata
+            deferred = [cid for cid in changed
+                        if fingerprint(incoming[cid])[0] != self.specs[cid].fingerprint[0]]
+            for camera_id in changed:
+                if camera_id in deferred:
+                    self.specs[camera_id].fingerprint = fingerprint(incoming[camera_id])
+                else:
+                    self._apply_change(camera_id, incoming[camera_id], result)
+            if added or removed or deferred:
+                logger.warning(f"⚠️  Pipeline compartido: {len(added)} nuevas, {len(removed)} quitadas, "
+                               f"{len(deferred)} con otra URI; se aplicarán al reiniciar")
+            return result
+
+        logger.info(f"🔄 Reconciliando cámaras: +{len(added)} -{len(removed)} ~{len(changed)}")
+
+        # 1. Quitar (libera capacidad para las nuevas)
+        for camera_id in removed:
+            if self._remove(camera_id):
+                result.removed.append(camera_id)
+            else:
+                result.failed.append(camera_id)
+
+        # 2. Modificadas
+        for camera_id in changed:
+            self._apply_change(camera_id, incoming[camera_id], result)
+
+        # 3. Nuevas
+        for camera_id in added:
+            logger.info(f"\n📹 Configurando cámara ID {camera_id}:")
+            spec = self.build_spec(incoming[camera_id])
+            if spec is None:
+                result.failed.append(camera_id)
+                continue
+            if self._add(spec, start_new):
+                result.added.append(camera_id)
+            else:
+                result.failed.append(camera_id)
+                self._pending.add(camera_id)
+
+        if result.changes or result.failed:
+            logger.info(f"✅ Reconciliación: agregadas {result.added} | quitadas {result.removed} | "
+                        f"reiniciadas {result.restarted} | actualizadas {result.updated}"
+                        + (f" | fallidas {result.failed}" if result.failed else ""))
+        return result
+
+    def _frozen(self) -> bool:
+        """El pipeline compartido no admite cambios de cámaras una vez construido"""
+        return self.manager.shared_pipeline and self.manager._shared is not None
+
+    def _apply_change(self, camera_id: int, camera_data: Dict, result: ReconcileResult):
+        spec = self.specs[camera_id]
+        new_fp = fingerprint(camera_data)
+        pipeline_changed = new_fp[0] != spec.fingerprint[0]
+        line_changed = new_fp[1] != spec.fingerprint[1]
+
+        if not pipeline_changed and not line_changed and camera_id not in result.failed:
+            # Solo nombre/zona: sin reinicio
+            self._save_metadata(camera_data)
+            spec.camera_name = camera_data.get('cam_nombre', spec.camera_name)
+            spec.fingerprint = new_fp
+            result.updated.append(camera_id)
+            return
+
+        logger.info(f"\n📹 Cámara ID {camera_id} modificada "
+                    f"({'pipeline' if pipeline_changed else 'línea'}):")
+        new_spec = self.build_spec(camera_data)
+        if new_spec is None:
+            result.failed.append(camera_id)
+            return
+
+        if not pipeline_changed:
+            # Solo la línea: en caliente (sin cambio si manda un archivo local)
+            if (new_spec.line_config == spec.line_config
+                    or self.manager.update_line_config(camera_id, new_spec.line_config)):
+                self._applied(new_spec)
+                result.updated.append(camera_id)
+                return
+            if self._frozen():
+                result.failed.append(camera_id)
+                self._pending.add(camera_id)
+                return
+
+        if self.manager.restart_camera(new_spec.camera_id, new_spec.camera_name, new_spec.rtsp_uri,
+                                       new_spec.line_config, timeout=self.stop_timeout):
+            self._applied(new_spec)
+            result.restarted.append(camera_id)
+        else:
+            result.failed.append(camera_id)
+            self._pending.add(camera_id)
+
+    def _applied(self, spec: CameraSpec):
+        """Registra la configuración con la que quedó corriendo la cámara"""
+        self.specs[spec.camera_id] = spec
+        if self.line_watcher is not None:
+            self.line_watcher.watch(spec.camera_id, spec.api_coordinates, spec.line_config)
+
+    def _add(self, spec: CameraSpec, start: bool) -> bool:
+        if not self.manager.add_camera(spec.camera_id, spec.camera_name, spec.rtsp_uri, spec.line_config):
+            return False
+        self._applied(spec)
+        if start and not self.manager.start_camera(spec.camera_id):
+            logger.error(f"❌ Cámara {spec.camera_id} agregada pero no inició")
+        return True
+
+    def _remove(self, camera_id: int) -> bool:
+        self.manager.stop_camera(camera_id, timeout=self.stop_timeout)
+        if camera_id in self.manager.cameras and not self.manager.remove_camera(camera_id):
+            self._pending.add(camera_id)
+            return False
+        self.specs.pop(camera_id, None)
+        if self.line_watcher is not None:
+            self.line_watcher.unwatch(camera_id)
+        return True
+
+    # ------------------------------------------------------------------
+    # Consulta periódica
+    # ------------------------------------------------------------------
+
+    def start(self, api_client, interval: float = 60.0, immediate: bool = True):
+        """
+        Consulta la API periódicamente y reconcilia
+
+        Con respuesta 304 (sin cambios) no hay trabajo, salvo reintentar
+        cámaras cuyo último cambio falló
+
+        Args:
+            api_client: CameraAPIClient
+            interval: Segundos entre consultas
+            immediate: Consultar en cuanto arranca (arranque desde la caché)
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        def run():
+            wait = 0.0 if immediate else interval
+            while not self._stop_event.wait(wait):
+                wait = interval
+                try:
+                    cameras, changed = api_client.fetch()
+                except Exception as e:
+                    logger.warning(f"⚠️  No se pudo consultar la lista de cámaras: {e}")
+                    continue
+                if changed or self._pending:
+                    try:
+                        self.reconcile(cameras)
+                    except Exception as e:
+                        logger.error(f"❌ Error reconciliando cámaras: {e}", exc_info=True)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="FleetReconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 15.0):
+        """Detiene la consulta periódica"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
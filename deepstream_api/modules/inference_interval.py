@@ -0,0 +1,152 @@
+"""
+Intervalo de inferencia adaptativo por cámara
+Decide cada cuántos batches corre nvinfer según la actividad cerca de la línea
+de conteo: intervalo largo con la escena vacía o lejos de la línea, interval=0
+cuando alguien se acerca. Entre inferencias el tracker sigue reportando los
+objetos (posición predicha), así que el probe cuenta igual
+"""
+import threading
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+
+class AdaptiveInferenceInterval:
+    """
+    Controlador del `interval` de nvinfer (lo alimenta LineCrossingCounter)
+
+    - Por frame: distancia de cada persona a la línea y velocidad hacia ella
+      (posición actual vs la anterior del mismo track)
+    - Frames hasta que la persona más próxima entre a la franja `near_px`:
+      t = (distancia - near_px) / velocidad; el intervalo elegido deja al
+      menos `safety` inferencias antes de que llegue
+    - Alguien dentro de la franja -> min_interval; escena vacía -> max_interval
+    - Tracks nuevos (sin posición previa) se suponen a `default_speed` px/frame
+    - Bajar el intervalo es inmediato; subirlo requiere `calm_frames` frames
+      seguidos pidiendo un intervalo mayor (histéresis)
+    - Sin estado compartido con otros threads salvo stats() (solo lectura)
+    """
+
+    def __init__(self, min_interval: int = 2, max_interval: int = 8, near_px: float = 120.0,
+                 safety: float = 2.0, default_speed: float = 8.0, calm_frames: int = 15,
+                 baseline_interval: int = 2, on_change: Optional[Callable[[int], None]] = None):
+        """
+        Args:
+            min_interval: Intervalo con personas cerca de la línea (0 = todos los frames).
+                          Por debajo de baseline_interval una escena concurrida infiere
+                          más que el config fijo (bench_adaptive_interval: con 0, +25%
+                          de día y +176% en hora punta frente a interval=2)
+            max_interval: Intervalo con la escena vacía
+            near_px: Franja a cada lado de la línea donde se infiere con min_interval
+            safety: Inferencias mínimas antes de que alguien llegue a la franja
+            default_speed: Velocidad supuesta de un track nuevo (px/frame)
+            calm_frames: Frames seguidos antes de subir el intervalo
+            baseline_interval: Intervalo fijo del config de nvinfer (para el ahorro reportado)
+            on_change: Callback(interval) cuando cambia el intervalo (aplica a nvinfer)
+        """
+        if not 0 <= min_interval <= max_interval:
+            raise ValueError("Se requiere 0 <= min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.near_px = near_px
+        self.safety = safety
+        self.default_speed = default_speed
+        self.calm_frames = calm_frames
+        self.baseline_interval = baseline_interval
+        self.on_change = on_change
+
+        # Arranca conservador: el intervalo mínimo (más inferencia) hasta ver la escena
+        self.interval = min_interval
+        self._applied: Optional[int] = None
+        self._calm = 0
+
+        self._lock = threading.Lock()
+        self._frames = 0
+        self._inferred = 0.0
+        self._changes = 0
+
+    # ------------------------------------------------------------------
+    # Camino del probe
+    # ------------------------------------------------------------------
+
+    def observe(self, detector, centroids, known=None, prev_centroids=None):
+        """
+        Registra un frame con personas
+
+        Args:
+            detector: LineCrossingDetector vigente
+            centroids: np.ndarray (N, 2) posiciones actuales
+            known: Máscara (N,) de tracks con posición previa
+            prev_centroids: np.ndarray (K, 2) posiciones previas de los `known`
+        """
+        if not detector.tiene_linea_configurada():
+            self._update(self.max_interval)
+            return
+
+        distance = np.abs(detector.distancias_batch(centroids))
+        if (distance <= self.near_px).any():
+            self._update(self.min_interval)
+            return
+
+        # Frames hasta la franja: tracks nuevos a velocidad supuesta
+        frames_to_band = (distance - self.near_px) / self.default_speed
+        if prev_centroids is not None and len(prev_centroids):
+            approach = np.abs(detector.distancias_batch(prev_centroids)) - distance[known]
+            frames_to_band[known] = np.where(approach > 1e-6,
+                                             (distance[known] - self.near_px) / np.maximum(approach, 1e-6),
+                                             np.inf)
+        self._update(self._interval_for(float(frames_to_band.min())))
+
+    def observe_empty(self):
+        """Registra un frame sin personas"""
+        self._update(self.max_interval)
+
+    def _interval_for(self, frames_to_band: float) -> int:
+        """Mayor intervalo que deja `safety` inferencias antes de la franja"""
+        if frames_to_band == np.inf:
+            return self.max_interval
+        interval = int(frames_to_band / self.safety) - 1
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def _update(self, target: int):
+        if target < self.interval:
+            self.interval = target
+            self._calm = 0
+        elif target > self.interval:
+            self._calm += 1
+            if self._calm >= self.calm_frames:
+                self.interval = target
+                self._calm = 0
+        else:
+            self._calm = 0
+
+        if self.interval != self._applied:
+            self._applied = self.interval
+            self._changes += 1
+            if self.on_change is not None:
+                self.on_change(self.interval)
+
+        with self._lock:
+            self._frames += 1
+            # nvinfer infiere 1 de cada interval + 1 batches
+            self._inferred += 1.0 / (self.interval + 1)
+
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            {'infer_interval', 'infer_ratio', 'infer_saved_pct',
+             'infer_saved_vs_fixed_pct', 'infer_changes'} (ahorro estimado)
+        """
+        with self._lock:
+            frames, inferred = self._frames, self._inferred
+        ratio = inferred / frames if frames else 1.0
+        fixed_ratio = 1.0 / (self.baseline_interval + 1)
+        return {
+            'infer_interval': self.interval,
+            'infer_ratio': ratio,
+            'infer_saved_pct': (1.0 - ratio) * 100.0,
+            'infer_saved_vs_fixed_pct': (1.0 - ratio / fixed_ratio) * 100.0,
+            'infer_changes': self._changes,
+        }
@@ -0,0 +1,130 @@
+"""
+Recarga en caliente de las líneas de conteo
+Vigila los archivos camera_<id>_line.json y el almacén de configuración y
+aplica los cambios al contador en ejecución (entre dos batches) sin
+reconstruir el pipeline
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+# Marca que fuerza volver a evaluar la cámara en la próxima revisión
+_RETRY = "retry"
+
+
+@dataclass
+class _WatchedLine:
+    api_coordinates: object
+    line_config: Dict
+    stamp: Optional[str]
+
+
+class LineConfigWatcher:
+    """
+    Detecta cambios en las líneas locales y los aplica en caliente
+
+    - Por cámara y revisión solo se hace un stat() de su archivo; se lee y
+      valida únicamente si cambió su mtime, tamaño o inodo
+    - Una consulta por revisión (PRAGMA data_version) detecta líneas guardadas
+      en el almacén por otro proceso (CameraConfig.save_line_config)
+    - Un archivo a medio escribir (JSON inválido) se ignora: la cámara sigue
+      con la línea anterior
+    - Si el archivo se borra, vuelven a regir las coordenadas de la API
+    - Las coordenadas de la API las actualiza FleetReconciler con watch()
+    """
+
+    def __init__(self, manager, config_manager, interval: float = 2.0):
+        """
+        Args:
+            manager: MultiCameraManager (aplica la línea con update_line_config)
+            config_manager: CameraConfig
+            interval: Segundos entre revisiones
+        """
+        self.manager = manager
+        self.config_manager = config_manager
+        self.interval = interval
+
+        self._watched: Dict[int, _WatchedLine] = {}
+        self._data_version = config_manager.data_version()
+        self._lock = threading.Lock()
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def watch(self, camera_id: int, api_coordinates, line_config: Dict):
+        """
+        Registra (o actualiza) la línea vigente de una cámara
+
+        Args:
+            camera_id: ID de la cámara
+            api_coordinates: cam_coordenadas de la API (se usan si no hay línea local)
+            line_config: Línea con la que corre la cámara
+        """
+        stamp = self.config_manager.line_file_stamp(camera_id)
+        with self._lock:
+            self._watched[camera_id] = _WatchedLine(api_coordinates, line_config, stamp)
+
+    def unwatch(self, camera_id: int):
+        """Deja de vigilar una cámara (p.ej. quitada del gestor)"""
+        with self._lock:
+            self._watched.pop(camera_id, None)
+
+    def check(self) -> List[int]:
+        """
+        Revisa los archivos y el almacén una vez
+
+        Returns:
+            IDs de las cámaras cuya línea se actualizó
+        """
+        updated = []
+        with self._lock:
+            data_version = self.config_manager.data_version()
+            store_changed = data_version != self._data_version
+            self._data_version = data_version
+
+            for camera_id, entry in self._watched.items():
+                stamp = self.config_manager.line_file_stamp(camera_id)
+                if stamp == entry.stamp and not store_changed:
+                    continue
+                entry.stamp = stamp
+
+                line_config = self.config_manager.get_line_config(camera_id, entry.api_coordinates)
+                if line_config == entry.line_config:
+                    continue
+
+                if self.manager.update_line_config(camera_id, line_config):
+                    entry.line_config = line_config
+                    updated.append(camera_id)
+                    logger.info(f"📐 [Cam {camera_id}] Línea recargada: "
+                                f"{line_config['start']} -> {line_config['end']}")
+                else:
+                    entry.stamp = _RETRY
+        return updated
+
+    def start(self):
+        """Revisa los archivos cada `interval` segundos en un thread daemon"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def run():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.check()
+                except Exception as e:
+                    logger.error(f"❌ Error revisando archivos de línea: {e}", exc_info=True)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="LineConfigWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detiene la revisión periódica"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
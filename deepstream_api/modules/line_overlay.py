@@ -0,0 +1,98 @@
+"""
+Overlay de línea de cruce y contadores con display-meta cacheado
+Evita reconstruir osd.Line / osd.Text en cada frame
+"""
+from pyservicemaker import osd
+
+
+class LineOverlay:
+    """
+    Capa de overlay para LineCrossingCounter
+
+    - La geometría de la línea se construye una vez por configuración de línea
+    - El texto se reconstruye solo cuando cambian los contadores
+    - Por frame solo se adjuntan los objetos ya construidos
+    """
+
+    def __init__(self, camera_id,
+                 text_format="Cam {camera_id} | E:{entradas} S:{salidas} | Dentro:{dentro}",
+                 line_width=4, font_size=14, bg_alpha=0.7):
+        """
+        Inicializa el overlay
+
+        Args:
+            camera_id: ID de la cámara (se usa en el texto)
+            text_format: Formato del texto con campos camera_id, entradas, salidas, dentro
+            line_width: Grosor de la línea de cruce
+            font_size: Tamaño de fuente del texto
+            bg_alpha: Opacidad del fondo del texto
+        """
+        self.camera_id = camera_id
+        self.text_format = text_format
+        self.line_width = line_width
+        self.font_size = font_size
+        self.bg_alpha = bg_alpha
+
+        # Caché de la línea (clave: puntos de la línea)
+        self._line_key = None
+        self._line = None
+
+        # Caché del texto (clave: valores de los contadores)
+        self._text_key = None
+        self._text = None
+
+    def _build_line(self, line_start, line_end):
+        """Construye la geometría de la línea de cruce"""
+        line = osd.Line()
+        line.x1 = int(line_start[0])
+        line.y1 = int(line_start[1])
+        line.x2 = int(line_end[0])
+        line.y2 = int(line_end[1])
+        line.width = self.line_width
+        line.color = osd.Color(0.0, 1.0, 0.0, 1.0)  # Verde
+        return line
+
+    def _build_text(self, entradas, salidas, dentro):
+        """Construye el texto con los contadores"""
+        text = osd.Text()
+        text.display_text = self.text_format.format(
+            camera_id=self.camera_id,
+            entradas=entradas,
+            salidas=salidas,
+            dentro=dentro
+        ).encode('ascii')
+        text.x_offset = 10
+        text.y_offset = 10
+        text.font.name = osd.FontFamily.Serif
+        text.font.size = self.font_size
+        text.font.color = osd.Color(1.0, 1.0, 1.0, 1.0)  # Blanco
+        text.set_bg_color = True
+        text.bg_color = osd.Color(0.0, 0.0, 0.0, self.bg_alpha)  # Negro semi-transparente
+        return text
+
+    def draw(self, batch_meta, frame_meta, line_detector, contadores):
+        """
+        Adjunta línea y contadores al frame
+
+        Args:
+            batch_meta: Metadata del batch (para adquirir display-meta)
+            frame_meta: Metadata del frame destino
+            line_detector: LineCrossingDetector con la línea actual
+            contadores: dict con 'entradas', 'salidas', 'dentro'
+        """
+        line_key = (line_detector.line_start, line_detector.line_end)
+        if line_key != self._line_key:
+            self._line_key = line_key
+            self._line = (self._build_line(*line_key)
+                          if line_detector.tiene_linea_configurada() else None)
+
+        text_key = (contadores['entradas'], contadores['salidas'], contadores['dentro'])
+        if text_key != self._text_key:
+            self._text_key = text_key
+            self._text = self._build_text(*text_key)
+
+        display_meta = batch_meta.acquire_display_meta()
+        if self._line is not None:
+            display_meta.add_line(self._line)
+        display_meta.add_text(self._text)
+        frame_meta.append(display_meta)
@@ -2,11 +2,24 @@
 Gestor de múltiples cámaras con threading
 Coordina el ciclo de vida de múltiples cámaras DeepStream
 """
+import logging
+import os
 import threading
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from .threaded_camera import ThreadedDeepStreamCamera
+from .threaded_shared_pipeline import ThreadedSharedPipeline, SharedSourceCamera
+from .process_camera import CameraProcessGroup, ProcessCamera
+from .camera_supervisor import CameraSupervisor
+from .camera_profiles import CameraProfile, resolve_profile, SINK_ENCODE
+from .shared_counters import DEFAULT_TABLE_NAME, SharedCounterTable
+
+
+logger = logging.getLogger(__name__)
+
+
+EXECUTION_MODES = ("thread", "process")
 
 
 class MultiCameraManager:
@@ -17,26 +30,129 @@ class MultiCameraManager:
     - Gestión thread-safe del ciclo de vida de cámaras
     - Apagado coordinado de todas las cámaras
     - Sin race conditions en operaciones start/stop
+
+    Modos:
+    - Por cámara (default): un pipeline por cámara (engine cargado N veces)
+    - Compartido (shared_pipeline=True): un solo pipeline batch con todas
+      las cámaras, un solo infer/track; se inicia y detiene completo
+
+    Ejecución (pipelines por cámara):
+    - "thread" (default): todas las cámaras en threads de este proceso
+      (los probes compiten por el mismo GIL)
+    - "process": cámaras en procesos worker de `cameras_per_process`
+      cámaras cada uno, controlados por un Pipe; la caída de un worker
+      no afecta a las cámaras de los demás
+
+    Perfiles (modules/camera_profiles.py):
+    - `profile` es el perfil por defecto (throughput, low-latency, headless,
+      record) y `camera_profiles` lo sobreescribe por cámara
+    - set_camera_profile() cambia el perfil de una cámara en caliente
+      (reconstruye solo su pipeline; los contadores se conservan)
+
+    Grabación (pipelines por cámara):
+    - start_recording() engancha una rama de grabación segmentada al
+      pipeline de conteo en ejecución (tee después del OSD -> queue leaky ->
+      encoder): un solo decode y una sola inferencia por cámara
+    - stop_recording() la desengancha sin detener el conteo; las opciones
+      quedan registradas para los reinicios de la cámara
+
+    Contadores:
+    - Cada probe escribe sus contadores en una fila de una tabla en memoria
+      compartida (`counter_table`); get_all_stats() y get_camera_stats()
+      la leen sin locks ni llamadas a las cámaras (ni al worker en modo
+      "process"), y otros procesos pueden adjuntarse por nombre
     """
 
-    def __init__(self, max_cameras: int = 16, headless: bool = False):
+    def __init__(self, max_cameras: int = 16, headless: bool = False,
+                 shared_pipeline: bool = False, event_publisher=None,
+                 execution_mode: str = "thread", cameras_per_process: int = 1,
+                 counter_table_name: Optional[str] = None, adaptive_interval: Optional[dict] = None,
+                 profile: Union[str, CameraProfile, None] = None,
+                 camera_profiles: Optional[Dict[int, Union[str, CameraProfile]]] = None):
         """
         Inicializa gestor de múltiples cámaras
 
         Args:
             max_cameras: Número máximo de cámaras simultáneas
             headless: Si True, no muestra ventanas (solo terminal)
+            shared_pipeline: Si True, todas las cámaras comparten un pipeline batch
+            event_publisher: CrossingEventPublisher opcional compartido por todas las cámaras
+                             (en modo "process" cada worker crea el suyo con la misma API)
+            execution_mode: "thread" o "process"
+            cameras_per_process: Cámaras por proceso worker (modo "process")
+            counter_table_name: Nombre del segmento de la tabla de contadores
+                                (default: deepstream_counters_<pid>)
+            adaptive_interval: Opciones de AdaptiveInferenceInterval para cada cámara
+                               (None = interval fijo del config de nvinfer; no aplica
+                               al pipeline compartido, que tiene un solo nvinfer)
+            profile: Perfil por defecto de las cámaras (None = throughput, o headless
+                     si headless=True); con pipeline compartido es el del pipeline
+            camera_profiles: {camera_id: perfil} para cámaras con otro perfil
+                             (no aplica al pipeline compartido)
         """
-        self.cameras: Dict[int, ThreadedDeepStreamCamera] = {}
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"execution_mode debe ser uno de {EXECUTION_MODES}")
+        if shared_pipeline and execution_mode != "thread":
+            raise ValueError("El pipeline compartido solo admite execution_mode='thread'")
+
+        self.cameras: Dict[int, Union[ThreadedDeepStreamCamera, SharedSourceCamera, ProcessCamera]] = {}
         self.max_cameras = max_cameras
         self.headless = headless
+        self.shared_pipeline = shared_pipeline
+        self.event_publisher = event_publisher
+        self.execution_mode = execution_mode
+        self.cameras_per_process = max(1, cameras_per_process)
+        self.profile = resolve_profile(profile, headless)
+        if shared_pipeline and self.profile.sink == SINK_ENCODE:
+            raise ValueError(f"El pipeline compartido no admite el perfil '{self.profile.name}'")
+        self.camera_profiles: Dict[int, Union[str, CameraProfile]] = {}
+        for camera_id, camera_profile in (camera_profiles or {}).items():
+            resolve_profile(camera_profile, headless)  # valida el nombre ya
+            self.camera_profiles[camera_id] = camera_profile
+        if self.camera_profiles and shared_pipeline:
+            logger.warning("⚠️  Perfiles por cámara no disponibles con pipeline compartido; se ignoran")
+        # {camera_id: opciones de RecordingBranch} de las cámaras que graban
+        self.camera_recordings: Dict[int, dict] = {}
+        self.adaptive_interval = adaptive_interval
+        if adaptive_interval is not None and shared_pipeline:
+            logger.warning("⚠️  Interval adaptativo no disponible con pipeline compartido; se ignora")
+            self.adaptive_interval = None
         self.shutdown_event = threading.Event()
 
+        # Pipeline compartido (solo en modo shared_pipeline)
+        self._shared: Optional[ThreadedSharedPipeline] = None
+
+        # Procesos worker (solo en modo "process")
+        self._process_groups: List[CameraProcessGroup] = []
+
         # Lock para modificaciones del dict de cámaras
         self._cameras_lock = threading.Lock()
 
+        # Reinicio automático de cámaras caídas (start_supervisor)
+        self.supervisor: Optional[CameraSupervisor] = None
+
+        # Tabla de contadores compartida (lectura de stats sin locks)
+        self.counter_table: Optional[SharedCounterTable] = None
+        try:
+            self.counter_table = SharedCounterTable(
+                name=counter_table_name or f"{DEFAULT_TABLE_NAME}_{os.getpid()}",
+                capacity=max_cameras
+            )
+            logger.info(f"🧮 Tabla de contadores compartida: {self.counter_table.name}")
+        except OSError as e:
+            logger.warning(f"⚠️  Sin tabla de contadores compartida ({e}); stats desde cada cámara")
+
+    def _profile_for(self, camera_id: int) -> CameraProfile:
+        """Perfil de una cámara: el suyo en camera_profiles o el del gestor"""
+        profile = self.camera_profiles.get(camera_id)
+        if profile is None:
+            return self.profile
+        return resolve_profile(profile, self.headless)
+
     def add_camera(self, camera_id: int, camera_name: str,
-                   rtsp_uri: str, line_config: dict) -> bool:
+                   rtsp_uri: str, line_config: dict,
+                   profile: Union[str, CameraProfile, None] = None,
+                   initial_counts: Optional[Dict] = None) -> bool:
         """
         Agrega cámara al gestor
 
@@ -45,37 +161,84 @@ class MultiCameraManager:
             camera_name: Nombre descriptivo
             rtsp_uri: URI RTSP completa
             line_config: Configuración de línea de cruce
+            profile: Perfil de esta cámara (queda registrado para sus reinicios);
+                     None = el de camera_profiles o el del gestor
+            initial_counts: Contadores de partida (entradas/salidas/dentro) si la
+                            cámara no tiene CounterStore que restaurar
 
         Returns:
             True si se agregó exitosamente
         """
         with self._cameras_lock:
             if len(self.cameras) >= self.max_cameras:
-                print(f"❌ Máximo de cámaras ({self.max_cameras}) alcanzado")
+                logger.error(f"❌ Máximo de cámaras ({self.max_cameras}) alcanzado")
                 return False
 
             if camera_id in self.cameras:
-                print(f"❌ Cámara {camera_id} ya existe")
+                logger.error(f"❌ Cámara {camera_id} ya existe")
                 return False
 
-            camera = ThreadedDeepStreamCamera(
-                camera_id=camera_id,
-                camera_name=camera_name,
-                rtsp_uri=rtsp_uri,
-                line_config=line_config,
-                headless=self.headless
-            )
+            if profile is not None and not self.shared_pipeline:
+                resolve_profile(profile, self.headless)  # nombre desconocido -> ValueError
+                self.camera_profiles[camera_id] = profile
+
+            counter_row = None
+            if self.counter_table is not None:
+                counter_row = self.counter_table.register(camera_id)
+
+            if self.shared_pipeline:
+                if self._shared is not None:
+                    logger.error(f"❌ El pipeline compartido ya está construido; "
+                                 f"no se puede agregar la cámara {camera_id}")
+                    return False
+
+                camera = SharedSourceCamera(
+                    camera_id=camera_id,
+                    camera_name=camera_name,
+                    rtsp_uri=rtsp_uri,
+                    line_config=line_config,
+                    counter_row=counter_row
+                )
+            elif self.execution_mode == "process":
+                camera = ProcessCamera(
+                    camera_id=camera_id,
+                    camera_name=camera_name,
+                    rtsp_uri=rtsp_uri,
+                    line_config=line_config,
+                    group=self._group_with_capacity(),
+                    counter_row=counter_row,
+                    adaptive_interval=self.adaptive_interval,
+                    profile=self._profile_for(camera_id),
+                    recording=self.camera_recordings.get(camera_id),
+                    initial_counts=initial_counts
+                )
+            else:
+                camera = ThreadedDeepStreamCamera(
+                    camera_id=camera_id,
+                    camera_name=camera_name,
+                    rtsp_uri=rtsp_uri,
+                    line_config=line_config,
+                    headless=self.headless,
+                    event_publisher=self.event_publisher,
+                    counter_row=counter_row,
+                    adaptive_interval=self.adaptive_interval,
+                    profile=self._profile_for(camera_id),
+                    recording=self.camera_recordings.get(camera_id),
+                    initial_counts=initial_counts
+                )
 
             self.cameras[camera_id] = camera
-            print(f"✅ Cámara {camera_id} ({camera_name}) agregada al gestor")
+            logger.info(f"✅ Cámara {camera_id} ({camera_name}) agregada al gestor")
             return True
 
-    def remove_camera(self, camera_id: int) -> bool:
+    def remove_camera(self, camera_id: int, release_counters: bool = True) -> bool:
         """
         Remueve cámara del gestor (debe estar detenida)
 
         Args:
             camera_id: ID de la cámara a remover
+            release_counters: Si False conserva su fila en la tabla de contadores
+                              (un reinicio la vuelve a usar sin ponerla a cero)
 
         Returns:
             True si se removió exitosamente
@@ -84,17 +247,44 @@ class MultiCameraManager:
             camera = self.cameras.get(camera_id)
 
             if not camera:
-                print(f"❌ Cámara {camera_id} no encontrada")
+                logger.error(f"❌ Cámara {camera_id} no encontrada")
                 return False
 
             if camera.is_alive():
-                print(f"❌ Cámara {camera_id} aún está corriendo. Deténgala primero.")
+                logger.error(f"❌ Cámara {camera_id} aún está corriendo. Deténgala primero.")
                 return False
 
+            if isinstance(camera, ProcessCamera):
+                camera.group.remove_camera(camera_id)
+                if not camera.group.camera_ids:
+                    camera.group.shutdown()
+                    self._process_groups.remove(camera.group)
+
+            if self.counter_table is not None and release_counters:
+                self.counter_table.release(camera_id)
+
             del self.cameras[camera_id]
-            print(f"✅ Cámara {camera_id} removida del gestor")
+            logger.info(f"✅ Cámara {camera_id} removida del gestor")
             return True
 
+    def _group_with_capacity(self) -> CameraProcessGroup:
+        """
+        Retorna un worker con espacio para otra cámara (crea uno si hace falta)
+        Debe llamarse con _cameras_lock tomado
+        """
+        for group in self._process_groups:
+            if len(group.camera_ids) < self.cameras_per_process:
+                return group
+
+        group_id = max((g.group_id for g in self._process_groups), default=-1) + 1
+        group = CameraProcessGroup(
+            group_id=group_id,
+            headless=self.headless,
+            event_api_url=self.event_publisher.api_url if self.event_publisher else None
+        )
+        self._process_groups.append(group)
+        return group
+
     def start_camera(self, camera_id: int) -> bool:
         """
         Inicia una cámara específica
@@ -109,17 +299,47 @@ class MultiCameraManager:
             camera = self.cameras.get(camera_id)
 
         if not camera:
-            print(f"❌ Cámara {camera_id} no encontrada")
+            logger.error(f"❌ Cámara {camera_id} no encontrada")
             return False
 
         return camera.start()
 
-    def start_all_cameras(self, sequential: bool = False):
+    def _start_shared_pipeline(self, camera_list: List[SharedSourceCamera]) -> bool:
+        """
+        Construye e inicia el pipeline compartido con todas las cámaras
+
+        El orden de camera_list define el source_id de cada cámara en el batch
+
+        Args:
+            camera_list: Vistas de cámara a incluir en el batch
+
+        Returns:
+            True si el pipeline se inició exitosamente
+        """
+        if self._shared is not None and self._shared.is_alive():
+            logger.warning("⚠️  El pipeline compartido ya está corriendo")
+            return False
+
+        self._shared = ThreadedSharedPipeline(
+            sources=[camera.as_source() for camera in camera_list],
+            headless=self.headless,
+            event_publisher=self.event_publisher,
+            profile=self.profile
+        )
+
+        for camera in camera_list:
+            camera.shared_pipeline = self._shared
+
+        return self._shared.start()
+
+    def start_all_cameras(self, sequential: bool = False, max_concurrent: int = 8):
         """
         Inicia todas las cámaras
 
         Args:
             sequential: Si True, inicia una por una. Si False, inicia en paralelo
+            max_concurrent: Cámaras iniciándose a la vez en modo paralelo
+                            (ver StartupScheduler para arranque con sondeo RTSP)
 
         Sequential (secuencial):
             - Más seguro y fácil de debugear
@@ -137,35 +357,47 @@ class MultiCameraManager:
             camera_list = list(self.cameras.values())
 
         if not camera_list:
-            print("⚠️  No hay cámaras para iniciar")
+            logger.warning("⚠️  No hay cámaras para iniciar")
             return
 
-        print(f"\n{'='*70}")
-        print(f"🚀 INICIANDO {len(camera_list)} CÁMARAS "
-              f"({'SECUENCIAL' if sequential else 'PARALELO'})")
-        print(f"{'='*70}\n")
+        if self.shared_pipeline:
+            logger.info(f"\n{'='*70}")
+            logger.info(f"🚀 INICIANDO PIPELINE COMPARTIDO ({len(camera_list)} CÁMARAS, "
+                        f"batch-size={len(camera_list)})")
+            logger.info(f"{'='*70}\n")
+
+            if self._start_shared_pipeline(camera_list):
+                logger.info(f"✅ Pipeline compartido iniciado con {len(camera_list)} cámaras")
+            else:
+                logger.error("❌ Fallo al iniciar el pipeline compartido")
+            return
+
+        logger.info(f"\n{'='*70}")
+        logger.info(f"🚀 INICIANDO {len(camera_list)} CÁMARAS "
+                    f"({'SECUENCIAL' if sequential else 'PARALELO'})")
+        logger.info(f"{'='*70}\n")
 
         if sequential:
             # Iniciar cámaras una por una (más seguro, más lento)
             success_count = 0
             for i, camera in enumerate(camera_list, 1):
-                print(f"[{i}/{len(camera_list)}] Iniciando cámara {camera.camera_id}...")
+                logger.info(f"[{i}/{len(camera_list)}] Iniciando cámara {camera.camera_id}...")
                 if camera.start():
                     success_count += 1
-                    print(f"✅ Cámara {camera.camera_id} iniciada")
+                    logger.info(f"✅ Cámara {camera.camera_id} iniciada")
                 else:
-                    print(f"❌ Fallo al iniciar cámara {camera.camera_id}")
+                    logger.error(f"❌ Fallo al iniciar cámara {camera.camera_id}")
 
-            print(f"\n{'='*70}")
-            print(f"✅ {success_count}/{len(camera_list)} cámaras iniciadas exitosamente")
-            print(f"{'='*70}\n")
+            logger.info(f"\n{'='*70}")
+            logger.info(f"✅ {success_count}/{len(camera_list)} cámaras iniciadas exitosamente")
+            logger.info(f"{'='*70}\n")
 
         else:
             # Iniciar cámaras en paralelo (más rápido, mayor carga inicial)
             success_count = 0
             failed_cameras = []
 
-            with ThreadPoolExecutor(max_workers=len(camera_list)) as executor:
+            with ThreadPoolExecutor(max_workers=min(max(1, max_concurrent), len(camera_list))) as executor:
                 futures = {
                     executor.submit(camera.start): camera
                     for camera in camera_list
@@ -177,19 +409,19 @@ class MultiCameraManager:
                         success = future.result(timeout=20.0)
                         if success:
                             success_count += 1
-                            print(f"✅ Cámara {camera.camera_id} iniciada")
+                            logger.info(f"✅ Cámara {camera.camera_id} iniciada")
                         else:
                             failed_cameras.append(camera.camera_id)
-                            print(f"❌ Cámara {camera.camera_id} falló")
+                            logger.error(f"❌ Cámara {camera.camera_id} falló")
                     except Exception as e:
                         failed_cameras.append(camera.camera_id)
-                        print(f"❌ Cámara {camera.camera_id} error: {e}")
+                        logger.error(f"❌ Cámara {camera.camera_id} error: {e}")
 
-            print(f"\n{'='*70}")
-            print(f"✅ {success_count}/{len(camera_list)} cámaras iniciadas exitosamente")
+            logger.info(f"\n{'='*70}")
+            logger.info(f"✅ {success_count}/{len(camera_list)} cámaras iniciadas exitosamente")
             if failed_cameras:
-                print(f"❌ Cámaras fallidas: {failed_cameras}")
-            print(f"{'='*70}\n")
+                logger.error(f"❌ Cámaras fallidas: {failed_cameras}")
+            logger.info(f"{'='*70}\n")
 
     def stop_camera(self, camera_id: int, timeout: float = 5.0):
         """
@@ -205,23 +437,264 @@ class MultiCameraManager:
         if camera:
             camera.stop(timeout=timeout)
         else:
-            print(f"❌ Cámara {camera_id} no encontrada")
+            logger.error(f"❌ Cámara {camera_id} no encontrada")
+
+    def restart_camera(self, camera_id: int, camera_name: str, rtsp_uri: str,
+                       line_config: dict, timeout: float = 5.0, expected=None) -> bool:
+        """
+        Reemplaza una cámara por una nueva configuración sin tocar las demás
+        La nueva cámara arranca con los contadores de la anterior y conserva su
+        fila de la tabla compartida (su CounterStore, si lo hay, tiene prioridad)
+
+        Args:
+            camera_id: ID de la cámara
+            camera_name: Nombre descriptivo
+            rtsp_uri: Nueva URI RTSP
+            line_config: Nueva configuración de línea
+            timeout: Tiempo máximo de espera al detener
+            expected: Si se indica, solo se reinicia si la cámara registrada sigue
+                      siendo este objeto (no pisa un reemplazo hecho por otro thread)
+
+        Returns:
+            True si la cámara quedó corriendo con la nueva configuración
+        """
+        if self.shared_pipeline and self._shared is not None:
+            logger.error(f"❌ El pipeline compartido ya está construido; "
+                         f"no se puede reiniciar la cámara {camera_id}")
+            return False
+
+        if expected is not None:
+            with self._cameras_lock:
+                if self.cameras.get(camera_id) is not expected:
+                    logger.info(f"ℹ️  Cámara {camera_id} reemplazada o quitada; reinicio omitido")
+                    return False
+
+        counts = None
+        if camera_id in self.cameras:
+            self.stop_camera(camera_id, timeout=timeout)
+            # Leídos ya detenida: son los definitivos de la cámara saliente
+            counts = self.get_camera_stats(camera_id)
+            if not self.remove_camera(camera_id, release_counters=False):
+                return False
+
+        if not self.add_camera(camera_id, camera_name, rtsp_uri, line_config,
+                               initial_counts=counts):
+            if self.counter_table is not None and camera_id not in self.cameras:
+                self.counter_table.release(camera_id)
+            return False
+        logger.info(f"🔄 Cámara {camera_id} reiniciada con nueva configuración")
+        return self.start_camera(camera_id)
+
+    def set_camera_profile(self, camera_id: int, profile: Union[str, CameraProfile]) -> bool:
+        """
+        Cambia el perfil de una cámara
+
+        Si la cámara corre, se reconstruye solo su pipeline (restart_camera);
+        si no corre o aún no existe, el perfil se usa en su próximo arranque
+
+        Args:
+            camera_id: ID de la cámara
+            profile: Nombre o CameraProfile
+
+        Returns:
+            True si el perfil quedó aplicado (o registrado para el arranque)
+
+        Raises:
+            ValueError: si el perfil no existe
+        """
+        if self.shared_pipeline:
+            logger.error("❌ Perfiles por cámara no disponibles con pipeline compartido")
+            return False
+
+        resolved = resolve_profile(profile, self.headless)
+        self.camera_profiles[camera_id] = profile
+
+        with self._cameras_lock:
+            camera = self.cameras.get(camera_id)
+        if camera is None or camera.profile == resolved:
+            return True
+
+        logger.info(f"🎛️  Cámara {camera_id}: perfil {camera.profile.name} -> {resolved.name}")
+        if not camera.is_alive():
+            # Sin pipeline corriendo: se reemplaza la vista sin iniciarla
+            return (self.remove_camera(camera_id) and
+                    self.add_camera(camera_id, camera.camera_name, camera.rtsp_uri, camera.line_config))
+        return self.restart_camera(camera_id, camera.camera_name, camera.rtsp_uri,
+                                   camera.line_config, expected=camera)
+
+    def update_line_config(self, camera_id: int, line_config: dict) -> bool:
+        """
+        Cambia la línea de conteo de una cámara sin reiniciar su pipeline
+        El probe adopta la línea nueva entre dos batches
+
+        Args:
+            camera_id: ID de la cámara
+            line_config: dict con 'start', 'end', 'direccion_entrada'
+
+        Returns:
+            True si se aplicó
+        """
+        with self._cameras_lock:
+            camera = self.cameras.get(camera_id)
+
+        if not camera:
+            logger.error(f"❌ Cámara {camera_id} no encontrada")
+            return False
+
+        return camera.update_line_config(line_config)
+
+    def _recordable_camera(self, camera_id: int):
+        """Cámara con rama de grabación (no en el pipeline compartido)"""
+        if self.shared_pipeline:
+            logger.error("❌ Grabación por rama no disponible con pipeline compartido")
+            return None
+        with self._cameras_lock:
+            camera = self.cameras.get(camera_id)
+        if not camera:
+            logger.error(f"❌ Cámara {camera_id} no encontrada")
+        return camera
+
+    def start_recording(self, camera_id: int, **options) -> bool:
+        """
+        Empieza a grabar una cámara
+
+        Si su pipeline tiene el tee de grabación (perfil record o `recordable`)
+        la rama se engancha en caliente; si no, se reconstruye solo el
+        pipeline de esa cámara con la rama (los contadores se conservan)
+
+        Args:
+            camera_id: ID de la cámara
+            **options: Opciones de RecordingBranch (directory, segment_s, quota_mb,
+                       clip_quota_mb, clip_pre_s, clip_post_s, bitrate)
+
+        Returns:
+            True si quedó grabando (o quedó para su arranque); False si falló
+            o si el pipeline reconstruido tampoco pudo enganchar la rama
+        """
+        camera = self._recordable_camera(camera_id)
+        if camera is None:
+            return False
+        self.camera_recordings[camera_id] = options
+        started = camera.start_recording(**options)
+        if not camera.is_alive():
+            # Con opciones de grabación el pipeline se arma con el tee al arrancar
+            logger.info(f"ℹ️  Cámara {camera_id} detenida: grabará al arrancar")
+            return True
+        if started:
+            return True
+
+        if not self.restart_camera(camera_id, camera.camera_name, camera.rtsp_uri,
+                                   camera.line_config, expected=camera):
+            return False
+        with self._cameras_lock:
+            camera = self.cameras.get(camera_id)
+        if camera is None or camera.get_recording_stats() is None:
+            logger.error(f"❌ Cámara {camera_id}: el pipeline reconstruido no pudo enganchar "
+                         f"la grabación (sin tee; ver el log de la cámara)")
+            return False
+        return True
+
+    def stop_recording(self, camera_id: int) -> bool:
+        """
+        Deja de grabar una cámara; el conteo sigue sin interrupción
+
+        Returns:
+            True si el último segmento quedó cerrado
+        """
+        camera = self._recordable_camera(camera_id)
+        if camera is None:
+            return False
+        self.camera_recordings.pop(camera_id, None)
+        return camera.stop_recording()
+
+    def request_clip(self, camera_id: int, event_ts: Optional[float] = None,
+                     label: str = "cruce") -> Optional[str]:
+        """
+        Pide un clip de una cámara que graba (segmentos completos, sin re-codificar)
+
+        Returns:
+            clip_id, o None si la cámara no graba
+        """
+        camera = self._recordable_camera(camera_id)
+        if camera is None:
+            return None
+        return camera.request_clip(event_ts, label)
+
+    def get_recording_stats(self) -> Dict[int, Dict]:
+        """
+        Uso de disco y estado de la grabación de las cámaras que graban
+
+        Returns:
+            Diccionario {camera_id: stats}
+        """
+        if self.shared_pipeline:
+            return {}
+        with self._cameras_lock:
+            cameras = list(self.cameras.items())
+        stats = {}
+        for camera_id, camera in cameras:
+            recording = camera.get_recording_stats()
+            if recording is not None:
+                stats[camera_id] = recording
+        return stats
+
+    def start_supervisor(self, **options) -> Optional[CameraSupervisor]:
+        """
+        Activa el reinicio automático de cámaras caídas
+
+        Args:
+            **options: Parámetros de CameraSupervisor (stall_timeout, max_delay, ...)
+
+        Returns:
+            El supervisor, o None con pipeline compartido (se inicia y cae completo)
+        """
+        if self.shared_pipeline:
+            logger.warning("⚠️  Supervisor no disponible con pipeline compartido")
+            return None
+        if self.supervisor is None:
+            self.supervisor = CameraSupervisor(self, **options)
+        self.supervisor.start()
+        return self.supervisor
+
+    def get_supervisor_stats(self) -> Dict[int, Dict]:
+        """
+        Reinicios y tiempo caído por cámara
+
+        Returns:
+            {camera_id: {'state', 'restarts', 'failures', 'downtime_s', ...}} ({} sin supervisor)
+        """
+        if self.supervisor is None:
+            return {}
+        return self.supervisor.get_stats()
 
     def stop_all_cameras(self):
         """
         Detiene todas las cámaras gracefully
         """
-        print(f"\n{'='*70}")
-        print("🛑 DETENIENDO TODAS LAS CÁMARAS...")
-        print(f"{'='*70}\n")
+        logger.info(f"\n{'='*70}")
+        logger.info("🛑 DETENIENDO TODAS LAS CÁMARAS...")
+        logger.info(f"{'='*70}\n")
 
         self.shutdown_event.set()
 
+        # Sin reinicios automáticos durante el apagado
+        if self.supervisor is not None:
+            self.supervisor.stop()
+
         with self._cameras_lock:
             camera_list = list(self.cameras.values())
 
         if not camera_list:
-            print("⚠️  No hay cámaras corriendo")
+            logger.warning("⚠️  No hay cámaras corriendo")
+            return
+
+        if self.shared_pipeline:
+            # Un solo pipeline para todas las cámaras
+            if self._shared is not None:
+                self._shared.stop()
+            logger.info(f"\n{'='*70}")
+            logger.info("✅ TODAS LAS CÁMARAS DETENIDAS")
+            logger.info(f"{'='*70}\n")
             return
 
         # Detener todas las cámaras en paralelo
@@ -235,13 +708,17 @@ class MultiCameraManager:
                 camera = futures[future]
                 try:
                     future.result(timeout=10.0)
-                    print(f"✅ Cámara {camera.camera_id} detenida")
+                    logger.info(f"✅ Cámara {camera.camera_id} detenida")
                 except Exception as e:
-                    print(f"⚠️  Error deteniendo cámara {camera.camera_id}: {e}")
+                    logger.warning(f"⚠️  Error deteniendo cámara {camera.camera_id}: {e}")
+
+        # Terminar procesos worker (modo "process")
+        for group in self._process_groups:
+            group.shutdown()
 
-        print(f"\n{'='*70}")
-        print("✅ TODAS LAS CÁMARAS DETENIDAS")
-        print(f"{'='*70}\n")
+        logger.info(f"\n{'='*70}")
+        logger.info("✅ TODAS LAS CÁMARAS DETENIDAS")
+        logger.info(f"{'='*70}\n")
 
     def get_camera_stats(self, camera_id: int) -> Dict:
         """
@@ -253,6 +730,11 @@ class MultiCameraManager:
         Returns:
             Diccionario con estadísticas
         """
+        if self.counter_table is not None:
+            stats = self.counter_table.read(camera_id)
+            if stats is not None:
+                return stats
+
         with self._cameras_lock:
             camera = self.cameras.get(camera_id)
 
@@ -267,6 +749,10 @@ class MultiCameraManager:
         Returns:
             Diccionario {camera_id: stats}
         """
+        if self.counter_table is not None:
+            # Lectura de la tabla compartida: sin locks ni llamadas a las cámaras
+            return self.counter_table.snapshot()
+
         stats = {}
         with self._cameras_lock:
             for camera_id, camera in self.cameras.items():
@@ -286,6 +772,28 @@ class MultiCameraManager:
                 fps_data[camera_id] = camera.get_fps()
         return fps_data
 
+    def get_all_metrics(self) -> Dict[int, Dict]:
+        """
+        Obtiene snapshot de métricas de todas las cámaras
+
+        Returns:
+            Diccionario {camera_id: métricas} (serializable a JSON)
+        """
+        with self._cameras_lock:
+            cameras = list(self.cameras.items())
+        return {camera_id: camera.get_metrics() for camera_id, camera in cameras}
+
+    def get_pipeline_metrics(self) -> Optional[Dict]:
+        """
+        Obtiene métricas de batch del pipeline compartido
+
+        Returns:
+            Diccionario de métricas, o None si no hay pipeline compartido
+        """
+        if self._shared is None:
+            return None
+        return self._shared.get_metrics()
+
     def get_running_cameras(self) -> List[int]:
         """
         Obtiene lista de IDs de cámaras corriendo
@@ -317,11 +825,11 @@ class MultiCameraManager:
         """
         try:
             running = self.get_running_cameras()
-            print(f"\n✅ {len(running)} cámaras corriendo: {running}")
-            print("Presiona Ctrl+C para detener todas las cámaras...\n")
+            logger.info(f"\n✅ {len(running)} cámaras corriendo: {running}")
+            logger.info("Presiona Ctrl+C para detener todas las cámaras...\n")
             self.shutdown_event.wait()
         except KeyboardInterrupt:
-            print("\n⚠️  Interrupción de teclado detectada")
+            logger.warning("\n⚠️  Interrupción de teclado detectada")
         finally:
             self.stop_all_cameras()
 
@@ -329,33 +837,69 @@ class MultiCameraManager:
         """
         Imprime resumen de todas las cámaras y sus estadísticas
         """
-        print(f"\n{'='*70}")
-        print("📊 RESUMEN DE CÁMARAS")
-        print(f"{'='*70}")
+        logger.info(f"\n{'='*70}")
+        logger.info("📊 RESUMEN DE CÁMARAS")
+        logger.info(f"{'='*70}")
 
         with self._cameras_lock:
             total = len(self.cameras)
             running = sum(1 for cam in self.cameras.values() if cam.is_alive())
 
-        print(f"Total de cámaras: {total}")
-        print(f"Cámaras corriendo: {running}")
-        print(f"Cámaras detenidas: {total - running}")
-        print(f"{'='*70}")
+        logger.info(f"Total de cámaras: {total}")
+        logger.info(f"Cámaras corriendo: {running}")
+        logger.info(f"Cámaras detenidas: {total - running}")
+        logger.info(f"{'='*70}")
+
+        pipeline_metrics = self.get_pipeline_metrics()
+        if pipeline_metrics is not None:
+            logger.info(f"Pipeline compartido: {pipeline_metrics['batches']} batches | "
+                        f"handle_metadata p50/p95/p99: {pipeline_metrics['batch_ms_p50']:.2f}/"
+                        f"{pipeline_metrics['batch_ms_p95']:.2f}/{pipeline_metrics['batch_ms_p99']:.2f} ms")
+            logger.info(f"{'='*70}")
 
         # Estadísticas por cámara
         all_stats = self.get_all_stats()
-        all_fps = self.get_all_fps()
+        all_metrics = self.get_all_metrics()
+        supervisor_stats = self.get_supervisor_stats()
 
         for camera_id, stats in all_stats.items():
-            fps = all_fps.get(camera_id, 0.0)
+            # El FleetReconciler puede remover una cámara entre las lecturas
+            metrics = all_metrics.get(camera_id)
             with self._cameras_lock:
-                camera = self.cameras[camera_id]
+                camera = self.cameras.get(camera_id)
+                if camera is None or metrics is None:
+                    continue
                 status = "🟢 ACTIVA" if camera.is_alive() else "🔴 DETENIDA"
 
-            print(f"\nCámara {camera_id} - {status}")
-            print(f"  FPS: {fps:.1f}")
-            print(f"  Entradas: {stats['entradas']}")
-            print(f"  Salidas: {stats['salidas']}")
-            print(f"  Dentro: {stats['dentro']}")
-
-        print(f"{'='*70}\n")
+            profile = getattr(camera, 'profile', None) or self.profile
+            logger.info(f"\nCámara {camera_id} - {status} [{profile.name}]")
+            logger.info(f"  FPS: {metrics['fps']:.1f} ({metrics['frames']} frames)")
+            if metrics['batches']:
+                logger.info(f"  Probe p50/p95/p99: {metrics['batch_ms_p50']:.2f}/"
+                            f"{metrics['batch_ms_p95']:.2f}/{metrics['batch_ms_p99']:.2f} ms "
+                            f"(max {metrics['batch_ms_max']:.2f} ms)")
+            logger.info(f"  Objetos/frame: {metrics['objects_per_frame']:.1f} "
+                        f"(max {metrics['objects_max']}) | Tracks: {metrics['tracked']}")
+            logger.info(f"  Cruces/min: {metrics['crossings_per_min']:.1f}")
+            if 'infer_interval' in metrics:
+                logger.info(f"  Inferencia: interval {metrics['infer_interval']} | "
+                            f"ahorro {metrics['infer_saved_pct']:.0f}% vs todos los frames, "
+                            f"{metrics['infer_saved_vs_fixed_pct']:.0f}% vs interval fijo")
+            health = supervisor_stats.get(camera_id)
+            if health and health['failures']:
+                logger.info(f"  Reinicios: {health['restarts']} | Caídas: {health['failures']} | "
+                            f"Tiempo caída: {health['downtime_s']:.0f}s | Última: {health['last_exit']}")
+            logger.info(f"  Entradas: {stats['entradas']}")
+            logger.info(f"  Salidas: {stats['salidas']}")
+            logger.info(f"  Dentro: {stats['dentro']}")
+
+        logger.info(f"{'='*70}\n")
+
+    def close(self):
+        """
+        Libera recursos compartidos (tabla de contadores)
+        Llamar después de stop_all_cameras() y print_summary()
+        """
+        if self.counter_table is not None:
+            self.counter_table.close()
+            self.counter_table = None
@@ -0,0 +1,431 @@
+"""
+Autotuner de parámetros del pipeline
+Barre un espacio de parámetros declarado (batch, interval, resolución de
+nvstreammux, batched-push-timeout, tracker y su resolución) sobre un conjunto
+de clips grabados, mide throughput, latencia extremo a extremo y acuerdo en los
+cruces contados, y escribe los ajustes Pareto-óptimos como archivo de perfiles
+(camera_profiles.load_profiles / main.py --profiles-file)
+
+La orquestación y el análisis no dependen de GStreamer: el backend ejecuta cada
+clip con un CameraProfile y devuelve un ClipRun
+- modules/clip_backend.py: DeepStream real (clips como file://)
+- benchmarks/autotune_sim.py: pipeline simulado (sin GPU)
+"""
+import json
+import time
+import random
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from modules.camera_profiles import CameraProfile, TRACKERS, get_profile
+
+
+logger = logging.getLogger(__name__)
+
+
+# Parámetro del espacio -> cómo se aplica al perfil
+PARAMETERS = ('batch_size', 'interval', 'mux_resolution', 'batched_push_timeout_us',
+              'tracker', 'tracker_resolution')
+
+# Espacio por defecto: los valores hoy fijados a mano y sus vecinos. Sin
+# batch_size: cada perfil es un pipeline de una cámara, donde un batch > 1
+# junta frames consecutivos de la misma fuente (más latencia, no más cámaras
+# por engine) y pide un engine compilado para ese batch (nvinfer_config lo
+# rechaza si no lo admite). Se puede barrer con --space si el engine lo admite
+DEFAULT_SPACE = {
+    'interval': [0, 1, 2, 4],
+    'mux_resolution': ['1920x1080', '1280x720'],
+    'batched_push_timeout_us': [33000, 40000],
+    'tracker': ['nvdcf', 'iou'],
+    'tracker_resolution': ['960x544', '640x384'],
+}
+
+# Ajustes de referencia para los cruces cuando el clip no trae los esperados:
+# inferencia en cada frame, resolución completa, NvDCF
+REFERENCE_PARAMS = {
+    'batch_size': 1,
+    'interval': 0,
+    'mux_resolution': '1920x1080',
+    'tracker': 'nvdcf',
+    'tracker_resolution': '960x544',
+}
+
+PROFILE_FILE_VERSION = 1
+
+
+def parse_resolution(value) -> tuple:
+    """'960x544' o [960, 544] -> (960, 544)"""
+    if isinstance(value, str):
+        width, sep, height = value.lower().partition('x')
+        if not sep:
+            raise ValueError(f"Resolución inválida: {value!r} (se espera ANCHOxALTO)")
+        return int(width), int(height)
+    width, height = value
+    return int(width), int(height)
+
+
+def apply_params(base: CameraProfile, params: Dict, name: Optional[str] = None) -> CameraProfile:
+    """
+    Perfil base con los parámetros de un punto del espacio
+
+    Raises:
+        ValueError: parámetro o tracker desconocido
+    """
+    changes = {}
+    for key, value in params.items():
+        if key == 'batch_size':
+            changes['batch_size'] = int(value)
+        elif key == 'interval':
+            changes['infer_interval'] = int(value)
+        elif key == 'batched_push_timeout_us':
+            changes['batched_push_timeout_us'] = int(value)
+        elif key == 'mux_resolution':
+            changes['mux_width'], changes['mux_height'] = parse_resolution(value)
+        elif key == 'tracker_resolution':
+            changes['tracker_width'], changes['tracker_height'] = parse_resolution(value)
+        elif key == 'tracker':
+            if value not in TRACKERS:
+                raise ValueError(f"Tracker desconocido: {value!r} (disponibles: {', '.join(TRACKERS)})")
+            changes['tracker_config'], changes['tracker_label'] = TRACKERS[value]
+        else:
+            raise ValueError(f"Parámetro desconocido: {key!r} (disponibles: {', '.join(PARAMETERS)})")
+    return base.derive(name or base.name, **changes)
+
+
+def profile_entry(base_name: str, params: Dict) -> Dict:
+    """Entrada del archivo de perfiles (load_profiles) para un punto del espacio"""
+    entry = {'base': base_name}
+    for key, value in params.items():
+        if key == 'interval':
+            entry['infer_interval'] = int(value)
+        elif key == 'mux_resolution':
+            entry['mux_width'], entry['mux_height'] = parse_resolution(value)
+        elif key == 'tracker_resolution':
+            entry['tracker_width'], entry['tracker_height'] = parse_resolution(value)
+        elif key == 'tracker':
+            entry['tracker'] = value
+        else:
+            entry[key] = int(value)
+    return entry
+
+
+class ParameterSpace:
+    """
+    Espacio de parámetros declarado: nombre -> lista de valores
+
+    Los puntos se recorren en rejilla completa o con una muestra aleatoria
+    reproducible (max_trials)
+    """
+
+    def __init__(self, axes: Dict[str, Sequence]):
+        unknown = sorted(set(axes) - set(PARAMETERS))
+        if unknown:
+            raise ValueError(f"Parámetros desconocidos: {', '.join(unknown)} "
+                             f"(disponibles: {', '.join(PARAMETERS)})")
+        empty = [name for name, values in axes.items() if not values]
+        if empty:
+            raise ValueError(f"Parámetros sin valores: {', '.join(empty)}")
+        self.axes = {name: list(values) for name, values in axes.items()}
+        # Validar valores antes de lanzar el barrido
+        for point in self._product():
+            apply_params(CameraProfile(name='check'), point)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'ParameterSpace':
+        """Espacio desde un JSON {"parametro": [valores...]}"""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @property
+    def size(self) -> int:
+        size = 1
+        for values in self.axes.values():
+            size *= len(values)
+        return size
+
+    def _product(self) -> Iterator[Dict]:
+        names = list(self.axes)
+        for values in itertools.product(*(self.axes[name] for name in names)):
+            yield dict(zip(names, values))
+
+    def points(self, max_trials: Optional[int] = None, seed: int = 0) -> List[Dict]:
+        """
+        Puntos a evaluar
+
+        Args:
+            max_trials: Si el espacio es mayor, muestra aleatoria de ese tamaño
+            seed: Semilla de la muestra
+        """
+        points = list(self._product())
+        if max_trials is not None and len(points) > max_trials:
+            points = random.Random(seed).sample(points, max_trials)
+        return points
+
+
+@dataclass
+class Clip:
+    """
+    Clip grabado con su línea de conteo
+
+    expected: cruces conocidos {'entradas', 'salidas'}; None = los del
+    ajuste de referencia (REFERENCE_PARAMS)
+    """
+    name: str
+    uri: str
+    line_config: Dict
+    expected: Optional[Dict] = None
+    fps: float = 30.0
+
+
+@dataclass
+class ClipRun:
+    """Resultado de ejecutar un clip con un perfil"""
+    frames: int
+    elapsed_s: float                    # tiempo de pared del clip a máxima velocidad
+    latencies_ms: Sequence[float]       # latencia extremo a extremo por frame (o por batch)
+    entradas: int
+    salidas: int
+
+
+@dataclass
+class TrialResult:
+    """Métricas agregadas de un punto del espacio sobre todos los clips"""
+    params: Dict
+    fps: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    agreement: float                    # 1 = mismos cruces que la referencia
+    crossing_errors: int
+    clips: Dict[str, Dict] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {
+            'params': self.params,
+            'fps': round(self.fps, 2),
+            'latency_p50_ms': round(self.latency_p50_ms, 2),
+            'latency_p95_ms': round(self.latency_p95_ms, 2),
+            'agreement': round(self.agreement, 4),
+            'crossing_errors': self.crossing_errors,
+            'clips': self.clips,
+        }
+
+
+def dominates(a: TrialResult, b: TrialResult) -> bool:
+    """a domina a b: no peor en fps, latencia p95 y acuerdo, y mejor en alguno"""
+    not_worse = (a.fps >= b.fps and a.latency_p95_ms <= b.latency_p95_ms
+                 and a.agreement >= b.agreement)
+    better = (a.fps > b.fps or a.latency_p95_ms < b.latency_p95_ms
+              or a.agreement > b.agreement)
+    return not_worse and better
+
+
+def pareto_front(results: Sequence[TrialResult]) -> List[TrialResult]:
+    """Resultados no dominados, ordenados por fps descendente"""
+    front = [r for r in results if not any(dominates(other, r) for other in results)]
+    return sorted(front, key=lambda r: (-r.fps, r.latency_p95_ms, -r.agreement))
+
+
+def select_profiles(front: Sequence[TrialResult]) -> Dict[str, TrialResult]:
+    """
+    Tres puntos del frente para el archivo de perfiles
+
+    - throughput: más fps (desempate por acuerdo)
+    - latency: menor latencia p95 (desempate por acuerdo)
+    - balanced: mejor suma de los tres objetivos normalizados sobre el frente
+    """
+    if not front:
+        return {}
+
+    def normalized(values, invert=False):
+        low, high = min(values), max(values)
+        if high == low:
+            return [1.0] * len(values)
+        scaled = [(v - low) / (high - low) for v in values]
+        return [1.0 - v for v in scaled] if invert else scaled
+
+    fps = normalized([r.fps for r in front])
+    latency = normalized([r.latency_p95_ms for r in front], invert=True)
+    agreement = normalized([r.agreement for r in front])
+    scores = [f + l + a for f, l, a in zip(fps, latency, agreement)]
+
+    return {
+        'throughput': max(front, key=lambda r: (r.fps, r.agreement)),
+        'latency': min(front, key=lambda r: (r.latency_p95_ms, -r.agreement)),
+        'balanced': front[int(np.argmax(scores))],
+    }
+
+
+@dataclass
+class TuningReport:
+    """Resultado de un barrido"""
+    results: List[TrialResult]
+    front: List[TrialResult]
+    selected: Dict[str, TrialResult]
+    base_profile: str
+    backend: str
+    clips: List[str]
+    min_agreement: float
+    elapsed_s: float
+
+    def profiles(self, prefix: str = 'tuned') -> Dict[str, Dict]:
+        """Entradas del archivo de perfiles: {prefix}-{throughput,latency,balanced}"""
+        return {f"{prefix}-{role}": profile_entry(self.base_profile, result.params)
+                for role, result in self.selected.items()}
+
+    def write_profiles(self, path: str, prefix: str = 'tuned') -> Dict[str, Dict]:
+        """
+        Escribe el archivo de perfiles (perfiles elegidos + frente + todos los ensayos)
+
+        Returns:
+            Entradas de perfil escritas
+        """
+        profiles = self.profiles(prefix)
+        data = {
+            'version': PROFILE_FILE_VERSION,
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'backend': self.backend,
+            'base_profile': self.base_profile,
+            'clips': self.clips,
+            'min_agreement': self.min_agreement,
+            'profiles': profiles,
+            'pareto': [result.to_dict() for result in self.front],
+            'trials': [result.to_dict() for result in self.results],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return profiles
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    return float(np.percentile(values, q)) if len(values) else 0.0
+
+
+class PipelineAutotuner:
+    """
+    Barre un ParameterSpace sobre clips con un backend y elige el frente de Pareto
+
+    El backend expone:
+        name: str
+        run_clip(clip: Clip, profile: CameraProfile) -> ClipRun
+    """
+
+    def __init__(self, backend, clips: Sequence[Clip], space: ParameterSpace,
+                 base_profile: str = 'headless', min_agreement: float = 0.95,
+                 max_trials: Optional[int] = None, repeats: int = 1, seed: int = 0,
+                 reference_params: Optional[Dict] = None):
+        """
+        Args:
+            backend: Ejecuta un clip con un perfil (ver docstring de la clase)
+            clips: Clips del barrido
+            space: Espacio de parámetros
+            base_profile: Perfil registrado sobre el que se aplican los parámetros
+            min_agreement: Acuerdo mínimo en cruces para entrar en el frente
+            max_trials: Muestra aleatoria del espacio si es mayor (None = rejilla completa)
+            repeats: Ejecuciones por clip y punto (se agregan todas)
+            seed: Semilla de la muestra
+            reference_params: Ajustes de referencia para los cruces (default REFERENCE_PARAMS)
+        """
+        if not clips:
+            raise ValueError("El barrido necesita al menos un clip")
+        self.backend = backend
+        self.clips = list(clips)
+        self.space = space
+        self.base_profile = base_profile
+        self.base = get_profile(base_profile)
+        self.min_agreement = min_agreement
+        self.max_trials = max_trials
+        self.repeats = max(1, repeats)
+        self.seed = seed
+        self.reference_params = dict(reference_params or REFERENCE_PARAMS)
+        self._references: Dict[str, Dict] = {}
+
+    def references(self) -> Dict[str, Dict]:
+        """Cruces esperados por clip (del clip o del ajuste de referencia)"""
+        if not self._references:
+            profile = apply_params(self.base, self.reference_params, name='reference')
+            for clip in self.clips:
+                if clip.expected is not None:
+                    self._references[clip.name] = dict(clip.expected)
+                    continue
+                run = self.backend.run_clip(clip, profile)
+                self._references[clip.name] = {'entradas': run.entradas, 'salidas': run.salidas}
+                logger.info(f"📏 Referencia {clip.name}: E:{run.entradas} S:{run.salidas}")
+        return self._references
+
+    def evaluate(self, params: Dict) -> TrialResult:
+        """Ejecuta todos los clips con un punto del espacio y agrega las métricas"""
+        profile = apply_params(self.base, params, name='trial')
+        references = self.references()
+        frames = 0
+        elapsed = 0.0
+        latencies = []
+        errors = 0
+        expected_total = 0
+        clips = {}
+        for clip in self.clips:
+            reference = references[clip.name]
+            for _ in range(self.repeats):
+                run = self.backend.run_clip(clip, profile)
+                frames += run.frames
+                elapsed += run.elapsed_s
+                latencies.extend(run.latencies_ms)
+                clip_errors = (abs(run.entradas - reference['entradas'])
+                               + abs(run.salidas - reference['salidas']))
+                errors += clip_errors
+                expected_total += reference['entradas'] + reference['salidas']
+            clips[clip.name] = {'entradas': run.entradas, 'salidas': run.salidas,
+                                'errors': clip_errors,
+                                'fps': round(run.frames / run.elapsed_s, 2) if run.elapsed_s else 0.0}
+        return TrialResult(
+            params=dict(params),
+            fps=frames / elapsed if elapsed > 0 else 0.0,
+            latency_p50_ms=_percentile(latencies, 50),
+            latency_p95_ms=_percentile(latencies, 95),
+            agreement=1.0 - errors / expected_total if expected_total else float(errors == 0),
+            crossing_errors=errors,
+            clips=clips,
+        )
+
+    def run(self, on_trial: Optional[Callable[[int, int, TrialResult], None]] = None) -> TuningReport:
+        """
+        Ejecuta el barrido
+
+        Args:
+            on_trial: Callback (índice, total, resultado) tras cada punto
+
+        Returns:
+            TuningReport con todos los ensayos, el frente y los perfiles elegidos
+        """
+        t0 = time.perf_counter()
+        points = self.space.points(self.max_trials, self.seed)
+        logger.info(f"🔧 Autotuner: {len(points)} puntos x {len(self.clips)} clips "
+                    f"({self.backend.name}, base {self.base_profile})")
+        self.references()
+
+        results = []
+        for index, params in enumerate(points, 1):
+            result = self.evaluate(params)
+            results.append(result)
+            if on_trial is not None:
+                on_trial(index, len(points), result)
+
+        eligible = [r for r in results if r.agreement >= self.min_agreement]
+        if not eligible:
+            logger.warning(f"⚠️  Ningún punto alcanza acuerdo {self.min_agreement:.2f}; "
+                           f"el frente usa todos los puntos")
+            eligible = results
+        front = pareto_front(eligible)
+        return TuningReport(
+            results=results,
+            front=front,
+            selected=select_profiles(front),
+            base_profile=self.base_profile,
+            backend=self.backend.name,
+            clips=[clip.name for clip in self.clips],
+            min_agreement=self.min_agreement,
+            elapsed_s=time.perf_counter() - t0,
+        )
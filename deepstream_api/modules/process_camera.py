@@ -0,0 +1,492 @@
+"""
+Ejecución de cámaras en procesos worker
+Cada proceso aloja una o más cámaras con su propio intérprete (y su propio GIL);
+el proceso principal las controla por un canal (Pipe) ligero
+"""
+import logging
+import importlib
+import multiprocessing
+import signal
+import threading
+import time
+from typing import Dict, Optional
+
+from .async_logging import setup_logging, shutdown_logging
+from .camera_metrics import empty_snapshot
+from .camera_profiles import resolve_profile
+from .shared_counters import SharedCounterTable
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CAMERA_FACTORY = "modules.threaded_camera:ThreadedDeepStreamCamera"
+
+# Timeouts del canal de control (s)
+START_TIMEOUT = 45.0
+STOP_TIMEOUT = 15.0
+QUERY_TIMEOUT = 5.0
+
+
+def _load_factory(path: str):
+    """Resuelve 'paquete.modulo:Clase'"""
+    module_name, _, attr = path.partition(':')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _worker_main(conn, group_id, headless, camera_factory, event_api_url):
+    """
+    Bucle del proceso worker
+
+    Atiende comandos (request_id, cmd, *args) y responde (request_id, ok, resultado)
+    por el mismo Pipe.
+    Las cámaras corren en threads del worker (ThreadedDeepStreamCamera), pero
+    solo compiten por el GIL con las demás cámaras de su grupo
+    """
+    # Ctrl+C llega a todo el grupo de procesos: el principal coordina el apagado
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Cola de logs y thread escritor propios del worker
+    setup_logging()
+
+    factory = _load_factory(camera_factory)
+
+    event_publisher = None
+    if event_api_url:
+        from .event_publisher import CrossingEventPublisher
+        event_publisher = CrossingEventPublisher(event_api_url)
+        event_publisher.start()
+
+    cameras = {}
+    counter_tables = {}
+
+    def counter_row_for(spec):
+        """Fila de la tabla compartida del gestor (adjunta por nombre)"""
+        name = spec.get('counter_table')
+        if name is None:
+            return None
+        if name not in counter_tables:
+            # El worker hereda el resource_tracker del gestor (dueño de la tabla)
+            counter_tables[name] = SharedCounterTable.attach(name, untrack=False)
+        return counter_tables[name].row(spec['counter_slot'], spec['camera_id'])
+
+    def handle(cmd, args):
+        if cmd == 'add':
+            spec = args[0]
+            # Solo se pasan si están en el spec: otras fábricas pueden no aceptarlos
+            options = {key: spec[key] for key in ('adaptive_interval', 'profile', 'recording', 'initial_counts')
+                       if key in spec}
+            cameras[spec['camera_id']] = factory(
+                camera_id=spec['camera_id'],
+                camera_name=spec['camera_name'],
+                rtsp_uri=spec['rtsp_uri'],
+                line_config=spec['line_config'],
+                headless=headless,
+                event_publisher=event_publisher,
+                counter_row=counter_row_for(spec),
+                **options
+            )
+            return True
+        if cmd == 'remove':
+            return cameras.pop(args[0], None) is not None
+        if cmd == 'start':
+            return cameras[args[0]].start()
+        if cmd == 'stop':
+            cameras[args[0]].stop(timeout=args[1])
+            return True
+        if cmd == 'line':
+            return cameras[args[0]].update_line_config(args[1])
+        if cmd == 'record':
+            # args: camera_id, opciones de RecordingBranch (None = dejar de grabar)
+            if args[1] is None:
+                return cameras[args[0]].stop_recording()
+            return cameras[args[0]].start_recording(**args[1])
+        if cmd == 'clip':
+            return cameras[args[0]].request_clip(args[1], args[2])
+        if cmd == 'poll':
+            # Una sola ida y vuelta para stats, métricas y estado de todas las cámaras
+            return {
+                camera_id: {
+                    'stats': camera.get_stats(),
+                    'metrics': camera.get_metrics(),
+                    'alive': camera.is_alive(),
+                    'recording': camera.get_recording_stats() if hasattr(camera, 'get_recording_stats') else None,
+                    'exit_reason': getattr(camera, 'exit_reason', None),
+                }
+                for camera_id, camera in cameras.items()
+            }
+        if cmd == 'ping':
+            return group_id
+        raise ValueError(f"Comando desconocido: {cmd}")
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break  # El proceso principal terminó
+
+            request_id, cmd, args = message[0], message[1], message[2:]
+            if cmd == 'shutdown':
+                conn.send((request_id, True, None))
+                break
+
+            try:
+                conn.send((request_id, True, handle(cmd, args)))
+            except Exception as e:
+                conn.send((request_id, False, f"{type(e).__name__}: {e}"))
+    finally:
+        for camera in cameras.values():
+            try:
+                camera.stop()
+            except Exception as e:
+                logger.warning(f"⚠️  [Worker {group_id}] Error deteniendo cámara {camera.camera_id}: {e}")
+        if event_publisher is not None:
+            event_publisher.stop()
+        for table in counter_tables.values():
+            table.close()
+        conn.close()
+        shutdown_logging()
+
+
+class CameraProcessGroup:
+    """
+    Proceso worker que aloja un grupo de cámaras
+
+    - El proceso se crea al primer uso (contexto 'spawn' por defecto:
+      no se hace fork de un proceso con GStreamer/CUDA ya inicializado)
+    - Si el worker muere, solo se pierden sus cámaras: las llamadas
+      fallan rápido y las vistas devuelven el último estado conocido
+    """
+
+    def __init__(self, group_id: int, headless: bool = False,
+                 camera_factory: str = DEFAULT_CAMERA_FACTORY,
+                 event_api_url: Optional[str] = None, mp_context: str = 'spawn',
+                 poll_max_age: float = 0.5):
+        """
+        Args:
+            group_id: Identificador del grupo (nombre del proceso)
+            headless: Si True, las cámaras no muestran ventanas
+            camera_factory: 'modulo:Clase' de la cámara a crear en el worker
+            event_api_url: URL de la API para un publicador de eventos propio del worker
+            mp_context: Contexto de multiprocessing ('spawn' o 'fork')
+            poll_max_age: Segundos que se reutiliza el último estado de las cámaras
+        """
+        self.group_id = group_id
+        self.headless = headless
+        self.camera_factory = camera_factory
+        self.event_api_url = event_api_url
+        self.poll_max_age = poll_max_age
+        self._ctx = multiprocessing.get_context(mp_context)
+
+        self.process = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._request_id = 0
+
+        # Cámaras asignadas al grupo y cámaras ya registradas en el worker
+        self.camera_ids = set()
+        self._added = set()
+
+        # Último resultado de 'poll' (se sirve si el worker no responde)
+        self._last_poll: Dict[int, Dict] = {}
+        self._last_poll_time = 0.0
+
+    def is_alive(self) -> bool:
+        """Verifica si el proceso worker está vivo"""
+        return self.process is not None and self.process.is_alive()
+
+    def _ensure_process(self):
+        if self.is_alive():
+            return
+
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        self.process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.group_id, self.headless, self.camera_factory, self.event_api_url),
+            name=f"CameraWorker-{self.group_id}",
+            daemon=False
+        )
+        self.process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self._added.clear()
+        logger.info(f"🧩 Worker {self.group_id} iniciado (PID {self.process.pid})")
+
+    def call(self, cmd: str, *args, timeout: float = QUERY_TIMEOUT):
+        """
+        Envía un comando al worker y espera su respuesta
+
+        Raises:
+            RuntimeError: si el worker no está vivo, no responde o el comando falla
+        """
+        with self._lock:
+            if not self.is_alive() or self._conn is None:
+                raise RuntimeError(f"Worker {self.group_id} no está corriendo")
+
+            self._request_id += 1
+            request_id = self._request_id
+            deadline = time.monotonic() + timeout
+            try:
+                self._conn.send((request_id, cmd) + args)
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._conn.poll(remaining):
+                        raise RuntimeError(f"Worker {self.group_id} no respondió a '{cmd}' en {timeout}s")
+                    reply_id, ok, result = self._conn.recv()
+                    # Respuestas tardías de comandos que ya expiraron se descartan
+                    if reply_id == request_id:
+                        break
+            except (EOFError, OSError) as e:
+                raise RuntimeError(f"Worker {self.group_id} terminó inesperadamente: {e}")
+
+        if not ok:
+            raise RuntimeError(f"Worker {self.group_id}: {result}")
+        return result
+
+    def add_camera(self, spec: dict):
+        """Registra la cámara en el worker (creándolo si hace falta)"""
+        with self._lock:
+            self._ensure_process()
+        if spec['camera_id'] not in self._added:
+            self.call('add', spec)
+            self._added.add(spec['camera_id'])
+
+    def remove_camera(self, camera_id: int):
+        """Quita la cámara del grupo (debe estar detenida)"""
+        if camera_id in self._added and self.is_alive():
+            self.call('remove', camera_id)
+        self._added.discard(camera_id)
+        self.camera_ids.discard(camera_id)
+        self._last_poll.pop(camera_id, None)
+
+    def update_line_config(self, camera_id: int, line_config: dict) -> bool:
+        """Envía una línea nueva a una cámara ya registrada en el worker"""
+        if camera_id not in self._added or not self.is_alive():
+            return True
+        return bool(self.call('line', camera_id, line_config))
+
+    def call_camera(self, cmd: str, camera_id: int, *args, timeout: float = QUERY_TIMEOUT):
+        """Comando para una cámara ya registrada en el worker (None si no está)"""
+        if camera_id not in self._added or not self.is_alive():
+            return None
+        return self.call(cmd, camera_id, *args, timeout=timeout)
+
+    def invalidate(self):
+        """Fuerza que el próximo poll() consulte al worker"""
+        self._last_poll_time = 0.0
+
+    def poll(self, max_age: Optional[float] = None) -> Dict[int, Dict]:
+        """
+        Estado de todas las cámaras del grupo (cacheado poll_max_age segundos)
+
+        Returns:
+            {camera_id: {'stats', 'metrics', 'alive'}}
+        """
+        if max_age is None:
+            max_age = self.poll_max_age
+        if time.monotonic() - self._last_poll_time < max_age:
+            return self._last_poll
+
+        if self.is_alive():
+            try:
+                self._last_poll = self.call('poll')
+            except RuntimeError as e:
+                logger.warning(f"⚠️  {e}")
+        else:
+            for state in self._last_poll.values():
+                state['alive'] = False
+        self._last_poll_time = time.monotonic()
+        return self._last_poll
+
+    def shutdown(self, timeout: float = STOP_TIMEOUT):
+        """Detiene las cámaras del grupo y termina el proceso"""
+        if self.process is None:
+            return
+        if self.is_alive():
+            try:
+                self.call('shutdown', timeout=timeout)
+            except RuntimeError as e:
+                logger.warning(f"⚠️  {e}")
+            self.process.join(timeout=timeout)
+            if self.process.is_alive():
+                logger.warning(f"⚠️  Worker {self.group_id} no terminó en {timeout}s, forzando...")
+                self.process.terminate()
+                self.process.join(timeout=5)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self.process = None
+
+
+class ProcessCamera:
+    """
+    Vista de una cámara alojada en un CameraProcessGroup
+
+    Expone la interfaz de ThreadedDeepStreamCamera para que
+    MultiCameraManager trate todos los modos igual
+    """
+
+    def __init__(self, camera_id: int, camera_name: str, rtsp_uri: str,
+                 line_config: dict, group: CameraProcessGroup, counter_row=None,
+                 adaptive_interval: Optional[dict] = None, profile=None,
+                 recording: Optional[dict] = None, initial_counts: Optional[dict] = None):
+        self.camera_id = camera_id
+        self.camera_name = camera_name
+        self.rtsp_uri = rtsp_uri
+        self.line_config = line_config
+        self.group = group
+        self.counter_row = counter_row
+        self.adaptive_interval = adaptive_interval
+        # CameraProfile ya resuelto (se envía al worker en el spec)
+        self.profile = resolve_profile(profile, group.headless)
+        # Opciones de grabación (se envían en el spec para engancharla al arrancar)
+        self.recording = recording
+        # Contadores de partida (los de la cámara reemplazada en un reinicio)
+        self.initial_counts = initial_counts
+        self._stopped = False
+        group.camera_ids.add(camera_id)
+
+    def as_spec(self) -> dict:
+        """Descripción serializable de la cámara para el worker"""
+        spec = {
+            'camera_id': self.camera_id,
+            'camera_name': self.camera_name,
+            'rtsp_uri': self.rtsp_uri,
+            'line_config': self.line_config
+        }
+        if self.counter_row is not None:
+            # El worker se adjunta a la tabla por nombre y escribe en la misma fila
+            spec['counter_table'] = self.counter_row.table.name
+            spec['counter_slot'] = self.counter_row.slot
+        if self.adaptive_interval is not None:
+            spec['adaptive_interval'] = self.adaptive_interval
+        if self.recording is not None:
+            spec['recording'] = self.recording
+        if self.initial_counts is not None:
+            spec['initial_counts'] = self.initial_counts
+        spec['profile'] = self.profile
+        return spec
+
+    def start(self) -> bool:
+        """
+        Inicia la cámara en su worker (creando el proceso si hace falta)
+
+        Returns:
+            True si se inició exitosamente
+        """
+        self._stopped = False
+        try:
+            self.group.add_camera(self.as_spec())
+            return bool(self.group.call('start', self.camera_id, timeout=START_TIMEOUT))
+        except RuntimeError as e:
+            logger.error(f"❌ Cámara {self.camera_id}: {e}")
+            return False
+        finally:
+            self.group.invalidate()
+
+    def stop(self, timeout: float = 8.0):
+        """Detiene la cámara (el worker sigue vivo para las demás del grupo)"""
+        self._stopped = True
+        if not self.group.is_alive():
+            logger.info(f"[Main] Cámara {self.camera_id} ya está detenida (worker {self.group.group_id} no corre)")
+            return
+        try:
+            self.group.call('stop', self.camera_id, timeout, timeout=timeout + STOP_TIMEOUT)
+        except RuntimeError as e:
+            logger.warning(f"⚠️  Cámara {self.camera_id}: {e}")
+        finally:
+            self.group.invalidate()
+
+    def update_line_config(self, line_config: dict) -> bool:
+        """
+        Cambia la línea de conteo en el worker sin reiniciar la cámara
+        Si la cámara aún no está en el worker, se usa al agregarla
+
+        Returns:
+            True si se aplicó (o quedó para el arranque)
+        """
+        self.line_config = line_config
+        try:
+            return self.group.update_line_config(self.camera_id, line_config)
+        except RuntimeError as e:
+            logger.warning(f"⚠️  Cámara {self.camera_id}: {e}")
+            return False
+
+    def start_recording(self, **options) -> bool:
+        """
+        Engancha la rama de grabación en el worker (o al agregar la cámara)
+
+        Returns:
+            True si quedó grabando (o quedó para el arranque)
+        """
+        self.recording = options
+        try:
+            result = self.group.call_camera('record', self.camera_id, options, timeout=START_TIMEOUT)
+        except RuntimeError as e:
+            logger.error(f"❌ Cámara {self.camera_id}: {e}")
+            return False
+        finally:
+            self.group.invalidate()
+        return result is None or bool(result)
+
+    def stop_recording(self) -> bool:
+        """Desengancha la rama de grabación en el worker (el conteo sigue)"""
+        self.recording = None
+        try:
+            result = self.group.call_camera('record', self.camera_id, None, timeout=STOP_TIMEOUT)
+        except RuntimeError as e:
+            logger.warning(f"⚠️  Cámara {self.camera_id}: {e}")
+            return False
+        finally:
+            self.group.invalidate()
+        return result is None or bool(result)
+
+    def request_clip(self, event_ts: Optional[float] = None, label: str = "cruce") -> Optional[str]:
+        """Clip alrededor de un evento; None si la cámara no graba"""
+        try:
+            return self.group.call_camera('clip', self.camera_id, event_ts, label)
+        except RuntimeError as e:
+            logger.warning(f"⚠️  Cámara {self.camera_id}: {e}")
+            return None
+
+    def get_recording_stats(self) -> Optional[Dict]:
+        """Uso de disco y estado de la grabación; None si la cámara no graba"""
+        state = self._state()
+        return state.get('recording') if state else None
+
+    def _state(self) -> Optional[Dict]:
+        return self.group.poll().get(self.camera_id)
+
+    def get_stats(self) -> Dict:
+        """Obtiene contadores (último estado conocido si el worker murió)"""
+        state = self._state()
+        return dict(state['stats']) if state else {'entradas': 0, 'salidas': 0, 'dentro': 0}
+
+    def get_metrics(self) -> Dict:
+        """Obtiene snapshot de métricas del probe"""
+        state = self._state()
+        return dict(state['metrics']) if state else empty_snapshot(self.camera_id)
+
+    def get_fps(self) -> float:
+        """Obtiene FPS actual"""
+        return self.get_metrics()['fps']
+
+    @property
+    def exit_reason(self) -> Optional[str]:
+        """Motivo de la última salida ('stopped', 'eos', 'error: ...' o 'worker: ...')"""
+        if self._stopped:
+            return "stopped"
+        if not self.group.is_alive():
+            exitcode = self.group.process.exitcode if self.group.process is not None else None
+            return f"worker: exitcode {exitcode}"
+        state = self._state()
+        return state.get('exit_reason') if state else None
+
+    def is_alive(self) -> bool:
+        """Verifica que el worker y la cámara estén corriendo"""
+        if not self.group.is_alive():
+            return False
+        state = self._state()
+        return bool(state and state['alive'])
+
@@ -0,0 +1,313 @@
+"""
+Rama de grabación enganchable a un pipeline de conteo en ejecución
+
+tee (después del OSD) -> queue leaky -> [nvdsosd] -> nvvideoconvert -> nvv4l2h264enc
+-> h264parse -> splitmuxsink. Los segmentos y clips se gestionan con SegmentStore
+(modules/segment_store.py). Una cámara contada y grabada usa un solo decode y
+una sola inferencia; si el encoder se atrasa, la queue descarta frames en
+lugar de frenar el conteo
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+from modules.segment_store import SegmentStore
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_SEGMENT_S = 60
+DEFAULT_QUOTA_MB = 2048
+DEFAULT_CLIP_QUOTA_MB = 1024
+DEFAULT_CLIP_PRE_S = 10.0
+DEFAULT_CLIP_POST_S = 10.0
+DEFAULT_BITRATE = 4000000
+
+# Frames en la queue de la rama (~1 s a 30 fps); llena, descarta los más viejos
+QUEUE_MAX_BUFFERS = 30
+
+# Tiempo máximo esperando el EOS al desenganchar (cierre del último segmento)
+EOS_TIMEOUT_S = 10.0
+
+
+def insert_tee(pipeline: Gst.Pipeline, anchor: Gst.Element, name: str) -> Optional[Gst.Element]:
+    """
+    Inserta un tee a la salida de `anchor` (pipeline aún sin iniciar)
+
+    El enlace anchor -> siguiente pasa a ser anchor -> tee -> siguiente; con
+    una sola rama el tee no copia buffers
+
+    Returns:
+        El tee, o None si la salida de anchor no está enlazada
+    """
+    srcpad = anchor.get_static_pad('src')
+    peer = srcpad.get_peer() if srcpad is not None else None
+    if peer is None:
+        return None
+    tee = Gst.ElementFactory.make('tee', name)
+    tee.set_property('allow-not-linked', True)
+    pipeline.add(tee)
+    srcpad.unlink(peer)
+    tee_pad = tee.get_request_pad('src_%u')
+    if srcpad.link(tee.get_static_pad('sink')) != Gst.PadLinkReturn.OK or \
+            tee_pad.link(peer) != Gst.PadLinkReturn.OK:
+        # Se restaura el enlace original: el pipeline queda como estaba
+        srcpad.unlink(tee.get_static_pad('sink'))
+        tee_pad.unlink(peer)
+        tee.release_request_pad(tee_pad)
+        pipeline.remove(tee)
+        srcpad.link(peer)
+        raise RuntimeError(f"No se pudo insertar el tee después de {anchor.get_name()}")
+    return tee
+
+
+class _RecordingBin(Gst.Bin):
+    """
+    Bin de la rama: intercepta los mensajes de splitmuxsink
+
+    El EOS de la rama no sube al pipeline (que seguiría contando); marca el
+    cierre del último segmento. Un ERROR de la rama (disco lleno, encoder)
+    tampoco sube: detendría el conteo. Se registra y la rama se desengancha
+    """
+
+    def __init__(self, branch: 'RecordingBranch', name: str):
+        super().__init__(name=name)
+        self.branch = branch
+
+    def do_handle_message(self, message):
+        if message.type == Gst.MessageType.ELEMENT:
+            structure = message.get_structure()
+            name = structure.get_name() if structure else None
+            if name == 'splitmuxsink-fragment-opened':
+                self.branch.segments.segment_opened(structure.get_string('location'))
+            elif name == 'splitmuxsink-fragment-closed':
+                self.branch.segments.segment_closed(structure.get_string('location'))
+        elif message.type == Gst.MessageType.EOS:
+            self.branch.closed.set()
+            return
+        elif message.type == Gst.MessageType.ERROR:
+            err, debug = message.parse_error()
+            logger.error(f"❌ [Cam {self.branch.camera_id}] Grabación: {err.message} ({debug}); "
+                         f"se desengancha la rama, el conteo sigue")
+            self.branch.closed.set()
+            self.branch.failed(err.message)
+            return
+        Gst.Bin.do_handle_message(self, message)
+
+
+class RecordingBranch:
+    """
+    Grabación segmentada de una cámara como rama de su pipeline
+
+    attach() engancha la rama a un tee (también con el pipeline en PLAYING);
+    detach() la desengancha sin detener el pipeline, cerrando el último
+    segmento. El recorder standalone enlaza el bin directamente (sink_pad)
+    """
+
+    def __init__(self, camera_id, directory: str,
+                 segment_s: float = DEFAULT_SEGMENT_S, quota_mb: float = DEFAULT_QUOTA_MB,
+                 clip_quota_mb: float = DEFAULT_CLIP_QUOTA_MB,
+                 clip_pre_s: float = DEFAULT_CLIP_PRE_S, clip_post_s: float = DEFAULT_CLIP_POST_S,
+                 bitrate: int = DEFAULT_BITRATE, draw_osd: bool = False):
+        """
+        Args:
+            camera_id: ID de la cámara
+            directory: Directorio de segmentos de la cámara (índice y clips dentro)
+            segment_s: Duración de cada segmento (s)
+            quota_mb: Disco máximo de segmentos (MB)
+            clip_quota_mb: Disco máximo de clips (MB)
+            clip_pre_s: Segundos de video antes del evento en cada clip
+            clip_post_s: Segundos de video después del evento en cada clip
+            bitrate: Bitrate del encoder H264 (bps)
+            draw_osd: Si True, la rama dibuja bboxes e IDs (el tee está antes de un OSD)
+        """
+        self.camera_id = camera_id
+        self.directory = directory
+        self.segment_s = segment_s
+        self.clip_pre_s = clip_pre_s
+        self.clip_post_s = clip_post_s
+        self.segments = SegmentStore(directory, quota_bytes=int(quota_mb * 1024 ** 2),
+                                     clip_quota_bytes=int(clip_quota_mb * 1024 ** 2))
+
+        # EOS (o error) de splitmuxsink: último segmento cerrado
+        self.closed = threading.Event()
+        self.dropped_frames = 0
+
+        self._pipeline = None
+        self._tee = None
+        self._tee_pad = None
+        # Llamado (desde un thread propio) cuando la rama falla; None = solo desenganchar
+        self.on_failure = None
+        self.error = None
+        self._bitrate = bitrate
+        self._draw_osd = draw_osd
+        self._bin = None
+
+    @property
+    def bin(self) -> Gst.Bin:
+        """Bin de la rama (se arma al primer uso: requiere Gst.init)"""
+        if self._bin is None:
+            self._bin = self._build(self._bitrate, self._draw_osd)
+        return self._bin
+
+    def _build(self, bitrate, draw_osd) -> Gst.Bin:
+        """Arma el bin de la rama con un ghost pad 'sink'"""
+        rbin = _RecordingBin(self, f"recording-{self.camera_id}")
+
+        queue = Gst.ElementFactory.make("queue", None)
+        queue.set_property('leaky', 2)      # downstream: descarta los frames más viejos
+        queue.set_property('max-size-buffers', QUEUE_MAX_BUFFERS)
+        queue.set_property('max-size-bytes', 0)
+        queue.set_property('max-size-time', 0)
+        queue.connect('overrun', self._on_overrun)
+
+        elements = [queue]
+        if draw_osd:
+            osd = Gst.ElementFactory.make("nvdsosd", None)
+            osd.set_property('process-mode', 1)  # GPU mode
+            elements.append(osd)
+
+        convert = Gst.ElementFactory.make("nvvideoconvert", None)
+        convert.set_property('gpu-id', 0)
+        caps = Gst.ElementFactory.make("capsfilter", None)
+        caps.set_property('caps', Gst.Caps.from_string("video/x-raw(memory:NVMM), format=I420"))
+
+        encoder = Gst.ElementFactory.make("nvv4l2h264enc", None)
+        encoder.set_property('bitrate', bitrate)
+        encoder.set_property('insert-sps-pps', True)
+        encoder.set_property('iframeinterval', 30)
+        parse = Gst.ElementFactory.make("h264parse", None)
+
+        # Corta en keyframe al llegar a segment_s (pide uno al encoder). El mp4
+        # fragmentado deja cada segmento legible aunque el proceso muera
+        muxer = Gst.ElementFactory.make("mp4mux", None)
+        muxer.set_property('fragment-duration', 1000)
+        splitmuxsink = Gst.ElementFactory.make("splitmuxsink", None)
+        splitmuxsink.set_property('muxer', muxer)
+        splitmuxsink.set_property('max-size-time', int(self.segment_s * Gst.SECOND))
+        splitmuxsink.set_property('send-keyframe-requests', True)
+        splitmuxsink.set_property('async-handling', True)
+        splitmuxsink.connect('format-location', self._on_format_location)
+
+        elements += [convert, caps, encoder, parse, splitmuxsink]
+        for element in elements:
+            rbin.add(element)
+        for upstream, downstream in zip(elements, elements[1:]):
+            if not upstream.link(downstream):
+                raise RuntimeError(f"Grabación: no se pudo enlazar {upstream.get_name()} -> "
+                                   f"{downstream.get_name()}")
+        rbin.add_pad(Gst.GhostPad.new('sink', queue.get_static_pad('sink')))
+        return rbin
+
+    def _on_format_location(self, splitmux, fragment_id):
+        """Nombre del siguiente segmento (lleva la hora de inicio)"""
+        return os.path.join(self.directory, SegmentStore.segment_name(fragment_id))
+
+    def _on_overrun(self, queue):
+        self.dropped_frames += 1
+
+    def failed(self, message: str):
+        """
+        Error dentro de la rama (thread de streaming): se desengancha desde
+        otro thread para no bloquear al que publicó el error
+        """
+        self.error = message
+        target = self.on_failure or self.detach
+        threading.Thread(target=target, name=f"recording-detach-{self.camera_id}", daemon=True).start()
+
+    @property
+    def sink_pad(self) -> Gst.Pad:
+        return self.bin.get_static_pad('sink')
+
+    @property
+    def attached(self) -> bool:
+        return self._tee_pad is not None
+
+    # ------------------------------------------------------------------
+    # Enganche en caliente
+    # ------------------------------------------------------------------
+
+    def attach(self, pipeline: Gst.Pipeline, tee: Gst.Element):
+        """Agrega la rama al pipeline y la conecta a un pad nuevo del tee"""
+        self.closed.clear()
+        pipeline.add(self.bin)
+        tee_pad = tee.get_request_pad('src_%u')
+        if tee_pad.link(self.sink_pad) != Gst.PadLinkReturn.OK:
+            tee.release_request_pad(tee_pad)
+            pipeline.remove(self.bin)
+            raise RuntimeError(f"Grabación: no se pudo enlazar el tee de la cámara {self.camera_id}")
+        self._pipeline, self._tee, self._tee_pad = pipeline, tee, tee_pad
+        self.bin.sync_state_with_parent()
+        logger.info(f"⏺️  [Cam {self.camera_id}] Grabación enganchada: {self.directory} "
+                    f"(segmentos de {self.segment_s}s)")
+
+    def detach(self, timeout: float = EOS_TIMEOUT_S) -> bool:
+        """
+        Desengancha la rama sin detener el pipeline
+
+        Se desenlaza del tee cuando el pad está ocioso (entre buffers), se
+        envía EOS a la rama para cerrar el segmento en curso y se retira
+
+        Returns:
+            True si el último segmento se cerró dentro de `timeout`
+        """
+        if self._tee_pad is None:
+            return True
+
+        def unlink(pad, info):
+            pad.unlink(self.sink_pad)
+            if not self.closed.is_set():
+                self.sink_pad.send_event(Gst.Event.new_eos())
+            return Gst.PadProbeReturn.REMOVE
+
+        _, state, _ = self.bin.get_state(0)
+        if state == Gst.State.PLAYING and not self.closed.is_set():
+            self._tee_pad.add_probe(Gst.PadProbeType.IDLE, unlink)
+            finished = self.wait_closed(timeout)
+        else:
+            # Pipeline detenido o rama con error: no hay flujo que cierre el
+            # segmento (queda legible por el mp4 fragmentado)
+            self._tee_pad.unlink(self.sink_pad)
+            finished = self.closed.is_set() and self.error is None
+        self.bin.set_state(Gst.State.NULL)
+        self._pipeline.remove(self.bin)
+        self._tee.release_request_pad(self._tee_pad)
+        self._pipeline = self._tee = self._tee_pad = None
+        self.segments.flush_pending()
+        logger.info(f"⏹️  [Cam {self.camera_id}] Grabación desenganchada "
+                    f"({self.dropped_frames} frames descartados por la queue)")
+        return finished
+
+    def wait_closed(self, timeout: float = EOS_TIMEOUT_S) -> bool:
+        """Espera el EOS de splitmuxsink (último segmento cerrado)"""
+        if self.closed.wait(timeout):
+            return True
+        logger.warning(f"⚠️  [Cam {self.camera_id}] Sin EOS de la grabación en {timeout:.0f}s; "
+                       f"el último segmento se recupera al reiniciar")
+        return False
+
+    # ------------------------------------------------------------------
+    # Clips y estado
+    # ------------------------------------------------------------------
+
+    def request_clip(self, event_ts: Optional[float] = None, label: str = "cruce") -> str:
+        """Pide un clip alrededor de un evento (ver SegmentStore.request_clip)"""
+        return self.segments.request_clip(event_ts, self.clip_pre_s, self.clip_post_s, label)
+
+    def stats(self) -> Dict:
+        """Uso de disco, segmentos, clips y frames descartados"""
+        stats = self.segments.usage()
+        stats.update(directory=self.directory, attached=self.attached, dropped_frames=self.dropped_frames,
+                     error=self.error)
+        return stats
+
+    def close(self):
+        """Exporta los clips pendientes y cierra el índice"""
+        self.segments.close()
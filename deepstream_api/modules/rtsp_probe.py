@@ -0,0 +1,215 @@
+"""
+Sondeo rápido de cámaras RTSP (sin GStreamer)
+Conexión TCP + OPTIONS + DESCRIBE con timeout corto, para saber antes de
+construir un pipeline si la cámara responde
+"""
+import base64
+import hashlib
+import logging
+import os
+import re
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, unquote
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RTSP_PORT = 554
+USER_AGENT = "deepstream-api-probe/1.0"
+
+
+@dataclass
+class ProbeResult:
+    """Resultado del sondeo de una cámara"""
+    ok: bool
+    stage: str              # 'tcp', 'options', 'describe', 'auth', 'skip' o 'ok'
+    latency_ms: float
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+
+def _split_uri(uri: str) -> Tuple[str, int, str, Optional[str], Optional[str]]:
+    """(host, puerto, uri sin credenciales, usuario, contraseña)"""
+    parts = urlsplit(uri)
+    host = parts.hostname or ''
+    port = parts.port or DEFAULT_RTSP_PORT
+    netloc = host if parts.port is None else f"{host}:{parts.port}"
+    clean = parts._replace(netloc=netloc).geturl()
+    user = unquote(parts.username) if parts.username else None
+    password = unquote(parts.password) if parts.password else None
+    return host, port, clean, user, password
+
+
+class _Connection:
+    """Socket RTSP con buffer: lee respuestas completas (headers + cuerpo)"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.buffer = b''
+
+    def _fill(self):
+        chunk = self.sock.recv(4096)
+        if not chunk:
+            raise ConnectionError("conexión cerrada por la cámara")
+        self.buffer += chunk
+        if len(self.buffer) > 262144:
+            raise ValueError("respuesta RTSP demasiado grande")
+
+    def read_response(self) -> Tuple[int, Dict[str, str]]:
+        """Lee una respuesta; retorna (status, headers en minúscula)"""
+        while b'\r\n\r\n' not in self.buffer:
+            self._fill()
+        head, self.buffer = self.buffer.split(b'\r\n\r\n', 1)
+        lines = head.decode('latin-1').split('\r\n')
+        match = re.match(r'RTSP/\d\.\d\s+(\d{3})', lines[0])
+        if not match:
+            raise ValueError(f"respuesta no RTSP: {lines[0][:40]!r}")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        # El cuerpo (SDP, página de error) se descarta
+        length = int(headers.get('content-length', 0) or 0)
+        while len(self.buffer) < length:
+            self._fill()
+        self.buffer = self.buffer[length:]
+        return int(match.group(1)), headers
+
+
+def _challenge_params(challenge: str) -> Dict[str, str]:
+    """Parámetros de un desafío WWW-Authenticate (valores con o sin comillas)"""
+    return {name.lower(): quoted or bare
+            for name, quoted, bare in re.findall(r'(\w+)=(?:"([^"]*)"|([^\s,]*))', challenge)}
+
+
+def _authorization(challenge: str, method: str, uri: str, user: str, password: str) -> Optional[str]:
+    """
+    Header Authorization para un desafío Basic o Digest (MD5, con o sin qop=auth)
+
+    Returns:
+        El header, o None si el desafío pide algo no soportado (auth-int, MD5-sess, SHA-256...)
+    """
+    scheme = challenge.split(' ', 1)[0].lower()
+    if scheme == 'basic':
+        token = base64.b64encode(f"{user}:{password}".encode('utf-8')).decode('ascii')
+        return f"Basic {token}"
+    if scheme == 'digest':
+        params = _challenge_params(challenge)
+        if params.get('algorithm', 'MD5').upper() != 'MD5':
+            return None
+        realm, nonce = params.get('realm', ''), params.get('nonce', '')
+        ha1 = hashlib.md5(f"{user}:{realm}:{password}".encode('utf-8')).hexdigest()
+        ha2 = hashlib.md5(f"{method}:{uri}".encode('utf-8')).hexdigest()
+        header = f'Digest username="{user}", realm="{realm}", nonce="{nonce}", uri="{uri}"'
+
+        if 'qop' in params:
+            # RFC 2617: con qop el cliente aporta su nonce y el contador de uso del nonce
+            if 'auth' not in [q.strip().lower() for q in params['qop'].split(',')]:
+                return None
+            nc, cnonce = '00000001', os.urandom(8).hex()
+            response = hashlib.md5(f"{ha1}:{nonce}:{nc}:{cnonce}:auth:{ha2}".encode('utf-8')).hexdigest()
+            header += f', qop=auth, nc={nc}, cnonce="{cnonce}"'
+        else:
+            response = hashlib.md5(f"{ha1}:{nonce}:{ha2}".encode('utf-8')).hexdigest()
+        header += f', response="{response}"'
+        if 'opaque' in params:
+            header += f', opaque="{params["opaque"]}"'
+        return header
+    return None
+
+
+def probe_rtsp(uri: str, timeout: float = 3.0, describe: bool = True) -> ProbeResult:
+    """
+    Verifica que una cámara RTSP responda
+
+    Args:
+        uri: URI RTSP (con credenciales opcionales)
+        timeout: Timeout total de conexión y de cada respuesta (s)
+        describe: Además de OPTIONS, pedir DESCRIBE (valida path y credenciales)
+
+    Returns:
+        ProbeResult (las URIs que no son rtsp:// se consideran alcanzables)
+    """
+    t0 = time.perf_counter()
+
+    def result(ok, stage, status=None, error=None):
+        return ProbeResult(ok, stage, (time.perf_counter() - t0) * 1000.0, status, error)
+
+    if not uri or not uri.lower().startswith(('rtsp://', 'rtsps://')):
+        return result(True, 'skip')
+
+    host, port, clean_uri, user, password = _split_uri(uri)
+    try:
+        sock = socket.create_connection((host, port), timeout=timeout)
+    except OSError as e:
+        return result(False, 'tcp', error=str(e) or type(e).__name__)
+
+    conn = _Connection(sock)
+    cseq = 0
+
+    def request(method, extra=''):
+        nonlocal cseq
+        cseq += 1
+        sock.sendall((f"{method} {clean_uri} RTSP/1.0\r\nCSeq: {cseq}\r\n"
+                      f"User-Agent: {USER_AGENT}\r\n{extra}\r\n").encode('latin-1'))
+        return conn.read_response()
+
+    stage = 'options'
+    try:
+        with sock:
+            sock.settimeout(timeout)
+            status, _ = request('OPTIONS')
+            # Algunas cámaras piden autenticación ya en OPTIONS: basta con que respondan
+            if status >= 500 or status == 404:
+                return result(False, stage, status, f"OPTIONS respondió {status}")
+            if not describe:
+                return result(True, 'ok', status)
+
+            stage = 'describe'
+            status, headers = request('DESCRIBE', 'Accept: application/sdp\r\n')
+            if status == 401:
+                challenge = headers.get('www-authenticate')
+                if not challenge or not user:
+                    return result(False, 'auth', status, "la cámara requiere credenciales")
+                auth = _authorization(challenge, 'DESCRIBE', clean_uri, user, password or '')
+                if auth is None:
+                    # Responde, pero no se pueden verificar las credenciales: se da por alcanzable
+                    return result(True, 'auth', status,
+                                  f"desafío no soportado: {challenge.split(',', 1)[0]}")
+                stage = 'auth'
+                status, _ = request('DESCRIBE', f"Accept: application/sdp\r\nAuthorization: {auth}\r\n")
+                if status == 401:
+                    return result(False, stage, status, "credenciales rechazadas")
+            if status != 200:
+                return result(False, stage, status, f"DESCRIBE respondió {status}")
+            return result(True, 'ok', status)
+    except (OSError, ValueError) as e:
+        return result(False, stage, error=str(e) or type(e).__name__)
+
+
+def probe_many(uris: Dict[int, str], timeout: float = 3.0, concurrency: int = 32,
+               describe: bool = True) -> Dict[int, ProbeResult]:
+    """
+    Sondea varias cámaras en paralelo
+
+    Args:
+        uris: {camera_id: uri}
+        timeout: Timeout por cámara (s)
+        concurrency: Sondeos simultáneos
+
+    Returns:
+        {camera_id: ProbeResult}; el total tarda ~ timeout, no N * timeout
+    """
+    if not uris:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(uris)),
+                            thread_name_prefix="RTSPProbe") as executor:
+        futures = {camera_id: executor.submit(probe_rtsp, uri, timeout, describe)
+                   for camera_id, uri in uris.items()}
+        return {camera_id: future.result() for camera_id, future in futures.items()}
@@ -0,0 +1,337 @@
+"""
+Grabación segmentada por cámara: índice de segmentos, cuota de disco y clips de eventos
+Sin dependencias de GStreamer: el recorder (splitmuxsink) solo avisa de los
+segmentos abiertos/cerrados y pide clips
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+SEGMENT_DB_NAME = "segments.db"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    name      TEXT PRIMARY KEY,
+    start_ts  REAL NOT NULL,
+    end_ts    REAL,
+    bytes     INTEGER NOT NULL DEFAULT 0,
+    complete  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_segments_start ON segments (start_ts);
+CREATE TABLE IF NOT EXISTS clips (
+    clip_id   TEXT PRIMARY KEY,
+    label     TEXT,
+    event_ts  REAL NOT NULL,
+    start_ts  REAL NOT NULL,
+    end_ts    REAL NOT NULL,
+    bytes     INTEGER NOT NULL,
+    created   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_clips_created ON clips (created);
+"""
+
+# seg_<inicio en ms>_<fragmento>.mp4: el inicio va en el nombre para
+# reconstruir el índice si se pierde
+_SEGMENT_FILE = re.compile(r'^seg_(\d{13})_(\d{6})\.mp4$')
+
+
+@dataclass
+class Segment:
+    """Segmento de video (archivo completo e independiente, empieza en keyframe)"""
+    name: str
+    start_ts: float
+    end_ts: Optional[float]
+    bytes: int
+    complete: bool
+
+
+@dataclass
+class ClipRequest:
+    """Clip pendiente: espera a que se cierren los segmentos que cubren el post-roll"""
+    clip_id: str
+    label: str
+    event_ts: float
+    start_ts: float
+    end_ts: float
+
+
+class SegmentStore:
+    """
+    Segmentos de una cámara en un buffer circular con cuota de disco
+
+    - Los segmentos se indexan en SQLite (WAL) por hora de inicio: buscar los
+      que cubren un intervalo es una consulta por índice, sin leer video
+    - Al cerrarse un segmento se borran los más antiguos hasta quedar bajo
+      `quota_bytes` (nunca el que está abierto): el disco ocupado y la
+      escritura por cámara quedan acotados
+    - Un clip de evento referencia segmentos completos: se enlazan (hard
+      link) en clips/<clip_id>/ con un playlist ffconcat que recorta por
+      inpoint/outpoint, sin re-codificar ni copiar datos. Los clips tienen su
+      propia cuota (`clip_quota_bytes`)
+    - Llamado desde el thread del bus del recorder y desde los probes: todo
+      protegido con un lock
+    """
+
+    def __init__(self, directory: str, quota_bytes: int, clip_quota_bytes: int):
+        """
+        Args:
+            directory: Directorio de la cámara (segmentos, índice y clips/)
+            quota_bytes: Máximo de bytes de segmentos
+            clip_quota_bytes: Máximo de bytes de clips (enlaces incluidos)
+        """
+        self.directory = directory
+        self.clips_dir = os.path.join(directory, 'clips')
+        self.quota_bytes = quota_bytes
+        self.clip_quota_bytes = clip_quota_bytes
+        os.makedirs(self.clips_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pending: List[ClipRequest] = []
+        self._conn = sqlite3.connect(os.path.join(directory, SEGMENT_DB_NAME), timeout=10.0,
+                                     check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self.recover()
+
+    # ------------------------------------------------------------------
+    # Segmentos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def segment_name(fragment_id: int, start_ts: Optional[float] = None) -> str:
+        """Nombre del segmento que empieza ahora (o en start_ts)"""
+        start_ms = int((start_ts if start_ts is not None else time.time()) * 1000)
+        return f"seg_{start_ms:013d}_{fragment_id % 1000000:06d}.mp4"
+
+    def segment_opened(self, location: str):
+        """splitmuxsink abrió un segmento"""
+        name = os.path.basename(location)
+        match = _SEGMENT_FILE.match(name)
+        start_ts = int(match.group(1)) / 1000 if match else time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO segments (name, start_ts) VALUES (?, ?)",
+                               (name, start_ts))
+
+    def segment_closed(self, location: str, end_ts: Optional[float] = None) -> List[str]:
+        """
+        splitmuxsink cerró un segmento: se indexa, se aplica la cuota y se
+        exportan los clips pendientes que ya tienen todo su post-roll
+
+        Returns:
+            Clips exportados
+        """
+        name = os.path.basename(location)
+        end_ts = end_ts if end_ts is not None else time.time()
+        try:
+            size = os.path.getsize(location)
+        except OSError:
+            size = 0
+        with self._lock:
+            with self._conn:
+                self._conn.execute("UPDATE segments SET end_ts = ?, bytes = ?, complete = 1 WHERE name = ?",
+                                   (end_ts, size, name))
+            ready = [request for request in self._pending if request.end_ts <= end_ts]
+            self._pending = [request for request in self._pending if request.end_ts > end_ts]
+            exported = [request.clip_id for request in ready if self._export(request)]
+            # Primero los clips (enlazan los segmentos), después la cuota
+            self._enforce_quota()
+        return exported
+
+    def segments_between(self, start_ts: float, end_ts: float) -> List[Segment]:
+        """Segmentos completos que se solapan con [start_ts, end_ts] (por índice)"""
+        with self._lock:
+            return self._segments_between(start_ts, end_ts)
+
+    def _segments_between(self, start_ts: float, end_ts: float) -> List[Segment]:
+        rows = self._conn.execute(
+            "SELECT * FROM segments WHERE complete = 1 AND start_ts <= ? AND end_ts >= ? "
+            "ORDER BY start_ts", (end_ts, start_ts)).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def usage(self) -> Dict:
+        """Bytes y número de segmentos y clips"""
+        with self._lock:
+            segments = self._conn.execute(
+                "SELECT COUNT(*) AS n, COALESCE(SUM(bytes), 0) AS b, MIN(start_ts) AS t0 "
+                "FROM segments WHERE complete = 1").fetchone()
+            clips = self._conn.execute("SELECT COUNT(*) AS n, COALESCE(SUM(bytes), 0) AS b FROM clips").fetchone()
+        return {'segments': segments['n'], 'segment_bytes': segments['b'], 'oldest_ts': segments['t0'],
+                'clips': clips['n'], 'clip_bytes': clips['b'], 'pending_clips': len(self._pending)}
+
+    def _enforce_quota(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM segments WHERE complete = 1").fetchone()[0]
+        if total <= self.quota_bytes:
+            return
+        rows = self._conn.execute("SELECT name, bytes FROM segments WHERE complete = 1 "
+                                  "ORDER BY start_ts").fetchall()
+        removed = []
+        for row in rows:
+            if total <= self.quota_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, row['name']))
+            except FileNotFoundError:
+                pass
+            total -= row['bytes']
+            removed.append((row['name'],))
+        with self._conn:
+            self._conn.executemany("DELETE FROM segments WHERE name = ?", removed)
+        logger.debug(f"🗑️  {len(removed)} segmentos rotados ({self.directory})")
+
+    def recover(self):
+        """
+        Reconcilia índice y disco tras una caída
+
+        - Segmento abierto en el índice: se cierra con la hora de modificación
+          del archivo (mp4 fragmentado: legible hasta el último fragmento)
+        - Archivo seg_* sin fila (índice perdido): se indexa por su nombre
+        - Fila sin archivo: se borra
+        - Clip en disco sin fila: se indexa desde su clip.json
+        """
+        with self._lock:
+            on_disk = {name for name in os.listdir(self.directory) if _SEGMENT_FILE.match(name)}
+            indexed = {row['name']: row for row in self._conn.execute("SELECT * FROM segments")}
+            with self._conn:
+                for name, row in indexed.items():
+                    if name not in on_disk:
+                        self._conn.execute("DELETE FROM segments WHERE name = ?", (name,))
+                    elif not row['complete']:
+                        self._close_from_disk(name)
+                for name in on_disk - set(indexed):
+                    start_ts = int(_SEGMENT_FILE.match(name).group(1)) / 1000
+                    self._conn.execute("INSERT INTO segments (name, start_ts) VALUES (?, ?)", (name, start_ts))
+                    self._close_from_disk(name)
+                known = {row[0] for row in self._conn.execute("SELECT clip_id FROM clips")}
+                for clip_id in set(os.listdir(self.clips_dir)) - known:
+                    self._index_clip_from_disk(clip_id)
+            self._enforce_quota()
+
+    def _close_from_disk(self, name: str):
+        stat = os.stat(os.path.join(self.directory, name))
+        self._conn.execute("UPDATE segments SET end_ts = ?, bytes = ?, complete = 1 WHERE name = ?",
+                           (stat.st_mtime, stat.st_size, name))
+
+    def _index_clip_from_disk(self, clip_id: str):
+        clip_dir = os.path.join(self.clips_dir, clip_id)
+        try:
+            with open(os.path.join(clip_dir, 'clip.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            logger.warning(f"⚠️  Clip sin clip.json válido, se ignora: {clip_dir}")
+            return
+        size = sum(segment['bytes'] for segment in meta.get('segments', []))
+        self._conn.execute("INSERT OR REPLACE INTO clips VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           (clip_id, meta['label'], meta['event_ts'], meta['start_ts'], meta['end_ts'],
+                            size, os.path.getmtime(clip_dir)))
+
+    # ------------------------------------------------------------------
+    # Clips
+    # ------------------------------------------------------------------
+
+    def request_clip(self, event_ts: Optional[float] = None, pre_s: float = 10.0, post_s: float = 10.0,
+                     label: str = 'evento') -> str:
+        """
+        Clip alrededor de un evento (p.ej. un cruce)
+
+        Si los segmentos del post-roll aún no se cerraron, el clip queda
+        pendiente y se exporta al cerrarse el segmento que lo cubre
+
+        Returns:
+            clip_id (directorio clips/<clip_id>/)
+        """
+        event_ts = event_ts if event_ts is not None else time.time()
+        clip_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(event_ts))}_{int(event_ts * 1000) % 1000:03d}_{label}"
+        request = ClipRequest(clip_id, label, event_ts, event_ts - pre_s, event_ts + post_s)
+        with self._lock:
+            covered = self._conn.execute("SELECT MAX(end_ts) FROM segments WHERE complete = 1").fetchone()[0]
+            if covered is not None and covered >= request.end_ts:
+                self._export(request)
+            else:
+                self._pending.append(request)
+        return clip_id
+
+    def flush_pending(self) -> List[str]:
+        """Exporta los clips pendientes con los segmentos que haya (al detener la grabación)"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            return [request.clip_id for request in pending if self._export(request)]
+
+    def clips(self) -> List[Dict]:
+        """Clips exportados (más recientes primero)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM clips ORDER BY created DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def _export(self, request: ClipRequest) -> bool:
+        segments = self._segments_between(request.start_ts, request.end_ts)
+        if not segments:
+            logger.warning(f"⚠️  Clip {request.clip_id}: sin segmentos para "
+                           f"{request.start_ts:.1f}-{request.end_ts:.1f} (rotados o sin grabar)")
+            return False
+
+        clip_dir = os.path.join(self.clips_dir, request.clip_id)
+        os.makedirs(clip_dir, exist_ok=True)
+        playlist = ["ffconcat version 1.0"]
+        size = 0
+        for segment in segments:
+            source = os.path.join(self.directory, segment.name)
+            target = os.path.join(clip_dir, segment.name)
+            if not os.path.exists(target):
+                os.link(source, target)
+            size += segment.bytes
+            playlist.append(f"file '{segment.name}'")
+            # Recorte al reproducir (sin re-codificar): relativo al inicio de cada segmento
+            if segment.start_ts < request.start_ts:
+                playlist.append(f"inpoint {request.start_ts - segment.start_ts:.3f}")
+            if segment.end_ts > request.end_ts:
+                playlist.append(f"outpoint {request.end_ts - segment.start_ts:.3f}")
+
+        with open(os.path.join(clip_dir, 'playlist.ffconcat'), 'w') as f:
+            f.write("\n".join(playlist) + "\n")
+        with open(os.path.join(clip_dir, 'clip.json'), 'w') as f:
+            json.dump(dict(asdict(request), segments=[asdict(s) for s in segments]), f, indent=2)
+
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO clips VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (request.clip_id, request.label, request.event_ts, request.start_ts,
+                                request.end_ts, size, time.time()))
+        self._enforce_clip_quota()
+        logger.info(f"🎬 Clip {request.clip_id}: {len(segments)} segmentos ({size / (1024 ** 2):.1f} MB)")
+        return True
+
+    def _enforce_clip_quota(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM clips").fetchone()[0]
+        if total <= self.clip_quota_bytes:
+            return
+        for row in self._conn.execute("SELECT clip_id, bytes FROM clips ORDER BY created").fetchall():
+            if total <= self.clip_quota_bytes:
+                break
+            shutil.rmtree(os.path.join(self.clips_dir, row['clip_id']), ignore_errors=True)
+            with self._conn:
+                self._conn.execute("DELETE FROM clips WHERE clip_id = ?", (row['clip_id'],))
+            total -= row['bytes']
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Segment:
+        return Segment(row['name'], row['start_ts'], row['end_ts'], row['bytes'], bool(row['complete']))
+
+    def close(self):
+        """Exporta los clips pendientes y cierra el índice"""
+        self.flush_pending()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,254 @@
+"""
+Tabla de contadores en memoria compartida
+Una fila por cámara escrita por su probe sin locks; lectura consistente por seqlock
+desde el gestor, un endpoint de stats u otro proceso de monitoreo
+"""
+import struct
+import time
+import logging
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional
+
+
+DEFAULT_TABLE_NAME = "deepstream_counters"
+
+# Cabecera: magic, versión, capacidad
+HEADER = struct.Struct('<4sII')
+HEADER_SIZE = 64
+TABLE_MAGIC = b'DSCT'
+TABLE_VERSION = 1
+
+# Fila (64 bytes = una línea de caché):
+# seq | camera_id | entradas | salidas | dentro | frames | last_update | reservado
+ROW_SEQ = struct.Struct('<Q')
+ROW_BODY = struct.Struct('<qQQQQd')
+ROW_SIZE = 64
+ROW_BODY_OFFSET = ROW_SEQ.size
+
+EMPTY_CAMERA = -1
+
+# Lectura en conflicto con el escritor: los primeros reintentos solo ceden la
+# CPU (el escritor puede estar en el mismo núcleo), luego esperan un poco
+READ_SPIN_RETRIES = 100
+READ_BACKOFF_S = 0.0001
+
+
+logger = logging.getLogger(__name__)
+
+
+class CounterRow:
+    """
+    Escritor de la fila de una cámara (un único escritor: el thread del probe)
+
+    write() marca la fila como "escribiendo" (seq impar), escribe el cuerpo
+    y la libera (seq par). Los lectores reintentan si ven seq impar o si
+    seq cambió durante la lectura
+    """
+
+    def __init__(self, table: "SharedCounterTable", slot: int, camera_id: int):
+        self.table = table
+        self.slot = slot
+        self.camera_id = camera_id
+        self._offset = HEADER_SIZE + slot * ROW_SIZE
+        self._seq = ROW_SEQ.unpack_from(table.buf, self._offset)[0]
+        if self._seq & 1:
+            self._seq += 1  # Escritor anterior murió a mitad de escritura
+
+    def write(self, entradas: int, salidas: int, dentro: int, frames: int):
+        """Publica los contadores actuales de la cámara"""
+        buf = self.table.buf
+        offset = self._offset
+        seq = self._seq
+        ROW_SEQ.pack_into(buf, offset, seq + 1)
+        ROW_BODY.pack_into(buf, offset + ROW_BODY_OFFSET, self.camera_id,
+                           entradas, salidas, dentro, frames, time.time())
+        ROW_SEQ.pack_into(buf, offset, seq + 2)
+        self._seq = seq + 2
+
+
+class SharedCounterTable:
+    """
+    Tabla de tamaño fijo en multiprocessing.shared_memory
+
+    - El proceso que la crea (MultiCameraManager) asigna las filas
+    - Los probes (threads del mismo proceso o workers que se adjuntan
+      por nombre) escriben su fila sin locks
+    - Los lectores leen sin locks ni copias intermedias: reintentan
+      mientras la fila esté a medio escribir
+
+    La consistencia depende de que las escrituras del probe lleguen a memoria
+    en orden (seq -> cuerpo -> seq); cada pack_into es una copia completa
+    """
+
+    def __init__(self, name: str = DEFAULT_TABLE_NAME, capacity: int = 64,
+                 create: bool = True, untrack: bool = True):
+        """
+        Crea o se adjunta a la tabla
+
+        Args:
+            name: Nombre del segmento de memoria compartida
+            capacity: Número de filas (solo al crear)
+            create: True para crearla (reemplaza un segmento huérfano con el
+                    mismo nombre), False para adjuntarse a una existente
+            untrack: Al adjuntarse, quitar el segmento del resource_tracker
+                     (False en procesos hijos que comparten el tracker del dueño)
+        """
+        self.name = name
+        self._owner = create
+
+        if create:
+            size = HEADER_SIZE + capacity * ROW_SIZE
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # Segmento de una ejecución anterior que no se limpió
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+            self.capacity = capacity
+            self._shm.buf[:size] = bytes(size)
+            for slot in range(capacity):
+                ROW_BODY.pack_into(self._shm.buf, HEADER_SIZE + slot * ROW_SIZE + ROW_BODY_OFFSET,
+                                   EMPTY_CAMERA, 0, 0, 0, 0, 0.0)
+            HEADER.pack_into(self._shm.buf, 0, TABLE_MAGIC, TABLE_VERSION, capacity)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            # Un proceso independiente que solo se adjunta no debe eliminar el
+            # segmento al salir (su resource_tracker lo haría por defecto)
+            if untrack:
+                try:
+                    resource_tracker.unregister(self._shm._name, 'shared_memory')
+                except Exception:
+                    pass
+            magic, version, capacity = HEADER.unpack_from(self._shm.buf, 0)
+            if magic != TABLE_MAGIC or version != TABLE_VERSION:
+                self._shm.close()
+                raise ValueError(f"'{name}' no es una tabla de contadores válida")
+            self.capacity = capacity
+
+        # camera_id -> slot (solo lo mantiene el proceso dueño)
+        self._slots: Dict[int, int] = {}
+
+        # Lecturas que agotaron los reintentos (fila siempre en escritura)
+        self.read_failures = 0
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_TABLE_NAME, untrack: bool = True) -> "SharedCounterTable":
+        """Se adjunta a una tabla existente (workers, procesos de monitoreo)"""
+        return cls(name=name, create=False, untrack=untrack)
+
+    @property
+    def buf(self):
+        return self._shm.buf
+
+    def register(self, camera_id: int) -> CounterRow:
+        """
+        Asigna (o reutiliza) la fila de una cámara
+
+        Raises:
+            RuntimeError: si la tabla está llena
+        """
+        slot = self._slots.get(camera_id)
+        if slot is None:
+            used = set(self._slots.values())
+            free = [s for s in range(self.capacity) if s not in used]
+            if not free:
+                raise RuntimeError(f"Tabla de contadores llena ({self.capacity} cámaras)")
+            slot = free[0]
+            self._slots[camera_id] = slot
+            row = CounterRow(self, slot, camera_id)
+            row.write(0, 0, 0, 0)
+            return row
+        return CounterRow(self, slot, camera_id)
+
+    def release(self, camera_id: int):
+        """Libera la fila de una cámara removida"""
+        slot = self._slots.pop(camera_id, None)
+        if slot is not None:
+            row = CounterRow(self, slot, EMPTY_CAMERA)
+            row.write(0, 0, 0, 0)
+
+    def row(self, slot: int, camera_id: int) -> CounterRow:
+        """Escritor de una fila ya asignada (workers adjuntos por nombre)"""
+        return CounterRow(self, slot, camera_id)
+
+    def read_slot(self, slot: int, max_retries: int = 1000) -> Optional[tuple]:
+        """
+        Lee una fila de forma consistente
+
+        Returns:
+            (camera_id, entradas, salidas, dentro, frames, last_update), o
+            None si el escritor no la liberó en max_retries intentos
+        """
+        buf = self._shm.buf
+        offset = HEADER_SIZE + slot * ROW_SIZE
+        for attempt in range(max_retries):
+            seq = ROW_SEQ.unpack_from(buf, offset)[0]
+            if not seq & 1:
+                body = ROW_BODY.unpack_from(buf, offset + ROW_BODY_OFFSET)
+                if ROW_SEQ.unpack_from(buf, offset)[0] == seq:
+                    return body
+            time.sleep(0 if attempt < READ_SPIN_RETRIES else READ_BACKOFF_S)
+        self.read_failures += 1
+        return None
+
+    def _slot_camera(self, slot: int):
+        """camera_id de una fila para los logs (sin seqlock: solo cambia al asignarla)"""
+        for camera_id, owned in self._slots.items():
+            if owned == slot:
+                return camera_id
+        return ROW_BODY.unpack_from(self._shm.buf, HEADER_SIZE + slot * ROW_SIZE + ROW_BODY_OFFSET)[0]
+
+    def read(self, camera_id: int) -> Optional[Dict]:
+        """Lee la fila de una cámara registrada en este proceso"""
+        slot = self._slots.get(camera_id)
+        if slot is None:
+            return None
+        body = self.read_slot(slot)
+        if body is None:
+            logger.warning(f"⚠️  Contadores de cámara {camera_id}: la fila no se liberó para leerla")
+            return None
+        return self._as_dict(body)
+
+    def snapshot(self) -> Dict[int, Dict]:
+        """
+        Lee todas las filas ocupadas (sirve en cualquier proceso)
+
+        Returns:
+            {camera_id: {'entradas', 'salidas', 'dentro', 'frames', 'last_update'}}
+            (una fila que no se pudo leer se informa en el log y en read_failures)
+        """
+        result = {}
+        for slot in range(self.capacity):
+            body = self.read_slot(slot)
+            if body is None:
+                logger.warning(f"⚠️  Contadores: fila {slot} (cámara {self._slot_camera(slot)}) "
+                               f"no se liberó para leerla; se omite de este snapshot")
+            elif body[0] != EMPTY_CAMERA:
+                result[body[0]] = self._as_dict(body)
+        return result
+
+    @staticmethod
+    def _as_dict(body) -> Dict:
+        _, entradas, salidas, dentro, frames, last_update = body
+        return {
+            'entradas': entradas,
+            'salidas': salidas,
+            'dentro': dentro,
+            'frames': frames,
+            'last_update': last_update,
+        }
+
+    def close(self):
+        """Se desadjunta; el dueño además elimina el segmento"""
+        if self._shm is None:
+            return
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
@@ -0,0 +1,310 @@
+"""
+Arranque de la flota de cámaras con sondeo RTSP previo y concurrencia acotada
+
+1. Sondea todas las cámaras en paralelo (TCP + OPTIONS/DESCRIBE, ~timeout total)
+2. Inicia las que responden, como máximo `max_concurrent` a la vez, por prioridad
+3. Las que no responden (o fallan al iniciar) quedan en una cola de reintentos
+   en segundo plano con backoff exponencial
+4. Mide el tiempo hasta el primer frame contado de cada cámara y de la flota
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .rtsp_probe import ProbeResult, probe_many, probe_rtsp
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CameraStartup:
+    """Estado de arranque de una cámara"""
+    camera_id: int
+    priority: int = 0
+    probe: Optional[ProbeResult] = None
+    started: bool = False
+    attempts: int = 0
+    started_at: Optional[float] = None      # s desde el inicio del arranque
+    first_count_at: Optional[float] = None  # s hasta el primer frame contado
+    next_retry: float = 0.0                 # time.monotonic() del próximo reintento
+    error: Optional[str] = None
+
+
+@dataclass
+class StartupReport:
+    """Resumen del arranque de la flota"""
+    total: int
+    probe_s: float
+    started: List[int] = field(default_factory=list)
+    deferred: List[int] = field(default_factory=list)
+    first_count_s: Dict[int, float] = field(default_factory=dict)
+    fleet_first_count_s: Optional[float] = None     # None si alguna cámara iniciada no contó aún
+    elapsed_s: float = 0.0
+
+
+class StartupScheduler:
+    """
+    Inicia las cámaras de un MultiCameraManager sin que una cámara caída
+    retrase a las demás
+
+    - start() de una cámara puede bloquear hasta 30 s esperando el RTSP; el
+      sondeo previo descarta en ~probe_timeout las que no responden
+    - Las alcanzables se inician con un pool de `max_concurrent` workers
+      (no un thread por cámara), en orden de prioridad y luego de latencia
+      de sondeo
+    - Reintentos: re-sondeo y start() cada retry_interval * 2^n segundos,
+      hasta max_retry_interval
+    - Solo para cámaras por separado (thread/process); el pipeline compartido
+      se inicia completo con start_all_cameras()
+    """
+
+    def __init__(self, manager, max_concurrent: int = 4, probe_timeout: float = 3.0,
+                 retry_interval: float = 30.0, max_retry_interval: float = 300.0,
+                 first_count_timeout: float = 60.0, poll_interval: float = 0.2):
+        """
+        Args:
+            manager: MultiCameraManager con las cámaras ya agregadas
+            max_concurrent: Cámaras iniciándose a la vez
+            probe_timeout: Timeout del sondeo RTSP por cámara (s)
+            retry_interval: Espera inicial antes de reintentar una cámara (s)
+            max_retry_interval: Espera máxima entre reintentos (s)
+            first_count_timeout: Tiempo máximo que run() espera el primer frame contado (s)
+            poll_interval: Periodo de revisión de frames y reintentos (s)
+        """
+        self.manager = manager
+        self.max_concurrent = max(1, max_concurrent)
+        self.probe_timeout = probe_timeout
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.first_count_timeout = first_count_timeout
+        self.poll_interval = poll_interval
+
+        self._states: Dict[int, CameraStartup] = {}
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self._probe_s = 0.0
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Arranque inicial
+    # ------------------------------------------------------------------
+
+    def run(self, priorities: Optional[Dict[int, int]] = None, wait_first_count: bool = True) -> StartupReport:
+        """
+        Sondea e inicia todas las cámaras del gestor
+
+        Args:
+            priorities: {camera_id: prioridad}; menor valor = antes (default 0)
+            wait_first_count: Esperar (hasta first_count_timeout) el primer
+                              frame contado de las cámaras iniciadas
+
+        Returns:
+            StartupReport; las cámaras diferidas siguen reintentándose en
+            segundo plano hasta stop()
+        """
+        priorities = priorities or {}
+        self._t0 = time.monotonic()
+
+        with self.manager._cameras_lock:
+            uris = {camera_id: camera.rtsp_uri for camera_id, camera in self.manager.cameras.items()}
+        if not uris:
+            logger.warning("⚠️  No hay cámaras para iniciar")
+            return StartupReport(total=0, probe_s=0.0)
+
+        logger.info(f"\n{'='*70}")
+        logger.info(f"🔎 SONDEANDO {len(uris)} CÁMARAS RTSP (timeout {self.probe_timeout:g}s)")
+        logger.info(f"{'='*70}\n")
+
+        probes = probe_many(uris, timeout=self.probe_timeout)
+        probe_s = self._probe_s = time.monotonic() - self._t0
+
+        reachable = []
+        with self._lock:
+            for camera_id, result in probes.items():
+                state = CameraStartup(camera_id, priorities.get(camera_id, 0), probe=result)
+                self._states[camera_id] = state
+                if result.ok:
+                    reachable.append(state)
+                else:
+                    self._defer(state, f"{result.stage}: {result.error}")
+                    logger.warning(f"⏸️  [Cam {camera_id}] No responde ({state.error}); "
+                                   f"reintento en {self.retry_interval:.0f}s")
+
+        reachable.sort(key=lambda s: (s.priority, s.probe.latency_ms, s.camera_id))
+        logger.info(f"🔎 Sondeo: {len(reachable)}/{len(uris)} cámaras alcanzables en {probe_s:.1f}s")
+        logger.info(f"🚀 Iniciando {len(reachable)} cámaras (máx. {self.max_concurrent} a la vez)")
+
+        if reachable:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrent, len(reachable)),
+                                    thread_name_prefix="CameraStart") as executor:
+                list(executor.map(self._start, reachable))
+
+        self._start_background()
+
+        if wait_first_count:
+            deadline = time.monotonic() + self.first_count_timeout
+            while time.monotonic() < deadline and self._waiting_first_count():
+                if self._stop_event.wait(self.poll_interval):
+                    break
+
+        report = self.report()
+        self._log_report(report)
+        return report
+
+    def _start(self, state: CameraStartup) -> bool:
+        """Inicia una cámara (desde el pool o desde el thread de reintentos)"""
+        state.attempts += 1
+        try:
+            success = self.manager.start_camera(state.camera_id)
+            error = None if success else "start() falló"
+        except Exception as e:
+            success, error = False, str(e)
+
+        with self._lock:
+            if success:
+                state.started = True
+                state.started_at = time.monotonic() - self._t0
+                state.error = None
+                logger.info(f"✅ [Cam {state.camera_id}] Iniciada a los {state.started_at:.1f}s "
+                            f"(intento {state.attempts})")
+            else:
+                self._defer(state, error)
+                logger.error(f"❌ [Cam {state.camera_id}] No se pudo iniciar ({error}); "
+                             f"reintento en {state.next_retry - time.monotonic():.0f}s")
+        return success
+
+    def _defer(self, state: CameraStartup, error: str):
+        """Agenda el próximo reintento con backoff exponencial (con self._lock tomado)"""
+        delay = min(self.retry_interval * (2 ** max(0, state.attempts - 1)), self.max_retry_interval)
+        state.error = error
+        state.next_retry = time.monotonic() + delay
+
+    # ------------------------------------------------------------------
+    # Primer frame contado
+    # ------------------------------------------------------------------
+
+    def _frames(self, camera_id: int) -> int:
+        """Frames procesados por el probe (tabla compartida o métricas de la cámara)"""
+        stats = self.manager.get_camera_stats(camera_id)
+        if 'frames' in stats:
+            return stats['frames']
+        with self.manager._cameras_lock:
+            camera = self.manager.cameras.get(camera_id)
+        return camera.get_metrics().get('frames', 0) if camera is not None else 0
+
+    def _update_first_counts(self):
+        with self._lock:
+            pending = [s for s in self._states.values() if s.started and s.first_count_at is None]
+        for state in pending:
+            if self._frames(state.camera_id) > 0:
+                with self._lock:
+                    state.first_count_at = time.monotonic() - self._t0
+                logger.info(f"🔢 [Cam {state.camera_id}] Primer frame contado a los "
+                            f"{state.first_count_at:.1f}s")
+
+    def _waiting_first_count(self) -> bool:
+        with self._lock:
+            return any(s.started and s.first_count_at is None for s in self._states.values())
+
+    # ------------------------------------------------------------------
+    # Reintentos en segundo plano
+    # ------------------------------------------------------------------
+
+    def _retry_due(self):
+        now = time.monotonic()
+        with self.manager._cameras_lock:
+            present = set(self.manager.cameras)
+        with self._lock:
+            # Cámaras quitadas del gestor (p.ej. por FleetReconciler) se olvidan
+            for camera_id in [c for c in self._states if c not in present]:
+                del self._states[camera_id]
+            due = [s for s in self._states.values() if not s.started and s.next_retry <= now]
+
+        for state in due:
+            if self._stop_event.is_set():
+                return
+            with self.manager._cameras_lock:
+                camera = self.manager.cameras.get(state.camera_id)
+            if camera is None:
+                continue
+            result = probe_rtsp(camera.rtsp_uri, timeout=self.probe_timeout)
+            state.probe = result
+            if result.ok:
+                self._start(state)
+            else:
+                with self._lock:
+                    state.attempts += 1
+                    self._defer(state, f"{result.stage}: {result.error}")
+                logger.warning(f"⏸️  [Cam {state.camera_id}] Sigue sin responder ({state.error}); "
+                               f"reintento en {state.next_retry - time.monotonic():.0f}s")
+
+    def _start_background(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        def run():
+            while not self._stop_event.wait(self.poll_interval):
+                try:
+                    self._update_first_counts()
+                    self._retry_due()
+                except Exception as e:
+                    logger.error(f"❌ Error en reintentos de arranque: {e}", exc_info=True)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="StartupScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detiene los reintentos en segundo plano"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    # ------------------------------------------------------------------
+    # Reporte
+    # ------------------------------------------------------------------
+
+    def report(self) -> StartupReport:
+        """Estado actual del arranque"""
+        with self._lock:
+            states = list(self._states.values())
+        started = sorted(s.camera_id for s in states if s.started)
+        first_counts = {s.camera_id: s.first_count_at for s in states if s.first_count_at is not None}
+        fleet = (max(first_counts.values())
+                 if started and len(first_counts) == len(started) else None)
+        return StartupReport(
+            total=len(states),
+            probe_s=self._probe_s,
+            started=started,
+            deferred=sorted(s.camera_id for s in states if not s.started),
+            first_count_s=first_counts,
+            fleet_first_count_s=fleet,
+            elapsed_s=time.monotonic() - self._t0
+        )
+
+    def get_states(self) -> Dict[int, CameraStartup]:
+        """Copia del estado por cámara"""
+        with self._lock:
+            return {camera_id: CameraStartup(**vars(state)) for camera_id, state in self._states.items()}
+
+    @staticmethod
+    def _log_report(report: StartupReport):
+        logger.info(f"\n{'='*70}")
+        logger.info(f"✅ {len(report.started)}/{report.total} cámaras iniciadas "
+                    f"en {report.elapsed_s:.1f}s")
+        if report.fleet_first_count_s is not None:
+            logger.info(f"🔢 Flota contando a los {report.fleet_first_count_s:.1f}s "
+                        f"(primer frame de la última cámara iniciada)")
+        elif report.started:
+            logger.warning(f"⚠️  {len(report.started) - len(report.first_count_s)} cámaras "
+                           f"iniciadas aún sin frames contados")
+        if report.deferred:
+            logger.warning(f"⏸️  Cámaras en reintento: {report.deferred}")
+        logger.info(f"{'='*70}\n")
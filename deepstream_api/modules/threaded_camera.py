@@ -2,27 +2,37 @@
 Wrapper thread-safe para DeepStreamCamera
 Permite ejecutar múltiples cámaras en paralelo usando threading
 """
+import logging
 import threading
 import queue
-import time
 from typing import Dict, Optional
 import gi
 
 gi.require_version('Gst', '1.0')
 from gi.repository import GLib, Gst
 
+from .camera_metrics import empty_snapshot
+from .camera_profiles import resolve_profile
 from .deepstream_camera_sm import DeepStreamCameraServiceMaker
 
 
+logger = logging.getLogger(__name__)
+
+
 class ThreadedDeepStreamCamera:
     """
     Wrapper thread-safe para DeepStreamCamera
 
-    Cada cámara ejecuta en su propio thread con GLib.MainLoop dedicado
+    Cada cámara ejecuta en su propio thread con GLib.MainLoop dedicado;
+    el pipeline se arma según su CameraProfile (throughput, low-latency,
+    headless, record)
     """
 
     def __init__(self, camera_id: int, camera_name: str,
-                 rtsp_uri: str, line_config: dict, headless: bool = False):
+                 rtsp_uri: str, line_config: dict, headless: bool = False,
+                 event_publisher=None, counter_row=None, adaptive_interval=None,
+                 profile=None, recording: Optional[dict] = None,
+                 initial_counts: Optional[dict] = None):
         """
         Inicializa wrapper de cámara con threading
 
@@ -32,12 +42,26 @@ class ThreadedDeepStreamCamera:
             rtsp_uri: URI RTSP completa
             line_config: Configuración de línea de cruce
             headless: Si True, no muestra ventanas (solo terminal)
+            event_publisher: CrossingEventPublisher opcional para enviar cruces a la API
+            counter_row: CounterRow opcional de la tabla de contadores compartida
+            adaptive_interval: Opciones de AdaptiveInferenceInterval (None = interval fijo)
+            profile: Nombre o CameraProfile (None = throughput, o headless si headless=True)
+            recording: Opciones de RecordingBranch para grabar desde el arranque (None = sin grabar)
+            initial_counts: Contadores de partida si no hay CounterStore que restaurar
         """
         self.camera_id = camera_id
         self.camera_name = camera_name
         self.rtsp_uri = rtsp_uri
         self.line_config = line_config
+        self.profile = resolve_profile(profile, headless)
         self.headless = headless
+        self.event_publisher = event_publisher
+        self.counter_row = counter_row
+        self.adaptive_interval = adaptive_interval
+        self.initial_counts = initial_counts
+
+        # Grabación activa (se vuelve a enganchar si el pipeline se recrea)
+        self.recording = recording
 
         # Thread management
         self.thread: Optional[threading.Thread] = None
@@ -47,20 +71,16 @@ class ThreadedDeepStreamCamera:
         self.error_event = threading.Event()
         self.error_msg: Optional[str] = None
 
+        # Motivo de la última salida del pipeline (None mientras corre):
+        # 'stopped' (stop()), 'eos' (run() terminó solo) o 'error: ...'
+        self.exit_reason: Optional[str] = None
+
         # DeepStream instance (creado en el thread)
         self.deepstream_instance = None
 
         # Thread-local GLib context
         self._glib_context = None
 
-        # Métricas de rendimiento
-        self.metrics = {
-            'fps': 0.0,
-            'frame_count': 0,
-            'last_update': time.time()
-        }
-        self.metrics_lock = threading.Lock()
-
     def start(self) -> bool:
         """
         Inicia procesamiento de cámara en thread dedicado
@@ -69,9 +89,10 @@ class ThreadedDeepStreamCamera:
             True si se inició exitosamente
         """
         if self.thread and self.thread.is_alive():
-            print(f"⚠️  Camera {self.camera_id} ya está corriendo")
+            logger.warning(f"⚠️  Camera {self.camera_id} ya está corriendo")
             return False
 
+        self.exit_reason = None
         self.is_running.set()
         self.thread = threading.Thread(
             target=self._run_camera_thread,
@@ -81,14 +102,14 @@ class ThreadedDeepStreamCamera:
         self.thread.start()
 
         # Esperar a que el thread se inicialice (timeout 30s - suficiente para RTSP lento)
-        print(f"⏳ Esperando inicialización de cámara {self.camera_id}...")
+        logger.info(f"⏳ Esperando inicialización de cámara {self.camera_id}...")
         if not self.started.wait(timeout=30.0):
-            print(f"❌ Camera {self.camera_id} no se inició en 30 segundos")
+            logger.error(f"❌ Camera {self.camera_id} no se inició en 30 segundos")
             self.is_running.clear()
             return False
 
         if self.error_event.is_set():
-            print(f"❌ Camera {self.camera_id} error: {self.error_msg}")
+            logger.error(f"❌ Camera {self.camera_id} error: {self.error_msg}")
             return False
 
         return True
@@ -109,42 +130,60 @@ class ThreadedDeepStreamCamera:
             self._glib_context = GLib.MainContext.new()
             GLib.MainContext.push_thread_default(self._glib_context)
 
-            print(f"[Thread {self.camera_id}] Iniciando thread de cámara...")
+            logger.info(f"[Thread {self.camera_id}] Iniciando thread de cámara...")
 
             # Crear instancia DeepStream con Service Maker
-            mode_str = "HEADLESS (solo terminal)" if self.headless else "DISPLAY (con ventanas)"
-            print(f"[Thread {self.camera_id}] 📹 Creando instancia DeepStreamCameraServiceMaker [{mode_str}]...")
-            self.deepstream_instance = DeepStreamCameraServiceMaker(
-                camera_id=self.camera_id,
-                camera_name=self.camera_name,
-                rtsp_uri=self.rtsp_uri,
-                line_config=self.line_config,
-                headless=self.headless
-            )
+            self.deepstream_instance = self._create_deepstream_instance()
 
             # Señalar inicio exitoso antes de bloquear
             self.started.set()
-            print(f"[Thread {self.camera_id}] ✅ Pipeline creado exitosamente, iniciando...")
+            logger.info(f"[Thread {self.camera_id}] ✅ Pipeline creado exitosamente, iniciando...")
 
             # LLAMADA BLOQUEANTE - Service Maker maneja todo internamente
             # Esto ejecuta el pipeline hasta que se detenga
             self.deepstream_instance.run()
 
-            print(f"[Thread {self.camera_id}] Pipeline finalizado")
+            # run() retorna por stop(), fin del stream o un error del pipeline
+            if self.is_running.is_set():
+                error = getattr(self.deepstream_instance, 'exit_error', None)
+                self.exit_reason = f"error: {error}" if error else "eos"
+
+            logger.info(f"[Thread {self.camera_id}] Pipeline finalizado ({self.exit_reason})")
 
         except Exception as e:
             self.error_msg = str(e)
+            if self.exit_reason is None:
+                self.exit_reason = f"error: {e}"
             self.error_event.set()
             self.started.set()  # Desbloquear llamador de start()
-            print(f"❌ [Thread {self.camera_id}] Error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"❌ [Thread {self.camera_id}] Error: {e}", exc_info=True)
 
         finally:
             # Limpieza
             self._cleanup_thread()
             self.is_running.clear()
-            print(f"[Thread {self.camera_id}] Thread finalizando")
+            logger.info(f"[Thread {self.camera_id}] Thread finalizando")
+
+    def _create_deepstream_instance(self):
+        """
+        Crea la instancia DeepStream que ejecutará este thread
+        Las subclases (p.ej. pipeline compartido) sobreescriben este método
+        """
+        logger.info(f"[Thread {self.camera_id}] 📹 Creando instancia DeepStreamCameraServiceMaker "
+                    f"[perfil {self.profile.name}]...")
+        return DeepStreamCameraServiceMaker(
+            camera_id=self.camera_id,
+            camera_name=self.camera_name,
+            rtsp_uri=self.rtsp_uri,
+            line_config=self.line_config,
+            headless=self.headless,
+            event_publisher=self.event_publisher,
+            counter_row=self.counter_row,
+            adaptive_interval=self.adaptive_interval,
+            profile=self.profile,
+            recording=self.recording,
+            initial_counts=self.initial_counts
+        )
 
     def _check_commands(self) -> bool:
         """
@@ -157,33 +196,6 @@ class ThreadedDeepStreamCamera:
         """
         return True  # Placeholder
 
-    def _update_metrics(self) -> bool:
-        """
-        Actualiza métricas de rendimiento (FPS)
-        NOTA: Con Service Maker, las métricas se manejan en el operador LineCrossingCounter
-
-        Returns:
-            True para continuar actualizando
-        """
-        if not self.deepstream_instance:
-            return False
-
-        with self.metrics_lock:
-            now = time.time()
-            elapsed = now - self.metrics['last_update']
-
-            if elapsed >= 1.0:
-                # Service Maker maneja el frame_count internamente en LineCrossingCounter
-                # Aproximamos FPS basado en el frame_count del contador
-                if hasattr(self.deepstream_instance, 'counter'):
-                    frame_count = self.deepstream_instance.counter.frame_count
-                    self.metrics['fps'] = frame_count / elapsed if elapsed > 0 else 0.0
-                    # No podemos resetear porque no tenemos control directo
-
-                self.metrics['last_update'] = now
-
-        return True
-
     def stop(self, timeout: float = 8.0):
         """
         Detiene procesamiento de cámara gracefully
@@ -191,30 +203,38 @@ class ThreadedDeepStreamCamera:
         Args:
             timeout: Tiempo máximo de espera para detener el thread
         """
+        # Parada intencional: el supervisor no debe reiniciarla
+        self.exit_reason = "stopped"
+
         if not self.is_running.is_set() and not (self.thread and self.thread.is_alive()):
-            print(f"[Main] Cámara {self.camera_id} ya está detenida")
+            logger.info(f"[Main] Cámara {self.camera_id} ya está detenida")
             return
 
-        print(f"[Main] Deteniendo cámara {self.camera_id}...")
+        logger.info(f"[Main] Deteniendo cámara {self.camera_id}...")
 
         # Marcar como no running
         self.is_running.clear()
 
+        # Cerrar el segmento en curso antes de cortar el pipeline (la rama se
+        # vuelve a enganchar en el próximo arranque con self.recording)
+        if getattr(self.deepstream_instance, 'recording_branch', None) is not None:
+            self.deepstream_instance.stop_recording()
+
         # Detener el pipeline de Service Maker
         if self.deepstream_instance and hasattr(self.deepstream_instance, 'pipeline'):
             try:
                 # Acceder al pipeline interno de pyservicemaker y detenerlo
                 self.deepstream_instance.pipeline.pipeline.set_state(Gst.State.NULL)
             except Exception as e:
-                print(f"⚠️  Error deteniendo pipeline: {e}")
+                logger.warning(f"⚠️  Error deteniendo pipeline: {e}")
 
         # Esperar a que el thread finalice
         if self.thread:
             self.thread.join(timeout=timeout)
             if self.thread.is_alive():
-                print(f"⚠️  Thread de cámara {self.camera_id} no se detuvo en {timeout}s")
+                logger.warning(f"⚠️  Thread de cámara {self.camera_id} no se detuvo en {timeout}s")
             else:
-                print(f"✅ Cámara {self.camera_id} detenida correctamente")
+                logger.info(f"✅ Cámara {self.camera_id} detenida correctamente")
 
     def _cleanup_thread(self):
         """
@@ -239,7 +259,75 @@ class ThreadedDeepStreamCamera:
                     pass
 
         except Exception as e:
-            print(f"⚠️  Error durante limpieza: {e}")
+            logger.warning(f"⚠️  Error durante limpieza: {e}")
+
+    def update_line_config(self, line_config: dict) -> bool:
+        """
+        Cambia la línea de conteo sin reiniciar la cámara
+        Si el pipeline aún no existe, se usa al crearlo
+
+        Args:
+            line_config: dict con 'start', 'end', 'direccion_entrada'
+
+        Returns:
+            True si se aplicó (o quedó para el arranque)
+        """
+        self.line_config = line_config
+        if self.deepstream_instance is not None:
+            self.deepstream_instance.update_line_config(line_config)
+        return True
+
+    def start_recording(self, **options) -> bool:
+        """
+        Engancha la rama de grabación al pipeline en ejecución
+        Con la cámara detenida se engancha al crear el pipeline, que con
+        opciones de grabación siempre lleva el tee
+
+        Args:
+            **options: Opciones de RecordingBranch
+
+        Returns:
+            True si quedó grabando (o quedó para el arranque); False si el
+            pipeline en ejecución no tiene tee de grabación (perfil sin
+            `recordable`) o falló
+        """
+        self.recording = options
+        if self.deepstream_instance is None or not self.is_alive():
+            return True
+        if not self.deepstream_instance.can_record:
+            logger.info(f"ℹ️  Cámara {self.camera_id}: pipeline sin tee de grabación; "
+                        f"se graba al reconstruirlo")
+            return False
+        try:
+            self.deepstream_instance.start_recording(**options)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Cámara {self.camera_id}: {e}")
+            return False
+
+    def stop_recording(self) -> bool:
+        """
+        Desengancha la rama de grabación (el conteo sigue)
+
+        Returns:
+            True si el último segmento quedó cerrado
+        """
+        self.recording = None
+        if self.deepstream_instance is None or not self.is_alive():
+            return True
+        return self.deepstream_instance.stop_recording()
+
+    def request_clip(self, event_ts: Optional[float] = None, label: str = "cruce") -> Optional[str]:
+        """Clip alrededor de un evento; None si la cámara no graba"""
+        if self.deepstream_instance is None:
+            return None
+        return self.deepstream_instance.request_clip(event_ts, label)
+
+    def get_recording_stats(self) -> Optional[Dict]:
+        """Uso de disco y estado de la grabación; None si la cámara no graba"""
+        if self.deepstream_instance is None:
+            return None
+        return self.deepstream_instance.get_recording_stats()
 
     def get_stats(self) -> Dict:
         """
@@ -252,15 +340,26 @@ class ThreadedDeepStreamCamera:
             return self.deepstream_instance.counter.contadores.copy()
         return {'entradas': 0, 'salidas': 0, 'dentro': 0}
 
+    def get_metrics(self) -> Dict:
+        """
+        Obtiene snapshot consistente de las métricas del probe
+        (FPS, latencia de handle_metadata, objetos/frame, tracks, cruces)
+
+        Returns:
+            Diccionario de métricas
+        """
+        if self.deepstream_instance and hasattr(self.deepstream_instance, 'get_metrics'):
+            return self.deepstream_instance.get_metrics()
+        return empty_snapshot(self.camera_id)
+
     def get_fps(self) -> float:
         """
-        Obtiene FPS actual
+        Obtiene FPS actual (ventana de 1s calculada en el probe)
 
         Returns:
             FPS como float
         """
-        with self.metrics_lock:
-            return self.metrics['fps']
+        return self.get_metrics()['fps']
 
     def is_alive(self) -> bool:
         """
@@ -0,0 +1,186 @@
+"""
+Wrapper con threading para el pipeline DeepStream compartido
+Un solo thread ejecuta el pipeline batch de todas las cámaras;
+cada cámara se expone con la misma interfaz que ThreadedDeepStreamCamera
+"""
+import logging
+from typing import Dict, List, Optional
+
+from .camera_metrics import empty_snapshot
+from .deepstream_multi_source_sm import DeepStreamMultiSourceServiceMaker
+from .threaded_camera import ThreadedDeepStreamCamera
+
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadedSharedPipeline(ThreadedDeepStreamCamera):
+    """
+    Ejecuta DeepStreamMultiSourceServiceMaker en un thread dedicado
+
+    Reutiliza el ciclo de vida (start/stop/cleanup) de ThreadedDeepStreamCamera
+    """
+
+    def __init__(self, sources: List[dict], headless: bool = False,
+                 event_publisher=None, profile=None):
+        """
+        Inicializa el wrapper del pipeline compartido
+
+        Args:
+            sources: Lista de dicts con 'camera_id', 'camera_name', 'rtsp_uri', 'line_config'
+                     y 'counter_row' opcional
+            headless: Si True, no muestra ventanas (solo terminal)
+            event_publisher: CrossingEventPublisher opcional para enviar cruces a la API
+            profile: Nombre o CameraProfile del pipeline (tracker, sink, overlay)
+        """
+        super().__init__(
+            camera_id="shared",
+            camera_name="pipeline-compartido",
+            rtsp_uri=None,
+            line_config=None,
+            headless=headless,
+            event_publisher=event_publisher,
+            profile=profile
+        )
+        self.sources = list(sources)
+
+    def _create_deepstream_instance(self):
+        """Crea el pipeline batch con todas las cámaras"""
+        logger.info(f"[Thread {self.camera_id}] 📹 Creando pipeline compartido con "
+                    f"{len(self.sources)} cámaras [perfil {self.profile.name}]...")
+        return DeepStreamMultiSourceServiceMaker(
+            sources=self.sources,
+            headless=self.headless,
+            event_publisher=self.event_publisher,
+            profile=self.profile
+        )
+
+    def update_line_config(self, camera_id: int, line_config: dict) -> bool:
+        """
+        Cambia la línea de una cámara del batch sin detener el pipeline
+
+        Returns:
+            True si el pipeline está construido y contiene la cámara
+        """
+        if self.deepstream_instance is None:
+            return False
+        return self.deepstream_instance.update_line_config(camera_id, line_config)
+
+    def get_stats(self, camera_id: Optional[int] = None) -> Dict:
+        """
+        Obtiene estadísticas de una cámara del pipeline
+
+        Args:
+            camera_id: ID de la cámara
+
+        Returns:
+            Diccionario con contadores (copia read-only)
+        """
+        if self.deepstream_instance and camera_id is not None:
+            return self.deepstream_instance.get_counters(camera_id)
+        return {'entradas': 0, 'salidas': 0, 'dentro': 0}
+
+    def get_metrics(self, camera_id: Optional[int] = None) -> Dict:
+        """
+        Obtiene snapshot de métricas
+
+        Args:
+            camera_id: Cámara del batch; None = duración de batch del pipeline
+        """
+        if self.deepstream_instance:
+            return self.deepstream_instance.get_metrics(camera_id)
+        return empty_snapshot(camera_id if camera_id is not None else self.camera_id)
+
+    def get_fps(self, camera_id: Optional[int] = None) -> float:
+        """Obtiene FPS de una cámara del batch"""
+        return self.get_metrics(camera_id)['fps']
+
+
+class SharedSourceCamera:
+    """
+    Vista de una cámara dentro del pipeline compartido
+
+    Expone la interfaz de ThreadedDeepStreamCamera para que
+    MultiCameraManager trate ambos modos igual
+    """
+
+    def __init__(self, camera_id: int, camera_name: str,
+                 rtsp_uri: str, line_config: dict, counter_row=None):
+        """
+        Inicializa la vista de cámara
+
+        Args:
+            camera_id: ID de la cámara
+            camera_name: Nombre descriptivo
+            rtsp_uri: URI RTSP completa
+            line_config: Configuración de línea de cruce
+            counter_row: CounterRow opcional de la tabla de contadores compartida
+        """
+        self.camera_id = camera_id
+        self.camera_name = camera_name
+        self.rtsp_uri = rtsp_uri
+        self.line_config = line_config
+        self.counter_row = counter_row
+
+        # Pipeline compartido (asignado por MultiCameraManager al iniciar)
+        self.shared_pipeline: Optional[ThreadedSharedPipeline] = None
+
+    def as_source(self) -> dict:
+        """Retorna la descripción de la fuente para el pipeline batch"""
+        return {
+            'camera_id': self.camera_id,
+            'camera_name': self.camera_name,
+            'rtsp_uri': self.rtsp_uri,
+            'line_config': self.line_config,
+            'counter_row': self.counter_row
+        }
+
+    def start(self) -> bool:
+        """
+        Las cámaras del pipeline compartido se inician todas juntas
+
+        Returns:
+            True si el pipeline compartido está corriendo
+        """
+        if self.shared_pipeline is None:
+            logger.warning(f"⚠️  Cámara {self.camera_id} pertenece al pipeline compartido: "
+                           f"use start_all_cameras()")
+            return False
+        return self.shared_pipeline.is_alive()
+
+    def stop(self, timeout: float = 8.0):
+        """El pipeline compartido solo se detiene completo (stop_all_cameras)"""
+        logger.warning(f"⚠️  Cámara {self.camera_id} pertenece al pipeline compartido: "
+                       f"use stop_all_cameras()")
+
+    def update_line_config(self, line_config: dict) -> bool:
+        """
+        Cambia la línea de conteo sin detener el pipeline compartido
+
+        Returns:
+            True si se aplicó (o quedó para el arranque)
+        """
+        self.line_config = line_config
+        if self.shared_pipeline is None:
+            return True
+        return self.shared_pipeline.update_line_config(self.camera_id, line_config)
+
+    def get_stats(self) -> Dict:
+        """Obtiene contadores de esta cámara"""
+        if self.shared_pipeline is None:
+            return {'entradas': 0, 'salidas': 0, 'dentro': 0}
+        return self.shared_pipeline.get_stats(self.camera_id)
+
+    def get_metrics(self) -> Dict:
+        """Obtiene snapshot de métricas de esta cámara"""
+        if self.shared_pipeline is None:
+            return empty_snapshot(self.camera_id)
+        return self.shared_pipeline.get_metrics(self.camera_id)
+
+    def get_fps(self) -> float:
+        """Obtiene FPS de esta cámara dentro del pipeline compartido"""
+        return self.get_metrics()['fps']
+
+    def is_alive(self) -> bool:
+        """Verifica si el pipeline compartido está corriendo"""
+        return self.shared_pipeline is not None and self.shared_pipeline.is_alive()
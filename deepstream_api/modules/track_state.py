@@ -0,0 +1,171 @@
+"""
+Almacén acotado del estado de los tracks para LineCrossingCounter
+Tabla de slots respaldada por arrays paralelos (NumPy) con expiración por TTL
+"""
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+
+class TrackStateStore:
+    """
+    Estado por track (posición previa, último frame visto, si cruzó)
+
+    - Capacidad fija: los arrays se reservan una vez y no crecen
+    - Un track que el tracker no reporta en `ttl_frames` frames se expulsa
+    - Si la tabla se llena, se expulsa el track visto hace más tiempo
+    - El barrido de expiración es vectorizado y se ejecuta cada
+      `sweep_interval` frames (coste amortizado)
+    """
+
+    def __init__(self, capacity: int = 2048, ttl_frames: int = 150,
+                 sweep_interval: int = 30):
+        """
+        Inicializa el almacén
+
+        Args:
+            capacity: Número máximo de tracks simultáneos
+            ttl_frames: Frames sin ver un track antes de expulsarlo
+            sweep_interval: Cada cuántos frames buscar tracks expirados
+        """
+        if capacity <= 0:
+            raise ValueError("capacity debe ser > 0")
+
+        self.capacity = capacity
+        self.ttl_frames = ttl_frames
+        self.sweep_interval = max(1, sweep_interval)
+
+        # Arrays paralelos indexados por slot
+        self.prev_x = np.zeros(capacity, dtype=np.int32)
+        self.prev_y = np.zeros(capacity, dtype=np.int32)
+        self.last_seen_frame = np.zeros(capacity, dtype=np.int64)
+        self.crossed = np.zeros(capacity, dtype=bool)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.track_ids = np.zeros(capacity, dtype=np.uint64)
+
+        # track_id -> slot, y pila de slots libres
+        self._slots: Dict[int, int] = {}
+        self._free = list(range(capacity - 1, -1, -1))
+
+        self._last_sweep_frame = 0
+
+        # Contadores de expulsión
+        self.evicted_ttl = 0
+        self.evicted_capacity = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def lookup(self, track_ids: Sequence[int], frame_index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Resuelve los slots de los tracks de un frame (crea los nuevos)
+
+        Marca todos los tracks como vistos en frame_index
+
+        Args:
+            track_ids: object_id del tracker
+            frame_index: Índice del frame actual de la cámara
+
+        Returns:
+            (slots, is_new): arrays alineados con track_ids
+        """
+        count = len(track_ids)
+        slots = np.empty(count, dtype=np.intp)
+        is_new = np.zeros(count, dtype=bool)
+
+        slot_map = self._slots
+        for i, track_id in enumerate(track_ids):
+            slot = slot_map.get(track_id)
+            if slot is None:
+                if not self._free:
+                    # Proteger de la expulsión los tracks ya resueltos en este frame
+                    self.last_seen_frame[slots[:i]] = frame_index
+                slot = self._allocate(track_id, frame_index)
+                is_new[i] = True
+            slots[i] = slot
+
+        self.last_seen_frame[slots] = frame_index
+        return slots, is_new
+
+    def update_positions(self, slots: np.ndarray, xs: np.ndarray, ys: np.ndarray):
+        """Guarda la posición actual como posición previa de cada slot"""
+        self.prev_x[slots] = xs
+        self.prev_y[slots] = ys
+
+    def prev_positions(self, slots: np.ndarray) -> np.ndarray:
+        """Retorna (N, 2) con las posiciones previas de los slots"""
+        return np.column_stack((self.prev_x[slots], self.prev_y[slots]))
+
+    def mark_crossed(self, slots: np.ndarray):
+        """Marca que los tracks de esos slots cruzaron la línea"""
+        self.crossed[slots] = True
+
+    def sweep(self, frame_index: int) -> int:
+        """
+        Expulsa tracks expirados si toca barrido en este frame
+
+        Args:
+            frame_index: Índice del frame actual de la cámara
+
+        Returns:
+            Número de tracks expulsados
+        """
+        if frame_index - self._last_sweep_frame < self.sweep_interval:
+            return 0
+        self._last_sweep_frame = frame_index
+        return self.evict_expired(frame_index)
+
+    def evict_expired(self, frame_index: int) -> int:
+        """
+        Expulsa todos los tracks no vistos en los últimos ttl_frames
+
+        Returns:
+            Número de tracks expulsados
+        """
+        expired = self.active & (self.last_seen_frame < frame_index - self.ttl_frames)
+        expired_slots = np.flatnonzero(expired)
+        for slot in expired_slots:
+            self._release(int(slot))
+        self.evicted_ttl += len(expired_slots)
+        return len(expired_slots)
+
+    def clear(self):
+        """Olvida todos los tracks (p.ej. al reiniciar el pipeline)"""
+        self._slots.clear()
+        self._free = list(range(self.capacity - 1, -1, -1))
+        self.active[:] = False
+        self.crossed[:] = False
+
+    def stats(self) -> Dict:
+        """Retorna tamaño y contadores de expulsión"""
+        return {
+            'size': len(self._slots),
+            'capacity': self.capacity,
+            'ttl_frames': self.ttl_frames,
+            'evicted_ttl': self.evicted_ttl,
+            'evicted_capacity': self.evicted_capacity,
+        }
+
+    def _allocate(self, track_id: int, frame_index: int) -> int:
+        """Reserva un slot para un track nuevo"""
+        if not self._free:
+            # Primero intentar liberar expirados; si no, expulsar el más antiguo
+            if self.evict_expired(frame_index) == 0:
+                active_slots = np.flatnonzero(self.active)
+                oldest = int(active_slots[np.argmin(self.last_seen_frame[active_slots])])
+                self._release(oldest)
+                self.evicted_capacity += 1
+
+        slot = self._free.pop()
+        self._slots[track_id] = slot
+        self.track_ids[slot] = track_id
+        self.active[slot] = True
+        self.crossed[slot] = False
+        return slot
+
+    def _release(self, slot: int):
+        """Libera un slot"""
+        del self._slots[int(self.track_ids[slot])]
+        self.active[slot] = False
+        self.crossed[slot] = False
+        self._free.append(slot)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Monitor de contadores en vivo
+Se adjunta a la tabla de contadores compartida de un sistema en ejecución
+(main.py / main_headless.py) y la imprime periódicamente, sin tocar las cámaras
+"""
+import sys
+import glob
+import time
+import argparse
+
+from modules.shared_counters import DEFAULT_TABLE_NAME, SharedCounterTable
+
+
+def find_table_name():
+    """Busca la tabla de un gestor en ejecución (/dev/shm/deepstream_counters_<pid>)"""
+    candidates = sorted(glob.glob(f"/dev/shm/{DEFAULT_TABLE_NAME}_*"))
+    if not candidates:
+        return None
+    return candidates[-1].rsplit('/', 1)[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monitor de contadores en memoria compartida')
+    parser.add_argument('--name', help='Nombre de la tabla (default: la del gestor en ejecución)')
+    parser.add_argument('--interval', type=float, default=1.0, help='Segundos entre lecturas')
+    parser.add_argument('--once', action='store_true', help='Imprimir una sola vez y salir')
+    args = parser.parse_args()
+
+    name = args.name or find_table_name()
+    if name is None:
+        print("❌ No se encontró ninguna tabla de contadores (¿está corriendo el sistema?)")
+        return 1
+
+    try:
+        table = SharedCounterTable.attach(name)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ No se pudo adjuntar a '{name}': {e}")
+        return 1
+
+    print(f"🧮 Tabla: {name} ({table.capacity} filas)")
+    try:
+        while True:
+            now = time.time()
+            print(f"\n{'Cámara':>8}{'Entradas':>10}{'Salidas':>10}{'Dentro':>8}{'Frames':>10}{'Hace (s)':>10}")
+            for camera_id, row in sorted(table.snapshot().items()):
+                print(f"{camera_id:>8}{row['entradas']:>10}{row['salidas']:>10}{row['dentro']:>8}"
+                      f"{row['frames']:>10}{now - row['last_update']:>10.1f}")
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        table.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""
+Pruebas de deepstream_api sin GPU ni GStreamer
+
+Los módulos se cargan con benchmarks.synthetic_meta.load_probe_module (sin
+ejecutar modules/__init__.py, que importa gi); los stubs y servidores falsos
+son los mismos de los benchmarks
+
+Uso (desde la raíz del repositorio):
+    python3 -m pytest deepstream_api/tests -q
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,138 @@
+"""
+Pruebas de CameraAPIClient contra el stub local de la API
+
+Consultas condicionales (304) y respaldo con la última lista válida (memoria
+y disco) cuando la API cae
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_api_client.py -q
+"""
+import json
+
+import pytest
+import requests
+
+from benchmarks.stub_api_server import StubAPIServer, DEFAULT_CAMERAS
+from benchmarks.synthetic_meta import load_probe_module
+
+
+api_client = load_probe_module('api_client')
+
+
+def make_cameras(count):
+    base = DEFAULT_CAMERAS[0]
+    return [dict(base, id=i, cam_nombre=f"Stub {i}") for i in range(1, count + 1)]
+
+
+@pytest.fixture
+def server():
+    stub = StubAPIServer(cameras=make_cameras(3)).start()
+    yield stub
+    stub.outage = None
+    stub.stop()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'camaras.json')
+
+
+def make_client(server, cache_path):
+    return api_client.CameraAPIClient(server.url, timeout=(0.5, 1.0), max_retries=1,
+                                      backoff_base=0.01, backoff_max=0.02, cache_path=cache_path)
+
+
+def test_repeated_fetch_is_conditional(server, cache_path):
+    client = make_client(server, cache_path)
+    try:
+        cameras, changed = client.fetch()
+        assert changed and len(cameras) == 3
+
+        again, changed = client.fetch()
+        assert not changed
+        assert again == cameras
+        assert server.camaras_not_modified == 1
+        stats = client.get_stats()
+        assert stats['downloaded'] == 1
+        assert stats['not_modified'] == 1
+    finally:
+        client.stop()
+
+
+def test_changed_list_is_downloaded_again(server, cache_path):
+    client = make_client(server, cache_path)
+    try:
+        client.fetch()
+        server.set_cameras(make_cameras(4))
+        cameras, changed = client.fetch()
+        assert changed and len(cameras) == 4
+        assert client.get_stats()['downloaded'] == 2
+        with open(cache_path) as f:
+            assert len(json.load(f)['data']) == 4
+    finally:
+        client.stop()
+
+
+def test_outage_falls_back_to_last_list_in_memory(server, cache_path):
+    client = make_client(server, cache_path)
+    try:
+        cameras = client.get_cameras()
+        server.outage = '503'
+        assert client.get_cameras() == cameras
+        assert client.get_stats()['retries'] >= 1
+    finally:
+        client.stop()
+
+
+def test_outage_falls_back_to_disk_cache_in_a_new_process(server, cache_path):
+    first = make_client(server, cache_path)
+    try:
+        cameras = first.get_cameras()
+    finally:
+        first.stop()
+
+    server.outage = 'reset'
+    client = make_client(server, cache_path)
+    try:
+        assert client.get_cameras() == cameras
+        assert client.get_stats()['cache_loads'] == 1
+    finally:
+        client.stop()
+
+
+def test_prefer_cache_does_not_wait_for_the_api(server, cache_path):
+    first = make_client(server, cache_path)
+    try:
+        cameras = first.get_cameras()
+    finally:
+        first.stop()
+
+    server.outage = 'hang'
+    requests_before = server.camaras_requests
+    client = make_client(server, cache_path)
+    try:
+        assert client.get_cameras(prefer_cache=True) == cameras
+        assert server.camaras_requests == requests_before
+    finally:
+        client.stop()
+
+
+def test_outage_without_cache_raises(server):
+    server.outage = '503'
+    client = make_client(server, None)
+    try:
+        with pytest.raises((requests.exceptions.RequestException, api_client.CameraAPIError)):
+            client.get_cameras()
+    finally:
+        client.stop()
+
+
+def test_unreadable_cache_is_ignored(server, cache_path):
+    with open(cache_path, 'w') as f:
+        f.write('{no es json')
+    client = make_client(server, cache_path)
+    try:
+        assert client.load_cache() is None
+        assert len(client.get_cameras(prefer_cache=True)) == 3
+    finally:
+        client.stop()
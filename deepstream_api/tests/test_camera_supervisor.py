@@ -0,0 +1,103 @@
+"""
+Pruebas del supervisor de cámaras (modules/camera_supervisor.py) con un gestor falso
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_camera_supervisor.py -q
+"""
+import threading
+import time
+
+import pytest
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+camera_supervisor = load_probe_module('camera_supervisor')
+rtsp_probe = load_probe_module('rtsp_probe')
+
+
+class FakeCamera:
+    def __init__(self, camera_id, alive=True):
+        self.camera_id = camera_id
+        self.camera_name = f"cam{camera_id}"
+        self.rtsp_uri = "rtsp://127.0.0.1:1/stream"
+        self.line_config = {}
+        self.alive = alive
+        self.exit_reason = None
+        self.frames = 0
+
+    def is_alive(self):
+        return self.alive
+
+    def get_metrics(self):
+        self.frames += 1
+        return {'frames': self.frames}
+
+
+class FakeManager:
+    def __init__(self):
+        self._cameras_lock = threading.Lock()
+        self.cameras = {}
+        self.restarted = threading.Event()
+
+    def stop_camera(self, camera_id, timeout=5.0):
+        pass
+
+    def restart_camera(self, camera_id, camera_name, rtsp_uri, line_config, expected=None):
+        with self._cameras_lock:
+            self.cameras[camera_id] = FakeCamera(camera_id)
+        self.restarted.set()
+        return True
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    monkeypatch.setattr(camera_supervisor, 'probe_rtsp',
+                        lambda uri, timeout: rtsp_probe.ProbeResult(ok=True, stage='ok', latency_ms=0.0))
+    manager = FakeManager()
+    # interval largo: las revisiones las hace el test con check()
+    sup = camera_supervisor.CameraSupervisor(manager, interval=3600, base_delay=0.0)
+    yield sup
+    sup.stop()
+
+
+def crash_and_check(sup, camera_id):
+    """La cámara corre, cae y el supervisor agenda su reinicio"""
+    manager = sup.manager
+    manager.restarted.clear()
+    camera = FakeCamera(camera_id)
+    with manager._cameras_lock:
+        manager.cameras[camera_id] = camera
+    sup.check()
+    camera.alive, camera.exit_reason = False, "eos"
+    sup.check()
+    assert manager.restarted.wait(2.0)
+    deadline = time.monotonic() + 2.0
+    while sup._health[camera_id].restarting and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_restart_after_supervisor_restart(supervisor):
+    supervisor.start()
+    crash_and_check(supervisor, 1)
+    assert supervisor.get_stats()[1]['restarts'] == 1
+
+    # stop() cierra el pool; start() debe dejar uno nuevo
+    supervisor.stop()
+    supervisor.start()
+    crash_and_check(supervisor, 2)
+    health = supervisor._health[2]
+    assert health.restarts == 1
+    assert not health.restarting
+
+
+def test_no_restart_scheduled_while_stopped(supervisor):
+    manager = supervisor.manager
+    camera = FakeCamera(1)
+    manager.cameras[1] = camera
+    supervisor.check()
+    camera.alive, camera.exit_reason = False, "eos"
+    supervisor.check()
+    # Sin pool no se agenda nada ni queda marcada como reiniciando
+    assert not supervisor._health[1].restarting
+    assert not manager.restarted.is_set()
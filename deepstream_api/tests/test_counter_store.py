@@ -0,0 +1,121 @@
+"""
+Pruebas de la persistencia de contadores (modules/counter_store.py)
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_counter_store.py -q
+"""
+import os
+
+import pytest
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+counter_store = load_probe_module('counter_store')
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    stores = []
+
+    def open_(camera_id=1):
+        # Thread casi inactivo: los flush/snapshot los dispara el test
+        store = counter_store.CounterStore(camera_id, str(tmp_path), flush_interval=3600,
+                                           snapshot_interval=3600)
+        restored = store.restore()
+        store.start()
+        stores.append(store)
+        return store, restored
+
+    yield open_
+    for store in stores:
+        store.close()
+
+
+def crossings(store, start, count):
+    """Registra `count` entradas a partir de `start` (dentro == entradas)"""
+    for n in range(start + 1, start + count + 1):
+        store.record(1, n, 0, n)
+
+
+def test_restore_from_log(open_store):
+    store, restored = open_store()
+    assert restored == {'entradas': 0, 'salidas': 0, 'dentro': 0}
+    crossings(store, 0, 5)
+    store._flush()
+    store._wal.close()
+    store._wal = None  # caída: sin snapshot final
+
+    _, restored = open_store()
+    assert restored == {'entradas': 5, 'salidas': 0, 'dentro': 5}
+
+
+def test_restore_discards_torn_last_record(open_store):
+    store, _ = open_store()
+    crossings(store, 0, 3)
+    store._flush()
+    store._wal.close()
+    store._wal = None
+
+    # Escritura cortada a mitad del cuarto registro
+    record = counter_store._pack_with_crc(counter_store.WAL_RECORD, 4, 0.0, 1, 4, 0, 4)
+    with open(store.wal_path, 'ab') as f:
+        f.write(record[:counter_store.WAL_RECORD_SIZE // 2])
+
+    reopened, restored = open_store()
+    assert restored == {'entradas': 3, 'salidas': 0, 'dentro': 3}
+    assert reopened.get_stats()['discarded_bytes'] == counter_store.WAL_RECORD_SIZE // 2
+    # El log quedó alineado: los registros nuevos se recuperan
+    assert os.path.getsize(reopened.wal_path) == 3 * counter_store.WAL_RECORD_SIZE
+    crossings(reopened, 3, 2)
+    reopened._flush()
+    reopened._wal.close()
+    reopened._wal = None
+
+    _, restored = open_store()
+    assert restored == {'entradas': 5, 'salidas': 0, 'dentro': 5}
+
+
+def test_restore_ignores_corrupt_crc(open_store):
+    store, _ = open_store()
+    crossings(store, 0, 2)
+    store._flush()
+    store._wal.close()
+    store._wal = None
+
+    with open(store.wal_path, 'r+b') as f:
+        f.seek(counter_store.WAL_RECORD_SIZE + 10)
+        f.write(b'\xff')
+
+    _, restored = open_store()
+    assert restored == {'entradas': 1, 'salidas': 0, 'dentro': 1}
+
+
+def test_snapshot_with_pending_records_truncates_log(open_store):
+    store, _ = open_store()
+    crossings(store, 0, 10)
+    store._flush()
+    # Con cruces constantes siempre hay registros en el buffer al hacer el snapshot
+    crossings(store, 10, 3)
+    store._snapshot()
+
+    assert store.get_stats()['snapshots'] == 1
+    assert os.path.getsize(store.wal_path) == 0
+
+    store._flush()
+    assert os.path.getsize(store.wal_path) == 3 * counter_store.WAL_RECORD_SIZE
+    store._wal.close()
+    store._wal = None
+
+    _, restored = open_store()
+    assert restored == {'entradas': 13, 'salidas': 0, 'dentro': 13}
+
+
+def test_close_leaves_snapshot_and_empty_log(open_store):
+    store, _ = open_store()
+    crossings(store, 0, 4)
+    store.close()
+    assert os.path.getsize(store.wal_path) == 0
+
+    _, restored = open_store()
+    assert restored == {'entradas': 4, 'salidas': 0, 'dentro': 4}
@@ -0,0 +1,73 @@
+"""
+Pruebas del publicador de eventos (modules/event_publisher.py) sin red
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_event_publisher.py -q
+"""
+import threading
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+event_publisher = load_probe_module('event_publisher')
+line_crossing_detector = load_probe_module('line_crossing_detector')
+
+
+class SlowSession:
+    """Sesión que retiene cada POST hasta `release` y registra el cierre"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.posting = threading.Event()
+        self.closed = threading.Event()
+        self.posted = 0
+
+    def post(self, url, json, timeout):
+        self.posting.set()
+        self.release.wait(5.0)
+        assert not self.closed.is_set(), "sesión cerrada con un envío en curso"
+        self.posted += len(json['eventos'])
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        self.closed.set()
+
+
+def make_publisher():
+    publisher = event_publisher.CrossingEventPublisher("http://api.invalid", flush_interval=0.01)
+    publisher._session = SlowSession()
+    return publisher
+
+
+def test_stop_timeout_leaves_session_to_worker():
+    publisher = make_publisher()
+    session = publisher._session
+    publisher.start()
+    thread = publisher._thread
+    publisher.publish(1, 7, line_crossing_detector.CRUCE_ENTRADA, 1, 0, 1)
+    assert session.posting.wait(2.0)
+
+    publisher.stop(timeout=0.05)
+    assert thread.is_alive()
+    assert not session.closed.is_set()
+
+    session.release.set()
+    thread.join(2.0)
+    assert not thread.is_alive()
+    assert session.closed.is_set()
+    assert publisher.get_stats()['sent'] == 1
+
+
+def test_stop_closes_session_after_draining():
+    publisher = make_publisher()
+    session = publisher._session
+    session.release.set()
+    publisher.start()
+    for track_id in range(5):
+        publisher.publish(1, track_id, line_crossing_detector.CRUCE_SALIDA, 0, track_id + 1, 0)
+    publisher.stop(timeout=2.0)
+    assert session.closed.is_set()
+    assert session.posted == 5
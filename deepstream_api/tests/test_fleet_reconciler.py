@@ -0,0 +1,167 @@
+"""
+Clasificación de cambios de FleetReconciler (modules/fleet_reconciler.py)
+con un gestor y una configuración falsos
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_fleet_reconciler.py -q
+"""
+import threading
+
+import pytest
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+fleet_reconciler = load_probe_module('fleet_reconciler')
+
+
+class FakeManager:
+    """Registra las llamadas del reconciliador"""
+
+    def __init__(self):
+        self.shutdown_event = threading.Event()
+        self.shared_pipeline = False
+        self._shared = None
+        self.cameras = {}
+        self.calls = []
+        self.fail_restart = False
+
+    def add_camera(self, camera_id, camera_name, rtsp_uri, line_config):
+        self.calls.append(('add', camera_id))
+        self.cameras[camera_id] = rtsp_uri
+        return True
+
+    def start_camera(self, camera_id):
+        self.calls.append(('start', camera_id))
+        return True
+
+    def stop_camera(self, camera_id, timeout=5.0):
+        self.calls.append(('stop', camera_id))
+
+    def remove_camera(self, camera_id):
+        self.calls.append(('remove', camera_id))
+        del self.cameras[camera_id]
+        return True
+
+    def restart_camera(self, camera_id, camera_name, rtsp_uri, line_config, timeout=5.0):
+        self.calls.append(('restart', camera_id))
+        if self.fail_restart:
+            return False
+        self.cameras[camera_id] = rtsp_uri
+        return True
+
+    def update_line_config(self, camera_id, line_config):
+        self.calls.append(('line', camera_id))
+        return True
+
+
+class FakeConfig:
+    """Línea derivada de cam_coordenadas (sin archivos locales)"""
+
+    def __init__(self):
+        self.saved = []
+
+    def get_line_config(self, camera_id, coordinates):
+        x = coordinates or 640
+        return {'start': [x, 0], 'end': [x, 720], 'direccion_entrada': 'izquierda'}
+
+    def get_camera_metadata(self, camera_data):
+        return {'nombre': camera_data.get('cam_nombre')}
+
+    def save_cameras_metadata(self, batch):
+        self.saved.extend(camera_id for camera_id, _ in batch)
+
+
+def camera(camera_id, **changes):
+    data = {
+        'id': camera_id,
+        'cam_nombre': f"Cámara {camera_id}",
+        'cam_ip': f"10.0.0.{camera_id}",
+        'cam_port': 554,
+        'cam_user': 'admin',
+        'cam_password': 'admin',
+        'cam_rstp': 'Streaming/Channels/1',
+        'cam_coordenadas': 640,
+        'zonas_id': 1,
+    }
+    data.update(changes)
+    return data
+
+
+@pytest.fixture
+def fleet():
+    manager = FakeManager()
+    reconciler = fleet_reconciler.FleetReconciler(manager, FakeConfig())
+    result = reconciler.reconcile([camera(1), camera(2), camera(3)])
+    assert sorted(result.added) == [1, 2, 3]
+    manager.calls.clear()
+    return reconciler, manager
+
+
+def test_unchanged_list_touches_nothing(fleet):
+    reconciler, manager = fleet
+    result = reconciler.reconcile([camera(1), camera(2), camera(3)])
+    assert result.changes == 0
+    assert manager.calls == []
+
+
+def test_added_and_removed(fleet):
+    reconciler, manager = fleet
+    result = reconciler.reconcile([camera(1), camera(2), camera(4)])
+    assert result.added == [4]
+    assert result.removed == [3]
+    assert result.restarted == result.updated == []
+    assert ('remove', 3) in manager.calls and ('add', 4) in manager.calls
+    assert set(reconciler.specs) == {1, 2, 4}
+
+
+@pytest.mark.parametrize('field, value', [
+    ('cam_ip', '10.0.9.9'),
+    ('cam_port', 8554),
+    ('cam_password', 'otra'),
+    ('cam_rstp', 'Streaming/Channels/2'),
+])
+def test_pipeline_change_restarts_only_that_camera(fleet, field, value):
+    reconciler, manager = fleet
+    result = reconciler.reconcile([camera(1), camera(2, **{field: value}), camera(3)])
+    assert result.restarted == [2]
+    assert result.added == result.removed == result.updated == []
+    assert manager.calls == [('restart', 2)]
+
+
+def test_line_change_is_applied_hot(fleet):
+    reconciler, manager = fleet
+    result = reconciler.reconcile([camera(1), camera(2, cam_coordenadas=700), camera(3)])
+    assert result.updated == [2]
+    assert result.restarted == []
+    assert manager.calls == [('line', 2)]
+    assert reconciler.specs[2].line_config['start'] == [700, 0]
+
+
+@pytest.mark.parametrize('field, value', [('cam_nombre', 'Entrada norte'), ('zonas_id', 7)])
+def test_metadata_change_only_updates(fleet, field, value):
+    reconciler, manager = fleet
+    result = reconciler.reconcile([camera(1), camera(2), camera(3, **{field: value})])
+    assert result.updated == [3]
+    assert manager.calls == []
+    assert reconciler.config_manager.saved[-1] == 3
+
+
+def test_failed_restart_is_retried(fleet):
+    reconciler, manager = fleet
+    manager.fail_restart = True
+    cameras = [camera(1), camera(2, cam_ip='10.0.9.9'), camera(3)]
+    assert reconciler.reconcile(cameras).failed == [2]
+
+    # Misma lista (la API respondería 304): la cámara pendiente se reintenta
+    manager.fail_restart = False
+    result = reconciler.reconcile(cameras)
+    assert result.restarted == [2]
+    assert reconciler.reconcile(cameras).changes == 0
+
+
+def test_invalid_camera_is_not_added(fleet):
+    reconciler, manager = fleet
+    result = reconciler.reconcile([camera(1), camera(2), camera(3), camera(5, cam_ip='')])
+    assert result.failed == [5]
+    assert 5 not in manager.cameras
@@ -0,0 +1,98 @@
+"""
+Pruebas del intervalo de inferencia adaptativo (modules/inference_interval.py)
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_inference_interval.py -q
+"""
+import math
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+inference_interval = load_probe_module('inference_interval')
+line_crossing_detector = load_probe_module('line_crossing_detector')
+
+
+def make_controller(**options):
+    changes = []
+    options.setdefault('calm_frames', 3)
+    controller = inference_interval.AdaptiveInferenceInterval(on_change=changes.append, **options)
+    return controller, changes
+
+
+@pytest.mark.parametrize('frames_to_band, expected', [
+    (math.inf, 8),      # nadie se acerca
+    (0.0, 2),           # ya en la franja: nunca por debajo de min_interval
+    (5.0, 2),           # 5 / 2 - 1 = 1 -> min_interval
+    (10.0, 4),          # 10 / 2 - 1 = 4
+    (11.9, 4),          # se redondea hacia abajo
+    (1000.0, 8),        # lejos: tope max_interval
+])
+def test_interval_for(frames_to_band, expected):
+    controller, _ = make_controller()
+    assert controller._interval_for(frames_to_band) == expected
+
+
+def test_interval_for_with_min_zero():
+    controller, _ = make_controller(min_interval=0, safety=1.0)
+    assert controller._interval_for(0.5) == 0
+    assert controller._interval_for(4.0) == 3
+
+
+def test_starts_at_min_interval():
+    controller, _ = make_controller()
+    assert controller.interval == 2
+
+
+def test_lowering_is_immediate_raising_needs_calm_frames():
+    controller, changes = make_controller()
+    controller._update(8)
+    controller._update(8)
+    assert controller.interval == 2
+    controller._update(8)
+    assert controller.interval == 8
+
+    controller._update(3)
+    assert controller.interval == 3
+    assert changes == [2, 8, 3]
+
+
+def test_calm_streak_resets_on_equal_or_lower_target():
+    controller, _ = make_controller()
+    controller._update(8)
+    controller._update(8)
+    controller._update(2)       # vuelve a pedir el actual: la racha se corta
+    controller._update(8)
+    controller._update(8)
+    assert controller.interval == 2
+    controller._update(8)
+    assert controller.interval == 8
+
+
+def test_observe_uses_distance_to_line():
+    detector = line_crossing_detector.LineCrossingDetector((500, 0), (500, 1000))
+    controller, _ = make_controller(calm_frames=1)
+    controller.observe_empty()
+    assert controller.interval == 8
+
+    # Alguien dentro de la franja near_px
+    controller.observe(detector, np.array([[550.0, 300.0]]))
+    assert controller.interval == 2
+
+    # Lejos y alejándose
+    controller.observe(detector, np.array([[100.0, 300.0]]), known=np.array([True]),
+                       prev_centroids=np.array([[110.0, 300.0]]))
+    assert controller.interval == 8
+
+
+def test_stats_report_savings():
+    controller, _ = make_controller(calm_frames=1)
+    for _ in range(10):
+        controller.observe_empty()
+    stats = controller.stats()
+    assert stats['infer_interval'] == 8
+    assert 0.0 < stats['infer_ratio'] < 1.0 / 3
+    assert stats['infer_saved_vs_fixed_pct'] > 0
@@ -0,0 +1,112 @@
+"""
+Paridad de cruces_batch con punto_cruza_linea (modules/line_crossing_detector.py)
+
+Cubre el camino escalar (< CRUCES_BATCH_MIN_OBJECTS) y el vectorizado, las
+dos direcciones de entrada y puntos exactamente sobre la línea
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_line_crossing_detector.py -q
+"""
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+line_crossing_detector = load_probe_module('line_crossing_detector')
+LineCrossingDetector = line_crossing_detector.LineCrossingDetector
+
+CODIGOS = {
+    None: line_crossing_detector.CRUCE_NINGUNO,
+    "ENTRADA": line_crossing_detector.CRUCE_ENTRADA,
+    "SALIDA": line_crossing_detector.CRUCE_SALIDA,
+}
+
+LINES = [
+    ((640, 0), (640, 720)),      # vertical
+    ((100, 50), (700, 650)),     # diagonal
+    ((0, 360), (1280, 360)),     # horizontal
+]
+
+
+def movements(line, n, seed):
+    """
+    n movimientos (prev, actual) en coordenadas de medio píxel (exactas en float64)
+
+    Un tercio cruza la línea (en ambos sentidos) y algunos empiezan o terminan
+    justo sobre ella
+    """
+    rng = np.random.default_rng(seed)
+    (sx, sy), (ex, ey) = line
+    prev = rng.integers(0, 2560, size=(n, 2)) / 2.0
+    curr = prev + rng.integers(-400, 401, size=(n, 2)) / 2.0
+
+    def on_line(t):
+        """Punto start + t * (end - start) (t en octavos: exacto)"""
+        return sx + t * (ex - sx), sy + t * (ey - sy)
+
+    # Normal entera de la recta: de un lado a otro sin redondeos
+    dx, dy = ex - sx, ey - sy
+    g = np.gcd(dx, dy)
+    normal = np.array([-dy // g, dx // g], dtype=np.float64)
+    for i in range(3, n, 3):
+        base = np.array(on_line(rng.integers(0, 9) / 8.0))
+        sign = 1 if rng.integers(0, 2) else -1
+        prev[i] = base + sign * rng.integers(1, 40) * normal
+        curr[i] = base - sign * rng.integers(1, 40) * normal
+
+    for i in range(0, n, 5):
+        curr[i] = on_line(rng.integers(0, 9) / 8.0)
+    for i in range(1, n, 7):
+        prev[i] = on_line(rng.integers(0, 9) / 8.0)
+    for i in range(2, n, 11):
+        prev[i] = curr[i] = on_line(rng.integers(0, 9) / 8.0)
+    return prev, curr
+
+
+def expected_codes(detector, prev, curr):
+    return np.array([CODIGOS[detector.punto_cruza_linea(x, y, px, py)]
+                     for (px, py), (x, y) in zip(prev.tolist(), curr.tolist())], dtype=np.int8)
+
+
+@pytest.mark.parametrize('direccion', ['izquierda', 'derecha'])
+@pytest.mark.parametrize('line', LINES)
+@pytest.mark.parametrize('n', [1, 5, line_crossing_detector.CRUCES_BATCH_MIN_OBJECTS - 1,
+                               line_crossing_detector.CRUCES_BATCH_MIN_OBJECTS, 200])
+def test_batch_matches_scalar(direccion, line, n):
+    detector = LineCrossingDetector(*line, direccion_entrada=direccion)
+    for seed in range(5):
+        prev, curr = movements(line, n, seed)
+        codes = detector.cruces_batch(prev, curr)
+        assert codes.dtype == np.int8
+        np.testing.assert_array_equal(codes, expected_codes(detector, prev, curr))
+
+
+@pytest.mark.parametrize('direccion', ['izquierda', 'derecha'])
+@pytest.mark.parametrize('n', [2, 40])
+def test_points_on_the_line_do_not_cross(direccion, n):
+    detector = LineCrossingDetector((640, 0), (640, 720), direccion_entrada=direccion)
+    prev = np.column_stack([np.full(n, 600.0), np.linspace(0, 720, n)])
+    on_line = np.column_stack([np.full(n, 640.0), np.linspace(0, 720, n)])
+    # Llegar a la línea o salir de ella no es un cruce (el siguiente frame lo decide)
+    assert not detector.cruces_batch(prev, on_line).any()
+    assert not detector.cruces_batch(on_line, prev).any()
+
+
+@pytest.mark.parametrize('n', [3, 30])
+def test_direction_flips_codes(n):
+    left = np.column_stack([np.full(n, 600.0), np.arange(n, dtype=np.float64)])
+    right = np.column_stack([np.full(n, 680.0), np.arange(n, dtype=np.float64)])
+    izquierda = LineCrossingDetector((640, 0), (640, 720), direccion_entrada='izquierda')
+    derecha = LineCrossingDetector((640, 0), (640, 720), direccion_entrada='derecha')
+
+    codes = izquierda.cruces_batch(left, right)
+    assert (codes == CODIGOS[izquierda.punto_cruza_linea(680, 0, 600, 0)]).all()
+    np.testing.assert_array_equal(derecha.cruces_batch(left, right), izquierda.cruces_batch(right, left))
+
+
+def test_without_line_returns_no_crossings():
+    detector = LineCrossingDetector()
+    prev, curr = movements(LINES[0], 30, 0)
+    assert not detector.cruces_batch(prev, curr).any()
+    assert len(detector.cruces_batch(np.empty((0, 2)), np.empty((0, 2)))) == 0
@@ -0,0 +1,126 @@
+"""
+Pruebas del autotuner (modules/pipeline_autotuner.py)
+
+Frente de Pareto, elección de perfiles, filtro por acuerdo en cruces y
+archivo de perfiles; el barrido usa un backend con resultados fijos
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_pipeline_autotuner.py -q
+"""
+
+import pytest
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+autotuner = load_probe_module('pipeline_autotuner')
+camera_profiles = load_probe_module('camera_profiles')
+
+
+def trial(name, fps, p95, agreement=1.0):
+    return autotuner.TrialResult(params={'name': name}, fps=fps, latency_p50_ms=p95 / 2,
+                                 latency_p95_ms=p95, agreement=agreement, crossing_errors=0)
+
+
+def names(results):
+    return [result.params['name'] for result in results]
+
+
+def test_dominates():
+    fast = trial('fast', 100, 20)
+    slow = trial('slow', 50, 30)
+    assert autotuner.dominates(fast, slow)
+    assert not autotuner.dominates(slow, fast)
+    assert not autotuner.dominates(fast, fast)
+    # Mejor en fps pero peor en acuerdo: ninguno domina
+    sloppy = trial('sloppy', 120, 20, agreement=0.9)
+    assert not autotuner.dominates(sloppy, fast)
+    assert not autotuner.dominates(fast, sloppy)
+
+
+def test_pareto_front_keeps_only_non_dominated_points():
+    results = [
+        trial('throughput', 120, 40),
+        trial('latency', 60, 10),
+        trial('balanced', 100, 15),
+        trial('dominated', 90, 20),
+        trial('worst', 50, 50),
+    ]
+    front = autotuner.pareto_front(results)
+    assert names(front) == ['throughput', 'balanced', 'latency']
+
+
+def test_select_profiles():
+    front = autotuner.pareto_front([
+        trial('throughput', 120, 40),
+        trial('latency', 60, 10),
+        trial('balanced', 100, 15),
+    ])
+    selected = autotuner.select_profiles(front)
+    assert {role: result.params['name'] for role, result in selected.items()} == {
+        'throughput': 'throughput', 'latency': 'latency', 'balanced': 'balanced'}
+    assert autotuner.select_profiles([]) == {}
+
+
+class TableBackend:
+    """Backend con resultados fijos por interval: (fps, latencia, entradas)"""
+    name = 'table'
+
+    def __init__(self, table):
+        self.table = table
+
+    def run_clip(self, clip, profile):
+        fps, latency_ms, entradas = self.table[profile.infer_interval]
+        frames = 300
+        return autotuner.ClipRun(frames=frames, elapsed_s=frames / fps,
+                                 latencies_ms=[latency_ms] * frames, entradas=entradas, salidas=0)
+
+
+def test_run_excludes_points_below_min_agreement():
+    backend = TableBackend({
+        0: (30.0, 30.0, 10),    # referencia
+        1: (60.0, 20.0, 10),
+        4: (150.0, 10.0, 5),    # más rápido, pero pierde la mitad de los cruces
+    })
+    clip = autotuner.Clip(name='entrada', uri='file:///clip.mp4',
+                          line_config={'start': [960, 0], 'end': [960, 1080]})
+    space = autotuner.ParameterSpace({'interval': [0, 1, 4]})
+    tuner = autotuner.PipelineAutotuner(backend, [clip], space, min_agreement=0.95)
+    report = tuner.run()
+
+    assert len(report.results) == 3
+    assert [result.params['interval'] for result in report.front] == [1]
+    assert report.selected['throughput'].params == {'interval': 1}
+    assert {result.params['interval']: result.agreement for result in report.results} == {0: 1.0, 1: 1.0, 4: 0.5}
+
+
+def test_default_space_does_not_sweep_batch_size():
+    assert 'batch_size' not in autotuner.DEFAULT_SPACE
+    # Sigue siendo un parámetro válido con un espacio explícito
+    assert autotuner.ParameterSpace({'batch_size': [1, 2]}).size == 2
+
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(ValueError):
+        autotuner.ParameterSpace({'batch': [1]})
+    with pytest.raises(ValueError):
+        autotuner.ParameterSpace({'tracker': ['deepsort']})
+
+
+def test_tuned_profiles_round_trip(tmp_path):
+    front = [trial('unused', 100, 15)]
+    front[0].params = {'interval': 2, 'tracker': 'iou', 'mux_resolution': '1280x720'}
+    report = autotuner.TuningReport(results=front, front=front, selected={'balanced': front[0]},
+                                    base_profile='headless', backend='table', clips=['entrada'],
+                                    min_agreement=0.95, elapsed_s=0.0)
+    path = str(tmp_path / 'tuned_profiles.json')
+    report.write_profiles(path)
+
+    (profile,) = camera_profiles.load_profiles(path, register=False)
+    assert profile.name == 'tuned-balanced'
+    assert profile.infer_interval == 2
+    assert profile.tracker_label == 'IOU'
+    assert profile.mux_size() == (1280, 720)
+    # La descripción describe el perfil ajustado, no la de la base
+    assert 'NvDCF' not in profile.description
+    assert 'tracker IOU' in profile.description
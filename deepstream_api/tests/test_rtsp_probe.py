@@ -0,0 +1,142 @@
+"""
+Pruebas del sondeo RTSP (modules/rtsp_probe.py) contra la cámara falsa
+
+Cada caso de campo debe fallar en su etapa: tcp, options, describe o auth
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_rtsp_probe.py -q
+"""
+import time
+
+import pytest
+
+from benchmarks.fake_rtsp_server import FakeRTSPServer
+from benchmarks.bench_startup import closed_port
+from benchmarks.synthetic_meta import load_probe_module
+
+
+rtsp_probe = load_probe_module('rtsp_probe')
+
+
+@pytest.fixture
+def camera():
+    servers = []
+
+    def start(mode):
+        server = FakeRTSPServer(mode=mode).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def test_healthy_camera(camera):
+    result = rtsp_probe.probe_rtsp(camera('ok').uri(), timeout=1.0)
+    assert result.ok
+    assert result.stage == 'ok'
+    assert result.status == 200
+
+
+def test_options_only(camera):
+    server = camera('404')
+    result = rtsp_probe.probe_rtsp(server.uri(), timeout=1.0, describe=False)
+    assert result.ok
+    assert server.requests == 1
+
+
+def test_digest_auth_with_valid_credentials(camera):
+    result = rtsp_probe.probe_rtsp(camera('auth').uri(), timeout=1.0)
+    assert result.ok
+    assert result.stage == 'ok'
+
+
+def test_digest_auth_without_credentials(camera):
+    result = rtsp_probe.probe_rtsp(camera('auth').uri(with_credentials=False), timeout=1.0)
+    assert not result.ok
+    assert result.stage == 'auth'
+    assert result.status == 401
+
+
+def test_digest_auth_with_wrong_password(camera):
+    server = camera('auth')
+    uri = server.uri(with_credentials=False).replace('rtsp://', f"rtsp://{server.user}:incorrecta@")
+    result = rtsp_probe.probe_rtsp(uri, timeout=1.0)
+    assert not result.ok
+    assert result.stage == 'auth'
+    assert result.error == "credenciales rechazadas"
+
+
+def test_digest_auth_with_qop(camera):
+    result = rtsp_probe.probe_rtsp(camera('auth-qop').uri(), timeout=1.0)
+    assert result.ok
+    assert result.stage == 'ok'
+
+
+def test_digest_auth_with_qop_and_wrong_password(camera):
+    server = camera('auth-qop')
+    uri = server.uri(with_credentials=False).replace('rtsp://', f"rtsp://{server.user}:incorrecta@")
+    result = rtsp_probe.probe_rtsp(uri, timeout=1.0)
+    assert not result.ok
+    assert result.error == "credenciales rechazadas"
+
+
+def test_digest_qop_header():
+    challenge = 'Digest realm="r", nonce="n", qop="auth,auth-int", opaque="o"'
+    header = rtsp_probe._authorization(challenge, 'DESCRIBE', 'rtsp://h/s', 'u', 'p')
+    params = rtsp_probe._challenge_params(header)
+    assert params['qop'] == 'auth'
+    assert params['nc'] == '00000001'
+    assert params['opaque'] == 'o'
+    assert len(params['cnonce']) == 16
+
+
+def test_unsupported_digest_challenge():
+    assert rtsp_probe._authorization('Digest realm="r", nonce="n", qop="auth-int"',
+                                     'DESCRIBE', 'rtsp://h/s', 'u', 'p') is None
+    assert rtsp_probe._authorization('Digest realm="r", nonce="n", algorithm=SHA-256',
+                                     'DESCRIBE', 'rtsp://h/s', 'u', 'p') is None
+
+
+def test_wrong_path(camera):
+    result = rtsp_probe.probe_rtsp(camera('404').uri(), timeout=1.0)
+    assert not result.ok
+    assert result.stage == 'describe'
+    assert result.status == 404
+
+
+def test_saturated_camera(camera):
+    result = rtsp_probe.probe_rtsp(camera('503').uri(), timeout=1.0)
+    assert not result.ok
+    assert result.stage == 'options'
+    assert result.status == 503
+
+
+def test_camera_off():
+    result = rtsp_probe.probe_rtsp(f"rtsp://127.0.0.1:{closed_port()}/stream", timeout=1.0)
+    assert not result.ok
+    assert result.stage == 'tcp'
+
+
+def test_hanging_camera_times_out(camera):
+    t0 = time.monotonic()
+    result = rtsp_probe.probe_rtsp(camera('hang').uri(), timeout=0.3)
+    assert not result.ok
+    assert result.stage == 'options'
+    assert time.monotonic() - t0 < 2.0
+
+
+def test_non_rtsp_uri_is_skipped():
+    result = rtsp_probe.probe_rtsp('file:///app/clips/entrada.mp4')
+    assert result.ok
+    assert result.stage == 'skip'
+
+
+def test_probe_many_survives_a_burst_of_connections(camera):
+    server = camera('ok')
+    uris = {i: server.uri(f"cam{i}") for i in range(1, 33)}
+    results = rtsp_probe.probe_many(uris, timeout=2.0, concurrency=32)
+    assert sorted(results) == sorted(uris)
+    assert all(result.ok for result in results.values()), \
+        {i: (r.stage, r.error) for i, r in results.items() if not r.ok}
@@ -0,0 +1,192 @@
+"""
+Pruebas del índice de segmentos (modules/segment_store.py): cuota, recuperación
+tras una caída y exportación de clips
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_segment_store.py -q
+"""
+import os
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+segment_store = load_probe_module('segment_store')
+SegmentStore = segment_store.SegmentStore
+
+T0 = 1_700_000_000.0
+SEGMENT_S = 10.0
+SEGMENT_BYTES = 1000
+
+
+def record(store, index, size=SEGMENT_BYTES, close=True):
+    """Segmento `index` de SEGMENT_S segundos a partir de T0 (como splitmuxsink)"""
+    start = T0 + index * SEGMENT_S
+    path = os.path.join(store.directory, SegmentStore.segment_name(index, start))
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    store.segment_opened(path)
+    if close:
+        return path, store.segment_closed(path, end_ts=start + SEGMENT_S)
+    return path, []
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    stores = []
+
+    def open_(quota=10 * SEGMENT_BYTES, clip_quota=10 * SEGMENT_BYTES):
+        store = SegmentStore(str(tmp_path / 'camera_1'), quota, clip_quota)
+        stores.append(store)
+        return store
+
+    yield open_
+    for store in stores:
+        try:
+            store.close()
+        except sqlite3.ProgrammingError:
+            pass
+
+
+def segment_files(store):
+    return sorted(name for name in os.listdir(store.directory) if name.startswith('seg_'))
+
+
+# ----------------------------------------------------------------------
+# Cuota
+# ----------------------------------------------------------------------
+
+def test_quota_rotates_oldest_segments(open_store):
+    store = open_store(quota=int(2.5 * SEGMENT_BYTES))
+    paths = [record(store, i)[0] for i in range(4)]
+    assert segment_files(store) == sorted(os.path.basename(p) for p in paths[2:])
+    usage = store.usage()
+    assert usage['segments'] == 2
+    assert usage['segment_bytes'] == 2 * SEGMENT_BYTES
+    assert usage['oldest_ts'] == T0 + 2 * SEGMENT_S
+
+
+def test_quota_never_removes_the_open_segment(open_store):
+    store = open_store(quota=SEGMENT_BYTES)
+    record(store, 0)
+    open_path, _ = record(store, 1, size=5 * SEGMENT_BYTES, close=False)
+    record(store, 2)
+    assert os.path.exists(open_path)
+    assert store.usage()['segments'] == 1
+
+
+# ----------------------------------------------------------------------
+# Clips
+# ----------------------------------------------------------------------
+
+def test_clip_links_covering_segments_with_trim(open_store):
+    store = open_store()
+    for i in range(3):
+        record(store, i)
+    # Evento a los 15 s: [12, 18] cae entero en el segundo segmento
+    clip_id = store.request_clip(T0 + 15.0, pre_s=3.0, post_s=3.0, label='cruce')
+    clip_dir = os.path.join(store.clips_dir, clip_id)
+
+    with open(os.path.join(clip_dir, 'playlist.ffconcat')) as f:
+        playlist = f.read().splitlines()
+    name = SegmentStore.segment_name(1, T0 + SEGMENT_S)
+    assert playlist == ["ffconcat version 1.0", f"file '{name}'", "inpoint 2.000", "outpoint 8.000"]
+    # Enlace duro: sin copiar datos
+    assert os.stat(os.path.join(clip_dir, name)).st_nlink == 2
+    assert store.clips()[0]['clip_id'] == clip_id
+
+
+def test_clip_spanning_segments(open_store):
+    store = open_store()
+    for i in range(3):
+        record(store, i)
+    clip_id = store.request_clip(T0 + 10.0, pre_s=5.0, post_s=15.0)
+    files = sorted(f for f in os.listdir(os.path.join(store.clips_dir, clip_id)) if f.startswith('seg_'))
+    assert len(files) == 3
+    assert store.clips()[0]['bytes'] == 3 * SEGMENT_BYTES
+
+
+def test_pending_clip_exports_when_post_roll_closes(open_store):
+    store = open_store()
+    record(store, 0)
+    clip_id = store.request_clip(T0 + 8.0, pre_s=2.0, post_s=5.0)
+    assert store.usage()['pending_clips'] == 1
+    assert not os.path.exists(os.path.join(store.clips_dir, clip_id))
+
+    _, exported = record(store, 1)
+    assert exported == [clip_id]
+    assert store.usage()['pending_clips'] == 0
+
+
+def test_clip_survives_segment_rotation(open_store):
+    store = open_store(quota=2 * SEGMENT_BYTES)
+    record(store, 0)
+    record(store, 1)
+    clip_id = store.request_clip(T0 + 5.0, pre_s=1.0, post_s=1.0)
+    for i in range(2, 5):
+        record(store, i)
+    name = SegmentStore.segment_name(0, T0)
+    assert name not in segment_files(store)
+    assert os.path.getsize(os.path.join(store.clips_dir, clip_id, name)) == SEGMENT_BYTES
+
+
+def test_clip_quota_drops_oldest_clips(open_store):
+    store = open_store(clip_quota=int(1.5 * SEGMENT_BYTES))
+    for i in range(3):
+        record(store, i)
+    first = store.request_clip(T0 + 5.0, pre_s=1.0, post_s=1.0, label='a')
+    second = store.request_clip(T0 + 25.0, pre_s=1.0, post_s=1.0, label='b')
+    assert [clip['clip_id'] for clip in store.clips()] == [second]
+    assert not os.path.exists(os.path.join(store.clips_dir, first))
+
+
+def test_clip_without_segments_is_not_exported(open_store):
+    store = open_store()
+    record(store, 0)
+    clip_id = store.request_clip(T0 - 100.0, pre_s=1.0, post_s=1.0)
+    assert store.clips() == []
+    assert not os.path.exists(os.path.join(store.clips_dir, clip_id))
+
+
+# ----------------------------------------------------------------------
+# Recuperación
+# ----------------------------------------------------------------------
+
+def test_recover_after_crash(open_store, tmp_path):
+    store = open_store()
+    record(store, 0)
+    gone, _ = record(store, 1)
+    clip_id = store.request_clip(T0 + 5.0, pre_s=1.0, post_s=1.0)
+    open_path, _ = record(store, 2, close=False)   # abierto al caer
+    store._conn.close()                             # caída: sin close()
+
+    os.remove(gone)                                 # fila sin archivo
+    orphan = os.path.join(store.directory, SegmentStore.segment_name(3, T0 + 3 * SEGMENT_S))
+    with open(orphan, 'wb') as f:                   # archivo sin fila
+        f.write(b'\0' * SEGMENT_BYTES)
+    with sqlite3.connect(os.path.join(store.directory, segment_store.SEGMENT_DB_NAME)) as conn:
+        conn.execute("DELETE FROM clips")           # clip en disco sin fila
+
+    recovered = open_store()
+    names = {segment.name for segment in recovered.segments_between(T0, T0 + 100)}
+    assert names == {SegmentStore.segment_name(0, T0), os.path.basename(open_path), os.path.basename(orphan)}
+    assert all(segment.complete for segment in recovered.segments_between(T0, T0 + 100))
+    assert [clip['clip_id'] for clip in recovered.clips()] == [clip_id]
+    assert recovered.usage()['segments'] == 3
+
+
+def test_recover_rebuilds_a_lost_index(open_store):
+    store = open_store()
+    for i in range(3):
+        record(store, i)
+    store.close()
+    for suffix in ('', '-wal', '-shm'):
+        path = os.path.join(store.directory, segment_store.SEGMENT_DB_NAME + suffix)
+        if os.path.exists(path):
+            os.remove(path)
+
+    recovered = open_store()
+    segments = recovered.segments_between(T0, T0 + 100)
+    assert [segment.start_ts for segment in segments] == [T0 + i * SEGMENT_S for i in range(3)]
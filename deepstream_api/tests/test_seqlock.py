@@ -0,0 +1,186 @@
+"""
+Lecturas por seqlock de CameraMetrics (modules/camera_metrics.py) y
+SharedCounterTable (modules/shared_counters.py) con un escritor concurrente
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_seqlock.py -q
+"""
+import sys
+import threading
+import time
+import uuid
+
+import pytest
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+camera_metrics = load_probe_module('camera_metrics')
+shared_counters = load_probe_module('shared_counters')
+
+READS = 2000
+
+
+@pytest.fixture
+def preemptive():
+    """Cambio de thread cada pocos µs: el lector cae a menudo en mitad de una escritura"""
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(previous)
+
+
+def run_writer(write):
+    """Escritor en otro thread hasta que el test termina de leer"""
+    stop = threading.Event()
+
+    def loop():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            write(n)
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return stop, thread
+
+
+# ----------------------------------------------------------------------
+# CameraMetrics
+# ----------------------------------------------------------------------
+
+def test_metrics_snapshot_is_consistent_under_writes(preemptive):
+    metrics = camera_metrics.CameraMetrics(1)
+    # Invariantes por frame: 3 objetos y 1 cruce
+    stop, thread = run_writer(lambda n: metrics.record_frame(objects=3, tracked=3, crossings=1))
+    try:
+        for _ in range(READS):
+            snapshot = metrics.snapshot()
+            assert snapshot['crossings'] == snapshot['frames']
+            if snapshot['frames']:
+                assert snapshot['objects_per_frame'] == 3.0
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_metrics_reader_waits_for_the_writer():
+    metrics = camera_metrics.CameraMetrics(1)
+    metrics.record_frame(objects=3, tracked=3, crossings=1)
+
+    # record_frame a mitad: frames ya incrementado, crossings todavía no
+    metrics._seq += 1
+    metrics.frames += 1
+    results = []
+    reader = threading.Thread(target=lambda: results.append(metrics.snapshot(max_retries=10 ** 7)))
+    reader.start()
+    time.sleep(0.05)
+    assert reader.is_alive()  # sigue reintentando
+
+    metrics.crossings += 1
+    metrics.objects_total += 3
+    metrics._seq += 1
+    reader.join(2.0)
+    assert results[0]['frames'] == results[0]['crossings'] == 2
+
+
+def test_metrics_snapshot_gives_up_on_a_stuck_writer():
+    metrics = camera_metrics.CameraMetrics(1)
+    metrics.record_frame(objects=1, tracked=1, crossings=0)
+    metrics._seq += 1  # escritor detenido a mitad de una escritura
+    snapshot = metrics.snapshot(max_retries=3)
+    assert snapshot['frames'] == 1
+
+
+def test_empty_snapshot_has_no_fps():
+    snapshot = camera_metrics.empty_snapshot(7)
+    assert snapshot['name'] == 7
+    assert snapshot['frames'] == 0
+    assert snapshot['fps'] == 0.0
+
+
+# ----------------------------------------------------------------------
+# SharedCounterTable
+# ----------------------------------------------------------------------
+
+@pytest.fixture
+def table():
+    table = shared_counters.SharedCounterTable(name=f"test_counters_{uuid.uuid4().hex[:12]}",
+                                               capacity=4)
+    yield table
+    table.close()
+
+
+def test_table_read_is_consistent_under_writes(table, preemptive):
+    row = table.register(10)
+    # Invariante: entradas == salidas == frames en cada escritura
+    stop, thread = run_writer(lambda n: row.write(n, n, 0, n))
+    try:
+        for _ in range(READS):
+            stats = table.read(10)
+            assert stats['entradas'] == stats['salidas'] == stats['frames']
+    finally:
+        stop.set()
+        thread.join()
+    assert table.read_failures == 0
+
+
+def test_table_reader_waits_for_the_writer(table):
+    row = table.register(10)
+    row.write(1, 1, 0, 1)
+    offset = shared_counters.HEADER_SIZE + row.slot * shared_counters.ROW_SIZE
+
+    # Escritura a mitad: seq impar y cuerpo a medio actualizar
+    shared_counters.ROW_SEQ.pack_into(table.buf, offset, row._seq + 1)
+    shared_counters.ROW_BODY.pack_into(table.buf, offset + shared_counters.ROW_BODY_OFFSET,
+                                       10, 2, 1, 0, 1, 0.0)
+    results = []
+    reader = threading.Thread(target=lambda: results.append(table.read(10)))
+    reader.start()
+    time.sleep(0.05)
+    assert reader.is_alive()  # sigue reintentando
+
+    shared_counters.ROW_BODY.pack_into(table.buf, offset + shared_counters.ROW_BODY_OFFSET,
+                                       10, 2, 2, 0, 2, 0.0)
+    shared_counters.ROW_SEQ.pack_into(table.buf, offset, row._seq + 2)
+    reader.join(2.0)
+    assert results[0]['entradas'] == results[0]['salidas'] == results[0]['frames'] == 2
+
+
+def test_table_read_fails_on_a_stuck_row(table):
+    row = table.register(10)
+    row.write(1, 0, 1, 5)
+    offset = shared_counters.HEADER_SIZE + row.slot * shared_counters.ROW_SIZE
+    shared_counters.ROW_SEQ.pack_into(table.buf, offset, row._seq + 1)  # escritor muerto
+
+    assert table.read_slot(row.slot, max_retries=5) is None
+    assert table.read_failures == 1
+    assert 10 not in table.snapshot()
+
+    # Un escritor nuevo sobre la misma fila la recupera
+    table.row(row.slot, 10).write(2, 0, 2, 6)
+    assert table.read(10)['entradas'] == 2
+
+
+def test_register_reuses_the_row_and_release_empties_it(table):
+    row = table.register(10)
+    row.write(4, 1, 3, 100)
+    again = table.register(10)
+    assert again.slot == row.slot
+    assert table.read(10)['entradas'] == 4   # reutilizar no pone la fila a cero
+
+    table.register(11)
+    assert set(table.snapshot()) == {10, 11}
+    table.release(10)
+    assert set(table.snapshot()) == {11}
+    assert table.read(10) is None
+
+
+def test_attached_reader_sees_the_owner_rows(table):
+    table.register(10).write(7, 2, 5, 50)
+    reader = shared_counters.SharedCounterTable.attach(table.name)
+    try:
+        assert reader.capacity == table.capacity
+        assert reader.snapshot()[10]['dentro'] == 5
+    finally:
+        reader.close()
@@ -0,0 +1,97 @@
+"""
+Pruebas del almacén de estado de tracks (modules/track_state.py)
+
+Uso:
+    python3 -m pytest deepstream_api/tests/test_track_state.py -q
+"""
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_meta import load_probe_module
+
+
+track_state = load_probe_module('track_state')
+TrackStateStore = track_state.TrackStateStore
+
+
+def test_lookup_creates_then_reuses_slots():
+    store = TrackStateStore(capacity=8)
+    slots, is_new = store.lookup([10, 11], frame_index=1)
+    assert is_new.tolist() == [True, True]
+    again, is_new = store.lookup([11, 10, 12], frame_index=2)
+    assert is_new.tolist() == [False, False, True]
+    assert again[:2].tolist() == [slots[1], slots[0]]
+    assert len(store) == 3
+
+
+def test_positions_and_crossed_follow_the_slot():
+    store = TrackStateStore(capacity=4)
+    slots, _ = store.lookup([1, 2], frame_index=0)
+    store.update_positions(slots, np.array([10, 20]), np.array([30, 40]))
+    store.mark_crossed(slots[1:])
+    np.testing.assert_array_equal(store.prev_positions(slots), [[10, 30], [20, 40]])
+    assert store.crossed[slots].tolist() == [False, True]
+
+
+def test_ttl_eviction_on_sweep():
+    store = TrackStateStore(capacity=8, ttl_frames=10, sweep_interval=5)
+    store.lookup([1, 2], frame_index=0)
+    for frame in range(1, 12):
+        store.lookup([2], frame_index=frame)
+        store.sweep(frame)
+    # El track 1 no se ve desde el frame 0: expira tras el frame 10, pero el
+    # barrido (cada 5 frames, el último en el 10) no vuelve a tocar hasta el 15
+    assert store.sweep(11) == 0
+    assert len(store) == 2
+    assert store.sweep(15) == 1
+    assert 1 not in store._slots and 2 in store._slots
+    assert store.stats()['evicted_ttl'] == 1
+
+
+def test_evicted_slot_is_reused_clean():
+    store = TrackStateStore(capacity=2, ttl_frames=5, sweep_interval=1)
+    slots, _ = store.lookup([1], frame_index=0)
+    store.mark_crossed(slots)
+    store.lookup([2], frame_index=10)
+    assert store.sweep(10) == 1
+
+    new_slots, is_new = store.lookup([3], frame_index=11)
+    assert is_new.tolist() == [True]
+    assert new_slots[0] == slots[0]          # el slot liberado se reutiliza
+    assert not store.crossed[new_slots[0]]   # sin el estado del track anterior
+    assert int(store.track_ids[new_slots[0]]) == 3
+
+
+def test_full_table_evicts_expired_first():
+    store = TrackStateStore(capacity=2, ttl_frames=5, sweep_interval=1000)
+    store.lookup([1], frame_index=0)
+    store.lookup([2], frame_index=8)
+    store.lookup([3], frame_index=9)
+    assert set(store._slots) == {2, 3}
+    assert store.stats()['evicted_ttl'] == 1
+    assert store.stats()['evicted_capacity'] == 0
+
+
+def test_full_table_evicts_oldest_but_not_current_frame():
+    store = TrackStateStore(capacity=3, ttl_frames=100)
+    store.lookup([1], frame_index=0)
+    store.lookup([2], frame_index=1)
+    store.lookup([3], frame_index=2)
+    # 1 y 3 vuelven a verse en el frame 5: el nuevo 4 expulsa al 2 (el más antiguo)
+    store.lookup([1, 3, 4], frame_index=5)
+    assert set(store._slots) == {1, 3, 4}
+    assert store.stats()['evicted_capacity'] == 1
+
+
+def test_clear_frees_every_slot():
+    store = TrackStateStore(capacity=4)
+    store.lookup([1, 2, 3], frame_index=0)
+    store.clear()
+    assert len(store) == 0
+    _, is_new = store.lookup([1, 2, 3, 4], frame_index=1)
+    assert is_new.all()
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        TrackStateStore(capacity=0)
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Almacén de artefactos del modelo (PT, ONNX, engines TensorRT) direccionado por contenido
+
+Cada artefacto se guarda bajo una clave = hash de TODAS sus entradas (pesos,
+opciones de exportación, precisión, perfil de batch, versión de TensorRT,
+arquitectura de GPU...). Un artefacto solo se reutiliza si la clave coincide y
+el archivo pasa la verificación de integridad (tamaño + SHA-256 del manifest),
+así un reinicio del contenedor nunca re-exporta ni recompila, y un engine de
+otras entradas nunca se carga en silencio.
+
+En cada arranque la verificación es barata (tamaño + mtime del manifest); el
+SHA-256 completo se recalcula solo si cambió el mtime, con `verify` y cuando
+la carga de un artefacto falla (recheck).
+
+Estructura (por defecto en /app/engines/store, volumen persistente):
+    manifest.json                       índice: clave -> entradas, archivo, sha256, tamaño
+    objects/<tipo>/<clave[:16]>/<archivo>
+    quarantine/                         artefactos que fallaron la verificación
+    .lock                               lock del manifest (varios contenedores)
+
+Uso:
+    python3 artifact_store.py list
+    python3 artifact_store.py verify
+    python3 artifact_store.py remove <clave>
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import argparse
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_STORE_DIR = os.environ.get('ARTIFACT_STORE_DIR', '/app/engines/store')
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def canonical_json(data) -> str:
+    """JSON estable (claves ordenadas, sin espacios) para calcular claves"""
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=True)
+
+
+def sha256_file(path: str) -> str:
+    """SHA-256 del contenido de un archivo (por bloques)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Almacén de artefactos con manifest, verificación de integridad y publicación por symlink"""
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = os.path.abspath(root)
+        self.manifest_path = os.path.join(self.root, 'manifest.json')
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Lock exclusivo del manifest (entre procesos y contenedores)"""
+        with open(os.path.join(self.root, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {}
+        except json.JSONDecodeError:
+            # Manifest corrupto: se conserva para diagnóstico y se empieza de cero
+            broken = f"{self.manifest_path}.corrupt-{int(time.time())}"
+            os.replace(self.manifest_path, broken)
+            print(f"⚠️  Manifest corrupto, movido a {broken}")
+            manifest = {}
+        manifest.setdefault('version', MANIFEST_VERSION)
+        manifest.setdefault('artifacts', {})
+        manifest.setdefault('digests', {})
+        return manifest
+
+    def _write_manifest(self, manifest: Dict):
+        """Escritura atómica (archivo temporal + rename)"""
+        tmp_path = f"{self.manifest_path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    # ------------------------------------------------------------------
+    # Claves y digests
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def key_for(kind: str, inputs: Dict) -> str:
+        """Clave del artefacto: SHA-256 del tipo + entradas en JSON canónico"""
+        return hashlib.sha256(canonical_json({'kind': kind, 'inputs': inputs}).encode()).hexdigest()
+
+    def file_digest(self, path: str) -> str:
+        """
+        SHA-256 de un archivo de entrada, cacheado en el manifest por (ruta, tamaño, mtime)
+
+        Evita volver a leer cientos de MB de pesos/ONNX en cada arranque
+        """
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        with self._locked():
+            cached = self._read_manifest()['digests'].get(path)
+        if cached and cached.get('size') == signature['size'] and cached.get('mtime_ns') == signature['mtime_ns']:
+            return cached['sha256']
+
+        digest = sha256_file(path)
+        with self._locked():
+            manifest = self._read_manifest()
+            manifest['digests'][path] = dict(signature, sha256=digest)
+            self._write_manifest(manifest)
+        return digest
+
+    # ------------------------------------------------------------------
+    # Artefactos
+    # ------------------------------------------------------------------
+
+    def _object_dir(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, 'objects', kind, key[:16])
+
+    def _quarantine(self, key: str, entry: Dict, reason: str):
+        """Saca un artefacto inválido del manifest (y su archivo a quarantine/)"""
+        print(f"⚠️  Artefacto {entry.get('kind')} {key[:12]} inválido ({reason}): se descarta")
+        path = entry.get('path')
+        if path and os.path.exists(path):
+            quarantine_dir = os.path.join(self.root, 'quarantine')
+            os.makedirs(quarantine_dir, exist_ok=True)
+            os.replace(path, os.path.join(quarantine_dir, f"{key[:16]}-{os.path.basename(path)}"))
+        with self._locked():
+            manifest = self._read_manifest()
+            manifest['artifacts'].pop(key, None)
+            self._write_manifest(manifest)
+
+    def _check(self, entry: Dict, verify: bool) -> Optional[str]:
+        """
+        Motivo por el que el artefacto no es válido, o None
+
+        Sin verify basta con el tamaño y el mtime del manifest; si el mtime
+        cambió (o la entrada no lo tiene) se recalcula el SHA-256
+        """
+        path = entry.get('path')
+        if not path or not os.path.isfile(path):
+            return "archivo no encontrado"
+        stat = os.stat(path)
+        if stat.st_size != entry.get('size'):
+            return "tamaño distinto al del manifest"
+        if not verify and stat.st_mtime_ns == entry.get('mtime_ns'):
+            return None
+        if sha256_file(path) != entry.get('sha256'):
+            return "SHA-256 distinto al del manifest"
+        return None
+
+    def lookup(self, kind: str, inputs: Dict, verify: bool = False) -> Optional[str]:
+        """
+        Ruta del artefacto con exactamente estas entradas, o None
+
+        Args:
+            kind: Tipo ('pt', 'onnx', 'engine')
+            inputs: Entradas que definen el artefacto
+            verify: Si True, recalcula siempre el SHA-256 (si no, solo si
+                    cambió el mtime)
+        """
+        key = self.key_for(kind, inputs)
+        with self._locked():
+            entry = self._read_manifest()['artifacts'].get(key)
+        if entry is None:
+            return None
+        reason = self._check(entry, verify)
+        if reason is not None:
+            self._quarantine(key, entry, reason)
+            return None
+        with self._locked():
+            manifest = self._read_manifest()
+            if key in manifest['artifacts']:
+                manifest['artifacts'][key]['last_used'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+                # Contenido ya verificado: el próximo arranque no vuelve a leerlo
+                manifest['artifacts'][key]['mtime_ns'] = os.stat(entry['path']).st_mtime_ns
+                self._write_manifest(manifest)
+        return entry['path']
+
+    def recheck(self, path: str) -> Optional[str]:
+        """
+        Verificación completa (SHA-256) de un artefacto cuya carga falló
+
+        Si está dañado va a quarantine/ y la próxima ejecución lo regenera
+
+        Returns:
+            Motivo por el que se descartó, o None si está íntegro (o no es del almacén)
+        """
+        found = self.entry_for_path(path)
+        if found is None:
+            return None
+        key, entry = found
+        reason = self._check(entry, verify=True)
+        if reason is not None:
+            self._quarantine(key, entry, reason)
+        return reason
+
+    def put(self, kind: str, inputs: Dict, src_path: str, filename: Optional[str] = None,
+            move: bool = False, info: Optional[Dict] = None) -> str:
+        """
+        Guarda un archivo como artefacto de estas entradas
+
+        Args:
+            kind: Tipo de artefacto
+            inputs: Entradas que lo definen (forman la clave)
+            src_path: Archivo generado
+            filename: Nombre dentro del almacén (default: el del archivo)
+            move: Mover en vez de copiar
+            info: Datos informativos (no forman la clave): versión del exportador, etc.
+
+        Returns:
+            Ruta del artefacto en el almacén
+        """
+        key = self.key_for(kind, inputs)
+        object_dir = self._object_dir(kind, key)
+        os.makedirs(object_dir, exist_ok=True)
+        path = os.path.join(object_dir, filename or os.path.basename(src_path))
+
+        # Copia a temporal + rename: nunca queda un artefacto a medio escribir
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        if move:
+            shutil.move(src_path, tmp_path)
+        else:
+            shutil.copy2(src_path, tmp_path)
+        digest = sha256_file(tmp_path)
+        os.replace(tmp_path, path)
+        stat = os.stat(path)
+
+        entry = {
+            'kind': kind,
+            'inputs': inputs,
+            'path': path,
+            'sha256': digest,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'last_used': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'info': info or {},
+        }
+        with self._locked():
+            manifest = self._read_manifest()
+            manifest['artifacts'][key] = entry
+            self._write_manifest(manifest)
+        print(f"📦 Artefacto {kind} guardado: {path} ({entry['size'] / (1024 ** 2):.1f} MB, clave {key[:12]})")
+        return path
+
+    def get_or_build(self, kind: str, inputs: Dict, filename: str,
+                     build: Callable[[str], None], info: Optional[Dict] = None) -> Tuple[str, bool]:
+        """
+        Artefacto existente o generado ahora
+
+        Un lock por clave evita que dos contenedores generen lo mismo a la vez:
+        el segundo espera y reutiliza el del primero
+
+        Args:
+            build: Función que escribe el artefacto en la ruta que recibe
+
+        Returns:
+            (ruta en el almacén, True si se generó)
+        """
+        path = self.lookup(kind, inputs)
+        if path is not None:
+            return path, False
+
+        key = self.key_for(kind, inputs)
+        locks_dir = os.path.join(self.root, 'locks')
+        os.makedirs(locks_dir, exist_ok=True)
+        with open(os.path.join(locks_dir, f"{key}.lock"), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                path = self.lookup(kind, inputs)
+                if path is not None:
+                    return path, False
+                build_dir = os.path.join(self.root, 'tmp', key[:16])
+                os.makedirs(build_dir, exist_ok=True)
+                output = os.path.join(build_dir, filename)
+                try:
+                    build(output)
+                    if not os.path.isfile(output):
+                        raise RuntimeError(f"La generación de {kind} no produjo {output}")
+                    return self.put(kind, inputs, output, filename, move=True, info=info), True
+                finally:
+                    shutil.rmtree(build_dir, ignore_errors=True)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def entries(self, kind: Optional[str] = None) -> List[Tuple[str, Dict]]:
+        """(clave, entrada) del manifest, opcionalmente de un tipo"""
+        with self._locked():
+            artifacts = self._read_manifest()['artifacts']
+        return [(key, entry) for key, entry in sorted(artifacts.items(), key=lambda item: item[1]['created'])
+                if kind is None or entry['kind'] == kind]
+
+    def entry_for_path(self, path: str) -> Optional[Tuple[str, Dict]]:
+        """Entrada del manifest de un artefacto (o de un symlink publicado hacia él)"""
+        real = os.path.realpath(path)
+        for key, entry in self.entries():
+            if os.path.realpath(entry['path']) == real:
+                return key, entry
+        return None
+
+    def verify(self) -> Tuple[int, int]:
+        """
+        Verifica todos los artefactos; los inválidos van a quarantine/
+
+        Returns:
+            (válidos, descartados)
+        """
+        ok = broken = 0
+        for key, entry in self.entries():
+            reason = self._check(entry, verify=True)
+            if reason is None:
+                ok += 1
+            else:
+                self._quarantine(key, entry, reason)
+                broken += 1
+        return ok, broken
+
+    def remove(self, key: str) -> bool:
+        """Borra un artefacto (archivo + entrada del manifest)"""
+        with self._locked():
+            manifest = self._read_manifest()
+            entry = manifest['artifacts'].pop(key, None)
+            if entry is None:
+                return False
+            self._write_manifest(manifest)
+        shutil.rmtree(os.path.dirname(entry['path']), ignore_errors=True)
+        return True
+
+    # ------------------------------------------------------------------
+    # Publicación
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def publish(artifact_path: str, link_path: str) -> str:
+        """
+        Publica un artefacto en una ruta fija (la de los configs) con un symlink atómico
+
+        Si en esa ruta hay un archivo normal (p.ej. un engine copiado a mano o
+        compilado por DeepStream) no se carga en silencio: se renombra a
+        <ruta>.stale-<timestamp> y se avisa
+
+        Returns:
+            link_path
+        """
+        link_dir = os.path.dirname(os.path.abspath(link_path))
+        os.makedirs(link_dir, exist_ok=True)
+        if os.path.islink(link_path):
+            if os.path.realpath(link_path) == os.path.realpath(artifact_path):
+                return link_path
+        elif os.path.exists(link_path):
+            stale = f"{link_path}.stale-{time.strftime('%Y%m%d_%H%M%S')}"
+            os.replace(link_path, stale)
+            print(f"⚠️  {link_path} no venía del almacén de artefactos: movido a {stale}")
+
+        tmp_link = f"{link_path}.tmp-{os.getpid()}"
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink(artifact_path, tmp_link)
+        os.replace(tmp_link, link_path)
+        print(f"🔗 Publicado: {link_path} -> {artifact_path}")
+        return link_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Almacén de artefactos del modelo')
+    parser.add_argument('--root', default=DEFAULT_STORE_DIR, help=f'Directorio (default: {DEFAULT_STORE_DIR})')
+    sub = parser.add_subparsers(dest='command', required=True)
+    list_parser = sub.add_parser('list', help='Artefactos del manifest')
+    list_parser.add_argument('--kind', help='Solo un tipo (pt, onnx, engine)')
+    sub.add_parser('verify', help='Verificar integridad (SHA-256) de todos los artefactos')
+    remove_parser = sub.add_parser('remove', help='Borrar un artefacto')
+    remove_parser.add_argument('key', help='Clave (o prefijo único)')
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.root)
+    if args.command == 'list':
+        for key, entry in store.entries(args.kind):
+            print(f"{key[:12]}  {entry['kind']:<7} {entry['size'] / (1024 ** 2):>8.1f} MB  "
+                  f"{entry['created']}  {entry['path']}")
+            print(f"              {canonical_json(entry['inputs'])}")
+        return 0
+    if args.command == 'verify':
+        ok, broken = store.verify()
+        print(f"✅ {ok} artefactos válidos, {broken} descartados")
+        return 0 if broken == 0 else 1
+    if args.command == 'remove':
+        matches = [key for key, _ in store.entries() if key.startswith(args.key)]
+        if len(matches) != 1:
+            print(f"❌ La clave {args.key!r} coincide con {len(matches)} artefactos")
+            return 1
+        store.remove(matches[0])
+        print(f"🗑️  Artefacto {matches[0][:12]} borrado")
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,20 +3,46 @@
 Script automático para detectar componentes y generar engine TensorRT
 Detecta GPU, CUDA, TensorRT y genera un engine optimizado para ese PC
 
+PT, ONNX y engine se guardan en el almacén de artefactos (artifact_store.py)
+con clave = hash de sus entradas: si ya existen con las mismas entradas se
+reutilizan (sin descargar, exportar ni compilar) y el engine se publica con un
+symlink en la ruta del config de nvinfer.
+
+El engine se compila con perfiles de batch dinámico según el despliegue
+(--cameras, --shared-pipeline) y la timing cache persistente del almacén
+(trt_engine_builder.py): recompilar tras un cambio pequeño tarda minutos.
+
 Uso:
     python3 auto_build_engine.py                    # Auto-detectar todo
     python3 auto_build_engine.py --onnx path/to/model.onnx
     python3 auto_build_engine.py --pt path/to/model.pt
+    python3 auto_build_engine.py --cameras 6 --shared-pipeline --precision fp16
 """
 
 import os
 import sys
 import json
+import shutil
+import hashlib
+import tempfile
 import subprocess
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import argparse
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from artifact_store import ArtifactStore, DEFAULT_STORE_DIR, canonical_json, sha256_file
+from trt_engine_builder import (BatchProfile, BuildPlan, Int8Calibration, TensorRTEngineBuilder,
+                                TimingCacheFile, plan_profiles, print_report, timing_cache_path,
+                                CALIBRATION_BATCH, DEFAULT_IMGSZ, DEFAULT_WORKSPACE_MB, PRECISIONS)
+from nvinfer_config import (Deployment, InferConfigError, generate as generate_infer_config,
+                            parse_size, DEFAULT_OUTPUT as DEFAULT_INFER_CONFIG)
+
+
+DEFAULT_ENGINE_PATH = '/app/engines/tensorrt/yolo11x_b1.engine'
+MODEL_NAME = 'yolo11x.pt'
+
 
 class SystemInfo:
     """Detecta información del sistema y componentes"""
@@ -29,6 +55,7 @@ class SystemInfo:
             'count': 0,
             'models': [],
             'memory_mb': [],
+            'compute_caps': [],
             'cuda_version': None,
             'tensorrt_version': None
         }
@@ -52,6 +79,13 @@ class SystemInfo:
                         gpu_info['models'].append(parts[0].strip())
                         gpu_info['memory_mb'].append(int(parts[1].strip()))
 
+                # Arquitectura (compute capability): un engine solo sirve para la suya
+                result = subprocess.run(['nvidia-smi', '--query-gpu=compute_cap',
+                                       '--format=csv,noheader'],
+                                      capture_output=True, text=True, timeout=5)
+                if result.returncode == 0:
+                    gpu_info['compute_caps'] = [line.strip() for line in result.stdout.strip().split('\n')]
+
         except Exception as e:
             print(f"⚠️  Error detectando GPU: {e}")
 
@@ -78,6 +112,14 @@ class SystemInfo:
                 result = subprocess.run(['ldconfig', '-p'], capture_output=True, text=True, timeout=5)
                 if 'libnvinfer.so' in result.stdout:
                     gpu_info['tensorrt_version'] = "Instalado (DeepStream)"
+                    # Versión exacta desde el nombre real de la librería (libnvinfer.so.10.3.0)
+                    for line in result.stdout.split('\n'):
+                        if 'libnvinfer.so' in line and '=>' in line:
+                            real = os.path.realpath(line.split('=>')[1].strip())
+                            version = real.split('libnvinfer.so.')[-1]
+                            if version and version[0].isdigit():
+                                gpu_info['tensorrt_version'] = version
+                                break
             except Exception as e:
                 print(f"⚠️  Error detectando TensorRT: {e}")
 
@@ -124,6 +166,8 @@ class SystemInfo:
             for i, (model, memory) in enumerate(zip(gpu_info['models'], gpu_info['memory_mb'])):
                 print(f"   GPU {i}: {model}")
                 print(f"   Memoria: {memory:,} MB ({memory/1024:.2f} GB)")
+            if gpu_info['compute_caps']:
+                print(f"   Arquitectura: sm_{gpu_info['compute_caps'][0].replace('.', '')}")
         else:
             print("   ❌ No se detectó GPU NVIDIA")
 
@@ -151,239 +195,293 @@ class SystemInfo:
 
 
 class YOLOExporter:
-    """Exporta modelo YOLO a ONNX si es necesario"""
+    """Exporta modelo YOLO a ONNX si es necesario (con caché en el almacén de artefactos)"""
 
     @staticmethod
-    def download_model(output_dir: str = None) -> str:
-        """Descarga modelo YOLO11x.pt desde Hugging Face"""
+    def download_model(store: ArtifactStore) -> str:
+        """Descarga modelo YOLO11x.pt (una sola vez: después sale del almacén)"""
+        inputs = {'model': MODEL_NAME, 'source': 'ultralytics'}
+        cached = store.lookup('pt', inputs)
+        if cached:
+            print(f"\n♻️  Modelo PT en el almacén: {cached}")
+            return cached
+
         print("\n" + "="*70)
         print("📥 DESCARGANDO MODELO YOLO11x")
         print("="*70)
 
         try:
             from ultralytics import YOLO
-            from pathlib import Path
-
-            if output_dir is None:
-                output_dir = "/app/engines/pt"
-
-            Path(output_dir).mkdir(parents=True, exist_ok=True)
 
-            print(f"\n📂 Directorio de destino: {output_dir}")
             print("⏳ Descargando modelo (5-10 minutos)...")
             print("   Tamaño: ~219 MB\n")
 
-            # Descargar modelo automáticamente
-            model = YOLO('yolo11x.pt')
-
-            # El modelo se descarga a ~/.cache de ultralytics
-            # Localizamos el archivo descargado
-            import glob
-            pt_paths = glob.glob(f"{Path.home()}/.cache/ultralytics/**/yolo11x.pt", recursive=True)
-
-            if pt_paths:
-                src_path = pt_paths[0]
-                dst_path = f"{output_dir}/yolo11x.pt"
-
-                # Copiar a directorio de destino
-                import shutil
-                shutil.copy2(src_path, dst_path)
-
-                size_mb = os.path.getsize(dst_path) / (1024**2)
-                print(f"✅ Modelo descargado: {dst_path}")
-                print(f"📊 Tamaño: {size_mb:.2f} MB\n")
-
-                return dst_path
-            else:
-                # El modelo fue descargado por ultralytics, ubicarlo
-                # Buscar en el directorio del usuario cache
-                home = str(Path.home())
-                cache_dir = Path(home) / '.cache' / 'torch' / 'hub' / 'ultralytics_yolov5_master'
-
-                # Intentar encontrar el modelo en diferentes ubicaciones
-                potential_paths = [
-                    Path(home) / '.cache' / 'ultralytics' / 'yolo11x.pt',
-                    Path(home) / '.cache' / 'ultralytics' / 'assets' / 'yolo11x.pt',
-                    Path(home) / 'yolo11x.pt',
-                ]
-
-                pt_file = None
-                for potential_path in potential_paths:
-                    if potential_path.exists():
-                        pt_file = str(potential_path)
-                        break
-
-                if not pt_file:
-                    # Usar el archivo del modelo en el directorio temporal
+            # Descarga en un directorio temporal y se mueve al almacén
+            download_dir = tempfile.mkdtemp(prefix='yolo-download-', dir=store.root)
+            cwd = os.getcwd()
+            try:
+                os.chdir(download_dir)
+                model = YOLO(MODEL_NAME)
+                pt_file = getattr(model, 'ckpt_path', None) or os.path.join(download_dir, MODEL_NAME)
+                if not os.path.isfile(pt_file):
                     raise FileNotFoundError(f"No se pudo encontrar el modelo descargado")
+                path = store.put('pt', inputs, pt_file, MODEL_NAME, move=pt_file.startswith(download_dir))
+            finally:
+                os.chdir(cwd)
+                shutil.rmtree(download_dir, ignore_errors=True)
 
-                # Copiar a directorio de destino
-                import shutil
-                dst_path = f"{output_dir}/yolo11x.pt"
-                shutil.copy2(pt_file, dst_path)
-
-                size_mb = os.path.getsize(dst_path) / (1024**2)
-                print(f"✅ Modelo localizado y copiado: {dst_path}")
-                print(f"📊 Tamaño: {size_mb:.2f} MB\n")
-
-                return dst_path
+            size_mb = os.path.getsize(path) / (1024**2)
+            print(f"✅ Modelo descargado: {path}")
+            print(f"📊 Tamaño: {size_mb:.2f} MB\n")
+            return path
 
         except Exception as e:
             print(f"\n❌ Error descargando modelo: {e}")
             raise
 
     @staticmethod
-    def export_to_onnx(pt_path: str = None) -> str:
-        """Exporta modelo YOLO PT a ONNX (descarga PT si no existe)"""
+    def export_to_onnx(store: ArtifactStore, pt_path: str = None, imgsz: int = 1280,
+                       opset: int = 17, dynamic: bool = True, simplify: bool = True) -> str:
+        """
+        Exporta modelo YOLO PT a ONNX (descarga PT si no existe)
+
+        Clave del ONNX: SHA-256 de los pesos + opciones de exportación; con las
+        mismas entradas se reutiliza el del almacén sin exportar
+        """
+        # Si no proporciona PT, descargar
+        if pt_path is None or not os.path.exists(pt_path):
+            print("\n⚠️  Modelo PT no encontrado, descargando...")
+            pt_path = YOLOExporter.download_model(store)
+
+        inputs = {
+            'weights_sha256': store.file_digest(pt_path),
+            'imgsz': imgsz,
+            'opset': opset,
+            'dynamic': dynamic,
+            'simplify': simplify,
+        }
+        cached = store.lookup('onnx', inputs)
+        if cached:
+            print(f"\n♻️  ONNX en el almacén (mismos pesos y opciones): {cached}")
+            return cached
+
         print("\n" + "="*70)
         print("📦 EXPORTANDO MODELO YOLO PT A ONNX")
         print("="*70)
 
-        try:
+        def export(output_path):
             from ultralytics import YOLO
 
-            # Si no proporciona PT, descargar
-            if pt_path is None or not os.path.exists(pt_path):
-                print("\n⚠️  Modelo PT no encontrado, descargando...")
-                pt_path = YOLOExporter.download_model()
+            # El exportador escribe junto al .pt: se exporta desde un enlace en el
+            # directorio de trabajo para no tocar el original
+            work_pt = os.path.join(os.path.dirname(output_path), os.path.basename(pt_path))
+            os.symlink(os.path.abspath(pt_path), work_pt)
 
             print(f"\n📂 Cargando modelo: {pt_path}")
-            model = YOLO(pt_path)
+            model = YOLO(work_pt)
 
             print("\n⚙️  Configuración de exportación:")
             print(f"   Formato: ONNX")
-            print(f"   Tamaño entrada: 1280x1280")
-            print(f"   Batch: DINÁMICO (1-16)")
-            print(f"   Opset: 17")
+            print(f"   Tamaño entrada: {imgsz}x{imgsz}")
+            print(f"   Batch: {'DINÁMICO (1-16)' if dynamic else 'FIJO'}")
+            print(f"   Opset: {opset}")
 
             print("\n🔄 Exportando (2-5 minutos)...")
-            onnx_path = model.export(
-                format='onnx',
-                imgsz=1280,
-                dynamic=True,
-                simplify=True,
-                opset=17
-            )
+            exported = model.export(format='onnx', imgsz=imgsz, dynamic=dynamic,
+                                    simplify=simplify, opset=opset)
+            shutil.move(str(exported), output_path)
 
+        try:
+            info = {'source': os.path.abspath(pt_path)}
+            try:
+                import ultralytics
+                info['ultralytics'] = ultralytics.__version__
+            except ImportError:
+                pass
+            onnx_path, _ = store.get_or_build('onnx', inputs, 'yolo11x.onnx', export, info=info)
             print(f"\n✅ ONNX exportado: {onnx_path}")
-            return str(onnx_path)
+            return onnx_path
 
         except Exception as e:
             print(f"\n❌ Error exportando a ONNX: {e}")
+            # El .pt del almacén solo se verifica por tamaño/mtime: si no cargó, SHA-256 completo
+            reason = store.recheck(pt_path)
+            if reason:
+                print(f"   El modelo PT del almacén estaba dañado ({reason}): "
+                      f"se vuelve a descargar en la próxima ejecución")
             raise
 
 
 class EngineBuilder:
-    """Construye engine TensorRT optimizado usando DeepStream"""
+    """Construye engine TensorRT (con caché en el almacén de artefactos)"""
 
     @staticmethod
-    def build_engine(onnx_path: str, output_path: str = None,
-                    workspace_mb: int = 8192,
-                    fp16: bool = True) -> str:
-        """
-        Construye engine TensorRT a partir de ONNX
-        DeepStream compilará automáticamente el engine la primera vez que se ejecute
+    def engine_inputs(store: ArtifactStore, plan: BuildPlan, gpu_info: Dict,
+                      calibration: Optional[Dict] = None) -> Dict:
         """
+        Entradas que definen el engine: ONNX, precisión, perfiles de batch,
+        tamaño de entrada, calibración INT8, versión de TensorRT y arquitectura de GPU
 
-        if output_path is None:
-            output_path = os.path.splitext(onnx_path)[0] + '.engine'
+        Raises:
+            RuntimeError: si no se conoce la versión exacta de TensorRT o la
+                          arquitectura (la clave no sería fiable)
+        """
+        trt_version = gpu_info.get('tensorrt_version')
+        if not trt_version or not trt_version[0].isdigit():
+            raise RuntimeError(f"Versión de TensorRT no detectable ({trt_version}): "
+                               f"no se puede identificar el engine")
+        if not gpu_info.get('compute_caps'):
+            raise RuntimeError("Arquitectura de GPU no detectable (nvidia-smi compute_cap)")
+        inputs = dict(plan.key_inputs(),
+                      onnx_sha256=store.file_digest(plan.onnx_path),
+                      tensorrt_version=trt_version,
+                      gpu_arch=gpu_info['compute_caps'][0])
+        if calibration is not None:
+            inputs['calibration'] = calibration
+        return inputs
 
-        print("\n" + "="*70)
-        print("🚀 PREPARANDO ENGINE TENSORRT CON DEEPSTREAM")
-        print("="*70)
+    @staticmethod
+    def calibration_inputs(store: ArtifactStore, calib_images: Optional[str] = None,
+                           calib_cache: Optional[str] = None) -> Tuple[Dict, Int8Calibration]:
+        """
+        Identidad de la calibración INT8 (forma parte de la clave del engine) y su configuración
 
-        try:
-            print(f"\n📦 Archivo ONNX: {onnx_path}")
-            print(f"🎯 Engine de salida: {output_path}")
+        Con --calib-cache manda la caché dada; con --calib-images el conjunto de
+        imágenes, y la caché resultante se guarda en el almacén (kind
+        'calibration') para la siguiente compilación (otra GPU, otro batch...)
 
-            if not os.path.exists(onnx_path):
-                raise FileNotFoundError(f"ONNX no encontrado: {onnx_path}")
+        Raises:
+            ValueError: sin caché ni imágenes de calibración
+        """
+        if calib_cache:
+            if not os.path.isfile(calib_cache):
+                raise ValueError(f"Caché de calibración no encontrada: {calib_cache}")
+            return ({'cache_sha256': store.file_digest(calib_cache)},
+                    Int8Calibration(cache_path=os.path.abspath(calib_cache)))
+        if not calib_images:
+            raise ValueError("INT8 requiere --calib-images o --calib-cache")
+        images = Int8Calibration.list_images(calib_images)
+        digests = sorted(sha256_file(path) for path in images)
+        inputs = {
+            'images_sha256': hashlib.sha256(canonical_json(digests).encode()).hexdigest(),
+            'count': len(images),
+            'batch': CALIBRATION_BATCH,
+            'algorithm': 'entropy2',
+        }
+        return inputs, Int8Calibration(cache_path='', images=images)
 
-            print(f"\n⚙️  Configuración TensorRT:")
-            print(f"   Formato entrada: NCHW (batch, 3, 1280, 1280)")
-            print(f"   Batch: 1")
-            print(f"   Precisión: {'FP16' if fp16 else 'FP32'}")
-            print(f"   Workspace: {workspace_mb} MB")
+    @staticmethod
+    def build_engine(store: ArtifactStore, onnx_path: str, gpu_info: Dict,
+                     output_path: str = DEFAULT_ENGINE_PATH,
+                     workspace_mb: int = DEFAULT_WORKSPACE_MB,
+                     precision: str = 'fp16',
+                     profiles: Optional[List[BatchProfile]] = None,
+                     imgsz: int = DEFAULT_IMGSZ,
+                     calib_images: Optional[str] = None,
+                     calib_cache: Optional[str] = None) -> str:
+        """
+        Engine TensorRT para este ONNX en esta GPU, publicado en output_path
 
-            print(f"\n📝 El engine será compilado automáticamente por DeepStream")
-            print(f"   cuando se ejecute la aplicación por primera vez.")
-            print(f"   Esto puede tardar 10-20 minutos.\n")
+        Si el almacén ya tiene un engine con exactamente las mismas entradas se
+        reutiliza; si no, se compila con los perfiles de batch del despliegue y
+        la timing cache persistente del almacén (en frío 10-20 minutos, con
+        la caché caliente pocos minutos). output_path queda como symlink al
+        engine del almacén
 
-            # El engine se compilará automáticamente cuando DeepStream lo necesite
-            # Solo necesitamos asegurar que el ONNX esté disponible
+        Returns:
+            output_path
+        """
+        print("\n" + "="*70)
+        print("🚀 PREPARANDO ENGINE TENSORRT")
+        print("="*70)
 
-            print(f"✅ ONNX preparado para compilación automática por DeepStream")
-            print(f"   Archivo: {onnx_path}")
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"ONNX no encontrado: {onnx_path}")
+
+        calibration_key, calibration = None, None
+        if precision == 'int8':
+            calibration_key, calibration = EngineBuilder.calibration_inputs(store, calib_images, calib_cache)
+        plan = BuildPlan(onnx_path, precision, profiles or [BatchProfile(1, 1, 1)],
+                         imgsz, workspace_mb, calibration)
+        inputs = EngineBuilder.engine_inputs(store, plan, gpu_info, calibration_key)
+        timing_cache = TimingCacheFile(timing_cache_path(store.root, inputs['tensorrt_version'],
+                                                         inputs['gpu_arch']))
+
+        print(f"\n📦 Archivo ONNX: {onnx_path}")
+        print(f"🎯 Engine publicado en: {output_path}")
+        print(f"\n⚙️  Configuración TensorRT:")
+        for i, profile in enumerate(plan.profiles):
+            print(f"   Perfil {i}: batch min/opt/max {profile}")
+        print(f"   Precisión: {plan.precision.upper()}")
+        print(f"   Entrada: {plan.imgsz}x{plan.imgsz}")
+        print(f"   TensorRT: {inputs['tensorrt_version']}  GPU: sm_{inputs['gpu_arch'].replace('.', '')}")
+        print(f"   Workspace: {workspace_mb} MB")
+
+        # La caché de calibración generada con imágenes se reutiliza entre compilaciones
+        calibration_store_inputs = None
+        if calibration is not None and not calibration.cache_path:
+            calibration_store_inputs = dict(calibration_key, onnx_sha256=inputs['onnx_sha256'], imgsz=imgsz)
+            calibration.cache_path = store.lookup('calibration', calibration_store_inputs) or ''
+            if calibration.cache_path:
+                print(f"   Calibración INT8: {calibration.cache_path} (del almacén)")
+            else:
+                print(f"   Calibración INT8: {len(calibration.images)} imágenes")
+
+        def build(engine_path):
+            generate_calibration = calibration is not None and not calibration.cache_path
+            if generate_calibration:
+                calibration.cache_path = f"{engine_path}.calib"
+            report = TensorRTEngineBuilder().build(plan, engine_path, timing_cache)
+            print_report(report)
+            if generate_calibration and os.path.isfile(calibration.cache_path):
+                store.put('calibration', calibration_store_inputs, calibration.cache_path,
+                          'calibration.cache', move=True)
 
-            return onnx_path  # Devolvemos la ruta del ONNX
+        try:
+            engine_path, built = store.get_or_build('engine', inputs, 'yolo11x.engine', build,
+                                                    info={'onnx': os.path.abspath(onnx_path),
+                                                          'workspace_mb': workspace_mb})
+            if not built:
+                print(f"\n♻️  Engine en el almacén (mismas entradas): {engine_path}")
+            return ArtifactStore.publish(engine_path, output_path)
 
         except Exception as e:
             print(f"\n❌ Error preparando engine: {e}")
+            # Idem con el ONNX del almacén que no se pudo parsear
+            reason = store.recheck(onnx_path)
+            if reason:
+                print(f"   El ONNX del almacén estaba dañado ({reason}): "
+                      f"se vuelve a exportar en la próxima ejecución")
             raise
 
 
 class DeepStreamConfig:
-    """Genera configuración de DeepStream optimizada"""
+    """Genera configuración de DeepStream para el despliegue y el engine publicado"""
 
     @staticmethod
-    def create_config(onnx_path: str, output_dir: str = None) -> str:
-        """Crea archivo de configuración de DeepStream para ONNX con compilación automática de engine"""
-
-        if output_dir is None:
-            output_dir = os.path.dirname(onnx_path)
-
-        config_path = os.path.join(output_dir, 'config_infer_auto_generated.txt')
-
-        # Generar ruta del engine que DeepStream creará
-        engine_path = os.path.splitext(onnx_path)[0] + '.engine'
-
-        config_content = f"""[property]
-gpu-id=0
-net-scale-factor=0.0039215697906911373
-model-color-format=0
-infer-dims=3;1280;1280
-onnx-file={onnx_path}
-model-engine-file={engine_path}
-labelfile-path=/app/configs/deepstream/labels.txt
-batch-size=1
-network-mode=0
-num-detected-classes=80
-interval=2
-gie-unique-id=1
-process-mode=1
-network-type=0
-cluster-mode=2
-maintain-aspect-ratio=1
-symmetric-padding=1
-workspace-size=8000
-parse-bbox-func-name=NvDsInferYolo
-custom-lib-path=/app/libnvdsinfer_custom_impl_Yolo.so
-engine-create-func-name=NvDsInferYoloCudaEngineGet
-
-# Configuración automática generada
-[class-attrs-all]
-nms-iou-threshold=0.5
-pre-cluster-threshold=1.0
-topk=0
-
-# Solo detectar personas (clase 0)
-[class-attrs-0]
-pre-cluster-threshold=0.25
-nms-iou-threshold=0.5
-topk=300
-detected-min-w=20
-detected-min-h=40
-"""
+    def create_config(store: ArtifactStore, engine_path: str, deployment: Deployment,
+                      gpu_info: Optional[Dict] = None, output_path: str = DEFAULT_INFER_CONFIG) -> str:
+        """
+        Config de nvinfer derivada del despliegue y del manifest del engine
+        (nvinfer_config.py), validada contra los perfiles del engine
 
+        Raises:
+            InferConfigError: si la config no encaja con el engine
+        """
+        hardware = None
+        if gpu_info and gpu_info.get('compute_caps'):
+            hardware = {'tensorrt_version': gpu_info.get('tensorrt_version'),
+                        'gpu_arch': gpu_info['compute_caps'][0]}
         try:
-            with open(config_path, 'w') as f:
-                f.write(config_content)
+            config_path = generate_infer_config(deployment, engine_path, output=output_path,
+                                                store=store, hardware=hardware)
             print(f"\n✅ Configuración de DeepStream creada: {config_path}")
-            print(f"   DeepStream compilará automáticamente el engine TensorRT")
-            print(f"   a partir del ONNX cuando se ejecute por primera vez.")
+            print(f"   {deployment.describe()}")
             return config_path
-        except Exception as e:
-            print(f"❌ Error creando configuración: {e}")
+        except InferConfigError as e:
+            print("❌ La configuración no encaja con el engine:")
+            for problem in e.problems:
+                print(f"   - {problem}")
             raise
 
 
@@ -405,16 +503,57 @@ Ejemplos:
 
   # Con opciones personalizadas
   python3 auto_build_engine.py --onnx model.onnx --workspace 4096 --no-fp16
+
+  # Pipeline compartido de 6 cámaras (perfil batch 1/6/8)
+  python3 auto_build_engine.py --cameras 6 --shared-pipeline
+
+  # INT8 calibrado con imágenes de las cámaras
+  python3 auto_build_engine.py --precision int8 --calib-images /app/calibration
+
+  # Artefactos guardados (claves, entradas, integridad)
+  python3 artifact_store.py list
+  python3 artifact_store.py verify
         """
     )
 
     parser.add_argument('--onnx', help='Ruta al archivo ONNX')
     parser.add_argument('--pt', help='Ruta al archivo PT (será exportado a ONNX)')
-    parser.add_argument('--workspace', type=int, default=8192, help='Workspace en MB (default: 8192)')
-    parser.add_argument('--no-fp16', action='store_true', help='No usar FP16, usar FP32')
-    parser.add_argument('--output', help='Ruta de salida para el engine')
+    parser.add_argument('--workspace', type=int, default=DEFAULT_WORKSPACE_MB,
+                        help=f'Workspace en MB (default: {DEFAULT_WORKSPACE_MB})')
+    parser.add_argument('--precision', choices=PRECISIONS, default='fp16', help='Precisión (default: fp16)')
+    parser.add_argument('--no-fp16', action='store_true', help='No usar FP16, usar FP32 (= --precision fp32)')
+    parser.add_argument('--cameras', type=int, default=int(os.environ.get('CAMERA_COUNT', 1)),
+                        help='Cámaras del despliegue (default: $CAMERA_COUNT o 1)')
+    parser.add_argument('--shared-pipeline', action='store_true',
+                        help='Pipeline compartido (main.py --shared-pipeline): batch óptimo = nº de cámaras')
+    parser.add_argument('--max-batch', type=int,
+                        help='Batch máximo del engine (default: 1 por cámara, siguiente potencia de 2 compartido)')
+    parser.add_argument('--opt-batch', type=int, action='append', default=[],
+                        help='Perfil de optimización adicional para este batch (repetible)')
+    parser.add_argument('--imgsz', type=int,
+                        help='Entrada de la red (default: la mínima para --frame-size y --min-person-height)')
+    parser.add_argument('--frame-size', type=parse_size, default=(1920, 1080), metavar='ANCHOxALTO',
+                        help='Frame que recibe nvinfer (nvstreammux; default: 1920x1080)')
+    parser.add_argument('--min-person-height', type=int, default=int(os.environ.get('MIN_PERSON_HEIGHT', 40)),
+                        help='Alto mínimo de persona en píxeles del frame (default: $MIN_PERSON_HEIGHT o 40)')
+    parser.add_argument('--infer-config', default=DEFAULT_INFER_CONFIG,
+                        help=f'Config de nvinfer a generar (default: {DEFAULT_INFER_CONFIG})')
+    parser.add_argument('--calib-images', help='Imágenes de calibración INT8 (directorio)')
+    parser.add_argument('--calib-cache', help='Caché de calibración INT8 existente')
+    parser.add_argument('--output', default=DEFAULT_ENGINE_PATH,
+                        help=f'Ruta donde se publica el engine (symlink; default: {DEFAULT_ENGINE_PATH})')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR,
+                        help=f'Almacén de artefactos (default: {DEFAULT_STORE_DIR})')
 
     args = parser.parse_args()
+    if args.no_fp16:
+        args.precision = 'fp32'
+    try:
+        profiles = plan_profiles(args.cameras, args.shared_pipeline, args.max_batch, args.opt_batch)
+        deployment = Deployment(args.cameras, args.shared_pipeline, *args.frame_size, args.min_person_height)
+        imgsz = args.imgsz or deployment.required_input_size
+    except ValueError as e:
+        parser.error(str(e))
 
     try:
         # 1. Detectar hardware
@@ -434,9 +573,11 @@ Ejemplos:
             print("   Instala TensorRT antes de ejecutar este script")
             sys.exit(1)
 
-        # Nota: TensorRT será utilizado por DeepStream automáticamente
         print("\n✅ TensorRT detectado y disponible para DeepStream")
 
+        store = ArtifactStore(args.store)
+        print(f"🗄️  Almacén de artefactos: {store.root}")
+
         # 2. Obtener/generar ONNX
         onnx_path = None
 
@@ -446,7 +587,7 @@ Ejemplos:
                 print(f"\n❌ ERROR: ONNX no encontrado: {onnx_path}")
                 sys.exit(1)
         elif args.pt:
-            onnx_path = YOLOExporter.export_to_onnx(args.pt)
+            onnx_path = YOLOExporter.export_to_onnx(store, args.pt)
         else:
             # Buscar YOLO11x.onnx por defecto
             default_paths = [
@@ -472,17 +613,16 @@ Ejemplos:
                 for path in pt_paths:
                     if os.path.exists(path):
                         print(f"\n📂 Usando modelo PT: {path}")
-                        onnx_path = YOLOExporter.export_to_onnx(path)
+                        onnx_path = YOLOExporter.export_to_onnx(store, path)
                         break
 
         if not onnx_path:
-            print("\n📥 No se encontró ONNX ni PT localmente, descargando modelo...")
-            print("   Esto puede tomar 10-15 minutos la primera vez\n")
+            print("\n📥 No se encontró ONNX ni PT localmente: modelo del almacén o descarga")
 
             try:
-                # Descargar y exportar automáticamente
-                pt_path = YOLOExporter.download_model()
-                onnx_path = YOLOExporter.export_to_onnx(pt_path)
+                # Descargar y exportar (o reutilizar ambos del almacén)
+                pt_path = YOLOExporter.download_model(store)
+                onnx_path = YOLOExporter.export_to_onnx(store, pt_path)
             except Exception as e:
                 print(f"\n❌ ERROR: No se pudo descargar/exportar el modelo")
                 print(f"   {e}")
@@ -491,31 +631,37 @@ Ejemplos:
                 print("   2. python3 auto_build_engine.py --onnx /ruta/a/yolo11x.onnx")
                 sys.exit(1)
 
-        # 3. Preparar engine (DeepStream compilará automáticamente)
-        output_engine = args.output
-        onnx_path_final = EngineBuilder.build_engine(
+        # 3. Engine: del almacén si coinciden todas las entradas, si no se compila
+        engine_path = EngineBuilder.build_engine(
+            store,
             onnx_path,
-            output_engine,
+            gpu_info,
+            output_path=args.output,
             workspace_mb=args.workspace,
-            fp16=not args.no_fp16
+            precision=args.precision,
+            profiles=profiles,
+            imgsz=imgsz,
+            calib_images=args.calib_images,
+            calib_cache=args.calib_cache
         )
 
         # 4. Crear configuración de DeepStream
-        config_path = DeepStreamConfig.create_config(onnx_path_final)
+        config_path = DeepStreamConfig.create_config(store, engine_path, deployment, gpu_info,
+                                                     output_path=args.infer_config)
 
         # 5. Resumen final
         print("\n" + "="*70)
         print("✅ PROCESO COMPLETADO EXITOSAMENTE")
         print("="*70)
         print(f"\n📦 Modelo ONNX:")
-        print(f"   {onnx_path_final}")
+        print(f"   {onnx_path}")
+        print(f"\n🚀 Engine TensorRT:")
+        print(f"   {engine_path} -> {os.path.realpath(engine_path)}")
         print(f"\n⚙️  Configuración DeepStream:")
         print(f"   {config_path}")
         print(f"\n📋 Próximos pasos:")
-        print(f"   1. El engine será compilado automáticamente por DeepStream")
-        print(f"      cuando ejecutes la aplicación (primera ejecución: 10-20 min)")
-        print(f"   2. Copia la config a: /app/configs/deepstream/")
-        print(f"   3. Ejecuta: python3 main_low_latency.py")
+        print(f"   1. Ejecuta: python3 main_low_latency.py")
+        print(f"   (los reinicios reutilizan PT, ONNX y engine del almacén)")
         print("="*70)
         print()
 
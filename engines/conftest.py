@@ -0,0 +1,3 @@
+# test_deepstream_engine.py es un script de verificación con GPU (se ejecuta
+# directamente con un ONNX), no una suite de pytest
+collect_ignore = ['test_deepstream_engine.py']
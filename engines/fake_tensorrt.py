@@ -0,0 +1,247 @@
+"""
+Sustituto del módulo tensorrt para ejecutar trt_engine_builder sin GPU
+
+Implementa solo la parte de la API que usa TensorRTEngineBuilder (builder,
+network, parser ONNX, builder config, perfiles, timing cache y calibrador
+INT8) con el mismo comportamiento observable:
+
+- El "parser" no lee el ONNX: la red tiene una entrada INPUT_NAME con forma
+  INPUT_SHAPE (la de la exportación dinámica de ultralytics) y NUM_LAYERS capas
+- build_serialized_network() valida perfiles y flags como TensorRT, mide
+  ("cronometra") una táctica por capa, precisión y batch óptimo que no esté
+  en la timing cache, y devuelve un engine JSON que describe lo compilado
+- La timing cache serializa sus entradas y lleva la versión y el dispositivo:
+  cargar una de otro dispositivo falla igual que en TensorRT
+
+Uso:
+    python3 trt_engine_builder.py --onnx x.onnx --output /tmp/x.engine --fake-trt
+"""
+
+import os
+import json
+
+
+__version__ = '10.3.0-fake'
+
+INPUT_NAME = 'images'
+INPUT_SHAPE = (-1, 3, -1, -1)
+NUM_LAYERS = 64
+DEVICE = os.environ.get('FAKE_TRT_DEVICE', 'sm_89')
+FAST_FP16 = True
+FAST_INT8 = True
+
+# Estadísticas de la última compilación (para comprobar la timing cache)
+last_build = {}
+
+
+class Logger:
+    VERBOSE = 0
+    INFO = 1
+    WARNING = 2
+    ERROR = 3
+
+    def __init__(self, min_severity=WARNING):
+        self.min_severity = min_severity
+
+
+class NetworkDefinitionCreationFlag:
+    EXPLICIT_BATCH = 0
+
+
+class MemoryPoolType:
+    WORKSPACE = 'workspace'
+
+
+class BuilderFlag:
+    FP16 = 'fp16'
+    INT8 = 'int8'
+
+
+class _Tensor:
+
+    def __init__(self, name, shape):
+        self.name = name
+        self.shape = shape
+
+
+class _Network:
+
+    def __init__(self, flags):
+        self.flags = flags
+        self.inputs = []
+        self.num_layers = 0
+
+    @property
+    def num_inputs(self):
+        return len(self.inputs)
+
+    def get_input(self, index):
+        return self.inputs[index]
+
+
+class OnnxParser:
+
+    def __init__(self, network, logger):
+        self.network = network
+        self.errors = []
+
+    @property
+    def num_errors(self):
+        return len(self.errors)
+
+    def get_error(self, index):
+        return self.errors[index]
+
+    def parse_from_file(self, path):
+        if not os.path.isfile(path):
+            self.errors.append(f"No existe el archivo {path}")
+            return False
+        self.network.inputs = [_Tensor(INPUT_NAME, INPUT_SHAPE)]
+        self.network.num_layers = NUM_LAYERS
+        return True
+
+
+class _OptimizationProfile:
+
+    def __init__(self):
+        self.shapes = {}
+
+    def set_shape(self, name, min, opt, max):
+        dims = [tuple(min), tuple(opt), tuple(max)]
+        if len({len(d) for d in dims}) != 1:
+            raise ValueError(f"Perfil de {name}: min/opt/max con distinto número de dimensiones")
+        for low, mid, high in zip(*dims):
+            if not 0 < low <= mid <= high:
+                raise ValueError(f"Perfil de {name} inválido: {dims}")
+        self.shapes[name] = dims
+
+
+class _TimingCache:
+
+    def __init__(self, entries=(), device=DEVICE):
+        self.entries = set(entries)
+        self.device = device
+
+    def combine(self, other, ignore_mismatch):
+        if other.device != self.device and not ignore_mismatch:
+            return False
+        self.entries |= other.entries
+        return True
+
+    def serialize(self):
+        return json.dumps({'version': __version__, 'device': self.device,
+                           'entries': sorted(self.entries)}).encode()
+
+
+class IInt8EntropyCalibrator2:
+
+    def __init__(self):
+        pass
+
+
+class _BuilderConfig:
+
+    def __init__(self):
+        self.flags = set()
+        self.memory_pools = {}
+        self.profiles = []
+        self.calibration_profile = None
+        self.int8_calibrator = None
+        self.timing_cache = None
+
+    def set_memory_pool_limit(self, pool, size):
+        self.memory_pools[pool] = size
+
+    def set_flag(self, flag):
+        self.flags.add(flag)
+
+    def add_optimization_profile(self, profile):
+        self.profiles.append(profile)
+        return len(self.profiles) - 1
+
+    def set_calibration_profile(self, profile):
+        self.calibration_profile = profile
+        return True
+
+    def create_timing_cache(self, serialized):
+        if not serialized:
+            return _TimingCache()
+        data = json.loads(bytes(serialized).decode())
+        if data.get('version') != __version__:
+            raise RuntimeError(f"Timing cache de TensorRT {data.get('version')}")
+        return _TimingCache(data['entries'], data['device'])
+
+    def set_timing_cache(self, cache, ignore_mismatch):
+        if cache.device != DEVICE and not ignore_mismatch:
+            return False
+        self.timing_cache = cache
+        return True
+
+    def get_timing_cache(self):
+        return self.timing_cache
+
+
+class Builder:
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.platform_has_fast_fp16 = FAST_FP16
+        self.platform_has_fast_int8 = FAST_INT8
+
+    def create_network(self, flags=0):
+        return _Network(flags)
+
+    def create_builder_config(self):
+        return _BuilderConfig()
+
+    def create_optimization_profile(self):
+        return _OptimizationProfile()
+
+    def _calibrate(self, config, network):
+        calibrator = config.int8_calibrator
+        if calibrator.read_calibration_cache():
+            return 0
+        batches = 0
+        while calibrator.get_batch([network.get_input(0).name]) is not None:
+            batches += 1
+        if not batches:
+            raise RuntimeError("Calibración INT8 sin lotes")
+        calibrator.write_calibration_cache(json.dumps({'batches': batches}).encode())
+        return batches
+
+    def build_serialized_network(self, network, config):
+        names = [tensor.name for tensor in network.inputs]
+        if not config.profiles:
+            return None
+        for profile in config.profiles:
+            if set(profile.shapes) != set(names):
+                return None
+        if BuilderFlag.INT8 in config.flags:
+            if config.int8_calibrator is None or config.calibration_profile is None:
+                return None
+            calibration_batches = self._calibrate(config, network)
+        else:
+            calibration_batches = 0
+
+        if config.timing_cache is None:
+            config.timing_cache = _TimingCache()
+        precisions = sorted(config.flags & {BuilderFlag.FP16, BuilderFlag.INT8}) or ['fp32']
+        timed = 0
+        for profile in config.profiles:
+            opt = profile.shapes[names[0]][1]
+            for layer in range(network.num_layers):
+                for precision in precisions:
+                    entry = f"layer{layer}:{precision}:{'x'.join(map(str, opt))}"
+                    if entry not in config.timing_cache.entries:
+                        config.timing_cache.entries.add(entry)
+                        timed += 1
+
+        last_build.clear()
+        last_build.update(timed_tactics=timed, calibration_batches=calibration_batches)
+        return json.dumps({
+            'fake_tensorrt': __version__,
+            'device': DEVICE,
+            'precisions': precisions,
+            'profiles': [{name: [list(d) for d in dims] for name, dims in p.shapes.items()}
+                         for p in config.profiles],
+        }, indent=2).encode()
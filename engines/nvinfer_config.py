@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Configuración de nvinfer derivada del despliegue y del engine del almacén
+
+La config de nvinfer no se mantiene a mano: se genera desde una plantilla
+(clases, umbrales, parser de YOLO) con los valores que dependen del despliegue:
+
+- batch-size: nº de cámaras activas con pipeline compartido; por cámara, el
+  mayor batch de nvstreammux de los perfiles en uso (1 si no lo fijan)
+- infer-dims: la entrada con la que se compiló el engine (manifest del
+  almacén), comprobando que es suficiente para la resolución del frame y el
+  tamaño mínimo de persona (detected-min-h)
+- model-engine-file: el engine publicado; su entrada en el manifest dice
+  precisión (network-mode), perfiles de batch y tamaño de entrada
+- sin onnx-file: si engine y config no encajan nvinfer falla al arrancar en vez
+  de recompilar 10-20 minutos en medio del arranque
+
+validate() comprueba la config contra el engine ANTES de crear ningún pipeline.
+
+Uso:
+    python3 nvinfer_config.py generate --cameras 6 --shared-pipeline --output config.txt
+    python3 nvinfer_config.py check /app/configs/deepstream/generated/config_infer_primary.txt \\
+        --cameras 6 --shared-pipeline
+"""
+
+import os
+import sys
+import math
+import argparse
+import configparser
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from artifact_store import ArtifactStore, DEFAULT_STORE_DIR
+
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'configs', 'deepstream')
+DEFAULT_TEMPLATE = os.path.join(CONFIGS_DIR, 'config_infer_primary_yolo11x_b1.txt')
+DEFAULT_OUTPUT = os.path.join(CONFIGS_DIR, 'generated', 'config_infer_primary.txt')
+DEFAULT_ENGINE_PATH = '/app/engines/tensorrt/yolo11x_b1.engine'
+
+# network-mode de nvinfer por precisión del engine
+NETWORK_MODES = {'fp32': 0, 'int8': 1, 'fp16': 2}
+
+# Alto mínimo de una persona en la entrada de la red para detectarla con
+# fiabilidad (YOLO11: stride mínimo 8, unas 3 celdas de P3)
+MIN_NETWORK_PERSON_PX = 24
+INPUT_STRIDE = 32
+MIN_INPUT_SIZE = 320
+MAX_INPUT_SIZE = 1280
+
+
+class InferConfigError(Exception):
+    """La config de nvinfer no encaja con el engine o con el despliegue"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("; ".join(problems))
+
+
+@dataclass(frozen=True)
+class Deployment:
+    """Lo que el despliegue impone a nvinfer"""
+    cameras: int
+    shared: bool = False
+    frame_width: int = 1920         # frame que recibe nvinfer (salida de nvstreammux)
+    frame_height: int = 1080
+    min_person_height: int = 40     # en píxeles del frame
+    interval: Optional[int] = None  # None = el de la plantilla
+    profile_batch: Optional[int] = None  # mayor batch-size de nvstreammux de los perfiles (por cámara)
+
+    @property
+    def batch_size(self) -> int:
+        if self.shared:
+            return self.cameras
+        return self.profile_batch or 1
+
+    @property
+    def min_person_width(self) -> int:
+        return max(1, round(self.min_person_height / 2))
+
+    @property
+    def required_input_size(self) -> int:
+        return required_input_size(self.frame_width, self.frame_height, self.min_person_height)
+
+    def describe(self) -> str:
+        mode = 'compartido' if self.shared else 'por cámara'
+        return (f"{self.cameras} cámaras ({mode}, batch {self.batch_size}), frame "
+                f"{self.frame_width}x{self.frame_height}, persona mínima {self.min_person_height}px")
+
+
+def required_input_size(frame_width: int, frame_height: int, min_person_height: int) -> int:
+    """
+    Lado mínimo de la entrada (cuadrada, letterbox) para que una persona de
+    min_person_height píxeles del frame llegue a la red con MIN_NETWORK_PERSON_PX
+
+    Múltiplo de INPUT_STRIDE entre MIN_INPUT_SIZE y MAX_INPUT_SIZE
+    """
+    if min_person_height <= 0:
+        raise ValueError(f"Alto mínimo de persona inválido: {min_person_height}")
+    size = MIN_NETWORK_PERSON_PX * max(frame_width, frame_height) / min_person_height
+    size = math.ceil(size / INPUT_STRIDE) * INPUT_STRIDE
+    return max(MIN_INPUT_SIZE, min(MAX_INPUT_SIZE, size))
+
+
+def parse_size(value: str):
+    """'1920x1080' -> (1920, 1080)"""
+    width, sep, height = value.lower().partition('x')
+    if not sep or not width.isdigit() or not height.isdigit():
+        raise argparse.ArgumentTypeError(f"se espera ANCHOxALTO: {value!r}")
+    return int(width), int(height)
+
+
+# ----------------------------------------------------------------------
+# Engine (manifest del almacén)
+# ----------------------------------------------------------------------
+
+def engine_entry(store: ArtifactStore, engine_path: str) -> Dict:
+    """
+    Entrada del manifest del engine publicado en engine_path
+
+    Raises:
+        InferConfigError: si no existe o no viene del almacén (sin entradas
+                          conocidas no se puede validar)
+    """
+    if not os.path.exists(engine_path):
+        raise InferConfigError([f"Engine no encontrado: {engine_path} (ejecutar auto_build_engine.py)"])
+    found = store.entry_for_path(engine_path)
+    if found is None or found[1]['kind'] != 'engine':
+        raise InferConfigError([f"{engine_path} no es un engine del almacén {store.root}: "
+                                f"sin perfiles ni precisión conocidos"])
+    missing = [key for key in ('precision', 'batch_profiles', 'imgsz') if key not in found[1]['inputs']]
+    if missing:
+        raise InferConfigError([f"El manifest de {engine_path} no tiene {', '.join(missing)} "
+                                f"(engine anterior a los perfiles de batch): recompilar con auto_build_engine.py"])
+    return found[1]
+
+
+# ----------------------------------------------------------------------
+# Config
+# ----------------------------------------------------------------------
+
+def read_config(path: str) -> configparser.ConfigParser:
+    config = configparser.ConfigParser(interpolation=None)
+    config.optionxform = str  # nvinfer distingue mayúsculas
+    if not config.read(path):
+        raise FileNotFoundError(f"Config de nvinfer no encontrada: {path}")
+    return config
+
+
+def synthesize(template: str, deployment: Deployment, engine_path: str, entry: Dict) -> configparser.ConfigParser:
+    """Config de nvinfer: plantilla + valores del despliegue y del engine"""
+    config = read_config(template)
+    inputs = entry['inputs']
+    prop = config['property']
+    prop['batch-size'] = str(deployment.batch_size)
+    prop['infer-dims'] = f"3;{inputs['imgsz']};{inputs['imgsz']}"
+    prop['model-engine-file'] = engine_path
+    prop['network-mode'] = str(NETWORK_MODES[inputs['precision']])
+    if deployment.interval is not None:
+        prop['interval'] = str(deployment.interval)
+    # Sin modelo de origen nvinfer no puede recompilar en el arranque
+    for key in ('onnx-file', 'model-file', 'int8-calib-file'):
+        prop.pop(key, None)
+
+    if not config.has_section('class-attrs-0'):
+        config.add_section('class-attrs-0')
+    config['class-attrs-0']['detected-min-h'] = str(deployment.min_person_height)
+    config['class-attrs-0']['detected-min-w'] = str(deployment.min_person_width)
+    return config
+
+
+def validate(config: configparser.ConfigParser, entry: Dict, deployment: Deployment,
+             hardware: Optional[Dict] = None) -> List[str]:
+    """
+    Problemas de la config frente al engine y al despliegue (vacía = válida)
+
+    Args:
+        hardware: {'tensorrt_version', 'gpu_arch'} de esta máquina (opcional)
+    """
+    problems = []
+    inputs = entry['inputs']
+    prop = config['property'] if config.has_section('property') else {}
+
+    engine_path = prop.get('model-engine-file')
+    if not engine_path or not os.path.exists(engine_path):
+        problems.append(f"model-engine-file no existe: {engine_path}")
+    elif os.path.realpath(engine_path) != os.path.realpath(entry['path']):
+        problems.append(f"model-engine-file {engine_path} no es el engine del manifest ({entry['path']})")
+
+    batch_size = int(prop.get('batch-size', 1))
+    if batch_size != deployment.batch_size:
+        problems.append(f"batch-size={batch_size} pero el despliegue usa batch {deployment.batch_size}")
+    profiles = inputs.get('batch_profiles', [])
+    # nvinfer usa el perfil 0 del engine
+    if not profiles or not profiles[0]['min'] <= deployment.batch_size <= profiles[0]['max']:
+        ranges = ', '.join(f"{p['min']}..{p['max']}" for p in profiles) or 'ninguno'
+        if not deployment.shared and deployment.batch_size > 1:
+            problems.append(f"el engine no admite el batch {deployment.batch_size} de los perfiles de cámara "
+                            f"(perfiles {ranges}): usar un perfil con batch_size dentro del rango o "
+                            f"auto_build_engine.py --max-batch {deployment.batch_size}")
+        else:
+            problems.append(f"el engine no admite batch {deployment.batch_size} (perfiles {ranges}): "
+                            f"auto_build_engine.py --cameras {deployment.cameras}"
+                            f"{' --shared-pipeline' if deployment.shared else ''}")
+
+    dims = f"3;{inputs['imgsz']};{inputs['imgsz']}"
+    if prop.get('infer-dims') != dims:
+        problems.append(f"infer-dims={prop.get('infer-dims')} pero el engine se compiló con {dims}")
+    if inputs['imgsz'] < deployment.required_input_size:
+        problems.append(f"entrada {inputs['imgsz']} insuficiente: una persona de {deployment.min_person_height}px "
+                        f"en {deployment.frame_width}x{deployment.frame_height} necesita "
+                        f"{deployment.required_input_size} (auto_build_engine.py --min-person-height {deployment.min_person_height})")
+
+    mode = NETWORK_MODES[inputs['precision']]
+    if int(prop.get('network-mode', -1)) != mode:
+        problems.append(f"network-mode={prop.get('network-mode')} pero el engine es "
+                        f"{inputs['precision'].upper()} ({mode})")
+    if prop.get('onnx-file') or prop.get('model-file'):
+        problems.append("onnx-file/model-file presente: un desajuste recompilaría el engine en el arranque")
+
+    if hardware:
+        for key in ('tensorrt_version', 'gpu_arch'):
+            if hardware.get(key) and hardware[key] != inputs.get(key):
+                problems.append(f"engine compilado para {key}={inputs.get(key)}, esta máquina tiene {hardware[key]}")
+    return problems
+
+
+def write_config(config: configparser.ConfigParser, path: str, deployment: Deployment):
+    """Escritura atómica, con cabecera de lo que generó el archivo"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        f.write("# Generado por engines/nvinfer_config.py: no editar, se regenera en cada arranque\n")
+        f.write(f"# Despliegue: {deployment.describe()}\n\n")
+        config.write(f, space_around_delimiters=False)
+    os.replace(tmp_path, path)
+
+
+def generate(deployment: Deployment, engine_path: str = DEFAULT_ENGINE_PATH,
+             template: str = DEFAULT_TEMPLATE, output: str = DEFAULT_OUTPUT,
+             store: Optional[ArtifactStore] = None, hardware: Optional[Dict] = None) -> str:
+    """
+    Genera y valida la config de nvinfer del despliegue
+
+    Returns:
+        Ruta de la config escrita
+
+    Raises:
+        InferConfigError: si no encaja con el engine (no se escribe nada)
+    """
+    store = store or ArtifactStore(DEFAULT_STORE_DIR)
+    entry = engine_entry(store, engine_path)
+    config = synthesize(template, deployment, engine_path, entry)
+    problems = validate(config, entry, deployment, hardware)
+    if problems:
+        raise InferConfigError(problems)
+    write_config(config, output, deployment)
+    return output
+
+
+def check(path: str, deployment: Deployment, store: Optional[ArtifactStore] = None,
+          hardware: Optional[Dict] = None) -> List[str]:
+    """Problemas de una config existente frente a su engine y al despliegue"""
+    store = store or ArtifactStore(DEFAULT_STORE_DIR)
+    config = read_config(path)
+    engine_path = config['property'].get('model-engine-file', '') if config.has_section('property') else ''
+    try:
+        entry = engine_entry(store, engine_path)
+    except InferConfigError as e:
+        return e.problems
+    return validate(config, entry, deployment, hardware)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Config de nvinfer derivada del despliegue y del engine')
+    sub = parser.add_subparsers(dest='command', required=True)
+    generate_parser = sub.add_parser('generate', help='Generar y validar la config')
+    check_parser = sub.add_parser('check', help='Validar una config existente')
+    check_parser.add_argument('config')
+    for p in (generate_parser, check_parser):
+        p.add_argument('--cameras', type=int, required=True, help='Cámaras activas')
+        p.add_argument('--shared-pipeline', action='store_true', help='Pipeline compartido (batch = cámaras)')
+        p.add_argument('--profile-batch', type=int,
+                       help='Mayor batch-size de nvstreammux de los perfiles por cámara (default: 1)')
+        p.add_argument('--frame-size', type=parse_size, default=(1920, 1080), metavar='ANCHOxALTO',
+                       help='Frame que recibe nvinfer (nvstreammux; default: 1920x1080)')
+        p.add_argument('--min-person-height', type=int, default=40,
+                       help='Alto mínimo de persona en píxeles del frame (default: 40)')
+        p.add_argument('--store', default=DEFAULT_STORE_DIR, help=f'Almacén de artefactos (default: {DEFAULT_STORE_DIR})')
+    generate_parser.add_argument('--interval', type=int, help='interval de nvinfer (default: el de la plantilla)')
+    generate_parser.add_argument('--engine', default=DEFAULT_ENGINE_PATH, help='Engine publicado')
+    generate_parser.add_argument('--template', default=DEFAULT_TEMPLATE)
+    generate_parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    width, height = args.frame_size
+    deployment = Deployment(args.cameras, args.shared_pipeline, width, height, args.min_person_height,
+                            getattr(args, 'interval', None), args.profile_batch)
+    store = ArtifactStore(args.store)
+    print(f"⚙️  {deployment.describe()}")
+
+    if args.command == 'generate':
+        try:
+            path = generate(deployment, args.engine, args.template, args.output, store)
+        except InferConfigError as e:
+            print("❌ La config no encaja con el engine:")
+            for problem in e.problems:
+                print(f"   - {problem}")
+            return 1
+        print(f"✅ Config de nvinfer generada: {path}")
+        return 0
+
+    problems = check(args.config, deployment, store)
+    if problems:
+        print(f"❌ {args.config}:")
+        for problem in problems:
+            print(f"   - {problem}")
+        return 1
+    print(f"✅ {args.config} encaja con el engine y el despliegue")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""
+Pruebas de engines/ sin GPU: fake_tensorrt sustituye a tensorrt
+
+Uso (desde la raíz del repositorio):
+    python3 -m pytest engines/tests -q
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
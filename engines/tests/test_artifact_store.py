@@ -0,0 +1,86 @@
+"""
+Pruebas del almacén de artefactos (artifact_store.py)
+
+Uso:
+    python3 -m pytest engines/tests/test_artifact_store.py -q
+"""
+import os
+
+import pytest
+
+import artifact_store
+from artifact_store import ArtifactStore
+
+
+INPUTS = {'weights_sha256': 'abc', 'imgsz': 640}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'store'))
+
+
+@pytest.fixture
+def stored(store, tmp_path):
+    src = tmp_path / 'model.onnx'
+    src.write_bytes(b'onnx' * 1024)
+    return store.put('onnx', INPUTS, str(src))
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """Cuenta los SHA-256 completos que hace el almacén"""
+    calls = []
+    real = artifact_store.sha256_file
+
+    def counting(path):
+        calls.append(path)
+        return real(path)
+
+    monkeypatch.setattr(artifact_store, 'sha256_file', counting)
+    return calls
+
+
+def test_lookup_does_not_rehash_an_unchanged_artifact(store, stored, hashes):
+    assert store.lookup('onnx', INPUTS) == stored
+    assert store.lookup('onnx', INPUTS) == stored
+    assert hashes == []
+
+
+def test_lookup_with_verify_rehashes(store, stored, hashes):
+    assert store.lookup('onnx', INPUTS, verify=True) == stored
+    assert hashes == [stored]
+
+
+def test_touched_artifact_is_rehashed_once(store, stored, hashes):
+    stat = os.stat(stored)
+    os.utime(stored, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert store.lookup('onnx', INPUTS) == stored
+    assert store.lookup('onnx', INPUTS) == stored
+    assert hashes == [stored]
+
+
+def test_size_change_is_quarantined_without_hashing(store, stored, hashes):
+    with open(stored, 'ab') as f:
+        f.write(b'x')
+    assert store.lookup('onnx', INPUTS) is None
+    assert hashes == []
+    assert os.listdir(os.path.join(store.root, 'quarantine'))
+
+
+def test_recheck_quarantines_same_size_corruption(store, stored):
+    # Misma longitud y mismo mtime: solo el SHA-256 lo detecta
+    stat = os.stat(stored)
+    with open(stored, 'r+b') as f:
+        f.write(b'XXXX')
+    os.utime(stored, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert store.lookup('onnx', INPUTS) == stored
+
+    assert store.recheck(stored) == "SHA-256 distinto al del manifest"
+    assert store.lookup('onnx', INPUTS) is None
+
+
+def test_recheck_of_intact_or_foreign_file(store, stored, tmp_path):
+    assert store.recheck(stored) is None
+    assert store.recheck(str(tmp_path / 'otro.onnx')) is None
+    assert store.lookup('onnx', INPUTS) == stored
@@ -0,0 +1,146 @@
+"""
+Pruebas de trt_engine_builder y nvinfer_config sin GPU (fake_tensorrt)
+
+Perfiles de batch del despliegue, reutilización de la timing cache entre
+compilaciones y validación de la config de nvinfer contra el engine
+
+Uso:
+    python3 -m pytest engines/tests/test_trt_engine_builder.py -q
+"""
+import os
+
+import pytest
+
+import fake_tensorrt
+import nvinfer_config
+from trt_engine_builder import (BatchProfile, BuildPlan, TensorRTEngineBuilder, TimingCacheFile,
+                                plan_profiles)
+
+
+# ----------------------------------------------------------------------
+# Perfiles
+# ----------------------------------------------------------------------
+
+def test_per_camera_profile_is_batch_one():
+    assert plan_profiles(6) == [BatchProfile(1, 1, 1)]
+
+
+def test_shared_profile_rounds_max_to_power_of_two():
+    assert plan_profiles(6, shared=True) == [BatchProfile(1, 6, 8)]
+    assert plan_profiles(8, shared=True) == [BatchProfile(1, 8, 8)]
+
+
+def test_extra_opt_batches_share_the_range():
+    profiles = plan_profiles(6, shared=True, opt_batches=[2, 6, 12])
+    assert [p.opt for p in profiles] == [6, 2, 12]
+    assert {(p.min, p.max) for p in profiles} == {(1, 12)}
+
+
+def test_per_camera_max_batch_covers_profile_batches():
+    (profile,) = plan_profiles(1, max_batch=4)
+    assert profile.opt == 1 and profile.covers(4)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'cameras': 0},
+    {'cameras': 6, 'shared': True, 'max_batch': 4},
+    {'cameras': 1, 'opt_batches': [0]},
+])
+def test_invalid_plans_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        plan_profiles(**kwargs)
+
+
+# ----------------------------------------------------------------------
+# Compilación y timing cache
+# ----------------------------------------------------------------------
+
+@pytest.fixture
+def onnx_path(tmp_path):
+    path = tmp_path / 'model.onnx'
+    path.write_bytes(b'onnx')
+    return str(path)
+
+
+def build(onnx_path, tmp_path, cache, name, **plan):
+    builder = TensorRTEngineBuilder(fake_tensorrt)
+    report = builder.build(BuildPlan(onnx_path, **plan), str(tmp_path / name), cache)
+    return report, fake_tensorrt.last_build['timed_tactics']
+
+
+def test_second_build_reuses_the_timing_cache(onnx_path, tmp_path):
+    cache = TimingCacheFile(str(tmp_path / 'timing' / 'trt.cache'))
+    first, timed_first = build(onnx_path, tmp_path, cache, 'a.engine')
+    assert first.timing_cache_loaded == 0
+    assert timed_first == fake_tensorrt.NUM_LAYERS
+
+    second, timed_second = build(onnx_path, tmp_path, cache, 'b.engine')
+    assert second.timing_cache_loaded > 0
+    assert timed_second == 0
+
+
+def test_new_batch_only_times_the_new_shapes(onnx_path, tmp_path):
+    cache = TimingCacheFile(str(tmp_path / 'timing' / 'trt.cache'))
+    build(onnx_path, tmp_path, cache, 'a.engine')
+    _, timed = build(onnx_path, tmp_path, cache, 'b.engine', profiles=plan_profiles(4, shared=True))
+    assert timed == fake_tensorrt.NUM_LAYERS
+
+
+def test_cache_from_another_gpu_is_discarded(onnx_path, tmp_path, monkeypatch):
+    cache = TimingCacheFile(str(tmp_path / 'timing' / 'trt.cache'))
+    build(onnx_path, tmp_path, cache, 'a.engine')
+
+    monkeypatch.setattr(fake_tensorrt, 'DEVICE', 'sm_80')
+    report, timed = build(onnx_path, tmp_path, cache, 'b.engine')
+    assert report.timing_cache_loaded == 0
+    assert timed == fake_tensorrt.NUM_LAYERS
+    assert any('.stale-' in name for name in os.listdir(tmp_path / 'timing'))
+
+
+def test_build_without_cache_times_everything(onnx_path, tmp_path):
+    report, timed = build(onnx_path, tmp_path, None, 'a.engine')
+    assert report.timing_cache_saved == 0
+    assert timed == fake_tensorrt.NUM_LAYERS
+
+
+# ----------------------------------------------------------------------
+# Config de nvinfer frente al engine
+# ----------------------------------------------------------------------
+
+def engine_entry(tmp_path, max_batch=1, imgsz=1280):
+    path = tmp_path / 'model.engine'
+    path.write_bytes(b'engine')
+    return {'path': str(path), 'inputs': {
+        'precision': 'fp16', 'imgsz': imgsz,
+        'batch_profiles': [{'min': 1, 'opt': 1, 'max': max_batch}],
+    }}
+
+
+def problems(tmp_path, deployment, **entry):
+    entry = engine_entry(tmp_path, **entry)
+    config = nvinfer_config.synthesize(nvinfer_config.DEFAULT_TEMPLATE, deployment, entry['path'], entry)
+    return nvinfer_config.validate(config, entry, deployment)
+
+
+def test_config_matches_a_per_camera_engine(tmp_path):
+    assert problems(tmp_path, nvinfer_config.Deployment(cameras=4)) == []
+
+
+def test_profile_batch_beyond_the_engine_is_rejected(tmp_path):
+    deployment = nvinfer_config.Deployment(cameras=1, profile_batch=4)
+    assert deployment.batch_size == 4
+    found = problems(tmp_path, deployment)
+    assert len(found) == 1 and 'batch 4 de los perfiles' in found[0]
+    assert problems(tmp_path, deployment, max_batch=4) == []
+
+
+def test_shared_pipeline_ignores_profile_batch(tmp_path):
+    deployment = nvinfer_config.Deployment(cameras=6, shared=True, profile_batch=2)
+    assert deployment.batch_size == 6
+    assert problems(tmp_path, deployment, max_batch=8) == []
+    assert any('batch 6' in problem for problem in problems(tmp_path, deployment, max_batch=4))
+
+
+def test_input_too_small_for_min_person_height(tmp_path):
+    deployment = nvinfer_config.Deployment(cameras=1, min_person_height=20)
+    assert any('insuficiente' in problem for problem in problems(tmp_path, deployment, imgsz=640))
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Constructor de engines TensorRT con perfiles de batch dinámico y timing cache persistente
+
+- plan_profiles(): perfiles de optimización según el despliegue real
+  (nº de cámaras, pipeline compartido o por cámara)
+- BuildPlan: todo lo que define el engine (ONNX, precisión, perfiles, forma
+  de entrada, calibración INT8); key_inputs() son las entradas de su clave en
+  el almacén de artefactos
+- TimingCacheFile: timing cache de TensorRT en disco, por versión de
+  TensorRT y arquitectura de GPU. Se carga antes de compilar y se guarda
+  (combinada con la que haya en disco) al terminar: recompilar tras un cambio
+  pequeño (otro batch, otra precisión, ONNX re-exportado) reutiliza las
+  tácticas ya medidas y tarda minutos en vez de decenas de minutos
+- TensorRTEngineBuilder: compila el plan. El módulo tensorrt se inyecta
+  (default: el real), así la planificación, los perfiles y la lógica de la
+  timing cache se ejecutan sin GPU con fake_tensorrt.py
+
+Uso:
+    python3 trt_engine_builder.py --onnx yolo11x.onnx --cameras 6 --shared-pipeline \\
+        --precision fp16 --output yolo11x.engine --timing-cache /app/engines/store/timing/trt.cache
+    python3 trt_engine_builder.py --onnx yolo11x.onnx --cameras 6 --shared-pipeline --fake-trt
+"""
+
+import os
+import sys
+import time
+import fcntl
+import argparse
+import contextlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+PRECISIONS = ('fp32', 'fp16', 'int8')
+DEFAULT_IMGSZ = 1280
+DEFAULT_WORKSPACE_MB = 8192
+CALIBRATION_BATCH = 8
+CALIBRATION_MAX_IMAGES = 512
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+# ----------------------------------------------------------------------
+# Planificación
+# ----------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class BatchProfile:
+    """Perfil de optimización de la dimensión batch (min <= opt <= max)"""
+    min: int
+    opt: int
+    max: int
+
+    def __post_init__(self):
+        if not 1 <= self.min <= self.opt <= self.max:
+            raise ValueError(f"Perfil de batch inválido: min={self.min} opt={self.opt} max={self.max}")
+
+    def covers(self, batch_size: int) -> bool:
+        return self.min <= batch_size <= self.max
+
+    def to_dict(self) -> Dict:
+        return {'min': self.min, 'opt': self.opt, 'max': self.max}
+
+    def __str__(self):
+        return f"{self.min}/{self.opt}/{self.max}"
+
+
+def next_power_of_two(value: int) -> int:
+    return 1 << max(0, value - 1).bit_length()
+
+
+def plan_profiles(cameras: int, shared: bool = False, max_batch: Optional[int] = None,
+                  opt_batches: Sequence[int] = ()) -> List[BatchProfile]:
+    """
+    Perfiles de optimización para el despliegue
+
+    - Por cámara (un pipeline por cámara, batch-size=1): perfil 1/1/1
+    - Pipeline compartido (batch-size = nº de cámaras): opt = nº de cámaras,
+      max = siguiente potencia de 2 (añadir cámaras no obliga a recompilar)
+
+    El perfil 0 es el del despliegue (el que usa nvinfer); opt_batches añade
+    perfiles afinados para otros batch. Todos cubren 1..max, así cualquier
+    perfil admite cualquier batch-size del rango
+
+    Args:
+        cameras: Número de cámaras del despliegue
+        shared: Si las cámaras van en un pipeline compartido
+        max_batch: Batch máximo (default: según el modo)
+        opt_batches: Batch óptimos adicionales
+
+    Raises:
+        ValueError: si algún batch queda fuera de 1..max_batch
+    """
+    if cameras < 1:
+        raise ValueError(f"Número de cámaras inválido: {cameras}")
+    primary = cameras if shared else 1
+    if max_batch is None:
+        max_batch = max([next_power_of_two(primary)] + list(opt_batches))
+    for batch in [primary] + list(opt_batches):
+        if not 1 <= batch <= max_batch:
+            raise ValueError(f"Batch {batch} fuera del rango 1..{max_batch} (--max-batch)")
+
+    opts = [primary] + sorted(set(opt_batches) - {primary})
+    return [BatchProfile(1, opt, max_batch) for opt in opts]
+
+
+@dataclass
+class Int8Calibration:
+    """
+    Calibración INT8: caché de calibración existente y/o imágenes representativas
+
+    Con una caché válida TensorRT no pide imágenes; sin ella recorre las
+    imágenes (letterbox a la entrada de la red) y escribe la caché en cache_path
+    """
+    cache_path: str
+    images: List[str] = field(default_factory=list)
+    batch_size: int = CALIBRATION_BATCH
+
+    @staticmethod
+    def list_images(directory: str, max_images: int = CALIBRATION_MAX_IMAGES) -> List[str]:
+        """Imágenes del directorio (orden estable, como mucho max_images repartidas)"""
+        images = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                        if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not images:
+            raise ValueError(f"No hay imágenes de calibración en {directory}")
+        if len(images) > max_images:
+            step = len(images) / max_images
+            images = [images[int(i * step)] for i in range(max_images)]
+        return images
+
+    def batches(self, shape: Tuple[int, int, int]):
+        """Lotes (batch_size, C, H, W) float32 normalizados a [0, 1]"""
+        # Imports diferidos: solo hacen falta al calibrar desde imágenes
+        import cv2
+        import numpy as np
+
+        _, height, width = shape
+        for start in range(0, len(self.images) - self.batch_size + 1, self.batch_size):
+            batch = np.zeros((self.batch_size, 3, height, width), dtype=np.float32)
+            for i, path in enumerate(self.images[start:start + self.batch_size]):
+                image = cv2.imread(path)
+                if image is None:
+                    raise ValueError(f"Imagen de calibración ilegible: {path}")
+                batch[i] = letterbox(image, height, width)
+            yield batch
+
+
+def letterbox(image, height: int, width: int):
+    """BGR HWC uint8 -> RGB CHW float32 con padding gris centrado (como nvinfer symmetric-padding)"""
+    import cv2
+    import numpy as np
+
+    scale = min(height / image.shape[0], width / image.shape[1])
+    resized_h, resized_w = round(image.shape[0] * scale), round(image.shape[1] * scale)
+    canvas = np.full((height, width, 3), 114, dtype=np.uint8)
+    top, left = (height - resized_h) // 2, (width - resized_w) // 2
+    canvas[top:top + resized_h, left:left + resized_w] = cv2.resize(image, (resized_w, resized_h))
+    return canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+
+
+@dataclass
+class BuildPlan:
+    """Todo lo que define un engine"""
+    onnx_path: str
+    precision: str = 'fp16'
+    profiles: List[BatchProfile] = field(default_factory=lambda: [BatchProfile(1, 1, 1)])
+    imgsz: int = DEFAULT_IMGSZ
+    workspace_mb: int = DEFAULT_WORKSPACE_MB
+    calibration: Optional[Int8Calibration] = None
+
+    def __post_init__(self):
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Precisión desconocida {self.precision!r} ({', '.join(PRECISIONS)})")
+        if not self.profiles:
+            raise ValueError("El plan necesita al menos un perfil de batch")
+        if self.precision == 'int8' and self.calibration is None:
+            raise ValueError("INT8 requiere calibración (caché o imágenes)")
+
+    @property
+    def max_batch(self) -> int:
+        return max(profile.max for profile in self.profiles)
+
+    def key_inputs(self) -> Dict:
+        """Entradas del plan que forman la clave del engine (sin ONNX ni hardware)"""
+        return {
+            'precision': self.precision,
+            'batch_profiles': [profile.to_dict() for profile in self.profiles],
+            'imgsz': self.imgsz,
+        }
+
+    def describe(self) -> str:
+        profiles = ', '.join(str(profile) for profile in self.profiles)
+        return f"{self.precision.upper()} perfiles min/opt/max [{profiles}] entrada {self.imgsz}x{self.imgsz}"
+
+
+# ----------------------------------------------------------------------
+# Timing cache
+# ----------------------------------------------------------------------
+
+def timing_cache_path(root: str, tensorrt_version: str, gpu_arch: str) -> str:
+    """Timing cache de una versión de TensorRT en una arquitectura (no son intercambiables)"""
+    return os.path.join(root, 'timing', f"trt{tensorrt_version}-sm{gpu_arch.replace('.', '')}.cache")
+
+
+class TimingCacheFile:
+    """Timing cache de TensorRT persistente, compartida por todas las compilaciones"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self) -> bytes:
+        try:
+            with open(self.path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return b''
+
+    def _discard(self, reason: str):
+        stale = f"{self.path}.stale-{int(time.time())}"
+        os.replace(self.path, stale)
+        print(f"⚠️  Timing cache descartada ({reason}): movida a {stale}")
+
+    def load(self, config):
+        """
+        Crea la timing cache del builder config desde el archivo
+
+        Una caché ilegible o de otro dispositivo se aparta y se empieza vacía
+
+        Returns:
+            Bytes cargados (0 = compilación en frío)
+        """
+        with self._locked():
+            data = self._read()
+            cache = None
+            if data:
+                try:
+                    cache = config.create_timing_cache(data)
+                except Exception as e:
+                    cache = None
+                    self._discard(f"ilegible: {e}")
+                if cache is not None and not config.set_timing_cache(cache, ignore_mismatch=False):
+                    cache = None
+                    self._discard("de otra GPU o versión de TensorRT")
+            if cache is None:
+                data = b''
+                config.set_timing_cache(config.create_timing_cache(b''), ignore_mismatch=False)
+        return len(data)
+
+    def save(self, config) -> int:
+        """
+        Guarda la timing cache del builder config, combinada con la del disco
+
+        Otra compilación pudo guardar tácticas mientras tanto: se combinan en
+        vez de sobrescribirlas
+
+        Returns:
+            Bytes guardados
+        """
+        cache = config.get_timing_cache()
+        with self._locked():
+            data = self._read()
+            if data:
+                try:
+                    cache.combine(config.create_timing_cache(data), ignore_mismatch=False)
+                except Exception as e:
+                    print(f"⚠️  No se pudo combinar con la timing cache del disco: {e}")
+            serialized = bytes(cache.serialize())
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(serialized)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        return len(serialized)
+
+
+# ----------------------------------------------------------------------
+# Construcción
+# ----------------------------------------------------------------------
+
+@dataclass
+class BuildReport:
+    """Resultado de una compilación"""
+    engine_path: str
+    input_name: str
+    input_shape: Tuple[int, int, int]
+    profiles: List[BatchProfile]
+    precision: str
+    build_s: float
+    engine_bytes: int
+    timing_cache_loaded: int = 0
+    timing_cache_saved: int = 0
+
+
+def _calibrator_class(trt):
+    """Calibrador entropy v2 sobre el módulo tensorrt dado"""
+
+    class EntropyCalibrator(trt.IInt8EntropyCalibrator2):
+
+        def __init__(self, calibration: Int8Calibration, shape: Tuple[int, int, int]):
+            trt.IInt8EntropyCalibrator2.__init__(self)
+            self.calibration = calibration
+            self.shape = shape
+            self._batches = None
+            self._device = None
+
+        def get_batch_size(self):
+            return self.calibration.batch_size
+
+        def get_batch(self, names):
+            if self._batches is None:
+                self._batches = self.calibration.batches(self.shape)
+            batch = next(self._batches, None)
+            if batch is None:
+                return None
+            # Import diferido: memoria de GPU para los lotes vía torch (ultralytics)
+            import torch
+
+            self._device = torch.from_numpy(batch).cuda()
+            return [int(self._device.data_ptr())]
+
+        def read_calibration_cache(self):
+            if os.path.isfile(self.calibration.cache_path):
+                with open(self.calibration.cache_path, 'rb') as f:
+                    return f.read()
+            return None
+
+        def write_calibration_cache(self, cache):
+            with open(self.calibration.cache_path, 'wb') as f:
+                f.write(bytes(cache))
+
+    return EntropyCalibrator
+
+
+class TensorRTEngineBuilder:
+    """Compila un BuildPlan con el módulo tensorrt dado (default: el real)"""
+
+    def __init__(self, trt=None, verbose: bool = False):
+        if trt is None:
+            import tensorrt as trt
+        self.trt = trt
+        self.logger = trt.Logger(trt.Logger.VERBOSE if verbose else trt.Logger.WARNING)
+
+    def _parse(self, builder, onnx_path: str):
+        trt = self.trt
+        flags = 0
+        # TensorRT < 10 necesita EXPLICIT_BATCH; en 10 es el único modo
+        explicit_batch = getattr(trt.NetworkDefinitionCreationFlag, 'EXPLICIT_BATCH', None)
+        if explicit_batch is not None:
+            flags |= 1 << int(explicit_batch)
+        network = builder.create_network(flags)
+        parser = trt.OnnxParser(network, self.logger)
+        if not parser.parse_from_file(onnx_path):
+            errors = [str(parser.get_error(i)) for i in range(parser.num_errors)]
+            raise RuntimeError("Error parseando ONNX:\n   " + "\n   ".join(errors))
+        return network, parser
+
+    @staticmethod
+    def input_shape(network, plan: BuildPlan) -> Tuple[str, Tuple[int, int, int]]:
+        """
+        Nombre y forma (C, H, W) de la entrada, comprobando que admite los perfiles
+
+        Raises:
+            ValueError: si la red no tiene una sola entrada o su batch es fijo
+                        y no coincide con los perfiles
+        """
+        if network.num_inputs != 1:
+            raise ValueError(f"Se esperaba una sola entrada (imagen), el ONNX tiene {network.num_inputs}")
+        tensor = network.get_input(0)
+        shape = tuple(tensor.shape)
+        if len(shape) != 4:
+            raise ValueError(f"Entrada {tensor.name} con forma {shape}: se esperaba NCHW")
+        batch, channels, height, width = shape
+        if batch != -1 and any(p.min != batch or p.max != batch for p in plan.profiles):
+            raise ValueError(f"El ONNX tiene batch fijo {batch}: re-exportar con dynamic=True "
+                             f"para los perfiles {', '.join(str(p) for p in plan.profiles)}")
+        if channels == -1:
+            raise ValueError(f"Entrada {tensor.name} con canales dinámicos")
+        # Exportación dinámica de ultralytics: alto y ancho también dinámicos
+        if (height, width) != (-1, -1) and (height, width) != (plan.imgsz, plan.imgsz):
+            raise ValueError(f"El ONNX tiene entrada fija {height}x{width}: re-exportar con "
+                             f"dynamic=True o compilar con imgsz {height}")
+        return tensor.name, (channels, plan.imgsz, plan.imgsz)
+
+    def _configure(self, builder, network, plan: BuildPlan, input_name: str,
+                   shape: Tuple[int, int, int], calibration_profile_batch: int):
+        trt = self.trt
+        config = builder.create_builder_config()
+        config.set_memory_pool_limit(trt.MemoryPoolType.WORKSPACE, plan.workspace_mb * (1 << 20))
+
+        # Precisión pedida o error: la precisión forma parte de la clave del engine
+        if plan.precision in ('fp16', 'int8'):
+            if not builder.platform_has_fast_fp16:
+                raise RuntimeError("FP16 no disponible en esta GPU: usar --precision fp32")
+            config.set_flag(trt.BuilderFlag.FP16)
+        if plan.precision == 'int8':
+            if not builder.platform_has_fast_int8:
+                raise RuntimeError("INT8 no disponible en esta GPU: usar --precision fp16")
+            config.set_flag(trt.BuilderFlag.INT8)
+            # Capas sin escala INT8 caen a FP16 (ya habilitado)
+            calibration_profile = builder.create_optimization_profile()
+            fixed = (calibration_profile_batch,) + shape
+            calibration_profile.set_shape(input_name, fixed, fixed, fixed)
+            config.set_calibration_profile(calibration_profile)
+            config.int8_calibrator = _calibrator_class(trt)(plan.calibration, shape)
+
+        for profile in plan.profiles:
+            optimization_profile = builder.create_optimization_profile()
+            optimization_profile.set_shape(input_name, (profile.min,) + shape,
+                                           (profile.opt,) + shape, (profile.max,) + shape)
+            config.add_optimization_profile(optimization_profile)
+        return config
+
+    def build(self, plan: BuildPlan, engine_path: str,
+              timing_cache: Optional[TimingCacheFile] = None) -> BuildReport:
+        """
+        Compila el plan y escribe el engine en engine_path
+
+        Raises:
+            RuntimeError/ValueError: ONNX ilegible, plan incompatible con la
+                                     red o fallo de TensorRT
+        """
+        trt = self.trt
+        builder = trt.Builder(self.logger)
+        network, _parser = self._parse(builder, plan.onnx_path)
+        input_name, shape = self.input_shape(network, plan)
+
+        calibration_batch = 1
+        if plan.calibration is not None:
+            calibration_batch = min(plan.calibration.batch_size, plan.max_batch)
+            plan.calibration.batch_size = calibration_batch
+        config = self._configure(builder, network, plan, input_name, shape, calibration_batch)
+
+        loaded = timing_cache.load(config) if timing_cache else 0
+        if timing_cache:
+            print(f"⏱️  Timing cache: {timing_cache.path} "
+                  f"({f'{loaded / 1024:.0f} KB' if loaded else 'vacía, compilación en frío'})")
+
+        print(f"⏳ Compilando {plan.describe()}...")
+        start = time.perf_counter()
+        serialized = builder.build_serialized_network(network, config)
+        build_s = time.perf_counter() - start
+        if serialized is None:
+            raise RuntimeError("TensorRT no pudo construir el engine (ver log de TensorRT)")
+
+        saved = timing_cache.save(config) if timing_cache else 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(engine_path)), exist_ok=True)
+        with open(engine_path, 'wb') as f:
+            f.write(serialized)
+
+        return BuildReport(engine_path=engine_path, input_name=input_name, input_shape=shape,
+                           profiles=list(plan.profiles), precision=plan.precision, build_s=build_s,
+                           engine_bytes=os.path.getsize(engine_path),
+                           timing_cache_loaded=loaded, timing_cache_saved=saved)
+
+
+def print_report(report: BuildReport):
+    print(f"\n✅ Engine compilado en {report.build_s:.1f}s: {report.engine_path} "
+          f"({report.engine_bytes / (1024 ** 2):.1f} MB)")
+    print(f"   Entrada: {report.input_name} {report.input_shape}  Precisión: {report.precision.upper()}")
+    for i, profile in enumerate(report.profiles):
+        print(f"   Perfil {i}: batch min/opt/max {profile}")
+    if report.timing_cache_saved:
+        print(f"   Timing cache: {report.timing_cache_loaded / 1024:.0f} KB -> "
+              f"{report.timing_cache_saved / 1024:.0f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compilar un engine TensorRT con perfiles de batch dinámico')
+    parser.add_argument('--onnx', required=True, help='Modelo ONNX')
+    parser.add_argument('--output', required=True, help='Engine a escribir')
+    parser.add_argument('--cameras', type=int, default=1, help='Cámaras del despliegue (default: 1)')
+    parser.add_argument('--shared-pipeline', action='store_true',
+                        help='Pipeline compartido: batch óptimo = nº de cámaras')
+    parser.add_argument('--max-batch', type=int, help='Batch máximo (default: según el modo)')
+    parser.add_argument('--opt-batch', type=int, action='append', default=[],
+                        help='Perfil adicional afinado para este batch (repetible)')
+    parser.add_argument('--precision', choices=PRECISIONS, default='fp16')
+    parser.add_argument('--imgsz', type=int, default=DEFAULT_IMGSZ,
+                        help='Alto/ancho de entrada si el ONNX los tiene dinámicos')
+    parser.add_argument('--workspace', type=int, default=DEFAULT_WORKSPACE_MB, help='Workspace en MB')
+    parser.add_argument('--timing-cache', help='Timing cache persistente')
+    parser.add_argument('--calib-cache', help='Caché de calibración INT8 (se lee o se escribe)')
+    parser.add_argument('--calib-images', help='Directorio de imágenes de calibración INT8')
+    parser.add_argument('--fake-trt', action='store_true',
+                        help='Usar fake_tensorrt (sin GPU): comprueba plan, perfiles y timing cache')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    try:
+        profiles = plan_profiles(args.cameras, args.shared_pipeline, args.max_batch, args.opt_batch)
+        calibration = None
+        if args.precision == 'int8':
+            if not args.calib_cache:
+                parser.error('--precision int8 requiere --calib-cache (y --calib-images si aún no existe)')
+            images = Int8Calibration.list_images(args.calib_images) if args.calib_images else []
+            if not images and not os.path.isfile(args.calib_cache):
+                parser.error(f"{args.calib_cache} no existe: --calib-images para calibrar")
+            calibration = Int8Calibration(cache_path=args.calib_cache, images=images)
+        plan = BuildPlan(args.onnx, args.precision, profiles, args.imgsz, args.workspace, calibration)
+    except ValueError as e:
+        parser.error(str(e))
+
+    trt = None
+    if args.fake_trt:
+        import fake_tensorrt as trt
+    builder = TensorRTEngineBuilder(trt, verbose=args.verbose)
+    timing_cache = TimingCacheFile(args.timing_cache) if args.timing_cache else None
+    try:
+        print_report(builder.build(plan, args.output, timing_cache))
+        if args.fake_trt:
+            print(f"   fake_tensorrt: {trt.last_build['timed_tactics']} tácticas medidas "
+                  f"(las demás salieron de la timing cache)")
+    except (RuntimeError, ValueError) as e:
+        print(f"\n❌ Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
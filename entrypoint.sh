@@ -13,32 +13,26 @@ echo "📦 Configurando variables de entorno..."
 source /app/setup_deepstream_env.sh
 echo ""
 
-# 2. Verificar si existe engine
+# 2. Engine TensorRT desde el almacén de artefactos
+# El engine se identifica por hash de sus entradas (pesos, exportación,
+# precisión, batch, versión de TensorRT, arquitectura de GPU): un reinicio
+# reutiliza el del almacén y un engine de otras entradas nunca se carga.
+# Perfiles de batch según el despliegue: CAMERA_COUNT cámaras, SHARED_PIPELINE=1
+# si main.py corre con --shared-pipeline; ENGINE_PRECISION=fp32|fp16|int8.
+# La entrada de la red sale de MIN_PERSON_HEIGHT (alto mínimo de persona, px)
 ENGINE_DIR="/app/engines/tensorrt"
 ENGINE_FILE="$ENGINE_DIR/yolo11x_b1.engine"
-
-if [ ! -f "$ENGINE_FILE" ]; then
-    echo "⚠️  Engine TensorRT no encontrado en $ENGINE_FILE"
-    echo ""
-    echo "🔍 Detectando componentes del sistema..."
-    echo ""
-
-    # Ejecutar auto-builder desde nueva ubicación
-    echo "🔨 Compilando TensorRT engine..."
-    python3 /app/engines/auto_build_engine.py
-
-    # Copiar engine generado
-    GENERATED_ENGINE=$(ls -t /app/engines/yolo11x.engine 2>/dev/null | head -1)
-    if [ -n "$GENERATED_ENGINE" ]; then
-        echo ""
-        echo "📋 Copiando engine generado..."
-        mkdir -p "$ENGINE_DIR"
-        cp "$GENERATED_ENGINE" "$ENGINE_FILE"
-        echo "✅ Engine copiado a: $ENGINE_FILE"
-    fi
-    echo ""
+ENGINE_ARGS=(--output "$ENGINE_FILE" --cameras "${CAMERA_COUNT:-1}" --precision "${ENGINE_PRECISION:-fp16}"
+             --min-person-height "${MIN_PERSON_HEIGHT:-40}")
+if [ "${SHARED_PIPELINE:-0}" = "1" ]; then
+    ENGINE_ARGS+=(--shared-pipeline)
 fi
 
+echo "🔍 Verificando artefactos del modelo..."
+echo ""
+python3 /app/engines/auto_build_engine.py "${ENGINE_ARGS[@]}"
+echo ""
+
 # 2.5. Corregir rutas de configuración (DeepStream 7.1 → 8.0)
 echo "⚙️  Actualizando configuración de DeepStream..."
 if [ -f "/app/configs/deepstream/tracker_config.txt" ]; then
@@ -83,8 +77,8 @@ cat /opt/nvidia/deepstream/deepstream-8.0/version 2>/dev/null || echo "   ❌ De
 # Verificar Engine
 echo "📦 Engine TensorRT:"
 if [ -f "$ENGINE_FILE" ]; then
-    SIZE=$(du -h "$ENGINE_FILE" | cut -f1)
-    echo "   ✅ $ENGINE_FILE ($SIZE)"
+    SIZE=$(du -hL "$ENGINE_FILE" | cut -f1)
+    echo "   ✅ $ENGINE_FILE -> $(readlink -f "$ENGINE_FILE") ($SIZE)"
 else
     echo "   ⚠️  No se encontró engine"
 fi